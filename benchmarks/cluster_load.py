@@ -0,0 +1,164 @@
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.reminder_load import cpu_seconds, generate_reminders  # noqa: E402
+from utils.fake_discord import FakeDiscord, VirtualClock  # noqa: E402
+from utils.sharding import plan, to_env  # noqa: E402
+
+#recap de ce qu'il fait ce code :
+#Test de charge du mode cluster, sans reseau : le debit des rappels augmente-t-il avec le nombre de processus ?
+#Pour 1, 2... N processus : memes rappels (repartis sur les shards comme le fait cluster.py), puis un processus
+#par cluster (plan()), chacun avec ses shards, son bail et le faux Discord (utils/fake_discord.py)
+#Horloge virtuelle : seules les attentes sont sautees, le temps de calcul reel de chaque processus compte
+#Debit = notifications envoyees par tous les processus / temps reel entre le premier depart et la derniere fin
+#Chaque passe relit les rappels de ses shards : plus de processus = passes plus courtes, meme sur un seul coeur ;
+#le gain du parallelisme, lui, plafonne a os.cpu_count()
+#  python benchmarks/cluster_load.py                          -> 1 a os.cpu_count() processus, 20k rappels
+#  python benchmarks/cluster_load.py --clusters 1 2 4 --reminders 50000 --json out.json
+
+
+async def run_cluster(duration, latency, seed):
+    """Reminder checker of this process's cluster (BOT_* variables) for duration virtual seconds."""
+    from core.time_management import TimeManagementCog
+    from utils.calendar_sync import CalendarSync
+    from utils.persistence import persistence
+    from utils.sharding import calendar_sync_file, from_env
+    from utils.time_manager import TimeManagement
+
+    cluster = from_env()
+    clock = VirtualClock()
+    client = FakeDiscord(clock, latency=latency, seed=seed + cluster.cluster_id)
+    cog = TimeManagementCog(client)
+    cog.track_activity.cancel()
+    cog.clock = clock.now
+    cog.time_manager = TimeManagement(data_file=None)
+    cog.calendar_sync = CalendarSync(None, calendar_sync_file(cluster))
+    await asyncio.to_thread(cog.reminder_lease.try_acquire)
+    lease_task = asyncio.create_task(cog.reminder_lease.run(), name='reminder_lease')
+
+    started, cpu = time.time(), cpu_seconds()
+    end = clock.now() + timedelta(seconds=duration)
+    while clock.now() < end:
+        await clock.sleep(await cog.process_reminders())
+    finished, cpu = time.time(), cpu_seconds() - cpu
+    lease_task.cancel()
+    await asyncio.gather(lease_task, return_exceptions=True)
+    persistence.flush(timeout=600)
+    return {'cluster': cluster.cluster_id, 'shards': len(cluster.shard_ids), 'sent': len(client.sends),
+            'started': started, 'finished': finished, 'cpu_seconds': round(cpu, 2)}
+
+
+def run_worker(args):
+    """One cluster process, in the data directory prepared by run_clusters."""
+    from utils.reminders import configure_partition
+    from utils.sharding import from_env
+    cluster = from_env()
+    configure_partition(cluster.shard_ids, cluster.shard_count)
+    print(json.dumps(asyncio.run(run_cluster(args.duration, args.latency, args.seed))))
+
+
+def prepare(workdir, reminders, shard_count, horizon, seed):
+    """Reminders due within horizon seconds, spread over the shard files like cluster.py does."""
+    from utils import database
+    from utils.persistence import persistence
+    from utils.reminders import repartition, save_reminders
+
+    os.chdir(workdir)
+    os.makedirs('data')
+    with open(os.path.join(ROOT, 'data', 'config.json.example')) as f:
+        config = json.load(f)
+    with open('data/config.json', 'w') as f:
+        json.dump(config, f)
+    reminders = generate_reminders(reminders, VirtualClock().now(), horizon, seed)
+    notifications = sum(1 + len(r['reminder_times']) for r in reminders)
+    save_reminders(reminders)
+    persistence.flush(timeout=600)
+    database.init_db()
+    repartition(shard_count)
+    return notifications
+
+
+def run_clusters(count, args):
+    """Same load over count processes: sends per second of all of them together."""
+    workdir = tempfile.mkdtemp(prefix='cluster-load-')
+    try:
+        notifications = prepare(workdir, args.reminders, args.shards, args.horizon, args.seed)
+        options = [f"--duration={args.duration}", f"--latency={args.latency}", f"--seed={args.seed}"]
+        processes = [
+            subprocess.Popen([sys.executable, os.path.abspath(__file__), '--worker', *options],
+                             cwd=workdir, env=dict(os.environ, **to_env(cluster)),
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            for cluster in plan(args.shards, count)
+        ]
+        reports = []
+        for process in processes:
+            out, err = process.communicate()
+            lines = out.strip().splitlines()
+            if process.returncode or not lines:
+                return {'clusters': count, 'error': f"exit {process.returncode}: {err[-300:]}"}
+            reports.append(json.loads(lines[-1]))
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+    sent = sum(report['sent'] for report in reports)
+    real = max(r['finished'] for r in reports) - min(r['started'] for r in reports)
+    return {
+        'clusters': count,
+        'notifications': notifications,
+        'sent': sent,
+        'real_seconds': round(real, 2),
+        'cpu_seconds': round(sum(report['cpu_seconds'] for report in reports), 2),
+        'throughput_per_s': round(sent / max(real, 1e-9), 1),
+        'per_cluster_sent': [report['sent'] for report in reports],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline throughput of the reminder checker by cluster count")
+    cores = os.cpu_count() or 1
+    parser.add_argument('--clusters', type=int, nargs='+', default=list(range(1, cores + 1)))
+    parser.add_argument('--reminders', type=int, default=20_000)
+    parser.add_argument('--shards', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=900,
+                        help="virtual seconds to run, past the horizon so every notification is due (default 15 min)")
+    parser.add_argument('--horizon', type=float, default=600,
+                        help="reminders are due within this many seconds (default 10 min)")
+    parser.add_argument('--latency', type=float, default=0.05, help="fake API round trip, seconds")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="also write the reports to this file")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        run_worker(args)
+        return
+
+    print(f"{args.reminders:,} reminders over {args.shards} shards, {cores} cores")
+    reports, baseline = [], None
+    for count in args.clusters:
+        report = run_clusters(count, args)
+        reports.append(report)
+        if 'error' in report:
+            print(f"{count:>3} processes: {report['error']}")
+            continue
+        baseline = baseline or report['throughput_per_s']
+        print(f"{count:>3} processes: {report['sent']:>8,} sent in {report['real_seconds']:>6.2f} s, "
+              f"{report['throughput_per_s']:>9.1f} sends/s (x{report['throughput_per_s'] / baseline:.2f}), "
+              f"cpu {report['cpu_seconds']:.1f} s", flush=True)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
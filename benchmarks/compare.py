@@ -0,0 +1,70 @@
+import json
+import sys
+
+#recap de ce qu'il fait ce code :
+#Compare deux fichiers de resultats des micro-benchmarks (benchmarks/conftest.py) sur le meilleur temps (min)
+#Un benchmark plus lent que la reference de plus du seuil (25 % par defaut) est signale, code de sortie 1
+#Les temps sont compares en unites de calibration (charge fixe mesuree autour de chaque tour) : insensible a la vitesse de la machine
+#  python -m benchmarks.compare benchmarks/baseline.json benchmarks/results.json [seuil]
+
+DEFAULT_THRESHOLD = 0.25
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    (rows, slower): rows are (name, baseline seconds, current seconds, ratio, flag) for every
+    benchmark of either file; slower lists the names more than threshold slower than the baseline.
+    The ratio compares the calibrated timings ('relative') when both runs have them, the best times otherwise.
+    """
+    before, after = baseline['benchmarks'], current['benchmarks']
+    rows, slower = [], []
+    for name in sorted(set(before) | set(after)):
+        old = before.get(name, {}).get('min')
+        new = after.get(name, {}).get('min')
+        if old is None or new is None:
+            rows.append((name, old, new, None, 'new' if old is None else 'removed'))
+            continue
+        if before[name].get('relative') and after[name].get('relative'):
+            ratio = after[name]['relative'] / before[name]['relative']
+        else:
+            ratio = new / old if old else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = 'SLOWER'
+            slower.append(name)
+        elif ratio < 1 / (1 + threshold):
+            flag = 'faster'
+        rows.append((name, old, new, ratio, flag))
+    return rows, slower
+
+
+def format_report(rows):
+    lines = [f"{'baseline':>12} {'current':>12} {'ratio':>7}  benchmark"]
+    for name, old, new, ratio, flag in rows:
+        old_text = f"{old * 1e3:.3f} ms" if old is not None else '-'
+        new_text = f"{new * 1e3:.3f} ms" if new is not None else '-'
+        ratio_text = f"{ratio:.2f}x" if ratio is not None else ''
+        lines.append(f"{old_text:>12} {new_text:>12} {ratio_text:>7}  {name}{'  ' + flag if flag else ''}")
+    return lines
+
+
+def main(argv):
+    if len(argv) < 2:
+        print("usage: python -m benchmarks.compare BASELINE.json CURRENT.json [threshold]")
+        return 2
+    with open(argv[0]) as f:
+        baseline = json.load(f)
+    with open(argv[1]) as f:
+        current = json.load(f)
+    threshold = float(argv[2]) if len(argv) > 2 else DEFAULT_THRESHOLD
+    rows, slower = compare(baseline, current, threshold)
+    print('\n'.join(format_report(rows)))
+    if slower:
+        print(f"\n{len(slower)} benchmark(s) more than {threshold:.0%} slower: {', '.join(slower)}")
+        return 1
+    print(f"\nNo benchmark more than {threshold:.0%} slower.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,178 @@
+import gc
+import json
+import os
+import platform
+import statistics
+import time
+from datetime import datetime
+
+import pytest
+
+from benchmarks.compare import compare, format_report
+
+#recap de ce qu'il fait ce code :
+#Fixture bench des micro-benchmarks : chronometre une fonction (plusieurs tours, nombre d'appels ajuste),
+#garde min / mediane / moyenne par test et les ecrit dans un fichier JSON en fin de session
+#Avec une reference, un test qui semble plus lent est remesure (2 fois au plus) avant d'etre signale (machines partagees bruyantes)
+#  python -m pytest benchmarks                                   -> resultats dans benchmarks/results.json
+#  python -m pytest benchmarks --bench-baseline benchmarks/baseline.json  -> signale les ralentissements
+#  python -m pytest benchmarks --bench-save benchmarks/baseline.json      -> remplace la reference
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MIN_ROUND_SECONDS = 0.05  # un tour dure au moins 50 ms : les fonctions rapides sont appelees plusieurs fois
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('benchmarks')
+    group.addoption('--bench-save', default=os.path.join(HERE, 'results.json'),
+                    help="write the timings to this JSON file (default benchmarks/results.json)")
+    group.addoption('--bench-baseline', default=None,
+                    help="compare the timings with this JSON file and flag slowdowns")
+    group.addoption('--bench-threshold', type=float, default=0.25,
+                    help="slowdown ratio flagged by --bench-baseline (default 0.25, i.e. 25%% slower)")
+    group.addoption('--bench-rounds', type=int, default=7)
+
+
+def calibrate():
+    """Time of a fixed pure-Python workload (about 25 ms): the speed of the machine right now."""
+    started = time.perf_counter()
+    counts = {}
+    for i in range(100_000):
+        counts[i % 1000] = counts.get(i % 1000, 0) + i * i
+    return time.perf_counter() - started
+
+
+def pytest_configure(config):
+    config.bench_results = {}
+    config.bench_baseline = {}
+    path = config.getoption('--bench-baseline', None)
+    if path:
+        with open(path) as f:
+            config.bench_baseline = json.load(f)['benchmarks']
+
+
+class Bench:
+    """bench(function): time function() and record it under the test id."""
+
+    def __init__(self, name, results, rounds, baseline=None, threshold=0.25, retries=2):
+        self.name = name
+        self.results = results
+        self.rounds = rounds
+        self.baseline = baseline  # entree de la reference pour ce test, ou None
+        self.threshold = threshold
+        self.retries = retries
+
+    def _measure(self, function, rounds, number):
+        """(seconds per call, seconds per call / calibration) of each round, plus the last result."""
+        timings, relatives = [], []
+        result = None
+        for _ in range(rounds):
+            # Les machines virtuelles changent de vitesse en cours de session : calibration avant et apres chaque tour
+            before = calibrate()
+            # Comme timeit : pas de ramasse-miettes pendant la mesure (ses pauses dependent des tests precedents)
+            gc.collect()
+            gc.disable()
+            try:
+                started = time.perf_counter()
+                for _ in range(number):
+                    result = function()
+                timing = (time.perf_counter() - started) / number
+            finally:
+                gc.enable()
+            timings.append(timing)
+            relatives.append(timing / ((before + calibrate()) / 2))
+        return timings, relatives, result
+
+    def _looks_slower(self, relatives):
+        reference = (self.baseline or {}).get('relative')
+        return bool(reference) and min(relatives) / reference > 1 + self.threshold
+
+    def __call__(self, function, rounds=None, number=None):
+        """
+        number calls per round, calibrated so that a round takes MIN_ROUND_SECONDS when None.
+        A benchmark slower than the baseline is measured again (retries times at most) before
+        being reported, so that a noisy spell of the machine is not taken for a regression.
+        Returns the value of the last call.
+        """
+        started = time.perf_counter()
+        result = function()
+        first = time.perf_counter() - started
+        if number is None:
+            number = max(1, min(100_000, int(MIN_ROUND_SECONDS / max(first, 1e-7))))
+        rounds = rounds or self.rounds
+        timings, relatives, result = self._measure(function, rounds, number)
+        attempts = 1
+        while attempts <= self.retries and self._looks_slower(relatives):
+            # Une vraie regression persiste d'une mesure a l'autre, un voisin bruyant rarement
+            more_timings, more_relatives, result = self._measure(function, rounds, number)
+            timings += more_timings
+            relatives += more_relatives
+            attempts += 1
+        self.results[self.name] = {
+            'min': min(timings),
+            'median': statistics.median(timings),
+            'mean': statistics.fmean(timings),
+            'rounds': len(timings),
+            'number': number,
+            'attempts': attempts,
+            # Temps du tour le plus rapide en unites de calibration : comparable d'une vitesse de machine a l'autre
+            'relative': min(relatives),
+        }
+        return result
+
+
+@pytest.fixture
+def bench(request):
+    config = request.config
+    name = request.node.nodeid.split('::', 1)[-1]
+    return Bench(name, config.bench_results, config.getoption('--bench-rounds'),
+                 baseline=config.bench_baseline.get(name), threshold=config.getoption('--bench-threshold'))
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    if not config.bench_results:
+        return
+    report = {
+        'machine': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'cpus': os.cpu_count(),
+        },
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'benchmarks': dict(sorted(config.bench_results.items())),
+    }
+    path = config.getoption('--bench-save')
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    config.bench_report = report
+    baseline_path = config.getoption('--bench-baseline')
+    if baseline_path:
+        # Seuls les benchmarks executes sont compares : une session filtree (-k, un fichier) n'en retire aucun
+        baseline = {'benchmarks': {name: entry for name, entry in config.bench_baseline.items()
+                                   if name in config.bench_results}}
+        config.bench_comparison = compare(baseline, report, config.getoption('--bench-threshold'))
+        if config.bench_comparison[1] and session.exitstatus == pytest.ExitCode.OK:
+            # Ralentissement = session en echec, pour que la CI ou la revue le voie
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    report = getattr(config, 'bench_report', None)
+    if report is None:
+        return
+    terminalreporter.section('benchmarks')
+    comparison = getattr(config, 'bench_comparison', None)
+    if comparison:
+        rows, slower = comparison
+        for line in format_report(rows):
+            terminalreporter.write_line(line)
+        if slower:
+            terminalreporter.write_line(
+                f"{len(slower)} benchmark(s) slower than {config.getoption('--bench-baseline')}", red=True
+            )
+    else:
+        for name, timing in report['benchmarks'].items():
+            terminalreporter.write_line(f"{timing['min'] * 1e3:>12.3f} ms  {name}")
+    terminalreporter.write_line(f"results written to {config.getoption('--bench-save')}")
@@ -0,0 +1,136 @@
+import json
+import random
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+#recap de ce qu'il fait ce code :
+#Donnees generees pour les micro-benchmarks, deterministes (graine fixe) et a plusieurs tailles :
+#activite des membres (messages et presence par heure), journal de statut SQLite, feedbacks, durees a analyser,
+#invites d'une reunion ; plus le solveur de creneaux ecrit en boucles, reference de justesse et de vitesse
+
+HOURS = 30 * 24  # un mois d'activite
+
+
+def fill_tracker(tracker, users, messages, seed=0):
+    """Spread messages over users and the last 30 days, plus presence samples, like a real guild."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    # Quelques membres tres actifs, beaucoup de membres discrets
+    weights = [1 / (rank + 1) for rank in range(users)]
+    user_ids = [10**17 + i for i in range(users)]
+    for user_id in rng.choices(user_ids, weights, k=messages):
+        hour_key = now - timedelta(hours=rng.randrange(HOURS))
+        tracker.message_counts[user_id][hour_key] += 1
+    for user_id in user_ids[:max(1, users // 2)]:
+        for _ in range(24):
+            tracker.presence_data[user_id][now - timedelta(hours=rng.randrange(HOURS))] += 1
+    tracker.synthetic_weight = 0.5
+    return user_ids
+
+
+def message_times(count, seed=0):
+    """(user_id, created_at) of count messages in the last week."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    return [(10**17 + rng.randrange(500), now - timedelta(seconds=rng.randrange(7 * 86400))) for _ in range(count)]
+
+
+def fill_activity_log(db_path, participant_id, rows, seed=0):
+    """rows online/offline status changes of one participant over the last rows // 20 days."""
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(days=max(1, rows // 20))
+    span = (datetime.now() - start).total_seconds()
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executemany(
+            'INSERT INTO activity_log (participant_id, status, timestamp) VALUES (?, ?, ?)',
+            [(participant_id, rng.choice(('online', 'offline')),
+              (start + timedelta(seconds=rng.uniform(0, span))).strftime('%Y-%m-%d %H:%M:%S'))
+             for _ in range(rows)]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def write_feedback_log(path, count, categories, seed=0):
+    """JSON Lines feedback log, in the format FeedbackStore imports."""
+    from utils.feedback_stats import POSITIVE_WORDS, NEGATIVE_WORDS
+    rng = random.Random(seed)
+    words = POSITIVE_WORDS + NEGATIVE_WORDS + ["the", "bot", "reminder", "works", "sometimes", "calendar"]
+    names = [f"category-{i}" for i in range(categories)]
+    with open(path, 'w') as f:
+        for _ in range(count):
+            f.write(json.dumps({
+                'category': rng.choice(names),
+                'rating': rng.randint(1, 5),
+                'description': ' '.join(rng.choices(words, k=20)),
+            }) + '\n')
+
+
+def duration_texts(count, seed=0):
+    """count distinct duration expressions, in the forms users type."""
+    rng = random.Random(seed)
+    forms = ("{h}h{m}m", "{h} hours", "{m} minutes", "{h}h", "{m}m", "{d} day", "{h} hours, {m} min",
+             "in {m} minutes", "{s}s", "{d}d{h}h")
+    texts = set()
+    while len(texts) < count:
+        texts.add(rng.choice(forms).format(d=rng.randint(1, 365), h=rng.randint(1, 23), m=rng.randint(1, 59),
+                                           s=rng.randint(1, 86400)))
+    return sorted(texts)
+
+
+def meeting_invitees(members, seed=0):
+    """(masks, known, offsets, activity) of members invitees: evening availability, 5 time zones."""
+    import numpy as np
+    from utils.availability_index import WEEK_SLOTS
+    from utils.slot_solver import HOURS_PER_WEEK
+    rng = np.random.default_rng(seed)
+    masks = np.zeros((members, WEEK_SLOTS), dtype=bool)
+    for day in range(7):
+        starts = rng.integers(32, 72, members)
+        for m in range(members):
+            masks[m, day * 96 + starts[m]:day * 96 + starts[m] + 16] = rng.random() < 0.7
+    known = rng.random(members) < 0.9
+    offsets = rng.choice([0, 60, 120, -300, 330], members)
+    activity = rng.random((members, HOURS_PER_WEEK))
+    return masks, known, offsets, activity
+
+
+def solve_meeting_slots_loop(start, duration_minutes, masks, known, offsets_minutes, activity=None,
+                             horizon_days=14, top_k=3, min_spacing_minutes=120, activity_weight=0.5,
+                             unknown_availability=0.5):
+    """utils.slot_solver.solve_meeting_slots one invitee and one candidate at a time, in pure Python."""
+    from utils.availability_index import SLOT_MINUTES, WEEK_SLOTS
+    from utils.slot_solver import WEEK_MINUTES, candidate_slots, minute_of_week
+    start, n_candidates = candidate_slots(start, horizon_days)
+    duration_slots = max(1, -(-duration_minutes // SLOT_MINUTES))
+    expected, available_count = [], []
+    for candidate in range(n_candidates):
+        utc_of_week = minute_of_week(int(start.timestamp()) // 60 + SLOT_MINUTES * candidate)
+        total, count = 0.0, 0
+        for member in range(len(masks)):
+            offset = offsets_minutes[member]
+            if hasattr(offset, '__len__'):
+                offset = offset[candidate]
+            slot = (utc_of_week + int(offset)) % WEEK_MINUTES // SLOT_MINUTES
+            available = all(masks[member][(slot + k) % WEEK_SLOTS] for k in range(duration_slots))
+            count += available
+            probability = float(available) if known[member] else unknown_availability
+            if activity is not None:
+                probability *= 1 - activity_weight + activity_weight * activity[member][utc_of_week // 60]
+            total += probability
+        expected.append(total)
+        available_count.append(count)
+
+    spacing = max(1, min_spacing_minutes // SLOT_MINUTES)
+    scores = list(expected)
+    results = []
+    while len(results) < top_k:
+        best = max(range(n_candidates), key=scores.__getitem__)
+        if scores[best] <= 0:
+            break
+        results.append((start + timedelta(minutes=SLOT_MINUTES * best), expected[best], available_count[best]))
+        for candidate in range(max(0, best - spacing + 1), min(n_candidates, best + spacing)):
+            scores[candidate] = float('-inf')
+    return results
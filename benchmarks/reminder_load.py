@@ -0,0 +1,261 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.delivery_slo import DeliverySLO, _percentile  # noqa: E402
+from utils.fake_discord import FakeDiscord, VirtualClock  # noqa: E402
+
+#recap de ce qu'il fait ce code :
+#Test de charge du pipeline des rappels, sans reseau : combien de rappels un processus peut-il tenir ?
+#Genere N rappels (heures arrondies au quart d'heure, rappels 5 min / 1 h / 1 jour avant) dans un repertoire temporaire,
+#puis fait tourner TimeManagementCog.process_reminders et send_reminder contre le faux Discord (utils/fake_discord.py)
+#Horloge virtuelle : les attentes entre passes et la latence de l'API sont sautees, le temps de calcul reel compte
+#Rapporte debit, retard d'envoi (p50/p95/p99), notifications manquees, 429, duree des passes, CPU et memoire
+#Chaque taille tourne dans son propre processus pour que la memoire soit mesuree separement
+#Une passe relit et parcourt tous les rappels : quand elle dure plus que l'ecart entre deux echeances, la boucle
+#ne dort plus et le temps reel du test se rapproche du temps simule (environ 10 min par taille au-dela de 100k)
+#  python benchmarks/reminder_load.py                              -> 1k, 10k, 100k et 1M rappels, 10 min simulees
+#  python benchmarks/reminder_load.py --reminders 10000 --rate-limit 0.05 --latency 0.2 --json out.json
+
+SCALES = (1_000, 10_000, 100_000, 1_000_000)
+# remind_before de /schedule : la valeur par defaut (5m) surtout
+REMIND_BEFORE = ((0.6, (timedelta(minutes=5),)),
+                 (0.25, (timedelta(hours=1), timedelta(minutes=10))),
+                 (0.15, (timedelta(days=1), timedelta(hours=1))))
+
+
+class RecordingSLO(DeliverySLO):
+    """DeliverySLO that also keeps every lag of the run (the real one keeps the last 500 per scope)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lags = []
+        self.waits = []
+        self.missed_count = 0
+
+    def record(self, guild_id, channel_id, scheduled, dequeued, acknowledged):
+        self.waits.append(max(0.0, dequeued - scheduled))
+        lag = super().record(guild_id, channel_id, scheduled, dequeued, acknowledged)
+        self.lags.append(lag)
+        return lag
+
+    def record_missed(self, guild_id, channel_id, scheduled, now=None):
+        self.missed_count += 1
+        super().record_missed(guild_id, channel_id, scheduled, now)
+
+
+def generate_reminders(count, start, horizon, seed=0, guilds=200):
+    """
+    count reminders due between start + 1 min and start + horizon (aware datetimes).
+    70 % of events are on a quarter hour, like people schedule them, which makes bursts.
+    """
+    from utils.reminders import new_reminder
+    from utils.time_manager import get_timezone
+
+    rng = random.Random(seed)
+    utc = get_timezone('UTC')
+    guild_ids = [(rng.randrange(1 << 40) << 22) for _ in range(guilds)]
+    channels = {guild_id: [guild_id + i + 1 for i in range(rng.randint(1, 8))] for guild_id in guild_ids}
+    weights = [weight for weight, _ in REMIND_BEFORE]
+    reminders = []
+    for i in range(count):
+        event_time = start + timedelta(seconds=rng.uniform(60, horizon))
+        if rng.random() < 0.7:
+            event_time = event_time.replace(second=0, microsecond=0)
+            event_time += timedelta(minutes=(15 - event_time.minute % 15) % 15)
+        before = rng.choices(REMIND_BEFORE, weights)[0][1]
+        reminder_times = [event_time - offset for offset in before if event_time - offset > start]
+        guild_id = rng.choice(guild_ids)
+        kind = rng.random()
+        if kind < 0.3:
+            mentioned = [rng.randrange(1 << 60)]  # un seul destinataire : message prive
+        elif kind < 0.8:
+            mentioned = [rng.randrange(1 << 60) for _ in range(rng.randint(2, 5))]
+        else:
+            mentioned = []  # @everyone
+        author = SimpleNamespace(id=rng.randrange(1 << 60), name=f"user{i % 5000}")
+        reminders.append(new_reminder(author, rng.choice(channels[guild_id]), f"Event {i}", "Load test",
+                                      event_time, reminder_times, mentioned, utc, guild_id=guild_id))
+    return reminders
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Ko sous Linux
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+async def run_scale(count, duration, horizon, latency, rate_limit, retry_after, seed):
+    """Generate count reminders, run the checker for duration virtual seconds, return the report."""
+    from core.time_management import TimeManagementCog
+    from utils import database
+    from utils.calendar_sync import CalendarSync
+    from utils.loop_monitor import monitor
+    from utils.persistence import persistence
+    from utils.reminders import save_reminders
+    from utils.time_manager import TimeManagement
+
+    clock = VirtualClock()
+    started = clock.now()
+    t = time.perf_counter()
+    reminders = generate_reminders(count, started, horizon, seed)
+    notifications = sum(1 + len(r['reminder_times']) for r in reminders)
+    save_reminders(reminders)
+    del reminders
+    persistence.flush(timeout=600)
+    generate_seconds = time.perf_counter() - t
+    store_mb = os.path.getsize('data/reminders.json') / 1e6
+
+    database.init_db()
+    client = FakeDiscord(clock, latency=latency, rate_limit_ratio=rate_limit, retry_after=retry_after, seed=seed)
+    cog = TimeManagementCog(client)
+    cog.track_activity.cancel()
+    cog.clock = clock.now
+    cog.delivery_slo = slo = RecordingSLO(window=10**9, clock=lambda: clock.now().timestamp())
+    cog.time_manager = TimeManagement(data_file=None)
+    cog.calendar_sync = CalendarSync(None, 'data/calendar_sync.json')
+    await asyncio.to_thread(cog.reminder_lease.try_acquire)
+    lease_task = asyncio.create_task(cog.reminder_lease.run(), name='reminder_lease')
+    monitor.start()
+
+    pass_seconds = []
+    cpu, real = cpu_seconds(), time.perf_counter()
+    end = started + timedelta(seconds=duration)
+    while clock.now() < end:
+        t = time.perf_counter()
+        sleep_time = await cog.process_reminders()
+        pass_seconds.append(time.perf_counter() - t)
+        await clock.sleep(sleep_time)
+    cpu, real = cpu_seconds() - cpu, time.perf_counter() - real
+    monitor.stop()
+    lease_task.cancel()
+    await asyncio.gather(lease_task, return_exceptions=True)
+    persistence.flush(timeout=600)
+
+    from utils import metrics
+    results = {result: c.value for (result,), c in metrics.REMINDER_NOTIFICATIONS.children.items()}
+    lags, waits = sorted(slo.lags), sorted(slo.waits)
+    sent = len(client.sends)
+    send_times = sorted(at for at, _, _ in client.sends)
+    # Debit soutenu : envois par seconde virtuelle sur la minute la plus chargee
+    busiest = 0
+    j = 0
+    for i, at in enumerate(send_times):
+        while send_times[j] < at - 60:
+            j += 1
+        busiest = max(busiest, i - j + 1)
+    return {
+        'reminders': count,
+        'notifications': notifications,
+        'store_mb': round(store_mb, 1),
+        'generate_seconds': round(generate_seconds, 2),
+        'virtual_seconds': round(clock.time() - started.timestamp(), 1),
+        'real_seconds': round(real, 2),
+        'cpu_seconds': round(cpu, 2),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'passes': len(pass_seconds),
+        'pass_p50': round(_percentile(sorted(pass_seconds), 50), 4),
+        'pass_max': round(max(pass_seconds), 4),
+        'sent': sent,
+        'failed': results.get('failed', 0),
+        'missed': slo.missed_count,
+        'claimed_elsewhere': results.get('claimed_elsewhere', 0),
+        'rate_limited': client.rate_limited,
+        'throughput_per_s': round(sent / max(real, 1e-9), 1),
+        'busiest_minute_per_s': round(busiest / 60, 2),
+        'lag_p50': round(_percentile(lags, 50), 2),
+        'lag_p95': round(_percentile(lags, 95), 2),
+        'lag_p99': round(_percentile(lags, 99), 2),
+        'wait_p95': round(_percentile(waits, 95), 2),
+        'loop_stall_max': round(monitor.max_lag, 3),
+    }
+
+
+def run_single(args):
+    """One scale, in this process, inside a throwaway data directory."""
+    workdir = tempfile.mkdtemp(prefix='reminder-load-')
+    try:
+        os.chdir(workdir)
+        os.makedirs('data')
+        with open(os.path.join(ROOT, 'data', 'config.json.example')) as f:
+            config = json.load(f)
+        with open('data/config.json', 'w') as f:
+            json.dump(config, f)
+        report = asyncio.run(run_scale(args.single, args.duration, args.horizon, args.latency,
+                                       args.rate_limit, args.retry_after, args.seed))
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(json.dumps(report))
+
+
+def print_table(reports):
+    columns = (('reminders', 'reminders', '{:>10,}'), ('notifications', 'notifs', '{:>9,}'),
+               ('sent', 'sent', '{:>8,}'), ('missed', 'missed', '{:>7,}'), ('rate_limited', '429', '{:>6,}'),
+               ('lag_p50', 'lag p50', '{:>8.2f}'), ('lag_p95', 'lag p95', '{:>8.2f}'),
+               ('lag_p99', 'lag p99', '{:>8.2f}'), ('pass_p50', 'pass p50', '{:>9.3f}'),
+               ('throughput_per_s', 'sends/s', '{:>8.1f}'), ('cpu_seconds', 'cpu s', '{:>7.1f}'),
+               ('peak_rss_mb', 'rss MB', '{:>7.0f}'), ('loop_stall_max', 'stall s', '{:>8.2f}'))
+    print(' '.join(f"{title:>{len(fmt.format(0))}}" for _, title, fmt in columns))
+    for report in reports:
+        if 'error' in report:
+            print(f"{report['reminders']:>10,} {report['error']}")
+            continue
+        print(' '.join(fmt.format(report[key]) for key, _, fmt in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test of the reminder checker")
+    parser.add_argument('--reminders', type=int, nargs='+', default=list(SCALES))
+    parser.add_argument('--duration', type=float, default=600, help="virtual seconds to run (default 10 min)")
+    parser.add_argument('--horizon', type=float, default=86400,
+                        help="reminders are due within this many seconds (default 1 day)")
+    parser.add_argument('--latency', type=float, default=0.05, help="fake API round trip, seconds")
+    parser.add_argument('--rate-limit', type=float, default=0.0, help="share of API calls answered 429")
+    parser.add_argument('--retry-after', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="also write the reports to this file")
+    parser.add_argument('--single', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.single:
+        run_single(args)
+        return
+
+    reports = []
+    for count in args.reminders:
+        options = [f"--{name}={getattr(args, name.replace('-', '_'))}"
+                   for name in ('duration', 'horizon', 'latency', 'rate-limit', 'retry-after', 'seed')]
+        print(f"{count:,} reminders...", flush=True)
+        process = subprocess.run([sys.executable, os.path.abspath(__file__), f"--single={count}", *options],
+                                 capture_output=True, text=True)
+        lines = process.stdout.strip().splitlines()
+        if process.returncode or not lines:
+            # Manque de memoire (tue par le noyau) ou erreur : la taille suivante est tentee quand meme
+            reports.append({'reminders': count, 'error': f"exit {process.returncode}: {process.stderr[-300:]}"})
+            continue
+        reports.append(json.loads(lines[-1]))
+    print()
+    print_table(reports)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from benchmarks.generate import fill_tracker, message_times, fill_activity_log
+from core.time_management import ActivityTracker
+from utils import database
+from utils.activity import aggregate_participant_activity
+from utils.persistence import persistence
+
+#recap de ce qu'il fait ce code :
+#Micro-benchmarks du suivi d'activite : un message enregistre, sauvegarde et chargement du fichier d'activite,
+#donnees hybrides (reelles + synthetiques) pour Prophet, agregation quotidienne du journal de statut SQLite
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    return ActivityTracker(guild_id=1, data_dir=str(tmp_path))
+
+
+@pytest.mark.parametrize('messages', [1_000, 10_000, 100_000])
+def test_add_message(bench, tracker, messages):
+    """Messages recorded on the event loop, as on_message does, then their one coalesced save."""
+    batch = message_times(messages)
+
+    async def record():
+        for user_id, created_at in batch:
+            tracker.add_message(user_id, created_at)
+        await persistence.wait_idle()
+
+    bench(lambda: asyncio.run(record()), rounds=3)
+
+
+@pytest.mark.parametrize('users,messages', [(50, 5_000), (500, 50_000), (5_000, 200_000)])
+def test_save_activity_data(bench, tracker, users, messages):
+    """Snapshot and atomic write of the activity file, until it is on disk."""
+    fill_tracker(tracker, users, messages)
+
+    def save():
+        tracker.save_activity_data()
+        persistence.flush()
+
+    bench(save, rounds=3)
+
+
+@pytest.mark.parametrize('users,messages', [(50, 5_000), (500, 50_000), (5_000, 200_000)])
+def test_load_activity_data(bench, tracker, users, messages):
+    fill_tracker(tracker, users, messages)
+    tracker.save_activity_data()
+    persistence.flush()
+    bench(tracker.load_activity_data, rounds=3)
+    assert tracker.message_counts
+
+
+@pytest.mark.parametrize('users', [10, 100, 1_000])
+def test_get_hybrid_activity_data(bench, tracker, users):
+    """30 days of hourly scores from the counters, blended with the synthetic profile."""
+    pytest.importorskip('pandas')
+    fill_tracker(tracker, users, users * 100)
+    df = bench(tracker.get_hybrid_activity_data, rounds=3)
+    assert len(df) > 0
+
+
+@pytest.mark.parametrize('rows', [1_000, 10_000, 100_000])
+def test_aggregate_participant_activity(bench, tmp_path, monkeypatch, rows):
+    """Daily online/offline summary of one participant (the function uses ./data/dataset.db)."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data').mkdir()
+    database.init_db()
+    fill_activity_log(database.DB_PATH, participant_id=42, rows=rows)
+    bench(lambda: aggregate_participant_activity(42), rounds=3)
@@ -0,0 +1,24 @@
+import pytest
+
+from benchmarks.generate import write_feedback_log
+from extended.feedback import FeedbackCog
+from utils.database import init_db
+from utils.feedback_stats import FeedbackStats
+from utils.feedback_store import FeedbackStore
+
+#recap de ce qu'il fait ce code :
+#Micro-benchmark de /view_feedback analyze : resume des statistiques tenues a jour, journal genere a plusieurs tailles
+
+
+@pytest.mark.parametrize('records,categories', [(1_000, 4), (10_000, 40), (100_000, 400)])
+@pytest.mark.parametrize('category', [None, 'category-1'])
+def test_analyze_feedback(bench, tmp_path, records, categories, category):
+    path, db_path = str(tmp_path / 'feedback.jsonl'), str(tmp_path / 'dataset.db')
+    write_feedback_log(path, records, categories)
+    init_db(db_path)
+    cog = FeedbackCog(bot=None)
+    # L'ancien journal est importe dans la base, puis les statistiques sont calculees
+    cog.stats = FeedbackStats(FeedbackStore(db_path, legacy_log=path, legacy_path=None),
+                              str(tmp_path / 'feedback.stats.json'))
+    analysis = bench(lambda: cog.analyze_feedback(category))
+    assert 'Average Rating' in analysis
@@ -0,0 +1,25 @@
+import asyncio
+
+import pytest
+
+from utils.loop_monitor import LoopMonitor
+
+#recap de ce qu'il fait ce code :
+#Micro-benchmark du cout du moniteur de boucle : debit d'une boucle de petites taches, avec et sans le moniteur
+#L'ecart entre les deux entrees est le surcout du battement (100 ms) et du thread de surveillance
+
+STEPS = 20_000
+
+
+async def spin(monitored):
+    monitor = LoopMonitor()
+    if monitored:
+        monitor.start()
+    for _ in range(STEPS):
+        await asyncio.sleep(0)
+    monitor.stop()
+
+
+@pytest.mark.parametrize('monitored', [False, True])
+def test_event_loop_throughput(bench, monitored):
+    bench(lambda: asyncio.run(spin(monitored)), number=1)
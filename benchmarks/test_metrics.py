@@ -0,0 +1,32 @@
+from utils.metrics import COMMAND_SECONDS, REMINDER_NOTIFICATIONS
+
+#recap de ce qu'il fait ce code :
+#Micro-benchmarks du cout d'une observation de metrique, chemin chaud de chaque commande et de chaque rappel
+#Cible : moins d'une microseconde, recherche du libelle comprise
+
+OBSERVATIONS = 1_000
+
+
+def test_histogram_observe(bench):
+    child = COMMAND_SECONDS.labels('suggest_times')
+
+    def observe():
+        for _ in range(OBSERVATIONS):
+            child.observe(0.042)
+    bench(observe)
+
+
+def test_histogram_observe_with_labels(bench):
+    def observe():
+        for _ in range(OBSERVATIONS):
+            COMMAND_SECONDS.labels('suggest_times').observe(0.042)
+    bench(observe)
+    assert bench.results[bench.name]['min'] / OBSERVATIONS < 1e-6
+
+
+def test_counter_inc_with_labels(bench):
+    def inc():
+        for _ in range(OBSERVATIONS):
+            REMINDER_NOTIFICATIONS.labels('sent').inc()
+    bench(inc)
+    assert bench.results[bench.name]['min'] / OBSERVATIONS < 1e-6
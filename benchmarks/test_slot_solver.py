@@ -0,0 +1,25 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from benchmarks.generate import meeting_invitees, solve_meeting_slots_loop
+from utils.slot_solver import solve_meeting_slots
+
+#recap de ce qu'il fait ce code :
+#Micro-benchmark du solveur de /find_meeting sur un horizon de 2 semaines (1344 creneaux candidats)
+#La version en boucles (100 invites) donne l'ordre de grandeur du gain de la version vectorisee
+
+START = datetime(2026, 3, 2, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize('members', [100, 1_000])
+def test_solve_meeting_slots(bench, members):
+    masks, known, offsets, activity = meeting_invitees(members)
+    results = bench(lambda: solve_meeting_slots(START, 60, masks, known, offsets, activity))
+    assert len(results) == 3
+
+
+def test_solve_meeting_slots_loop(bench):
+    masks, known, offsets, activity = meeting_invitees(100)
+    results = bench(lambda: solve_meeting_slots_loop(START, 60, masks, known, offsets, activity), rounds=1)
+    assert results[0][0] == solve_meeting_slots(START, 60, masks, known, offsets, activity)[0][0]
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from benchmarks.generate import fill_tracker
+from core.time_management import ActivityTracker, EventTimeSuggester
+
+#recap de ce qu'il fait ce code :
+#Micro-benchmarks des suggestions d'horaires, avec des modeles remplaces par des bouchons deterministes
+#(Prophet et XGBoost ne sont ni entraines ni necessaires) : seul le code du bot autour du modele est mesure
+
+
+class StubProphet:
+    """predict(df) like a fitted Prophet: ds plus a yhat following a daily curve."""
+
+    def predict(self, df):
+        hours = df['ds'].dt.hour.to_numpy() + df['ds'].dt.minute.to_numpy() / 60
+        return df.assign(yhat=0.5 + 0.4 * np.sin((hours - 9) / 24 * 2 * np.pi))
+
+
+class StubClassifier:
+    """predict_proba(X) like XGBClassifier: probability of being online from the hour."""
+
+    def predict_proba(self, data):
+        online = 1 / (1 + np.exp(-(data['hour'].to_numpy() - 12) / 4))
+        return np.column_stack([1 - online, online])
+
+
+@pytest.fixture
+def suggester(tmp_path):
+    suggester = EventTimeSuggester(ActivityTracker(guild_id=1, data_dir=str(tmp_path)))
+    suggester.model = StubProphet()
+    suggester.last_training = datetime.now()  # pas d'entrainement pendant la mesure
+    return suggester
+
+
+@pytest.mark.parametrize('users', [100, 1_000, 10_000])
+def test_get_time_suggestions(bench, suggester, users):
+    """Uncached suggestions: 7-day forecast, filtering, active users of the top slots."""
+    pytest.importorskip('pandas')
+    fill_tracker(suggester.activity_tracker, users, users * 20)
+    start = datetime.now() + timedelta(days=1)
+
+    def suggest():
+        suggester.suggestion_cache.clear()
+        return suggester.get_time_suggestions(start, num_suggestions=3)
+
+    suggestions = bench(suggest)
+    assert len(suggestions) == 3
+
+
+@pytest.mark.parametrize('users', [1_000, 10_000, 100_000])
+def test_get_active_users_count(bench, suggester, users):
+    fill_tracker(suggester.activity_tracker, users, users * 5)
+    counts = suggester.activity_tracker.message_counts[10**17]
+    busiest = max(counts, key=counts.get)  # heure la plus active du membre le plus actif
+    active, scores = bench(lambda: suggester._get_active_users_count(busiest))
+    assert active == len(scores)
+
+
+def test_predict_best_reminder_time(bench, monkeypatch, capsys):
+    """Hour-by-hour inference of utils.predict (24 frames of 24 rows, fixed size: no scale parameter)."""
+    pytest.importorskip('pandas')
+    pytest.importorskip('xgboost')  # importe par utils.train_model, dont predict lit MODEL_PATH
+    from utils import predict
+    monkeypatch.setattr(predict, 'load_model', StubClassifier)
+    bench(predict.predict_best_reminder_time, rounds=3)
+    assert '⏰' in capsys.readouterr().out
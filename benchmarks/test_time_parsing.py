@@ -0,0 +1,35 @@
+import pytest
+
+from benchmarks.generate import duration_texts
+from utils.time_manager import TimeManagement
+from utils.time_parser import compile_expression, parse_duration
+
+#recap de ce qu'il fait ce code :
+#Micro-benchmark de TimeManagement.parse_relative_time ('1h30m', '2 hours'...) sur des lots d'expressions distinctes
+#Les caches des expressions sont vides avant chaque lot : on mesure l'analyse, pas seulement le cache
+
+
+def clear_caches():
+    parse_duration.cache_clear()
+    compile_expression.cache_clear()
+
+
+@pytest.mark.parametrize('count', [100, 1_000, 10_000])
+def test_parse_relative_time(bench, count):
+    texts = duration_texts(count)
+
+    def parse_all():
+        clear_caches()
+        return [TimeManagement.parse_relative_time(text) for text in texts]
+
+    durations = bench(parse_all)
+    assert all(duration.total_seconds() > 0 for duration in durations)
+
+
+@pytest.mark.parametrize('count', [100, 1_000])
+def test_parse_relative_time_cached(bench, count):
+    """Repeated expressions (the common case: '5m', '1h'...) served from the cache."""
+    texts = duration_texts(count)
+    for text in texts:
+        TimeManagement.parse_relative_time(text)
+    bench(lambda: [TimeManagement.parse_relative_time(text) for text in texts])
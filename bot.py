@@ -1,26 +1,53 @@
-import discord
-from discord.ext import commands
-from utils import jeson
-from core import basic, time_management
-from extended import availability_pref
-from extended import feedback
+from utils.startup import timer, sync_commands_if_changed
+# Les modules lourds (prophet, pandas, client Google) ne sont plus importes ici : ils le sont a la premiere utilisation
+with timer.phase('imports'):
+    import discord
+    from discord.ext import commands
+    from utils import jeson, database
+    from utils.gateway import gateway_options
+    from utils import sharding
+    from utils.reminders import configure_partition
+    from core import basic, time_management
+    from extended import availability_pref
+    from extended import feedback
+    from extended import monitoring
 # Charger la configuration du bot
-bot_config = jeson.parse_json('./data/config.json')
+with timer.phase('config'):
+    bot_config = jeson.parse_json('./data/config.json')
 
-intents = discord.Intents.all()
-bot = commands.Bot(command_prefix=bot_config['COMMAND_PREFIX'], intents=intents)
+# Lance par cluster.py : ce processus ne gere que ses shards, et que les rappels de leurs serveurs
+CLUSTER = sharding.from_env()
+if CLUSTER:
+    configure_partition(CLUSTER.shard_ids, CLUSTER.shard_count)
+    bot = commands.AutoShardedBot(
+        command_prefix=bot_config['COMMAND_PREFIX'], shard_ids=CLUSTER.shard_ids,
+        shard_count=CLUSTER.shard_count, **gateway_options(bot_config)
+    )
+else:
+    # Intents et cache des membres selon GATEWAY_PROFILE (full, activity, lean)
+    bot = commands.Bot(command_prefix=bot_config['COMMAND_PREFIX'], **gateway_options(bot_config))
 
 # Configuration des modules
 basic.setup(bot)
 
 @bot.event
 async def on_ready():
-    await bot.tree.sync()  # Synchronise les commandes hybrides
+    # on_ready est rappele a chaque reconnexion : le demarrage n'est traite qu'une fois
+    if getattr(bot, 'startup_done', False):
+        return
+    bot.startup_done = True
+    timer.mark('gateway ready')
+    # Les commandes sont globales : en cluster, seul le premier processus les synchronise
+    synced = False
+    if CLUSTER is None or CLUSTER.cluster_id == 0:
+        with timer.phase('command tree sync'):
+            synced = await sync_commands_if_changed(bot.tree, bot.application_id)
     print('=============================================')
-    print(f'Bot connecté en tant que {bot.user}')
+    print(f'Bot connecté en tant que {bot.user}' + (f' (shards {CLUSTER.shard_ids})' if CLUSTER else ''))
     print('=============================================')
-    print("Hybrid commands have been synced successfully!")
+    print("Hybrid commands have been synced successfully!" if synced else "Hybrid commands unchanged, sync skipped.")
     print('=============================================')
+    bot.loop.create_task(timer.report_when_done())
 
 # Commandes simples pour tester le bot
 # @bot.command()
@@ -37,10 +64,19 @@ async def on_ready():
 
 # Charger le module de gestion du temps
 async def main():
+    # Mettre le schema de la base a jour une seule fois au demarrage
+    # En cluster, le superviseur a deja mis la base a jour avant de lancer les processus
+    if CLUSTER is None:
+        with timer.phase('database'):
+            database.init_db(retention_days=bot_config.get('ACTIVITY_LOG_RETENTION_DAYS', 90))
     async with bot:
-        await availability_pref.setup(bot)
-        await time_management.setup(bot)
-        await feedback.FeedbackCog.setup(bot)
+        # Les cogs chargent leurs donnees en arriere-plan (timer.track), la connexion n'attend pas
+        with timer.phase('cogs'):
+            # En premier : le moniteur de latence voit aussi le demarrage des autres cogs
+            await monitoring.setup(bot)
+            await availability_pref.setup(bot)
+            await time_management.setup(bot)
+            await feedback.FeedbackCog.setup(bot)
         await bot.start(bot_config['BOT_TOKEN'])
 
 # Lancer le bot
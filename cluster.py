@@ -0,0 +1,113 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+from utils import jeson, database
+from utils.reminders import repartition
+from utils.sharding import plan, to_env, repartition_calendar_sync
+
+#recap de ce qu'il fait ce code :
+#Mode cluster : lance plusieurs processus bot.py, chacun avec un AutoShardedBot sur une plage de shards
+#Chaque processus ne charge que les rappels, l'activite et les modeles des serveurs de ses shards
+#Le superviseur relance un processus qui s'arrete anormalement (attente croissante entre deux relances)
+#Les donnees des utilisateurs (fuseaux, emails, disponibilites, feedbacks) sont partagees par la base (utils/shared_store.py)
+#  python cluster.py               -> lance le cluster (SHARD_COUNT / CLUSTER_COUNT dans data/config.json)
+#  python benchmarks/cluster_load.py -> debit des rappels hors ligne selon le nombre de processus (1..N)
+
+RESTART_DELAY_MAX = 60  # secondes
+STABLE_AFTER = 300  # un processus qui a tenu 5 minutes repart avec une attente courte
+
+
+def recommended_shards(token):
+    """Shard count recommended by Discord for this bot (GET /gateway/bot)."""
+    request = urllib.request.Request(
+        'https://discord.com/api/v10/gateway/bot',
+        headers={'Authorization': f"Bot {token}", 'User-Agent': 'DiscordBot (cluster.py, 1.0)'}
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.load(response)['shards']
+
+
+class Supervisor:
+    """Runs one bot.py process per cluster and restarts the ones that crash."""
+
+    def __init__(self, clusters):
+        self.clusters = clusters
+        self.processes = {}  # cluster_id -> Popen
+        self.started = {}
+        self.delays = {cluster.cluster_id: 1 for cluster in clusters}
+        self.restart_at = {}
+        self.stopping = False
+
+    def spawn(self, cluster):
+        env = dict(os.environ, **to_env(cluster))
+        # Session a part : un Ctrl+C n'atteint que le superviseur, qui arrete ensuite les processus proprement
+        self.processes[cluster.cluster_id] = subprocess.Popen(
+            [sys.executable, 'bot.py'], env=env, start_new_session=True
+        )
+        self.started[cluster.cluster_id] = time.monotonic()
+        print(f"[cluster] processus {cluster.cluster_id} lance (shards {cluster.shard_ids}, "
+              f"pid {self.processes[cluster.cluster_id].pid})")
+
+    def stop(self, *_):
+        self.stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        for cluster in self.clusters:
+            self.spawn(cluster)
+        while not self.stopping:
+            time.sleep(1)
+            if self.stopping:
+                break
+            now = time.monotonic()
+            for cluster in self.clusters:
+                process = self.processes[cluster.cluster_id]
+                code = process.poll()
+                if code is None:
+                    continue
+                if cluster.cluster_id not in self.restart_at:
+                    # Attente doublee a chaque arret rapproche, remise a 1 s apres une longue periode stable
+                    if now - self.started[cluster.cluster_id] > STABLE_AFTER:
+                        self.delays[cluster.cluster_id] = 1
+                    delay = self.delays[cluster.cluster_id]
+                    self.delays[cluster.cluster_id] = min(delay * 2, RESTART_DELAY_MAX)
+                    self.restart_at[cluster.cluster_id] = now + delay
+                    print(f"[cluster] processus {cluster.cluster_id} arrete (code {code}), relance dans {delay} s")
+                elif now >= self.restart_at[cluster.cluster_id]:
+                    del self.restart_at[cluster.cluster_id]
+                    self.spawn(cluster)
+        self.shutdown()
+
+    def shutdown(self, timeout=15):
+        print("[cluster] arret des processus")
+        for process in self.processes.values():
+            if process.poll() is None:
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in self.processes.values():
+            try:
+                process.wait(max(0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def main():
+    config = jeson.parse_json('./data/config.json')
+    shard_count = config.get('SHARD_COUNT') or recommended_shards(config['BOT_TOKEN'])
+    clusters = plan(shard_count, config.get('CLUSTER_COUNT') or os.cpu_count() or 1)
+    # Une seule fois, avant les processus : schema de la base, rappels et agendas ranges par shard
+    database.init_db(retention_days=config.get('ACTIVITY_LOG_RETENTION_DAYS', 90))
+    repartition(shard_count)
+    repartition_calendar_sync(clusters)
+    print(f"[cluster] {shard_count} shards sur {len(clusters)} processus")
+    Supervisor(clusters).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,6 @@ from discord.ext import commands
 import uuid  # Pour générer un ID unique pour les rappels
 from datetime import datetime
 
-# Importation de ta fonction de prédiction
-from utils.predict import predict_best_reminder_time
 
 
 def setup(bot):
@@ -43,7 +41,8 @@ async def predict_best_reminder_time_command(ctx, title: str, date: str, time: s
             "id": str(uuid.uuid4())  # ID temporaire pour la prédiction
         }
 
-        # Prédire le meilleur moment pour l'envoi
+        # Prédire le meilleur moment pour l'envoi (pandas et le modèle ne sont importés qu'ici)
+        from utils.predict import predict_best_reminder_time
         best_reminder_time = predict_best_reminder_time(reminder)
 
         # Envoyer l'heure optimale du rappel prédit
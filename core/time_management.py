@@ -1,29 +1,60 @@
 import uuid
 import asyncio
-from datetime import datetime
+import importlib
+from datetime import datetime, timezone
+from time import perf_counter
 import discord
 from discord.ext import commands
-from utils.reminders import load_reminders, save_reminders
+from utils.reminders import (
+    load_reminders_async, add_reminders, remove_reminders, new_reminder
+)
+from utils.bulk_import import iter_rows, parse_row, MAX_BULK_ROWS
+from utils.user_data import get_directory
+from utils.shared_store import SharedStore
 from utils.time_manager import *
-from utils.google_calendar import GoogleCalendarManager
+from utils.calendar_sync import CalendarSync
+from utils.freebusy import FreeBusyCache, busy_counts
+from utils.sketches import CountMinSketch, HyperLogLog
+from utils.guild_state import GuildStateCache
+from utils.slot_solver import candidate_slots, solve_meeting_slots
+from utils.availability_index import SLOT_MINUTES
+from utils import jeson
+from utils.startup import timer
+from utils.gateway import tracked_guilds, ensure_chunked
+from utils.sharding import from_env as cluster_from_env, calendar_sync_file, cluster_file
+from utils.leader_lease import LeaderLease
+from utils.persistence import persistence
+from utils import metrics
+from utils.delivery_slo import DeliverySLO, MAX_ALERT_SCOPES, format_stats
 from discord import app_commands
-from prophet import Prophet
-import pandas as pd
+# prophet et pandas sont importes a la premiere suggestion d'horaire, le client Google en arriere-plan
 import numpy as np
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from discord.ext import tasks
 import json
+import os
+import io
+import csv
 class ActivityTracker:
-    def __init__(self):
+    approximate = False
+    # Fichier unique d'avant le decoupage par serveur, relu pour amorcer les nouveaux serveurs
+    LEGACY_PATH = 'data/activity_data.json'
+
+    def __init__(self, guild_id=None, data_dir='data/activity'):
+        self.guild_id = guild_id
+        self.path = (
+            'data/activity_data.json' if guild_id is None
+            else os.path.join(data_dir, f"{guild_id}.json")
+        )
         self.activity_data = defaultdict(list)
         self.message_counts = defaultdict(lambda: defaultdict(int))
         self.presence_data = defaultdict(lambda: defaultdict(int))
         self.synthetic_weight = 1.0
+        self.legacy_imported = False  # amorce depuis LEGACY_PATH (migrate_legacy_activity)
         self.load_activity_data()
     
-    def save_activity_data(self):
-        """Save message_counts and presence_data to a JSON file."""
-        data = {
+    def _snapshot(self):
+        return {
             'message_counts': {
             str(user_id): {hour_key.isoformat(): count for hour_key, count in hour_counts.items()}
             for user_id, hour_counts in self.message_counts.items()
@@ -32,16 +63,19 @@ class ActivityTracker:
             str(user_id): {hour_key.isoformat(): count for hour_key, count in hour_counts.items()}
             for user_id, hour_counts in self.presence_data.items()
             },
-            'synthetic_weight': self.synthetic_weight
+            'synthetic_weight': self.synthetic_weight,
+            'legacy_imported': self.legacy_imported
         }
-        with open('data/activity_data.json', 'w') as f:
-            json.dump(data, f)
+
+    def save_activity_data(self):
+        """Save message_counts and presence_data to a JSON file (written by the persistence thread)."""
+        persistence.save_json(self.path, self._snapshot())
 
     def load_activity_data(self):
         """Load message_counts and presence_data from a JSON file."""
         try:
-            with open('data/activity_data.json', 'r') as f:
-                data = json.load(f)
+            data = persistence.load_json(self.path)
+            if data:
                 self.message_counts = defaultdict(lambda: defaultdict(int))
                 self.presence_data = defaultdict(lambda: defaultdict(int))
             
@@ -59,15 +93,36 @@ class ActivityTracker:
             
                 # Load synthetic_weight
                 self.synthetic_weight = data.get('synthetic_weight', 1.0)
-        except FileNotFoundError:
-            print("File not found, starting with fresh activity data.")
-        except json.JSONDecodeError:
-            print("Error decoding JSON, starting with fresh activity data.")
+                self.legacy_imported = data.get('legacy_imported', False)
         except Exception as e:
             print(f"Error loading activity data: {e}, starting with fresh activity data.")
     
+    @classmethod
+    def load_legacy(cls, done_path):
+        """The old process-wide tracker, or None once it was split (done_path exists) or if there is none."""
+        if os.path.exists(done_path) or not os.path.exists(cls.LEGACY_PATH):
+            return None
+        return cls()  # guild_id None : lit LEGACY_PATH
+
+    def import_legacy(self, legacy, user_ids):
+        """
+        Add the counts of user_ids (the guild's members) from the old process-wide tracker.
+        Returns the number of users imported.
+        """
+        imported = 0
+        for counts, legacy_counts in ((self.message_counts, legacy.message_counts),
+                                      (self.presence_data, legacy.presence_data)):
+            for user_id, hour_counts in legacy_counts.items():
+                if user_id in user_ids:
+                    counts[user_id].update(hour_counts)
+                    imported += counts is self.message_counts
+        self.synthetic_weight = legacy.synthetic_weight
+        self.legacy_imported = True
+        return imported
+
     def generate_synthetic_data(self, days=30):
         """Generate synthetic activity data based on common Discord usage patterns"""
+        import pandas as pd
         now = datetime.now()
         start_date = now - timedelta(days=days)
         dates = pd.date_range(start=start_date, end=now, freq='H')
@@ -110,36 +165,76 @@ class ActivityTracker:
         self.message_counts[user_id][hour_key] += 1
         # Reduce synthetic data weight as we get real data
         self.synthetic_weight = max(0.2, self.synthetic_weight * 0.995)
-        self.save_activity_data()
+        # Une seule ecriture par seconde au plus, quel que soit le nombre de messages
+        persistence.save_later(self.path, self._snapshot)
     
     def add_presence(self, user_id, timestamp, status):
         """Record user presence status"""
         hour_key = timestamp.replace(minute=0, second=0, microsecond=0)
         if status in [discord.Status.online, discord.Status.idle]:
             self.presence_data[user_id][hour_key] += 1
-        self.save_activity_data()
+        persistence.save_later(self.path, self._snapshot)
     
+    def clear(self):
+        """Drop all recorded activity"""
+        self.message_counts.clear()
+        self.presence_data.clear()
+
+    def memory_bytes(self):
+        """Rough estimate of the memory held by the counters"""
+        entries = sum(len(h) for h in self.message_counts.values()) + \
+            sum(len(h) for h in self.presence_data.values())
+        return 200 * entries
+
+    def hour_of_week_profile(self, user_ids):
+        """
+        (users, 168) message activity by UTC hour of the week, scaled to [0, 1] for
+        each user. Users without messages get a neutral 0.5.
+        """
+        profile = np.full((len(user_ids), 168), 0.5)
+        for row, user_id in enumerate(user_ids):
+            counts = self.message_counts.get(user_id)
+            if not counts:
+                continue
+            histogram = np.zeros(168)
+            for hour_key, count in counts.items():
+                utc = hour_key.astimezone(timezone.utc)
+                histogram[utc.weekday() * 24 + utc.hour] += count
+            profile[row] = histogram / histogram.max()
+        return profile
+
+    def activity_stats(self):
+        """Return (total messages, tracked users, messages per hour of day)"""
+        hour_activity = defaultdict(int)
+        for user_msgs in self.message_counts.values():
+            for timestamp, count in user_msgs.items():
+                hour_activity[timestamp.hour] += count
+        return sum(hour_activity.values()), len(self.message_counts), hour_activity
+
+    def _activity_score(self, hour_key):
+        """Activity score (0-1) of the server for one hour"""
+        total_messages = sum(self.message_counts[user_id][hour_key] 
+                           for user_id in self.message_counts)
+        total_presence = sum(self.presence_data[user_id][hour_key] 
+                           for user_id in self.presence_data)
+        
+        # Normalize and combine scores
+        message_score = min(1.0, total_messages / max(1, len(self.message_counts)))
+        presence_score = min(1.0, total_presence / max(1, len(self.presence_data)))
+        return 0.7 * message_score + 0.3 * presence_score
+
     def get_hybrid_activity_data(self, days_back=30):
         """Combine synthetic and real activity data"""
+        import pandas as pd
         # Get real activity data
         now = datetime.now()
         start_date = now - timedelta(days=days_back)
         
         real_data = []
         for hour_key in pd.date_range(start=start_date, end=now, freq='H'):
-            total_messages = sum(self.message_counts[user_id][hour_key] 
-                               for user_id in self.message_counts)
-            total_presence = sum(self.presence_data[user_id][hour_key] 
-                               for user_id in self.presence_data)
-            
-            # Normalize and combine scores
-            message_score = min(1.0, total_messages / max(1, len(self.message_counts)))
-            presence_score = min(1.0, total_presence / max(1, len(self.presence_data)))
-            activity_score = (0.7 * message_score + 0.3 * presence_score)
-            
             real_data.append({
                 'ds': hour_key,
-                'y': activity_score
+                'y': self._activity_score(hour_key)
             })
         
         real_df = pd.DataFrame(real_data)
@@ -157,21 +252,237 @@ class ActivityTracker:
         
         return combined_df
 
+class SketchActivityTracker(ActivityTracker):
+    """
+    Approximate activity tracker with bounded memory, for very high-traffic guilds.
+
+    Over a rolling window of `days` it keeps:
+    - exact message and presence totals per hour (days * 24 integers);
+    - one CountMinSketch per day for per-user hourly message volume;
+    - one HyperLogLog per hour for distinct active users, and one per day (messages and
+      presence) merged on demand into the window counts;
+    - the RECENT_USERS most recently active user ids, the candidates of per-user scoring.
+    Per-user volumes are overestimated by at most 0.27% of the day's messages
+    (probability >= 98%), distinct user counts have a ~6.5% standard error
+    (~3.3% for the daily sketches, see utils/sketches.py). Data is saved by the caller,
+    not on every message.
+    """
+    approximate = True
+    RECENT_USERS = 256
+
+    def __init__(self, guild_id, days=30, data_dir='data/activity_sketches'):
+        self.guild_id = guild_id
+        self.days = days
+        self.path = os.path.join(data_dir, f"{guild_id}.json")
+        self.synthetic_weight = 1.0
+        self.clear()
+        self.load_activity_data()
+
+    def clear(self):
+        self.message_totals = {}   # hour index -> messages
+        self.presence_totals = {}  # hour index -> presence samples
+        self.daily_volume = {}     # day index -> CountMinSketch of (user_id, hour index)
+        self.hourly_users = {}     # hour index -> HyperLogLog of active user ids
+        self.daily_users = {}      # day index -> HyperLogLog of user ids who sent a message
+        self.daily_presence_users = {}  # day index -> HyperLogLog of user ids seen online
+        self.recent_users = OrderedDict()  # user id -> last hour index, RECENT_USERS au plus
+        self.latest_day = None
+        self._window_counts = None
+
+    @staticmethod
+    def _hour_index(timestamp):
+        if hasattr(timestamp, 'to_pydatetime'):
+            timestamp = timestamp.to_pydatetime()
+        return int(timestamp.timestamp() // 3600)
+
+    def _prune(self, hour):
+        # La fenetre couvre exactement les `days` derniers jours, aujourd'hui compris
+        oldest_day = hour // 24 - self.days + 1
+        oldest_hour = oldest_day * 24
+        for table in (self.message_totals, self.presence_totals, self.hourly_users):
+            for key in [k for k in table if k < oldest_hour]:
+                del table[key]
+        for table in (self.daily_volume, self.daily_users, self.daily_presence_users):
+            for key in [k for k in table if k < oldest_day]:
+                del table[key]
+        for user_id in [u for u, last in self.recent_users.items() if last < oldest_hour]:
+            del self.recent_users[user_id]
+
+    def _advance(self, hour):
+        """Rotate the window when a new day starts (the daily sketches are the unit of expiry)."""
+        self._window_counts = None
+        if self.latest_day is None or hour // 24 > self.latest_day:
+            self.latest_day = hour // 24
+            self._prune(hour)
+
+    def add_message(self, user_id, timestamp):
+        """Record a message being sent"""
+        hour = self._hour_index(timestamp)
+        self._advance(hour)
+        self.hourly_users.setdefault(hour, HyperLogLog()).add(user_id)
+        self.message_totals[hour] = self.message_totals.get(hour, 0) + 1
+        self.daily_volume.setdefault(hour // 24, CountMinSketch()).add((user_id, hour))
+        self.daily_users.setdefault(hour // 24, HyperLogLog(precision=10)).add(user_id)
+        self.recent_users[user_id] = max(hour, self.recent_users.pop(user_id, hour))
+        if len(self.recent_users) > self.RECENT_USERS:
+            self.recent_users.popitem(last=False)
+        self.synthetic_weight = max(0.2, self.synthetic_weight * 0.995)
+
+    def add_presence(self, user_id, timestamp, status):
+        """Record user presence status"""
+        if status in [discord.Status.online, discord.Status.idle]:
+            hour = self._hour_index(timestamp)
+            self._advance(hour)
+            self.presence_totals[hour] = self.presence_totals.get(hour, 0) + 1
+            self.daily_presence_users.setdefault(hour // 24, HyperLogLog(precision=10)).add(user_id)
+
+    def window_counts(self):
+        """(distinct users who sent a message, distinct users seen online) over the window"""
+        if self._window_counts is None:
+            # Union des sketches quotidiens : les jours sortis de la fenetre ne comptent plus
+            counts = []
+            for daily in (self.daily_users, self.daily_presence_users):
+                window = HyperLogLog(precision=10)
+                for sketch in daily.values():
+                    window.merge(sketch)
+                counts.append(window.count())
+            self._window_counts = tuple(counts)
+        return self._window_counts
+
+    def message_volume(self, user_id, hour_key):
+        """Approximate number of messages sent by a user during one hour"""
+        hour = hour_key if isinstance(hour_key, int) else self._hour_index(hour_key)
+        sketch = self.daily_volume.get(hour // 24)
+        return sketch.estimate((user_id, hour)) if sketch else 0
+
+    def distinct_users(self, hour_key):
+        """Approximate number of distinct users who sent a message during one hour"""
+        sketch = self.hourly_users.get(self._hour_index(hour_key))
+        return sketch.count() if sketch else 0
+
+    def estimate_active_users(self, time):
+        """
+        (active users, {user_id: score}) at the same hour in previous weeks of the window.
+        The count comes from the hourly HyperLogLogs; the scores, average messages per week
+        at that hour, from the count-min sketches for the recently active users.
+        """
+        weeks = [time - timedelta(weeks=week) for week in range(1, self.days // 7 + 1)]
+        if not weeks:
+            return 0, {}
+        active = round(sum(self.distinct_users(when) for when in weeks) / len(weeks))
+        hours = [self._hour_index(when) for when in weeks]
+        scores = {}
+        for user_id in self.recent_users:
+            volume = sum(self.message_volume(user_id, hour) for hour in hours) / len(hours)
+            if volume > 0:
+                scores[user_id] = volume
+        return active, scores
+
+    def hour_of_week_profile(self, user_ids):
+        """
+        (users, 168) message activity by UTC hour of the week, scaled to [0, 1] for each
+        user, from the count-min sketches. Users without messages get a neutral 0.5.
+        """
+        profile = np.full((len(user_ids), 168), 0.5)
+        # Seules les heures avec des messages sont interrogees (au plus days * 24)
+        hours = [hour for hour, total in self.message_totals.items() if total]
+        slots = [datetime.fromtimestamp(hour * 3600, timezone.utc) for hour in hours]
+        slots = [slot.weekday() * 24 + slot.hour for slot in slots]
+        for row, user_id in enumerate(user_ids):
+            histogram = np.zeros(168)
+            for hour, slot in zip(hours, slots):
+                histogram[slot] += self.message_volume(user_id, hour)
+            if histogram.any():
+                profile[row] = histogram / histogram.max()
+        return profile
+
+    def activity_stats(self):
+        hour_activity = defaultdict(int)
+        for hour, count in self.message_totals.items():
+            hour_activity[datetime.fromtimestamp(hour * 3600).hour] += count
+        return sum(self.message_totals.values()), self.window_counts()[0], hour_activity
+
+    def _activity_score(self, hour_key):
+        hour = self._hour_index(hour_key)
+        message_users, presence_users = self.window_counts()
+        message_score = min(1.0, self.message_totals.get(hour, 0) / max(1, message_users))
+        presence_score = min(1.0, self.presence_totals.get(hour, 0) / max(1, presence_users))
+        return 0.7 * message_score + 0.3 * presence_score
+
+    def memory_bytes(self):
+        return (
+            sum(sketch.memory_bytes() for sketch in self.daily_volume.values())
+            + sum(sketch.memory_bytes() for sketch in self.hourly_users.values())
+            + sum(sketch.memory_bytes() for sketch in self.daily_users.values())
+            + sum(sketch.memory_bytes() for sketch in self.daily_presence_users.values())
+            + 16 * (len(self.message_totals) + len(self.presence_totals) + len(self.recent_users))
+        )
+
+    def save_activity_data(self):
+        """Save the sketches to data/activity_sketches/<guild_id>.json."""
+        data = {
+            'message_totals': self.message_totals,
+            'presence_totals': self.presence_totals,
+            'daily_volume': {day: sketch.to_dict() for day, sketch in self.daily_volume.items()},
+            'hourly_users': {hour: sketch.to_dict() for hour, sketch in self.hourly_users.items()},
+            'daily_users': {day: sketch.to_dict() for day, sketch in self.daily_users.items()},
+            'daily_presence_users': {day: sketch.to_dict() for day, sketch in self.daily_presence_users.items()},
+            'recent_users': list(self.recent_users.items()),
+            'synthetic_weight': self.synthetic_weight
+        }
+        persistence.save_json(self.path, data)
+
+    def load_activity_data(self):
+        """Load the sketches from data/activity_sketches/<guild_id>.json."""
+        try:
+            data = persistence.load_json(self.path)
+            self.message_totals = {int(k): v for k, v in data.get('message_totals', {}).items()}
+            self.presence_totals = {int(k): v for k, v in data.get('presence_totals', {}).items()}
+            self.daily_volume = {
+                int(k): CountMinSketch.from_dict(v) for k, v in data.get('daily_volume', {}).items()
+            }
+            self.hourly_users = {
+                int(k): HyperLogLog.from_dict(v) for k, v in data.get('hourly_users', {}).items()
+            }
+            self.daily_users = {
+                int(k): HyperLogLog.from_dict(v) for k, v in data.get('daily_users', {}).items()
+            }
+            self.daily_presence_users = {
+                int(k): HyperLogLog.from_dict(v) for k, v in data.get('daily_presence_users', {}).items()
+            }
+            self.recent_users = OrderedDict((int(u), hour) for u, hour in data.get('recent_users', []))
+            hours = list(self.message_totals) + list(self.presence_totals)
+            self.latest_day = max(hours) // 24 if hours else None
+            # Anciens fichiers : un seul sketch pour toute la fenetre, rattache au dernier jour
+            for old, daily in (('window_users', self.daily_users),
+                               ('window_presence_users', self.daily_presence_users)):
+                if old in data and self.latest_day is not None and not daily:
+                    daily[self.latest_day] = HyperLogLog.from_dict(data[old])
+            self._window_counts = None
+            self.synthetic_weight = data.get('synthetic_weight', 1.0)
+        except Exception as e:
+            print(f"Error loading activity sketches for guild {self.guild_id}: {e}, starting fresh.")
+
 class EventTimeSuggester:
+    # Rough size of a fitted Prophet model, for the per-guild memory budget
+    MODEL_MEMORY_ESTIMATE = 5 * 1024 * 1024
+    SUGGESTION_CACHE_TTL = timedelta(minutes=30)
+    # Soft free/busy constraint: a slot where every invitee is busy loses this share of the score range
+    BUSY_PENALTY = 1.0
+
     def __init__(self, activity_tracker):
-        self.model = Prophet(
-            yearly_seasonality=True,
-            weekly_seasonality=True,
-            daily_seasonality=True,
-            interval_width=0.95,
-            changepoint_prior_scale=0.05,
-            seasonality_prior_scale=10.0
-        )
+        self.model = None  # cree a l'entrainement, a la premiere suggestion
         self.activity_tracker = activity_tracker
         self.last_training = None
+        self.suggestion_cache = {}
+
+    def memory_bytes(self):
+        model = self.MODEL_MEMORY_ESTIMATE if self.last_training else 0
+        return model + self.activity_tracker.memory_bytes()
     
     def train_model(self):
         """Train the model using hybrid activity data"""
+        from prophet import Prophet
         df = self.activity_tracker.get_hybrid_activity_data()
         if len(df) > 0:
             self.model = Prophet(
@@ -179,34 +490,73 @@ class EventTimeSuggester:
                 weekly_seasonality=True,
                 daily_seasonality=True
             )
+            started = perf_counter()
             self.model.fit(df)
+            metrics.MODEL_TRAIN_SECONDS.observe(perf_counter() - started)
             self.last_training = datetime.now()
+            self.suggestion_cache.clear()
         
-    def get_time_suggestions(self, start_date=None, num_suggestions=3):
-        """Get suggested meeting times based on hybrid activity patterns"""
+    def get_time_suggestions(self, start_date=None, num_suggestions=3, busy=None, busy_mode='soft',
+                             duration=timedelta(hours=1)):
+        """
+        Get suggested meeting times based on hybrid activity patterns.
+
+        busy is an optional list of IntervalSet (one per invitee calendar, None if unreadable).
+        With busy_mode 'hard' slots where an invitee is busy are dropped; with 'soft' they are
+        ranked lower, in proportion to the share of busy invitees.
+        """
+        import pandas as pd
         if (self.last_training is None or 
             datetime.now() - self.last_training > timedelta(hours=6)):
             self.train_model()
             
         if start_date is None:
             start_date = datetime.now()
-            
-        future_dates = pd.date_range(
-            start=start_date,
-            end=start_date + timedelta(days=7),
-            freq='30min'
-        )
-        future_df = pd.DataFrame({'ds': future_dates})
-        
-        forecast = self.model.predict(future_df)
-        best_times = forecast.sort_values('yhat', ascending=False)
-        
-        # Filter for reasonable hours (8 AM - 10 PM)
-        best_times = best_times[
-            (best_times.ds.dt.hour >= 8) & 
-            (best_times.ds.dt.hour <= 22)
-        ]
-        
+
+        # Start on the next half hour, so close requests share a cache entry
+        start_date = start_date.replace(second=0, microsecond=0)
+        if start_date.minute % 30:
+            start_date += timedelta(minutes=30 - start_date.minute % 30)
+
+        cache_key = (start_date, num_suggestions)
+        cached = self.suggestion_cache.get(cache_key)
+        if busy is None and cached and datetime.now() - cached[0] < self.SUGGESTION_CACHE_TTL:
+            return cached[1]
+
+        # La prevision ne depend pas des invites : elle est gardee en cache a part
+        cached = self.suggestion_cache.get(('forecast', start_date))
+        if cached and datetime.now() - cached[0] < self.SUGGESTION_CACHE_TTL:
+            best_times = cached[1]
+        else:
+            future_dates = pd.date_range(
+                start=start_date,
+                end=start_date + timedelta(days=7),
+                freq='30min'
+            )
+            future_df = pd.DataFrame({'ds': future_dates})
+
+            started = perf_counter()
+            forecast = self.model.predict(future_df)
+            metrics.MODEL_PREDICT_SECONDS.observe(perf_counter() - started)
+            best_times = forecast.sort_values('yhat', ascending=False)
+
+            # Filter for reasonable hours (8 AM - 10 PM)
+            best_times = best_times[
+                (best_times.ds.dt.hour >= 8) &
+                (best_times.ds.dt.hour <= 22)
+            ]
+            self.suggestion_cache[('forecast', start_date)] = (datetime.now(), best_times)
+
+        readable = [intervals for intervals in busy or [] if intervals is not None]
+        if readable:
+            counts = np.array(busy_counts(best_times.ds.dt.to_pydatetime(), duration, readable))
+            if busy_mode == 'hard':
+                best_times = best_times[counts == 0]
+            else:
+                spread = (best_times.yhat.max() - best_times.yhat.min()) or 1.0
+                rank = best_times.yhat - self.BUSY_PENALTY * spread * counts / len(readable)
+                best_times = best_times.assign(rank=rank).sort_values('rank', ascending=False)
+
         suggestions = []
         for _, row in best_times.head(num_suggestions).iterrows():
             time = row['ds'].to_pydatetime()
@@ -223,7 +573,9 @@ class EventTimeSuggester:
                 synthetic_weight,
                 user_scores
             ))
-            
+
+        if busy is None:
+            self.suggestion_cache[cache_key] = (datetime.now(), suggestions)
         return suggestions
     
     def _get_active_users_count(self, time):
@@ -236,6 +588,9 @@ class EventTimeSuggester:
         3. Time of day patterns
         4. Weighted scoring
         """
+        if self.activity_tracker.approximate:
+            return self.activity_tracker.estimate_active_users(time)
+
         hour_key = time.replace(minute=0, second=0, microsecond=0)
         day_of_week = time.weekday()
         hour = time.hour
@@ -297,35 +652,211 @@ async def setup(bot):
     await bot.add_cog(TimeManagementCog(bot))
 
 class TimeManagementCog(commands.Cog):
+    NOTIFICATION_TTL = 3600  # 1 hour TTL for sent notifications
+
     def __init__(self, bot):
         self.bot = bot
-        self.sent_notifications = set()
-        self.calendar_manager = GoogleCalendarManager()
-        self.calendar_manager.authenticate()
-        self.activity_tracker = ActivityTracker()
-        self.time_suggester = EventTimeSuggester(self.activity_tracker)
+        # Notifications deja traitees (cle -> heure), gardees NOTIFICATION_TTL secondes
+        self.sent_notifications = OrderedDict()
+        self.last_lease_purge = datetime.now(timezone.utc)
+        # Horloge des rappels, remplacee par une horloge virtuelle dans benchmarks/reminder_load.py
+        self.clock = lambda: datetime.now(timezone.utc)
+        # Reveille la boucle des rappels quand de nouveaux rappels sont ajoutes
+        self.reminder_wakeup = asyncio.Event()
+        self.config = jeson.parse_json('./data/config.json')
+        # Plusieurs instances (actif/attente) : seule celle qui detient le bail envoie les rappels
+        cluster = cluster_from_env()
+        self.reminder_lease = LeaderLease(
+            'reminder-dispatcher' + (f"-{cluster.cluster_id}" if cluster else ''),
+            ttl=self.config.get('REMINDER_LEASE_TTL_SECONDS', 10)
+        )
+        self.lease_task = None
+        # Retard d'envoi des rappels (p50/p95/p99 par serveur et salon), alertes dans ADMIN_CHANNEL_ID
+        self.delivery_slo = DeliverySLO(
+            target=self.config.get('REMINDER_LAG_TARGET_SECONDS', 5),
+            min_samples=self.config.get('REMINDER_SLO_MIN_SAMPLES', 20),
+            clock=lambda: self.clock().timestamp(),
+        )
+        self.admin_channel_id = self.config.get('ADMIN_CHANNEL_ID')
+        # Serveurs dont l'activite est suivie (None = tous), voir utils/gateway.py
+        self.activity_guilds = tracked_guilds(self.config)
+        # Charges en arriere-plan depuis cog_load : la connexion au gateway ne les attend pas
+        self.state_ready = asyncio.Event()     # emails, fuseaux horaires, evenements Calendar, reglages des serveurs
+        self.calendar_ready = asyncio.Event()  # client Google importe et authentifie
+        # Client Calendar non bloquant, importe et authentifie par start_calendar
+        self.calendar_manager = None
+        # Rappel -> evenement Calendar, les changements sont fusionnes puis envoyes en batch
+        self.calendar_sync = None
+        self.freebusy = FreeBusyCache(None, ttl=self.config.get('FREEBUSY_TTL_SECONDS', 300))
+        self.time_manager = None
+        # Emails Google des membres, en memoire, avec l'index role -> utilisateurs
+        self.emails = None
+        # Reglages par serveur en base (shared_data), une ligne par serveur : chaque processus n'ecrit que les siens
+        self.guild_settings_store = SharedStore('guild_settings')
+        self.guild_settings = {}  # charges par load_state
+
+        # Activity, models and suggestion caches are kept per guild, within a memory budget
+        self.guild_states = GuildStateCache(
+            loader=self.load_guild_state,
+            save=lambda guild_id, suggester: suggester.activity_tracker.save_activity_data(),
+            size=lambda suggester: suggester.memory_bytes(),
+            max_guilds=self.config.get('GUILD_CACHE_MAX_GUILDS', 200),
+            max_bytes=self.config.get('GUILD_CACHE_MAX_MB', 512) * 1024 * 1024
+        )
         self.track_activity.start()
 
     def cog_unload(self):
-        self.activity_tracker.cancel()
+        self.track_activity.cancel()
+        # Rend le bail (dans run) : l'instance en attente reprend les rappels sans attendre l'expiration
+        if self.lease_task:
+            self.lease_task.cancel()
+        self.flush_calendar.cancel()
+        self.guild_settings_store.stop()
+        self.guild_states.save_all()
+        if self.calendar_manager:
+            self.calendar_manager.close()
+
+    async def load_state(self):
+        """Load the cog's data off the event loop, then let commands and activity tracking run (state_ready)."""
+        def load():
+            # En cluster, chaque processus garde les evenements Calendar de ses propres rappels
+            sync_file = calendar_sync_file(cluster_from_env())
+            return (get_directory(), TimeManagement(), CalendarSync(self.calendar_manager, sync_file),
+                    self.guild_settings_store.load('data/guild_settings.json'))
+        self.emails, self.time_manager, self.calendar_sync, self.guild_settings = await asyncio.to_thread(load)
+        # Changements faits par les autres processus (cluster, instance en attente)
+        self.emails.follow()
+        self.time_manager.follow()
+        self.guild_settings_store.follow(self.guild_settings_changed)
+        self.state_ready.set()
+        self.flush_calendar.start()
+
+    def guild_settings_changed(self, guild_id, settings):
+        if self.guild_settings.get(guild_id) == settings:
+            return  # notre propre ecriture, relue
+        if settings is None:
+            self.guild_settings.pop(guild_id, None)
+        else:
+            self.guild_settings[guild_id] = settings
+        # Recharge avec le nouveau mode d'activite au prochain usage
+        self.guild_states.discard(int(guild_id))
+
+    async def start_calendar(self):
+        """Import and authenticate the Google Calendar client in the background (calendar_ready)."""
+        try:
+            module = await asyncio.to_thread(importlib.import_module, 'utils.google_calendar')
+            self.calendar_manager = module.GoogleCalendarManager(
+                api_endpoint=self.config.get('CALENDAR_API_ENDPOINT'),
+                max_workers=self.config.get('CALENDAR_MAX_WORKERS', 4)
+            )
+            await self.calendar_manager.authenticate_async()
+            await self.state_ready.wait()
+            self.calendar_sync.calendar_manager = self.freebusy.calendar_manager = self.calendar_manager
+            self.calendar_ready.set()
+        except Exception as e:
+            print(f"Error while starting the Google Calendar client: {e}")
+
+    async def cog_before_invoke(self, ctx):
+        # Les commandes arrivees pendant le chargement attendent qu'il se termine
+        await self.state_ready.wait()
+
+    def load_guild_state(self, guild_id):
+        """
+        Build the time suggester of a guild. Guilds with activity_mode "sketch"
+        use a bounded-memory SketchActivityTracker, the others exact counters.
+        """
+        settings = self.guild_settings.get(str(guild_id), {})
+        if settings.get('activity_mode') == 'sketch':
+            tracker = SketchActivityTracker(guild_id)
+        else:
+            tracker = ActivityTracker(guild_id)
+        return EventTimeSuggester(tracker)
+
+    async def migrate_legacy_activity(self):
+        """
+        Split data/activity_data.json, the activity file shared by all guilds before they were
+        split, once: each tracked guild gets the counts of its own members. A guild whose member
+        list cannot be loaded (no members intent) is left out and the split is retried at the next
+        start: its counts cannot be attributed, and copying every user would mix the guilds again.
+        """
+        await self.bot.wait_until_ready()
+        await self.state_ready.wait()
+        # Hors cluster l'ancien fichier est renomme ; en cluster chaque processus marque ses propres serveurs
+        cluster = cluster_from_env()
+        done_path = cluster_file(ActivityTracker.LEGACY_PATH, cluster) + '.migrated'
+        legacy = await asyncio.to_thread(ActivityTracker.load_legacy, done_path)
+        if legacy is None:
+            return
+        skipped = 0
+        for guild in self.bot.guilds:
+            if not self.tracks_activity(guild):
+                continue
+            await ensure_chunked(guild, self.bot.intents)
+            if not guild.chunked:
+                skipped += 1
+                continue
+            tracker = await self.get_tracker(guild, touch=False)
+            if tracker.approximate or tracker.legacy_imported:
+                continue
+            imported = tracker.import_legacy(legacy, {member.id for member in guild.members})
+            tracker.save_activity_data()
+            print(f"Seeded activity of guild {guild.id} from {ActivityTracker.LEGACY_PATH}: {imported} members")
+        if skipped:
+            print(f"{ActivityTracker.LEGACY_PATH} kept: member list of {skipped} guilds not loaded")
+            return
+        await persistence.wait_idle()
+        if cluster is None:
+            await asyncio.to_thread(os.replace, ActivityTracker.LEGACY_PATH, done_path)
+        else:
+            persistence.save_bytes(done_path, b'')
+
+    async def get_suggester(self, guild, touch=True):
+        """Time suggester of a guild (id 0 for direct messages), loaded off the event loop if needed"""
+        await self.state_ready.wait()  # le mode de suivi du serveur vient de ses reglages
+        return await self.guild_states.get_async(guild.id if guild else 0, touch=touch)
+
+    async def get_tracker(self, guild, touch=True):
+        return (await self.get_suggester(guild, touch)).activity_tracker
+
+    def tracks_activity(self, guild):
+        return self.activity_guilds is None or (guild is not None and guild.id in self.activity_guilds)
     
+    @tasks.loop(seconds=10)
+    async def flush_calendar(self):
+        """Send the queued Calendar changes, coalesced, in batches."""
+        try:
+            await self.calendar_sync.flush()
+        except Exception as e:
+            print(f"Error while syncing Google Calendar: {e}")
+
     @tasks.loop(minutes=5)
     async def track_activity(self):
         """Track user activity periodically"""
         for guild in self.bot.guilds:
+            if not self.tracks_activity(guild) or not self.bot.intents.presences:
+                continue
+            # Les membres d'un serveur suivi sont charges a son premier echantillonnage
+            await ensure_chunked(guild, self.bot.intents)
+            # Presence sampling alone does not keep a guild in memory
+            tracker = await self.get_tracker(guild, touch=False)
             for member in guild.members:
-                self.activity_tracker.add_presence(
+                tracker.add_presence(
                     member.id,
                     datetime.now(),
                     member.status
                 )
+        # Sketch trackers are saved here instead of on every message
+        for _, suggester in self.guild_states.items():
+            if suggester.activity_tracker.approximate:
+                suggester.activity_tracker.save_activity_data()
+        self.guild_states.evict_idle(max_idle_seconds=6 * 3600)
 
     @commands.Cog.listener()
     async def on_message(self, message):
         """Track message activity"""
-        if message.author.bot:
+        if message.author.bot or not self.tracks_activity(message.guild):
             return
-        self.activity_tracker.add_message(
+        (await self.get_tracker(message.guild)).add_message(
             message.author.id,
             message.created_at
         )
@@ -334,7 +865,17 @@ class TimeManagementCog(commands.Cog):
     name="suggest_times",
     description="🕒 Get smart suggestions for the best meeting times"
 )
-    async def suggest_times(self, ctx, start_date: str = None):
+    @app_commands.describe(
+        start_date="YYYY-MM-DD, default: now",
+        attendees="Users and/or roles whose Google calendars are checked (registered emails)",
+        busy_mode="soft: rank busy slots lower, hard: never suggest them, off: ignore calendars"
+    )
+    @app_commands.choices(busy_mode=[
+        app_commands.Choice(name="soft", value="soft"),
+        app_commands.Choice(name="hard", value="hard"),
+        app_commands.Choice(name="off", value="off"),
+    ])
+    async def suggest_times(self, ctx, start_date: str = None, attendees: str = None, busy_mode: str = "soft"):
         """Get suggestions for optimal meeting times."""
         try:
             if start_date:
@@ -346,9 +887,33 @@ class TimeManagementCog(commands.Cog):
             else:
                 start_dt = datetime.now()
 
-            suggestions = self.time_suggester.get_time_suggestions(start_dt)
-        
+            # Agendas Google des invites : une requete freebusy groupee, mise en cache
+            busy, unregistered, calendar_pending = None, 0, False
+            if attendees and busy_mode != "off" and ctx.guild:
+                await ensure_chunked(ctx.guild, self.bot.intents)
+                emails, missing = self.emails.emails_for_users(self.resolve_invitees(ctx, attendees))
+                unregistered = len(missing)
+                calendar_pending = bool(emails) and not self.calendar_ready.is_set()
+                if emails and not calendar_pending:
+                    start_utc = to_utc(max(start_dt, datetime.now()))
+                    busy = list((await self.freebusy.get(list(emails), start_utc, start_utc + timedelta(days=8))).values())
+
+            suggestions = (await self.get_suggester(ctx.guild)).get_time_suggestions(
+                start_dt, busy=busy, busy_mode=busy_mode
+            )
+            readable = [intervals for intervals in busy or [] if intervals is not None]
+
             response = "📊 **Smart meeting time suggestions:**\n\n"
+            if calendar_pending:
+                response += "📆 Google Calendar is still connecting, calendars were not checked\n\n"
+            if busy is not None:
+                response += (
+                    f"📆 Checked {len(readable)} Google calendars ({busy_mode} constraint)"
+                    + (f", {unregistered} invitees without a registered email" if unregistered else "")
+                    + "\n\n"
+                )
+            if not suggestions:
+                response += "No slot where every invitee is free this week."
             for time, score, active_users, synthetic_weight, user_scores in suggestions:
                 confidence = int(score * 100)
                 data_source = (f"({int(synthetic_weight * 100)}% pre-defined patterns, "
@@ -363,8 +928,12 @@ class TimeManagementCog(commands.Cog):
                 f"👥 Typically active users: {active_users}\n"
                 f"💫 Top active members: {top_users_str}\n"
                 f"📊 Activity score: {confidence}%\n"
-                f"📈 Based on: {data_source}\n\n"
+                f"📈 Based on: {data_source}\n"
                 )
+                if readable:
+                    busy_count = busy_counts([time], timedelta(hours=1), readable)[0]
+                    response += f"🗓️ Busy in their calendar: {busy_count}/{len(readable)}\n"
+                response += "\n"
         
             await ctx.send(response)
         
@@ -381,19 +950,15 @@ class TimeManagementCog(commands.Cog):
     async def view_activity(self, ctx):
         """View current server activity patterns and data weights."""
         try:
+            tracker = await self.get_tracker(ctx.guild)
+
             # Get current weights and activity data
-            synthetic_weight = self.activity_tracker.synthetic_weight
+            synthetic_weight = tracker.synthetic_weight
             real_weight = 1 - synthetic_weight
             
-            # Get basic statistics
-            total_messages = sum(len(msgs) for msgs in self.activity_tracker.message_counts.values())
-            total_users = len(self.activity_tracker.message_counts)
-            
-            # Get most active hours
-            hour_activity = defaultdict(int)
-            for user_msgs in self.activity_tracker.message_counts.values():
-                for timestamp in user_msgs:
-                    hour_activity[timestamp.hour] += user_msgs[timestamp]
+            # Get basic statistics and most active hours
+            total_messages, total_users, hour_activity = tracker.activity_stats()
+            approx = "≈" if tracker.approximate else ""
                     
             most_active_hours = sorted(
                 hour_activity.items(),
@@ -408,7 +973,7 @@ class TimeManagementCog(commands.Cog):
                 f"Server activity data: {int(real_weight * 100)}%\n\n"
                 f"**Statistics**\n"
                 f"Total messages tracked: {total_messages}\n"
-                f"Active users tracked: {total_users}\n\n"
+                f"Active users tracked: {approx}{total_users}\n\n"
                 f"**Most Active Hours**\n"
             )
             
@@ -430,9 +995,10 @@ class TimeManagementCog(commands.Cog):
         """Clear all stored activity data and reset weights."""
         try:
             # Reset all activity data
-            self.activity_tracker.message_counts.clear()
-            self.activity_tracker.presence_data.clear()
-            self.activity_tracker.synthetic_weight = 1.0
+            suggester = await self.get_suggester(ctx.guild)
+            suggester.activity_tracker.clear()
+            suggester.activity_tracker.synthetic_weight = 1.0
+            suggester.suggestion_cache.clear()
             
             await ctx.send("✅ Activity data has been cleared and weights reset to default.")
             
@@ -455,7 +1021,9 @@ class TimeManagementCog(commands.Cog):
                 await ctx.send("❌ Weight must be between 0 and 100.", ephemeral=True)
                 return
                 
-            self.activity_tracker.synthetic_weight = synthetic_weight / 100.0
+            suggester = await self.get_suggester(ctx.guild)
+            suggester.activity_tracker.synthetic_weight = synthetic_weight / 100.0
+            suggester.suggestion_cache.clear()
             
             response = (
                 "⚖️ **Weights Updated**\n\n"
@@ -495,7 +1063,7 @@ class TimeManagementCog(commands.Cog):
                 return
                 
             # Get suggestions near the specified time
-            suggestions = self.time_suggester.get_time_suggestions(start_time)
+            suggestions = (await self.get_suggester(ctx.guild)).get_time_suggestions(start_time)
             
             response = (
                 f"🔄 **Recurring Meeting: {title}**\n\n"
@@ -524,11 +1092,131 @@ class TimeManagementCog(commands.Cog):
             await ctx.send("❌ An error occurred while scheduling recurring meeting.", ephemeral=True)
             print(f"Error in schedule_recurring: {e}")
 
+    def resolve_invitees(self, ctx, attendees: str):
+        """User ids behind a string of user mentions, role mentions and/or 'everyone' (bots excluded)."""
+        invitees = set()
+        for mention in attendees.split():
+            if mention.lstrip('@').lower() == 'everyone':
+                invitees.update(m.id for m in ctx.guild.members if not m.bot)
+            elif mention.startswith('<@&'):
+                role = ctx.guild.get_role(int(''.join(filter(str.isdigit, mention))))
+                if role:
+                    invitees.update(m.id for m in role.members if not m.bot)
+            else:
+                user_id = ''.join(filter(str.isdigit, mention))
+                if user_id:
+                    invitees.add(int(user_id))
+        return sorted(invitees)
+
+    @commands.hybrid_command(
+        name="find_meeting",
+        description="👥 Find the best slots for a group meeting"
+    )
+    @app_commands.describe(
+        attendees="Users and/or roles to invite",
+        duration="Meeting duration, e.g. 1h or 90m",
+        days="How many days ahead to search (1-28, default 14)",
+        count="Number of slots to suggest (1-10)",
+        min_spacing="Minimum gap between two suggestions, e.g. 2h"
+    )
+    async def find_meeting(self, ctx, attendees: str, duration: str = "1h", days: int = 14,
+                           count: int = 3, min_spacing: str = "2h"):
+        """Suggest slots that maximize expected attendance of the invited members."""
+        try:
+            if not 1 <= days <= 28 or not 1 <= count <= 10:
+                await ctx.send("❌ days must be between 1 and 28, count between 1 and 10.", ephemeral=True)
+                return
+
+            await ensure_chunked(ctx.guild, self.bot.intents)
+            invitees = self.resolve_invitees(ctx, attendees)
+            if not invitees:
+                await ctx.send("❌ No attendees found in your mentions.", ephemeral=True)
+                return
+
+            duration_minutes = int(TimeManagement.parse_relative_time(duration).total_seconds() // 60)
+            spacing_minutes = int(TimeManagement.parse_relative_time(min_spacing).total_seconds() // 60)
+
+            # Disponibilites (AvailabilityCog), fuseaux (TimeManagement), activite (tracker du serveur)
+            availability_cog = self.bot.get_cog('AvailabilityCog')
+            if availability_cog:
+                masks, known = availability_cog.index.masks(invitees)
+            else:
+                masks, known = np.zeros((len(invitees), 672), dtype=bool), np.zeros(len(invitees), dtype=bool)
+            # Decalage de chaque invite a chaque creneau : un changement d'heure dans l'horizon est pris en compte
+            start, candidates = candidate_slots(datetime.now(timezone.utc), days)
+            offsets = self.time_manager.utc_offsets_minutes(invitees, start, candidates, SLOT_MINUTES)
+            activity = (await self.get_tracker(ctx.guild)).hour_of_week_profile(invitees)
+
+            results = solve_meeting_slots(
+                start,
+                duration_minutes,
+                masks,
+                known,
+                offsets,
+                activity,
+                horizon_days=days,
+                top_k=count,
+                min_spacing_minutes=spacing_minutes
+            )
+            if not results:
+                await ctx.send("❌ No suitable slot found for these attendees.", ephemeral=True)
+                return
+
+            response = (
+                f"👥 **Best slots for {len(invitees)} attendees** "
+                f"({int(known.sum())} with availability set)\n\n"
+            )
+            for slot, expected, available in results:
+                timestamp = int(slot.timestamp())
+                response += (
+                    f"📅 <t:{timestamp}:F> (<t:{timestamp}:R>)\n"
+                    f"✅ Available: {available}/{len(invitees)}\n"
+                    f"📊 Expected attendance: {expected:.1f}\n\n"
+                )
+            await ctx.send(response)
+
+        except ValueError as ve:
+            await ctx.send(f"❌ {str(ve)}", ephemeral=True)
+        except Exception as e:
+            await ctx.send("❌ An error occurred while searching meeting slots.", ephemeral=True)
+            print(f"Error in find_meeting: {e}")
+
+    @commands.hybrid_command(
+        name="activity_mode",
+        description="🧮 Choose exact or approximate (sketch) activity tracking for this server"
+    )
+    @commands.has_permissions(administrator=True)
+    @app_commands.describe(
+        mode="exact (per-user counters) or sketch (bounded memory, approximate counts)"
+    )
+    async def activity_mode(self, ctx, mode: str):
+        """Switch this server between exact and sketch-based activity tracking."""
+        try:
+            mode = mode.lower()
+            if mode not in ('exact', 'sketch'):
+                await ctx.send("❌ Invalid mode. Use: exact or sketch", ephemeral=True)
+                return
+
+            settings = self.guild_settings.setdefault(str(ctx.guild.id), {})
+            settings['activity_mode'] = mode
+            self.guild_settings_store.set(ctx.guild.id, settings)
+
+            # Reloaded with the new mode on next use
+            self.guild_states.discard(ctx.guild.id)
+
+            await ctx.send(f"✅ Activity tracking for this server is now **{mode}**.")
+
+        except Exception as e:
+            await ctx.send("❌ An error occurred while changing the activity mode.", ephemeral=True)
+            print(f"Error in activity_mode: {e}")
+
     # Error handlers
     @suggest_times.error
     @view_activity.error
     @clear_activity.error
     @set_weights.error
+    @activity_mode.error
+    @find_meeting.error
     @schedule_recurring.error
     async def command_error(self, ctx, error):
         """Generic error handler for all commands."""
@@ -546,7 +1234,12 @@ class TimeManagementCog(commands.Cog):
         """
         Méthode appelée lorsque le Cog est chargé. Démarre la vérification des rappels.
         """
-        self.bot.loop.create_task(self.check_reminders())
+        # Taches nommees : les blocages de la boucle leur sont attribues (utils/loop_monitor.py)
+        self.lease_task = self.bot.loop.create_task(self.reminder_lease.run(), name='reminder_lease')
+        self.bot.loop.create_task(self.check_reminders(), name='check_reminders')
+        timer.track('time management state', self.load_state())
+        timer.track('google calendar client', self.start_calendar())
+        self.bot.loop.create_task(self.migrate_legacy_activity(), name='migrate_legacy_activity')
 
     async def check_reminders(self):
         """
@@ -554,130 +1247,189 @@ class TimeManagementCog(commands.Cog):
         """
         print("Reminder checker started!")
         await self.bot.wait_until_ready()
-        
-        # Initialize notifications cache with TTL
-        from collections import OrderedDict
-        self.sent_notifications = OrderedDict()
-        NOTIFICATION_TTL = 3600  # 1 hour TTL for sent notifications
-        
-        # Add metrics tracking
-        metrics = {
-            'processed_reminders': 0,
-            'sent_notifications': 0,
-            'errors': 0,
-            'cleanup_operations': 0
-        }
-
+        await self.state_ready.wait()
         while True:
+            if not self.reminder_lease.is_leader:
+                # Instance en attente : une autre envoie les rappels, on reprend des que le bail est a nous
+                await asyncio.sleep(self.reminder_lease.ttl / 5)
+                continue
+            sleep_time = await self.process_reminders()
             try:
-                current_time = datetime.now()
-                reminders = load_reminders()
-                reminders_to_remove = []
-                modified_reminders = []
-
-                # Batch process reminders
-                for reminder in reminders:
-                    try:
-                        # Add reminder status tracking
-                        reminder_status = {
-                            'id': reminder['id'],
-                            'processing_started': datetime.now(),
-                            'notifications_sent': 0,
-                            'errors': []
-                        }
-
-                        reminder_datetime = datetime.fromisoformat(reminder["main_time"])
-                        time_until_reminder = reminder_datetime - current_time
-
-                        # Optimize old reminder cleanup
-                        if time_until_reminder.total_seconds() < -300:  # 5 minutes past
-                            reminders_to_remove.append(reminder)
-                            continue
+                await asyncio.wait_for(self.reminder_wakeup.wait(), timeout=sleep_time)
+            except asyncio.TimeoutError:
+                pass
+            self.reminder_wakeup.clear()
 
-                        # Process reminder times more efficiently
-                        all_times = [(reminder_datetime, 'main')] + [
-                            (datetime.fromisoformat(rt), 'early') 
-                            for rt in reminder.get("reminder_times", [])
-                        ]
+    async def process_reminders(self):
+        """
+        One pass of the reminder checker: send the notifications due now, count the ones
+        too late to send, drop finished reminders. Returns the seconds to wait before the next pass.
+        """
+        # Compteurs et latences exposes par utils/metrics.py (/metrics et /stats)
+        pass_started = perf_counter()
+        reminders = []
+        next_due = None  # secondes avant l'entree de la prochaine notification dans la fenetre d'envoi
+        try:
+            current_time = self.clock()
+            reminders = await load_reminders_async()
+            reminders_to_remove = []
+            modified_reminders = []
 
-                        for check_time, reminder_type in all_times:
-                            time_until = check_time - current_time
-                            seconds_until = time_until.total_seconds()
+            # Batch process reminders
+            for reminder in reminders:
+                try:
+                    # Add reminder status tracking
+                    reminder_status = {
+                        'id': reminder['id'],
+                        'processing_started': datetime.now(),
+                        'notifications_sent': 0,
+                        'errors': []
+                    }
+
+                    reminder_datetime = to_utc(datetime.fromisoformat(reminder["main_time"]))
+                    time_until_reminder = reminder_datetime - current_time
+
+                    # Optimize old reminder cleanup
+                    if time_until_reminder.total_seconds() < -300:  # 5 minutes past
+                        reminders_to_remove.append(reminder)
+                        continue
 
-                            # Skip if too far in future or too old
-                            if seconds_until > 3600:  # More than 1 hour away
-                                continue
-                            if seconds_until < -30:  # More than 30 seconds old
-                                continue
+                    # Process reminder times more efficiently
+                    all_times = [(reminder_datetime, 'main')] + [
+                        (to_utc(datetime.fromisoformat(rt)), 'early') 
+                        for rt in reminder.get("reminder_times", [])
+                    ]
 
-                            notification_key = f"{reminder['id']}_{check_time.isoformat()}"
-                            
-                            # More precise timing window
-                            if -1 <= seconds_until <= 3 and notification_key not in self.sent_notifications:
-                                try:
-                                    await self.send_reminder(reminder, reminder_type == 'main')
-                                    self.sent_notifications[notification_key] = current_time
-                                    reminder_status['notifications_sent'] += 1
-                                    metrics['sent_notifications'] += 1
-                                    
-                                    # Cleanup old notification keys
-                                    while len(self.sent_notifications) > 1000:  # Prevent unlimited growth
-                                        self.sent_notifications.popitem(last=False)
-                                        
-                                except Exception as e:
-                                    reminder_status['errors'].append(str(e))
-                                    metrics['errors'] += 1
-                                    continue
+                    for check_time, reminder_type in all_times:
+                        time_until = check_time - current_time
+                        seconds_until = time_until.total_seconds()
 
-                        # Update reminder if modified
-                        if reminder.get('modified'):
-                            modified_reminders.append(reminder)
-                            
-                        metrics['processed_reminders'] += 1
+                        # Skip if too far in future or too old
+                        if seconds_until > 3600:  # More than 1 hour away
+                            continue
+                        if seconds_until > 3:
+                            next_due = min(next_due or seconds_until - 3, seconds_until - 3)
+                            continue
+                        if seconds_until < -300:
+                            continue
 
-                    except Exception as e:
-                        print(f"Error processing reminder {reminder.get('id', 'unknown')}: {e}")
-                        metrics['errors'] += 1
-                        continue
+                        notification_key = f"{reminder['id']}_{check_time.isoformat()}"
+                        if notification_key in self.sent_notifications:
+                            continue
+                        if seconds_until < -30:
+                            # Trop tard pour l'envoyer : comptee une seule fois comme manquee, si personne ne l'a envoyee
+                            if await asyncio.to_thread(self.reminder_lease.claim, notification_key, reminder['id']):
+                                self.delivery_slo.record_missed(
+                                    reminder.get('guild_id'), None if reminder.get('is_dm') else reminder.get('channel_id'),
+                                    check_time.timestamp()
+                                )
+                                metrics.REMINDER_NOTIFICATIONS.labels('missed').inc()
+                            self.sent_notifications[notification_key] = current_time
+                            continue
 
-                # Batch update reminders
-                if reminders_to_remove or modified_reminders:
-                    new_reminders = [
-                        r for r in reminders 
-                        if r not in reminders_to_remove
-                    ]
-                    
-                    # Update modified reminders
-                    for mod_reminder in modified_reminders:
-                        reminder_index = next(
-                            (i for i, r in enumerate(new_reminders) 
-                            if r['id'] == mod_reminder['id']), 
-                            None
-                        )
-                        if reminder_index is not None:
-                            new_reminders[reminder_index] = mod_reminder
-
-                    save_reminders(new_reminders)
-                    metrics['cleanup_operations'] += 1
-
-                # Cleanup expired notification keys
-                current_time = datetime.now()
-                self.sent_notifications = OrderedDict(
-                    (k, v) for k, v in self.sent_notifications.items()
-                    if (current_time - v).total_seconds() < NOTIFICATION_TTL
-                )
+                        # Echues depuis moins de 30 s : rattrape un tour de boucle manque ou une reprise de bail
+                        if seconds_until <= 3:
+                            dequeued = self.clock().timestamp()
+                            try:
+                                # Reservee en base avant l'envoi : une autre instance ne l'enverra pas aussi
+                                claimed = await asyncio.to_thread(
+                                    self.reminder_lease.claim, notification_key, reminder['id']
+                                )
+                                if not claimed:
+                                    # Deja reservee ailleurs ; si le bail est perdu, le nouveau leader s'en charge
+                                    if self.reminder_lease.is_leader:
+                                        self.sent_notifications[notification_key] = current_time
+                                    metrics.REMINDER_NOTIFICATIONS.labels('claimed_elsewhere').inc()
+                                    continue
+                                delivered = await self.send_reminder(reminder, reminder_type == 'main')
+                                # Accuse de reception : la reponse de Discord au message envoye
+                                acknowledged = self.clock().timestamp()
+                                self.sent_notifications[notification_key] = current_time
+                                channel_id = None if reminder.get('is_dm') else reminder.get('channel_id')
+                                if not delivered:
+                                    self.delivery_slo.record_missed(reminder.get('guild_id'), channel_id, check_time.timestamp())
+                                    metrics.REMINDER_NOTIFICATIONS.labels('failed').inc()
+                                    continue
+                                await asyncio.to_thread(self.reminder_lease.mark_sent, notification_key)
+                                reminder_status['notifications_sent'] += 1
+                                metrics.REMINDER_NOTIFICATIONS.labels('sent').inc()
+                                metrics.REMINDER_LAG.observe(self.delivery_slo.record(
+                                    reminder.get('guild_id'), channel_id, check_time.timestamp(), dequeued, acknowledged
+                                ))
+
+                                # Cleanup old notification keys
+                                while len(self.sent_notifications) > 1000:  # Prevent unlimited growth
+                                    self.sent_notifications.popitem(last=False)
+
+                            except Exception as e:
+                                reminder_status['errors'].append(str(e))
+                                metrics.REMINDER_NOTIFICATIONS.labels('failed').inc()
+                                continue
 
-                # Log metrics periodically
-                if metrics['processed_reminders'] % 100 == 0:
-                    print(f"Reminder Checker Metrics: {metrics}")
+                    # Update reminder if modified
+                    if reminder.get('modified'):
+                        modified_reminders.append(reminder)
+
+                    metrics.REMINDERS_PROCESSED.inc()
+
+                except Exception as e:
+                    print(f"Error processing reminder {reminder.get('id', 'unknown')}: {e}")
+                    metrics.REMINDER_ERRORS.inc()
+                    continue
+
+            # Batch update reminders : relus au moment de sauvegarder, les rappels ajoutes pendant la passe
+            # (commandes, autre instance) ne sont pas ecrases par la liste chargee au debut
+            if reminders_to_remove or modified_reminders:
+                remove_reminders([r['id'] for r in reminders_to_remove], modified_reminders)
+                self.calendar_sync.forget([r['id'] for r in reminders_to_remove])
+                metrics.REMINDERS_REMOVED.inc(len(reminders_to_remove))
+
+            # Cleanup expired notification keys
+            current_time = self.clock()
+            self.sent_notifications = OrderedDict(
+                (k, v) for k, v in self.sent_notifications.items()
+                if (current_time - v).total_seconds() < self.NOTIFICATION_TTL
+            )
 
-            except Exception as e:
-                print(f"Critical error in reminder checker: {e}")
-                metrics['errors'] += 1
+            if (current_time - self.last_lease_purge).total_seconds() > self.NOTIFICATION_TTL:
+                await asyncio.to_thread(self.reminder_lease.purge, 86400)
+                self.last_lease_purge = current_time
 
-            # Adaptive sleep time based on number of active reminders
-            sleep_time = min(30, max(5, len(reminders) // 10))
-            await asyncio.sleep(sleep_time)
+        except Exception as e:
+            print(f"Critical error in reminder checker: {e}")
+            metrics.REMINDER_ERRORS.inc()
+        metrics.REMINDER_PASS_SECONDS.observe(perf_counter() - pass_started)
+        await self.report_slo_breaches()
+
+        # Adaptive sleep time based on number of active reminders
+        sleep_time = min(30, max(5, len(reminders) // 10))
+        if next_due is not None:
+            # Reveil a l'entree de la prochaine notification dans la fenetre, pas jusqu'a 30 s apres
+            sleep_time = min(sleep_time, max(0.05, next_due - (perf_counter() - pass_started)))
+        return sleep_time
+
+    async def report_slo_breaches(self):
+        """Warn once in the admin channel, listing every scope that started to break the target this pass."""
+        breaches = self.delivery_slo.breaches()
+        if not breaches:
+            return
+        lines = []
+        for scope, stats in breaches[:MAX_ALERT_SCOPES]:
+            name = 'all reminders' if scope == ('all',) else f"{scope[0]} {scope[1]}"
+            lines.append(f"• {name}: {format_stats(stats)}")
+        if len(breaches) > MAX_ALERT_SCOPES:
+            lines.append(f"• and {len(breaches) - MAX_ALERT_SCOPES} more")
+        slo = self.delivery_slo
+        message = (f"⚠️ Reminder delivery SLO breached (target p95 ≤ {slo.target:.0f} s, "
+                   f"≤ {slo.max_miss_rate:.0%} missed):\n" + "\n".join(lines))[:2000]
+        print(message)
+        if not self.admin_channel_id:
+            return
+        try:
+            channel = self.bot.get_channel(self.admin_channel_id) or await self.bot.fetch_channel(self.admin_channel_id)
+            await channel.send(message)
+        except Exception as e:
+            print(f"Impossible d'envoyer l'alerte dans le salon admin : {e}")
 
     def format_time_until(self, time_delta):
         """
@@ -704,36 +1456,56 @@ class TimeManagementCog(commands.Cog):
         return ", ".join(parts)
     
     def get_emails_for_mention(self, ctx, mention_str: str):
-        user_data = get_user_emails()
         emails = []
         missing = []
 
         # Si mention est @everyone
         if mention_str.lower() == "everyone":
-            for uid, data in user_data.items():
-                emails.append(data['email'])
-            return emails, missing
+            return list(self.emails.all_emails()), missing
 
-        # Si mention est un rôle
+        # Si mention est un rôle : membres en direct si le serveur est chargé, sinon l'index inverse
         if mention_str.startswith('<@&'):
             role_id = ''.join(filter(str.isdigit, mention_str))
-            role = ctx.guild.get_role(int(role_id))
-            if role:
-                for member in role.members:
-                    data = user_data.get(str(member.id))
-                    if data:
-                        emails.append(data['email'])
-                    else:
-                        missing.append(member.name)
+            emails, missing = self.role_emails(ctx.guild, role_id)
+        return list(emails), missing
+
+    def role_emails(self, guild, role_id):
+        """
+        (emails, names of the members without an email) of a role. When the guild is chunked,
+        role.members is the truth: the index is checked against it and healed, since
+        on_member_update does not fire for members the bot does not cache.
+        """
+        role = guild.get_role(int(role_id)) if guild else None
+        if role is None or not guild.chunked:
+            return self.emails.emails_for_role(role_id), []
+        guild_role_ids = [r.id for r in guild.roles]
+        live = {str(member.id): member for member in role.members}
+        for user_id in live.keys() ^ self.emails.role_user_ids(role_id):
+            if user_id not in self.emails:
+                continue
+            member = live.get(user_id) or guild.get_member(int(user_id))
+            roles = [r.id for r in member.roles if not r.is_default()] if member else []
+            self.emails.update_roles(user_id, guild.id, roles, guild_role_ids)
+        emails = {self.emails.email(user_id) for user_id in live if user_id in self.emails}
+        missing = [member.name for user_id, member in live.items() if user_id not in self.emails]
         return emails, missing
 
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        """Keep the role -> email index in sync with role changes of registered members."""
+        if before.roles != after.roles:
+            await self.state_ready.wait()
+            self.emails.update_roles(after.id, after.guild.id,
+                                     [role.id for role in after.roles if not role.is_default()],
+                                     [role.id for role in after.guild.roles])
+
     @commands.hybrid_command(
     name="schedule",
     description="📅 Schedule a custom reminder with optional early reminders"
 )
     @app_commands.describe(
     title="Title of the meeting", 
-    time_spec="YYYY-MM-DD HH:MM or relative time like 15m 13h",
+    time_spec="YYYY-MM-DD HH:MM, relative time like 15m or dans 2h, or e.g. 18h or friday 18:00",
     remind_before="e.g., 10m, default: 5 minutes",
     mentions="Users or roles to mention",
     add_to_calendar="Add event to Google Calendar",
@@ -754,8 +1526,6 @@ class TimeManagementCog(commands.Cog):
     channel_id: str = None
     ):
         try:
-            from utils.user_data import get_user_emails
-
             # Validate and set channel
             target_channel = (
             self.bot.get_channel(int(channel_id)) 
@@ -793,22 +1563,23 @@ class TimeManagementCog(commands.Cog):
                     await ctx.send("❌ You do not have permission to mention @everyone", ephemeral=True)
                     return
 
-            # Parse main event time
-            if any(unit in time_spec.lower() for unit in ['minute', 'hour', 'day', 'week', 'min', 'hr', 'm', 'h', 'd', 'w']):
-                time_delta = TimeManagement.parse_relative_time(time_spec)
-                reminder_datetime = datetime.now() + time_delta
-                date = reminder_datetime.strftime("%Y-%m-%d")
-                time = reminder_datetime.strftime("%H:%M")
-            else:
-                try:
-                    reminder_datetime = datetime.strptime(time_spec, "%Y-%m-%d %H:%M")
-                    date = reminder_datetime.strftime("%Y-%m-%d")
-                    time = reminder_datetime.strftime("%H:%M")
-                except ValueError:
-                    await ctx.send("❌ Invalid date/time format. Use YYYY-MM-DD HH:MM or relative time", ephemeral=True)
-                    return
+            # Parse main event time (absolute times are in the author's timezone, stored in UTC)
+            author_tz = self.time_manager.get_user_timezone(ctx.author.id)
+            now = datetime.now(timezone.utc)
+            try:
+                reminder_datetime, _ = parse_time_expression(time_spec, author_tz, now)
+            except ValueError:
+                await ctx.send(
+                    "❌ Invalid date/time format. Use YYYY-MM-DD HH:MM, a relative time like 1h30m, "
+                    "or a day and time like friday 18:00",
+                    ephemeral=True
+                )
+                return
+            local_datetime = reminder_datetime.astimezone(author_tz)
+            date = local_datetime.strftime("%Y-%m-%d")
+            time = local_datetime.strftime("%H:%M")
 
-            if reminder_datetime < datetime.now():
+            if reminder_datetime < now:
                 await ctx.send("❌ Date and time must be in the future.", ephemeral=True)
                 return
 
@@ -818,7 +1589,7 @@ class TimeManagementCog(commands.Cog):
                 try:
                     delta = TimeManagement.parse_relative_time(time_str.strip())
                     reminder_time = reminder_datetime - delta
-                    if reminder_time > datetime.now():
+                    if reminder_time > now:
                         reminder_times.append(reminder_time)
                 except ValueError as e:
                     await ctx.send(f"❌ Invalid reminder format: {time_str}", ephemeral=True)
@@ -828,33 +1599,22 @@ class TimeManagementCog(commands.Cog):
             reminder_times.sort()
 
             # Set up reminder data
-            reminder_id = str(uuid.uuid4())
-        
-            reminder = {
-                "id": reminder_id,
-                "user_id": ctx.author.id,
-                "username": ctx.author.name,
-                "channel_id": target_channel.id,
-                "title": title,
-                "description": description,
-                "date": date,
-                "time": time,
-                "mentions": mentioned_users if is_dm_reminder else (mentioned_users if mentioned_users else "everyone"),
-                "is_dm": is_dm_reminder,
-                "reminder_times": [rt.isoformat(' ') for rt in reminder_times],
-                "main_time": reminder_datetime.isoformat(' ')
-            }
+            reminder = new_reminder(
+                ctx.author, target_channel.id, title, description,
+                reminder_datetime, reminder_times, mentioned_users, author_tz,
+                guild_id=ctx.guild.id if ctx.guild else None
+            )
 
-            reminders = load_reminders()
-            reminders.append(reminder)
-            save_reminders(reminders)
+            add_reminders([reminder])
+            self.reminder_wakeup.set()
 
             # Format response message
-            time_until = reminder_datetime - datetime.now()
+            now = datetime.now(timezone.utc)
+            time_until = reminder_datetime - now
             formatted_time = self.format_time_until(time_until)
 
             reminder_times_text = "\n".join([
-                f"⏰ Reminder in {self.format_time_until(rt - datetime.now())}"
+                f"⏰ Reminder in {self.format_time_until(rt - now)}"
                 for rt in reminder_times
             ])
 
@@ -878,7 +1638,7 @@ class TimeManagementCog(commands.Cog):
                 f"✅ Event scheduled: \"{title}\"\n\n"
                 f"📅 Date: {date} at {time}\n\n"
                 f"⏳ In approximately {formatted_time}\n\n"
-                f"Reminders scheduled:\n\n{reminder_times_text if reminder_times_text else  "The event starts soon"}\n\n"
+                f"Reminders scheduled:\n\n{reminder_times_text if reminder_times_text else 'The event starts soon'}\n\n"
                 f"{notification_text}\n\n"
                 f"📢 Reminders will be sent in {target_channel.mention}"
             )
@@ -896,9 +1656,9 @@ class TimeManagementCog(commands.Cog):
                 all_missing = []
 
                 # Add author's email
-                author_data = get_user_emails().get(str(ctx.author.id))
-                if author_data:
-                    attendee_emails.append(author_data['email'])
+                author_email = self.emails.email(ctx.author.id)
+                if author_email:
+                    attendee_emails.append(author_email)
 
                 if mentioned_users or ctx.message.mention_everyone:
                     # Handle @everyone
@@ -908,6 +1668,8 @@ class TimeManagementCog(commands.Cog):
                         all_missing.extend(missing)
                 
                     # Handle mentioned roles
+                    if any(mention.startswith('<@&') for mention in mention_parts):
+                        await ensure_chunked(ctx.guild, self.bot.intents)
                     for mention in mention_parts:
                         if mention.startswith('<@&'):
                             emails, missing = self.get_emails_for_mention(ctx, mention)
@@ -915,32 +1677,25 @@ class TimeManagementCog(commands.Cog):
                             all_missing.extend(missing)
 
                 # Handle direct user mentions
-                for user_id in mentioned_users:
-                    user_data = get_user_emails().get(str(user_id))
-                    if user_data:
-                        attendee_emails.append(user_data['email'])
-                    else:
-                        user = self.bot.get_user(user_id)
-                        all_missing.append(user.name if user else str(user_id))
+                emails, missing = self.emails.emails_for_users(mentioned_users)
+                attendee_emails.extend(emails)
+                for user_id in missing:
+                    user = self.bot.get_user(user_id)
+                    all_missing.append(user.name if user else str(user_id))
 
                 # Remove duplicates
                 attendee_emails = list(set(attendee_emails))
 
-                # Create calendar event
-                event_id = await self.calendar_manager.create_event(
-                title=title,
-                start_time=reminder_datetime,
-                end_time=end_time,
-                description=description,
-                attendees=attendee_emails
+                # Queue the calendar event, sent with the next batch
+                self.calendar_sync.create(
+                    reminder['id'], title, reminder_datetime, end_time, description, attendee_emails
                 )
 
                 # Update response with calendar details
-                if event_id:
-                    await ctx.send(
-                        f"📅 Event added to calendars of: {len(attendee_emails)} participants",
-                        ephemeral=True
-                    )
+                await ctx.send(
+                    f"📅 Event will be added to the calendars of: {len(attendee_emails)} participants",
+                    ephemeral=True
+                )
                 
                 if all_missing:
                     await ctx.send(
@@ -956,7 +1711,126 @@ class TimeManagementCog(commands.Cog):
             await ctx.send("❌ An error happend.", ephemeral=True)
             print(f"Error: {e}")
 
+    @commands.hybrid_command(
+        name="schedule_bulk",
+        description="📥 Schedule many events at once from a CSV or JSON file"
+    )
+    @app_commands.describe(
+        file="CSV with a header row, JSON array or JSON Lines (columns: title, time or date+time, "
+             "description, remind_before, mentions, channel_id, add_to_calendar, duration)",
+        dry_run="Only validate the file, nothing is scheduled"
+    )
+    @commands.has_permissions(mention_everyone=True)
+    async def schedule_bulk(self, ctx, file: discord.Attachment, dry_run: bool = False):
+        await ctx.defer()
+        try:
+            text = (await file.read()).decode('utf-8-sig')
+        except UnicodeDecodeError:
+            await ctx.send("❌ The file must be UTF-8 text (CSV, JSON or JSON Lines).", ephemeral=True)
+            return
+
+        try:
+            author_tz = self.time_manager.get_user_timezone(ctx.author.id)
+            now = datetime.now(timezone.utc)
+
+            # Les roles mentionnes sont resolus depuis les membres du serveur
+            if '<@&' in text:
+                await ensure_chunked(ctx.guild, self.bot.intents)
+
+            # Passe unique : chaque ligne est validee, les erreurs sont collectees sans arreter l'import
+            new_reminders, calendar_events, errors = [], [], []
+            for line, row, error in iter_rows(file.filename, text):
+                if len(new_reminders) + len(errors) >= MAX_BULK_ROWS:
+                    errors.append((line, f"Import limited to {MAX_BULK_ROWS} rows, the rest was ignored"))
+                    break
+                try:
+                    if error:
+                        raise ValueError(error)
+                    event = parse_row(row, author_tz, now)
+                    channel_id = event['channel_id'] or ctx.channel.id
+                    if event['channel_id'] and not self.bot.get_channel(channel_id):
+                        raise ValueError(f"Unknown channel ID: {channel_id}")
+                    mentioned_users = event['mentioned_users']
+                    if len(mentioned_users) == 1 and mentioned_users[0] != ctx.author.id:
+                        raise ValueError("A private reminder can only be scheduled for yourself")
+                except (ValueError, OverflowError) as e:
+                    # Une ligne invalide est signalee, les autres sont importees
+                    errors.append((line, str(e) if isinstance(e, ValueError) else "Date out of range"))
+                    continue
+
+                reminder = new_reminder(
+                    ctx.author, channel_id, event['title'], event['description'],
+                    event['event_time'], event['reminder_times'], mentioned_users, author_tz,
+                    guild_id=ctx.guild.id if ctx.guild else None
+                )
+                new_reminders.append(reminder)
+                if event['add_to_calendar']:
+                    calendar_events.append({
+                        'reminder_id': reminder['id'],
+                        'title': event['title'],
+                        'start_time': event['event_time'],
+                        'end_time': event['end_time'],
+                        'description': event['description'],
+                        'attendees': self.bulk_attendees(ctx, event),
+                    })
+                if len(new_reminders) % 500 == 0:
+                    await asyncio.sleep(0)  # laisse respirer la boucle d'evenements sur les gros fichiers
+
+            created_events = 0
+            if not dry_run and new_reminders:
+                # Une seule ecriture du fichier, puis un seul reveil du planificateur
+                add_reminders(new_reminders)
+                self.reminder_wakeup.set()
+                if calendar_events:
+                    for calendar_event in calendar_events:
+                        self.calendar_sync.create(**calendar_event, save=False)
+                    self.calendar_sync.save()
+                    await self.calendar_sync.flush()
+                    created_events = sum(
+                        1 for calendar_event in calendar_events
+                        if self.calendar_sync.event_id(calendar_event['reminder_id'])
+                    )
+
+            action = "would be scheduled" if dry_run else "scheduled"
+            response = f"{'🧪' if dry_run else '✅'} {len(new_reminders)} events {action} from {file.filename}"
+            if calendar_events:
+                response += (f"\n📅 {len(calendar_events)} marked for Google Calendar" if dry_run
+                             else f"\n📅 {created_events}/{len(calendar_events)} added to Google Calendar")
+            if errors:
+                response += f"\n\n⚠️ {len(errors)} rows skipped:\n" + "\n".join(
+                    f"• line {line}: {message}" for line, message in errors[:10]
+                )
+                if len(errors) > 10:
+                    response += f"\n… and {len(errors) - 10} more, see the attached file"
+
+            error_file = None
+            if len(errors) > 10:
+                report = io.StringIO()
+                writer = csv.writer(report)
+                writer.writerow(["line", "error"])
+                writer.writerows(errors)
+                error_file = discord.File(io.BytesIO(report.getvalue().encode()), filename="schedule_bulk_errors.csv")
+            if error_file:
+                await ctx.send(response, file=error_file)
+            else:
+                await ctx.send(response)
+
+        except Exception as e:
+            await ctx.send("❌ An error happened during the import.", ephemeral=True)
+            print(f"Error in schedule_bulk: {e}")
+
+    def bulk_attendees(self, ctx, event):
+        """Calendar attendees of an imported event: the author, mentioned roles, @everyone and users."""
+        emails, _ = self.emails.emails_for_users([ctx.author.id] + event['mentioned_users'])
+        for mention in event['mention_parts']:
+            if mention.lower() in ('@everyone', 'everyone'):
+                emails |= self.emails.all_emails()
+            elif mention.startswith('<@&'):
+                emails |= self.role_emails(ctx.guild, ''.join(filter(str.isdigit, mention)))[0]
+        return list(emails)
+
     @schedule.error
+    @schedule_bulk.error
     async def schedule_error(self, ctx, error):
         if isinstance(error, commands.MissingPermissions):
             await ctx.send("❌ You don't have the required permissions to execute this command.")
@@ -964,12 +1838,12 @@ class TimeManagementCog(commands.Cog):
             await ctx.send("❌  An error happened when executing the command.")
 
     async def send_reminder(self, reminder, isMain = False):
-        """Helper function to send the reminder with time left"""
+        """Helper function to send the reminder with time left. Returns True once Discord accepted the message."""
         try:
             if(not isMain):
         # Calculate time left until the event
-                reminder_datetime = datetime.fromisoformat(reminder["main_time"])
-                time_left = reminder_datetime - datetime.now()
+                reminder_datetime = to_utc(datetime.fromisoformat(reminder["main_time"]))
+                time_left = reminder_datetime - self.clock()
                 time_left_str = self.format_time_until(time_left)
 
         # Prepare the reminder message with time left
@@ -986,20 +1860,33 @@ class TimeManagementCog(commands.Cog):
                 reminder_message+= f"⏳ Remaining time: {time_left_str}\n\n"
             
 
+            if isinstance(reminder["mentions"], list) and reminder["mentions"]:
+                # Heure locale de chaque destinataire, un seul calcul vectorise pour tous
+                groups = self.time_manager.local_time_groups(
+                    datetime.fromisoformat(reminder["main_time"]), reminder["mentions"]
+                )
+                reminder_message += "🕒 Local time: " + " · ".join(
+                    f"{local} ({zone})" for zone, local, _ in groups
+                ) + "\n\n"
+
             if reminder["is_dm"] and len(reminder["mentions"]) == 1:
                 # Send DM
-                user = self.bot.get_user(reminder["mentions"][0])
+                # Hors cache (rappel d'un autre shard avant la repartition) : recuperation par l'API
+                user = self.bot.get_user(reminder["mentions"][0]) or await self.bot.fetch_user(reminder["mentions"][0])
                 if user:
                     await user.send(reminder_message)
+                    return True
             else:
                 # Send to channel
-                channel = self.bot.get_channel(reminder["channel_id"])
+                channel = self.bot.get_channel(reminder["channel_id"]) or await self.bot.fetch_channel(reminder["channel_id"])
                 if channel:
                     mentions = " ".join(f"<@{uid}>" for uid in reminder['mentions']) if isinstance(reminder['mentions'], list) else "@everyone"
                     # reminder_message += "\n"
                     await channel.send(f"{reminder_message}{mentions}")
+                    return True
         except Exception as e:
             print(f"An error happened when sending the reminder: {e}")
+        return False
 
     @commands.hybrid_command(
         name="reminders",
@@ -1007,7 +1894,7 @@ class TimeManagementCog(commands.Cog):
     )
     async def reminders(self, ctx):
         try:
-            reminders = load_reminders()
+            reminders = await load_reminders_async()
             user_reminders = [r for r in reminders if r["user_id"] == ctx.author.id]
 
             if not user_reminders:
@@ -1017,8 +1904,8 @@ class TimeManagementCog(commands.Cog):
             user_reminders.sort(key=lambda r: f"{r['date']} {r['time']}")
             response = "**Your current reminders :**\n\n"
             for i, reminder in enumerate(user_reminders, start=1):
-                reminder_datetime = datetime.fromisoformat(reminder["main_time"])
-                time_until = reminder_datetime - datetime.now()
+                reminder_datetime = to_utc(datetime.fromisoformat(reminder["main_time"]))
+                time_until = reminder_datetime - datetime.now(timezone.utc)
                 response += (
                     f"{i}. **{reminder['title']}**\n\n"
                     f"📅 {reminder['date']} at {reminder['time']}\n\n"
@@ -1031,6 +1918,30 @@ class TimeManagementCog(commands.Cog):
             await ctx.send("❌ An error happened.")
             print(f"Erreur : {e}")
 
+    @commands.hybrid_command(
+        name="reminder_slo",
+        description="⏱️ Show reminder delivery lag for this server and its slowest channels"
+    )
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def reminder_slo(self, ctx):
+        """Delivery lag percentiles over the last hour, against REMINDER_LAG_TARGET_SECONDS."""
+        slo = self.delivery_slo
+        stats = slo.stats(('guild', ctx.guild.id))
+        response = (
+            f"⏱️ **Reminder delivery** (last {slo.window // 60} min, target p95 ≤ {slo.target:.0f} s)\n\n"
+            f"**This server**: {format_stats(stats)}\n"
+        )
+        if stats['count']:
+            # Attente avant la prise en charge par la boucle : le reste du retard vient de l'API Discord
+            response += f"Checker wait p95 {stats['wait_p95']:.1f} s\n"
+        channels = slo.worst('channel', guild_channels={channel.id for channel in ctx.guild.channels})
+        if channels:
+            response += "\n**Slowest channels**\n"
+            for (_, channel_id), channel_stats in channels:
+                response += f"• <#{channel_id}> {format_stats(channel_stats)}\n"
+        await ctx.send(response[:2000], ephemeral=True)
+
     @commands.hybrid_command(
         name="delete",
         description="Delete a specific reminder using its ID"
@@ -1040,21 +1951,74 @@ class TimeManagementCog(commands.Cog):
     )
     async def delete(self, ctx, reminder_id: str):
         try:
-            reminders = load_reminders()
+            reminders = await load_reminders_async()
             reminder_to_delete = next((r for r in reminders if r["id"] == reminder_id and r["user_id"] == ctx.author.id), None)
 
             if not reminder_to_delete:
                 await ctx.send("❌ No reminder using this ID is found.")
                 return
 
-            reminders.remove(reminder_to_delete)
-            save_reminders(reminders)
+            remove_reminders([reminder_id])
+            self.calendar_sync.delete(reminder_id)
             await ctx.send(f"✅ Deleted reminder : **{reminder_to_delete['title']}** (ID : {reminder_id})")
 
         except Exception as e:
             await ctx.send("❌ An error happened.")
             print(f"Erreur : {e}")
 
+    @commands.hybrid_command(
+        name="reschedule",
+        description="🔁 Move one of your reminders to a new time"
+    )
+    @app_commands.describe(
+        reminder_id="The reminder's ID, You can find it using the command reminders",
+        time_spec="YYYY-MM-DD HH:MM, relative time like 15m or 1h30m, or e.g. friday 18:00"
+    )
+    async def reschedule(self, ctx, reminder_id: str, time_spec: str):
+        try:
+            reminders = await load_reminders_async()
+            reminder = next((r for r in reminders if r["id"] == reminder_id and r["user_id"] == ctx.author.id), None)
+            if not reminder:
+                await ctx.send("❌ No reminder using this ID is found.")
+                return
+
+            author_tz = self.time_manager.get_user_timezone(ctx.author.id)
+            now = datetime.now(timezone.utc)
+            try:
+                new_time, _ = parse_time_expression(time_spec, author_tz, now)
+            except ValueError:
+                await ctx.send("❌ Invalid date/time format.", ephemeral=True)
+                return
+            if new_time < now:
+                await ctx.send("❌ Date and time must be in the future.", ephemeral=True)
+                return
+
+            # Les rappels anticipes gardent le meme ecart avec l'evenement
+            old_time = to_utc(datetime.fromisoformat(reminder["main_time"]))
+            offsets = [old_time - to_utc(datetime.fromisoformat(rt)) for rt in reminder.get("reminder_times", [])]
+            local_time = new_time.astimezone(author_tz)
+            reminder.update({
+                "date": local_time.strftime("%Y-%m-%d"),
+                "time": local_time.strftime("%H:%M"),
+                "main_time": new_time.isoformat(' '),
+                "reminder_times": sorted(
+                    (new_time - offset).isoformat(' ') for offset in offsets if new_time - offset > now
+                ),
+            })
+            # Remplace par id dans les rappels tels qu'ils seront a l'ecriture, sous le verrou
+            remove_reminders([], [reminder])
+            self.reminder_wakeup.set()
+            self.calendar_sync.reschedule(reminder_id, new_time)
+
+            await ctx.send(
+                f"✅ **{reminder['title']}** moved to {reminder['date']} at {reminder['time']}"
+                f" (in {self.format_time_until(new_time - now)})"
+            )
+
+        except Exception as e:
+            await ctx.send("❌ An error happened.")
+            print(f"Erreur : {e}")
+
     @commands.hybrid_command(
         name="check_permissions",
         description="Verify bot permissions."
@@ -1077,6 +2041,17 @@ class TimeManagementCog(commands.Cog):
             await ctx.send("❌ An error happened.")
             print(f"Erreur : {e}")
             
+    @commands.hybrid_command(
+        name="set_timezone",
+        description="🌍 Set your timezone for scheduling and reminders"
+    )
+    @app_commands.describe(
+        timezone="e.g. Europe/Paris, America/New_York, Africa/Algiers"
+    )
+    async def set_timezone(self, ctx, timezone: str):
+        success, message = self.time_manager.set_timezone(ctx.author.id, timezone)
+        await ctx.send(f"{'✅' if success else '❌'} {message}", ephemeral=True)
+
     @commands.hybrid_command(
         name="register_email",
         description="🔒 Save your google email and roles"
@@ -1093,6 +2068,5 @@ class TimeManagementCog(commands.Cog):
         member = ctx.guild.get_member(ctx.author.id)
         roles = [role.id for role in member.roles if role.name != "@everyone"]
         
-        from utils.user_data import save_user_email
-        save_user_email(ctx.author.id, email, roles)
+        self.emails.set(ctx.author.id, email, roles, ctx.guild.id, [role.id for role in ctx.guild.roles])
         await ctx.send("✅ Email and roles saved successfully !", ephemeral=True)
\ No newline at end of file
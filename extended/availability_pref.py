@@ -1,16 +1,66 @@
+import asyncio
+from datetime import datetime, timezone
+import discord
 from discord.ext import commands
-from utils.user_preferences import load_data_pref ,save_data_pref
+from utils.shared_store import SharedStore
+from utils.sharding import cluster_file, from_env as cluster_from_env
+from utils.availability_index import (
+    AvailabilityIndex, DAYS, SLOT_MINUTES, slot_of_week, slots_of_local_times, format_slot, slot_ranges
+)
 from discord import app_commands
+from utils.gateway import ensure_chunked
+from utils.time_manager import TimeManagement
 async def setup(bot):
     await bot.add_cog(AvailabilityCog(bot))
 
 class AvailabilityCog(commands.Cog):
     def __init__(self,bot):
         self.bot = bot
-        self.data_file = 'data/user_availability.json'
-        self.data = load_data_pref(self.data_file)
+        # Preferences en base (shared_data), une ligne par utilisateur ; l'ancien fichier JSON est importe une fois
+        self.store = SharedStore('availability')
+        self.data = {}
+        # Bitsets 7x96 compiles depuis les preferences, un fichier par processus du cluster
+        # (data/user_availability.bits.npz, ou user_availability.cluster-N.bits.npz)
+        self.data_file = cluster_file('data/user_availability.json', cluster_from_env())
+        self.index = AvailabilityIndex()
+        self.ready = asyncio.Event()  # preferences et index charges
+
+    async def cog_load(self):
+        """Load the preferences and their index off the event loop, then follow the other processes' changes."""
+        def load():
+            data = self.store.load('data/user_availability.json')
+            return data, AvailabilityIndex.load_or_build(self.data_file, data)
+        self.data, self.index = await asyncio.to_thread(load)
+        self.ready.set()
+        # Preferences changees par les autres processus (cluster, instance en attente)
+        self.store.follow(self.availability_changed)
+
+    async def cog_before_invoke(self, ctx):
+        # Les commandes arrivees pendant le chargement attendent qu'il se termine
+        await self.ready.wait()
+
+    def cog_unload(self):
+        self.store.stop()
+
+    def availability_changed(self, user_id, preferences):
+        if self.data.get(user_id) == preferences:
+            return  # notre propre ecriture, relue
+        if preferences is None:
+            self.data.pop(user_id, None)
+        else:
+            self.data[user_id] = preferences
+        self.index.update_user(user_id, preferences or {})
+        self.index.save_later(self.data_file, self.data)
 
         
+    async def get_time_manager(self):
+        """Users' time zones, kept by TimeManagementCog (everyone in UTC without it)."""
+        cog = self.bot.get_cog('TimeManagementCog')
+        if cog is None:
+            return TimeManagement(data_file=None)
+        await cog.state_ready.wait()
+        return cog.time_manager
+
     @commands.hybrid_command(name="set_availability", description="Set your availability preferences" )
     @app_commands.describe(
         day_of_week  = "jour de la semaine, ex : lundi , mardi ...",
@@ -44,9 +94,6 @@ class AvailabilityCog(commands.Cog):
                 await ctx.send("Temps de fin invalide. Utiliser HH:MM (ex., 15:00).")
                 return
             
-            if user_id not in self.data:
-                self.data[user_id] = {}
-
             availability = {}
             if not start_time and not end_time:
                 availability["all_day"] = True
@@ -57,8 +104,12 @@ class AvailabilityCog(commands.Cog):
                 if end_time:
                     availability["end_time"] = end_time
                 
-            self.data[user_id][day_of_week.lower()] = availability
-            save_data_pref(self.data_file,self.data)
+            # Nouvelle entree plutot qu'une modification sur place : la sauvegarde differee de l'index en garde une copie
+            preferences = {**self.data.get(user_id, {}), day_of_week.lower(): availability}
+            self.data[user_id] = preferences
+            self.store.set(user_id, preferences)
+            self.index.update_user(user_id, preferences)
+            self.index.save_later(self.data_file, self.data)
 
             if availability["all_day"]:
                 response = f"Your availability for {day_of_week.capitalize()} has been set to **all day**."
@@ -72,5 +123,75 @@ class AvailabilityCog(commands.Cog):
 
             await ctx.send(response)          
 
+    @commands.hybrid_command(name="who_available", description="Who is free at a given time, or when a role is free")
+    @app_commands.describe(
+        day_of_week="jour de la semaine, ex : lundi (par defaut : maintenant)",
+        time="format HH:MM (par defaut : maintenant)",
+        role="Only look at the members of this role"
+    )
+    async def who_available(self, ctx, day_of_week: str = None, time: str = None, role: discord.Role = None):
+        """
+        - With a day and/or a time: list who is free at that moment (optionally only in a role);
+          a missing day or time is taken from the author's current local time.
+        - With neither: list who is free right now, at each member's own local time.
+        - With only a role: list the time slots where the most members of the role are free.
+        """
+        if role:
+            await ensure_chunked(ctx.guild, self.bot.intents)
+        members = [member.id for member in role.members] if role else None
+
+        if role and not day_of_week and not time:
+            counts, counted = self.index.slot_counts(members)
+            if not counted:
+                await ctx.send(f"No member of {role.name} has set their availability.")
+                return
+            best = counts.max()
+            if best == 0:
+                await ctx.send(f"No common free slot for {role.name}.")
+                return
+            ranges = slot_ranges(counts == best)
+            lines = [f"• {format_slot(start)} - {format_slot(end, end=True)[-5:]}" for start, end in ranges[:10]]
+            response = (
+                f"**Best slots for {role.name}** ({best}/{counted} members free, "
+                f"{len(members) - counted} without availability):\n" + "\n".join(lines)
+            )
+            if len(ranges) > 10:
+                response += f"\n… and {len(ranges) - 10} more"
+            await ctx.send(response)
+            return
+
+        if not day_of_week and not time:
+            # Maintenant, a l'heure locale de chacun : les disponibilites sont en heure locale
+            now = datetime.now(timezone.utc)
+            candidates = members if members is not None else list(self.index.user_ids)
+            time_manager = await self.get_time_manager()
+            local_times, _, _ = time_manager.bulk_localize(now, candidates)
+            free = self.index.free_at_each(candidates, slots_of_local_times(local_times))
+            when = "right now (in their own time zone)"
+        else:
+            # Jour ou heure manquant : ceux de l'auteur de la commande, a son heure locale
+            time_manager = await self.get_time_manager()
+            now = datetime.now(timezone.utc).astimezone(time_manager.get_user_timezone(ctx.author.id))
+            day = (day_of_week or DAYS[now.weekday()]).lower()
+            time = time or f"{now.hour:02d}:{now.minute // SLOT_MINUTES * SLOT_MINUTES:02d}"
+            slot = slot_of_week(day, time)
+            if slot is None:
+                await ctx.send("Jour ou heure invalide. Utiliser un jour (ex., lundi) et HH:MM (ex., 13:00).")
+                return
+            free = self.index.free_at(slot, members)
+            when = f"on {format_slot(slot)}"
+
+        target = f" in {role.name}" if role else ""
+        if not free:
+            await ctx.send(f"Nobody{target} is available {when}.")
+            return
+        mentions = ", ".join(f"<@{user_id}>" for user_id in free[:50])
+        if len(free) > 50:
+            mentions += f" … (+{len(free) - 50})"
+        await ctx.send(
+            f"**{len(free)} member(s){target} available {when}:**\n{mentions}",
+            allowed_mentions=discord.AllowedMentions.none()
+        )
+
     async def setup(bot):
         await bot.add_cog(AvailabilityCog(bot))
\ No newline at end of file
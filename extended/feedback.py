@@ -1,20 +1,28 @@
-import os
-import json
 import uuid
-from datetime import datetime
-from discord.ext import commands
+import asyncio
+from datetime import datetime, timedelta
+from discord.ext import commands, tasks
 from discord import app_commands
 from discord.ui import View ,Button
 from discord.ui import Button
 from discord.ext import commands
 import discord
+from utils.feedback_store import FeedbackStore
+from utils.feedback_stats import FeedbackStats, STATS_FILE
+from utils.feedback_index import FeedbackIndex, INDEX_FILE
+from utils.sharding import cluster_file, from_env as cluster_from_env
+from utils.startup import timer
+
+PAGE_SIZE = 5
+MAX_DESCRIPTION = 200  # caracteres affiches par feedback : une page tient dans un message
 
 class StarRatingView(View):
     """
     A Discord view for star-based feedback ratings.
     """
-    def __init__(self, ctx, category, description):
+    def __init__(self, ctx, category, description, store):
         super().__init__(timeout=30)
+        self.store = store
         self.ctx = ctx
         self.category = category
         self.description = description
@@ -59,21 +67,8 @@ class StarRatingView(View):
         }
 
         try:
-            # Ensure the feedback.json file exists
-            if not os.path.exists("feedback.json"):
-                with open("feedback.json", "w") as f:
-                    json.dump([], f)  # Initialize with an empty list
-
-            # Load existing feedback
-            with open("feedback.json", "r") as f:
-                feedback_list = json.load(f)
-
-            # Append new feedback
-            feedback_list.append(feedback_data)
-
-            # Save updated feedback
-            with open("feedback.json", "w") as f:
-                json.dump(feedback_list, f, indent=4)
+            # Append to the feedback log (single writer, O(1) whatever the log size)
+            await self.store.submit(feedback_data)
 
             await interaction.response.send_message(
                 f"✅ Thank you for your feedback! You rated **{rating} stars** for **{self.category}**."
@@ -83,9 +78,106 @@ class StarRatingView(View):
             print(f"Error saving feedback: {e}")
             print(f"Feedback data: {feedback_data}")
 
+class FeedbackPageView(View):
+    """
+    One page of feedback at a time, newest first, with buttons to walk older / newer pages.
+    Only the records of the page shown are read from the log.
+    """
+    def __init__(self, ctx, store, index, filters):
+        super().__init__(timeout=300)
+        self.ctx = ctx
+        self.store = store
+        self.index = index
+        self.filters = filters  # category, min_rating, max_rating, since, until
+        self.positions = []
+        self.has_older = self.has_newer = False
+
+    def load(self, before=None, after=None):
+        """Fetch the page older than before, newer than after, or the newest one. False if empty."""
+        positions, more = self.index.page(**self.filters, before=before, after=after, limit=PAGE_SIZE)
+        if not positions:
+            return False
+        self.positions = positions
+        if after is not None:
+            self.has_newer, self.has_older = more, True
+        else:
+            self.has_older, self.has_newer = more, before is not None
+        self.older.disabled = not self.has_older
+        self.newer.disabled = not self.has_newer
+        return True
+
+    async def render(self):
+        category = self.filters['category']
+        response = f"**Feedback Submitted{' (' + category + ')' if category else ''}:**\n\n"
+        # Requete SQLite dans un thread : un clic sur une page ne bloque pas la boucle
+        records = await asyncio.to_thread(self.store.read_many, self.positions)
+        for feedback in records:
+            description = feedback['description']
+            if len(description) > MAX_DESCRIPTION:
+                description = description[:MAX_DESCRIPTION] + "…"
+            response += (
+                f"⭐ **Rating:** {feedback['rating']} stars\n"
+                f"📋 **Category:** {feedback['category']}\n"
+                f"📝 **Description:** {description}\n"
+                f"👤 **User:** {feedback['username']} (ID: {feedback['user_id']})\n"
+                f"🕒 **Timestamp:** {feedback['timestamp']}\n"
+                f"────────────────────\n"
+            )
+        return response
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        return interaction.user.id == self.ctx.author.id
+
+    @discord.ui.button(label="◀ Newer", style=discord.ButtonStyle.secondary)
+    async def newer(self, interaction: discord.Interaction, button: Button):
+        self.load(after=self.positions[0])
+        await interaction.response.edit_message(content=await self.render(), view=self)
+
+    @discord.ui.button(label="Older ▶", style=discord.ButtonStyle.secondary)
+    async def older(self, interaction: discord.Interaction, button: Button):
+        self.load(before=self.positions[-1])
+        await interaction.response.edit_message(content=await self.render(), view=self)
+
 class FeedbackCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # Journal, statistiques et index sont charges en arriere-plan (load_state)
+        self.ready = asyncio.Event()
+        self.store = self.stats = self.index = None
+
+    async def cog_load(self):
+        timer.track('feedback log', self.load_state())
+
+    async def load_state(self):
+        def load():
+            store = FeedbackStore()
+            # stats et index tenus a jour a chaque feedback vu, un fichier par processus du cluster
+            cluster = cluster_from_env()
+            return (store, FeedbackStats(store, cluster_file(STATS_FILE, cluster)),
+                    FeedbackIndex(store, cluster_file(INDEX_FILE, cluster)))
+        self.store, self.stats, self.index = await asyncio.to_thread(load)
+        self.store.start()
+        self.ready.set()
+        self.save_feedback_index.start()
+
+    async def cog_before_invoke(self, ctx):
+        await self.ready.wait()
+
+    async def cog_unload(self):
+        self.save_feedback_index.cancel()
+        if self.store:
+            await self.store.close()
+            self.stats.save()
+            self.index.save()
+
+    @tasks.loop(hours=24)
+    async def save_feedback_index(self):
+        """Catch up with the feedback of the other processes, then save the index."""
+        try:
+            await self.store.refresh()
+            self.index.save()
+        except Exception as e:
+            print(f"Error saving the feedback index: {e}")
 
     @commands.hybrid_command(
         name="feedback",
@@ -106,7 +198,7 @@ class FeedbackCog(commands.Cog):
             return
 
         # Send star rating view
-        view = StarRatingView(ctx, category, description)
+        view = StarRatingView(ctx, category, description, self.store)
         await ctx.send(
             f"🌟 Please rate your experience with **{category}** (1-5 stars):",
             view=view
@@ -120,63 +212,44 @@ class FeedbackCog(commands.Cog):
     @app_commands.describe(
         category="Filter feedback by category (e.g., reminder, scheduling, time-management, general)"
         ,analyze="option to analyze previous feedbacks, defaults to false , to turn it to true type true"
+        ,min_rating="Lowest rating to show (1-5)"
+        ,max_rating="Highest rating to show (1-5)"
+        ,since="Only feedback from this day on (YYYY-MM-DD)"
+        ,until="Only feedback up to this day, included (YYYY-MM-DD)"
     )
-    async def view_feedback(self, ctx, category: str = None, analyze : str  = ""):
+    async def view_feedback(self, ctx, category: str = None, analyze : str  = "",
+                            min_rating: int = 1, max_rating: int = 5, since: str = None, until: str = None):
         """
-        Command to view feedback and optionally analyze it.
+        Command to view feedback, one page at a time, and optionally analyze it.
         """
         # Check if the user included the 'analyze' flag
         analyze = analyze.lower()
 
         try:
-            # Check if the feedback file exists
-            if not os.path.exists("feedback.json"):
-                with open("feedback.json", "w") as f:
-                    json.dump([], f)  # Initialize with an empty list
-
             try:
-                # Load feedback from the file
-                with open("feedback.json", "r") as f:
-                    feedback_list = json.load(f)
-            except json.JSONDecodeError:
-                await ctx.send("❌ The feedback file is corrupted. Resetting it.", ephemeral=True)
-                with open("feedback.json", "w") as f:
-                    json.dump([], f)
-                feedback_list = []
-
-            if not feedback_list:
-                await ctx.send("No feedback has been submitted yet.", ephemeral=True)
+                since_dt = datetime.strptime(since, "%Y-%m-%d") if since else None
+                until_dt = datetime.strptime(until, "%Y-%m-%d") + timedelta(days=1) if until else None
+            except ValueError:
+                await ctx.send("❌ Invalid date. Please use the format YYYY-MM-DD.", ephemeral=True)
                 return
 
-            # Filter feedback by category
-            if category:
-                feedback_list = [fb for fb in feedback_list if fb['category'].lower() == category.lower()]
-            if not feedback_list:
-                await ctx.send(f"No feedback found for category: {category}.", ephemeral=True)
+            # Feedbacks envoyes depuis les autres processus du cluster
+            await self.store.refresh()
+            if not len(self.index):
+                await ctx.send("No feedback has been submitted yet.", ephemeral=True)
                 return
 
-            response = f"**Feedback Submitted{' (' + category + ')' if category else ''}:**\n\n"
-            for feedback in feedback_list:
-                response += (
-                    f"⭐ **Rating:** {feedback['rating']} stars\n"
-                    f"📋 **Category:** {feedback['category']}\n"
-                    f"📝 **Description:** {feedback['description']}\n"
-                    f"👤 **User:** {feedback['username']} (ID: {feedback['user_id']})\n"
-                    f"🕒 **Timestamp:** {feedback['timestamp']}\n"
-                    f"────────────────────\n"
-                )
-
-            # Send the feedback (split into multiple messages if too long)
-            if len(response) <= 2000:
-                await ctx.send(response, ephemeral=True)
-            else:
-                # Split the response into chunks of 2000 characters (Discord message limit)
-                for i in range(0, len(response), 2000):
-                    await ctx.send(response[i:i+2000], ephemeral=True)
+            filters = {'category': category, 'min_rating': min_rating, 'max_rating': max_rating,
+                       'since': since_dt, 'until': until_dt}
+            view = FeedbackPageView(ctx, self.store, self.index, filters)
+            if not view.load():
+                await ctx.send(f"No feedback found for these filters{' (category: ' + category + ')' if category else ''}.", ephemeral=True)
+                return
+            await ctx.send(await view.render(), view=view, ephemeral=True)
 
             # Perform feedback analysis if analyze=True
             if analyze == "true":
-                analysis_response = self.analyze_feedback(feedback_list, category)
+                analysis_response = self.analyze_feedback(category)
                 await ctx.send(analysis_response, ephemeral=True)
 
         except Exception as e:
@@ -184,42 +257,23 @@ class FeedbackCog(commands.Cog):
             print(f"Error viewing feedback: {e}")
 
     
-    def analyze_feedback(self, feedback_list, category=None):
+    def analyze_feedback(self, category=None):
         """
-        Analyze feedback data and return a summary.
+        Summarize the feedback (all, or one category) from the running stats.
         """
-        if not feedback_list:
+        summary = self.stats.summary(category)
+        if not summary['count']:
             return "No feedback data to analyze."
 
-        # Calculate average rating
-        total_ratings = sum(fb['rating'] for fb in feedback_list)
-        average_rating = total_ratings / len(feedback_list)
-
-        # Count feedback by category
-        category_counts = {}
-        for fb in feedback_list:
-            cat = fb['category']
-            category_counts[cat] = category_counts.get(cat, 0) + 1
-
+        category_counts = summary['category_counts']
         most_common_category = max(category_counts, key=category_counts.get)
 
-        # Sentiment analysis
-        positive_words = ["good", "great", "excellent", "awesome", "love", "happy", "amazing", "helpful"]
-        negative_words = ["bad", "poor", "terrible", "hate", "unhappy", "disappointing", "slow", "not working"]
-
-        positive_count = 0
-        negative_count = 0
-        for fb in feedback_list:
-            description = fb['description'].lower()
-            positive_count += sum(description.count(word) for word in positive_words)
-            negative_count += sum(description.count(word) for word in negative_words)
-
         analysis_response = (
             f"📊 **Feedback Analysis{' (' + category + ')' if category else ''}:**\n\n"
-            f"⭐ **Average Rating:** {average_rating:.2f} stars\n"
+            f"⭐ **Average Rating:** {summary['average']:.2f} stars\n"
             f"📋 **Most Common Category:** {most_common_category} ({category_counts[most_common_category]} entries)\n"
-            f"😊 **Positive Sentiment Words:** {positive_count}\n"
-            f"😠 **Negative Sentiment Words:** {negative_count}\n"
+            f"😊 **Positive Sentiment Words:** {summary['positive']}\n"
+            f"😠 **Negative Sentiment Words:** {summary['negative']}\n"
         )
 
         return analysis_response
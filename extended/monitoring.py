@@ -0,0 +1,145 @@
+import asyncio
+import time
+from discord.ext import commands
+from utils import jeson, metrics
+from utils.loop_monitor import monitor, format_stack
+from utils.persistence import persistence
+from utils.sharding import from_env as cluster_from_env
+
+#recap de ce qu'il fait ce code :
+#Demarre le moniteur de latence de la boucle (utils/loop_monitor.py) et marque chaque commande en cours
+#pour que les blocages soient attribues a la commande qui les cause
+#Mesure chaque commande (nombre, duree, erreurs) et sert les metriques Prometheus si METRICS_PORT est configure
+#/loop_stalls (admin) : percentiles de latence et derniers blocages avec la pile du code bloquant
+#/stats (admin) : resume des metriques (commandes, rappels, Calendar, modele, ecritures disque)
+
+MAX_STALLS_SHOWN = 5
+
+
+async def setup(bot):
+    await bot.add_cog(MonitoringCog(bot))
+
+
+class MonitoringCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        config = jeson.parse_json('./data/config.json')
+        self.threshold = config.get('LOOP_STALL_THRESHOLD_MS', 250) / 1000
+        self.metrics_host = config.get('METRICS_HOST', '127.0.0.1')
+        self.metrics_port = config.get('METRICS_PORT')
+        self.metrics_server = None
+
+    async def cog_load(self):
+        monitor.start(threshold=self.threshold)
+        # Hooks globaux : appeles dans la tache de la commande, prefixe ou slash
+        self.bot.before_invoke(self.label_command)
+        self.bot.after_invoke(self.unlabel_command)
+        metrics.registry.gauge('event_loop_lag_max_seconds', 'Largest event-loop lag seen.', lambda: monitor.max_lag)
+        metrics.registry.gauge('event_loop_stalls', 'Event-loop stalls kept in memory.', lambda: len(monitor.stalls))
+        metrics.registry.gauge('persistence_coalesced_saves', 'Saves merged into a newer pending one.',
+                               lambda: persistence.coalesced)
+        if self.metrics_port:
+            # En cluster, un port par processus : METRICS_PORT + numero du cluster
+            cluster = cluster_from_env()
+            port = self.metrics_port + (cluster.cluster_id if cluster else 0)
+            self.metrics_server = metrics.serve(metrics.registry, self.metrics_host, port)
+            print(f"Metriques Prometheus sur http://{self.metrics_host}:{port}/metrics")
+
+    async def cog_unload(self):
+        monitor.stop()
+        if self.metrics_server:
+            self.metrics_server.shutdown()
+
+    async def label_command(self, ctx):
+        monitor.label(asyncio.current_task(), f"command {ctx.command.qualified_name}")
+        ctx.metrics_started = time.perf_counter()
+
+    def record_command(self, ctx, status):
+        name = ctx.command.qualified_name if ctx.command else 'unknown'
+        metrics.COMMANDS.labels(name, status).inc()
+        started = getattr(ctx, 'metrics_started', None)
+        if started is not None:
+            metrics.COMMAND_SECONDS.labels(name).observe(time.perf_counter() - started)
+            ctx.metrics_started = None
+
+    async def unlabel_command(self, ctx):
+        monitor.unlabel(asyncio.current_task())
+        # Commande en echec : comptee par on_command_error (les hooks ne sont pas toujours appeles)
+        if not ctx.command_failed:
+            self.record_command(ctx, 'ok')
+
+    @commands.Cog.listener()
+    async def on_command_error(self, ctx, error):
+        if ctx.command is not None:
+            self.record_command(ctx, 'error')
+
+    @commands.hybrid_command(
+        name="loop_stalls",
+        description="🐢 Show event-loop lag and the latest stalls"
+    )
+    @commands.has_permissions(administrator=True)
+    async def loop_stalls(self, ctx):
+        """Lag percentiles and the commands or tasks that recently blocked the bot."""
+        response = (
+            "🐢 **Event Loop**\n"
+            f"Lag p50 ≤ {monitor.percentile(50) * 1000:.0f} ms · p99 ≤ {monitor.percentile(99) * 1000:.0f} ms · "
+            f"max {monitor.max_lag * 1000:.0f} ms ({monitor.samples} samples, "
+            f"stall threshold {monitor.threshold * 1000:.0f} ms)\n\n"
+        )
+        stalls = monitor.recent_stalls(MAX_STALLS_SHOWN)
+        if not stalls:
+            response += "✅ No stall recorded."
+        else:
+            response += f"**Recent stalls** ({len(monitor.stalls)} kept)\n"
+            for stall in stalls:
+                ongoing = " (ongoing)" if stall.get('ongoing') else ""
+                frames = ' ← '.join(format_stack(stall['stack'], limit=3)[::-1])
+                response += (
+                    f"• {stall['at']:%Y-%m-%d %H:%M:%S} — {stall['duration'] * 1000:.0f} ms{ongoing} "
+                    f"in `{stall['label']}`\n  `{frames[:250]}`\n"
+                )
+        await ctx.send(response[:2000], ephemeral=True)
+
+    @commands.hybrid_command(
+        name="stats",
+        description="📊 Show command latencies, reminder delivery and other bot metrics"
+    )
+    @commands.has_permissions(administrator=True)
+    async def stats(self, ctx):
+        """Summary of the metrics exported on /metrics."""
+        def ms(histogram, q):
+            return f"{histogram.quantile(q) * 1000:.0f} ms"
+
+        by_command = {}
+        for (name, status), counter in list(metrics.COMMANDS.children.items()):
+            by_command.setdefault(name, {})[status] = counter.value
+        response = "📊 **Bot Stats**\n\n**Commands** (calls · errors · p50 · p95)\n"
+        busiest = sorted(by_command.items(), key=lambda item: -sum(item[1].values()))[:10]
+        for name, counts in busiest:
+            latency = metrics.COMMAND_SECONDS.labels(name)
+            response += (f"• `{name}` {sum(counts.values())} · {counts.get('error', 0)} · "
+                         f"{ms(latency, 0.5)} · {ms(latency, 0.95)}\n")
+        if not busiest:
+            response += "• No command run yet\n"
+
+        notifications = {result: c.value for (result,), c in metrics.REMINDER_NOTIFICATIONS.children.items()}
+        lag = metrics.REMINDER_LAG.labels()
+        response += (
+            f"\n**Reminders**\nSent {notifications.get('sent', 0)} · failed {notifications.get('failed', 0)} · "
+            f"missed {notifications.get('missed', 0)} · "
+            f"delivery lag p50 {lag.quantile(0.5):.1f} s, p95 {lag.quantile(0.95):.1f} s\n"
+            f"Checker pass p95 {ms(metrics.REMINDER_PASS_SECONDS.labels(), 0.95)} · "
+            f"errors {metrics.REMINDER_ERRORS.labels().value}\n"
+        )
+        calendar = {result: c.value for (result,), c in metrics.CALENDAR_REQUESTS.children.items()}
+        response += (
+            f"\n**Google Calendar**\nCalls {sum(calendar.values())} · failed "
+            f"{sum(v for k, v in calendar.items() if k != 'ok')} · p95 {ms(metrics.CALENDAR_SECONDS.labels(), 0.95)}\n"
+            f"\n**Model**\nTrainings {metrics.MODEL_TRAIN_SECONDS.labels().count} "
+            f"(p50 {metrics.MODEL_TRAIN_SECONDS.labels().quantile(0.5):.1f} s) · "
+            f"forecasts p95 {ms(metrics.MODEL_PREDICT_SECONDS.labels(), 0.95)}\n"
+            f"\n**Persistence**\nWrites {metrics.PERSISTENCE_WRITE_SECONDS.labels().count} · "
+            f"p95 {ms(metrics.PERSISTENCE_WRITE_SECONDS.labels(), 0.95)} · merged saves {persistence.coalesced}\n"
+            f"\n**Event loop**\nLag p99 ≤ {monitor.percentile(99) * 1000:.0f} ms · stalls {len(monitor.stalls)}"
+        )
+        await ctx.send(response[:2000], ephemeral=True)
@@ -0,0 +1,77 @@
+import asyncio
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+from core.time_management import ActivityTracker, TimeManagementCog
+from utils.persistence import persistence
+
+#recap de ce qu'il fait ce code :
+#Verifie le decoupage par serveur de l'ancien fichier d'activite commun (data/activity_data.json)
+
+
+def write_legacy(tmp_path):
+    (tmp_path / 'data').mkdir()
+    hour = datetime(2026, 1, 5, 18).isoformat()
+    with open(tmp_path / 'data' / 'activity_data.json', 'w') as f:
+        json.dump({'message_counts': {'1': {hour: 3}, '2': {hour: 5}},
+                   'presence_data': {'1': {hour: 2}}, 'synthetic_weight': 0.4}, f)
+
+
+def test_import_legacy_restricted_to_members(tmp_path, monkeypatch):
+    write_legacy(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    tracker = ActivityTracker(guild_id=42)
+    assert tracker.import_legacy(ActivityTracker(), {1}) == 1
+    assert dict(tracker.message_counts) == {1: {datetime(2026, 1, 5, 18): 3}}
+    assert tracker.presence_data[1][datetime(2026, 1, 5, 18)] == 2
+    assert tracker.synthetic_weight == 0.4
+
+
+def fake_cog(guilds, members_intent=True):
+    trackers = {}
+
+    async def get_tracker(guild, touch=True):
+        if guild.id not in trackers:
+            trackers[guild.id] = ActivityTracker(guild_id=guild.id)
+        return trackers[guild.id]
+
+    async def wait_until_ready():
+        pass
+
+    ready = asyncio.Event()
+    ready.set()
+    bot = SimpleNamespace(guilds=guilds, wait_until_ready=wait_until_ready,
+                          intents=SimpleNamespace(members=members_intent))
+    return SimpleNamespace(bot=bot, state_ready=ready, get_tracker=get_tracker, tracks_activity=lambda guild: True)
+
+
+def guild(guild_id, member_ids, chunked=True):
+    return SimpleNamespace(id=guild_id, chunked=chunked, members=[SimpleNamespace(id=i) for i in member_ids])
+
+
+def test_legacy_activity_is_split_by_membership(tmp_path, monkeypatch):
+    write_legacy(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv('BOT_SHARD_IDS', raising=False)
+    cog = fake_cog([guild(42, [1]), guild(43, [2, 3])])
+    asyncio.run(TimeManagementCog.migrate_legacy_activity(cog))
+    persistence.flush()
+    assert set(ActivityTracker(guild_id=42).message_counts) == {1}
+    assert set(ActivityTracker(guild_id=43).message_counts) == {2}
+    assert ActivityTracker(guild_id=43).legacy_imported
+    # Fait une seule fois : l'ancien fichier est mis de cote
+    assert not (tmp_path / 'data' / 'activity_data.json').exists()
+    assert (tmp_path / 'data' / 'activity_data.json.migrated').exists()
+
+
+def test_guild_without_member_list_gets_nothing(tmp_path, monkeypatch):
+    write_legacy(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv('BOT_SHARD_IDS', raising=False)
+    cog = fake_cog([guild(42, [], chunked=False)], members_intent=False)
+    asyncio.run(TimeManagementCog.migrate_legacy_activity(cog))
+    persistence.flush()
+    # Jamais "tous les utilisateurs" : le serveur reste vide et le fichier est garde pour le prochain demarrage
+    assert not ActivityTracker(guild_id=42).message_counts
+    assert (tmp_path / 'data' / 'activity_data.json').exists()
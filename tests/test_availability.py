@@ -0,0 +1,63 @@
+import asyncio
+from datetime import datetime, timezone
+
+import numpy as np
+
+from utils.availability_index import AvailabilityIndex, slot_of_week, slots_of_local_times
+from utils.persistence import persistence
+from utils.time_manager import TimeManagement
+
+#recap de ce qu'il fait ce code :
+#Verifie l'index de disponibilites : reconstruction quand le JSON change, "qui est libre" a l'heure locale de chacun
+
+DATA = {
+    '1': {'lundi': {'all_day': False, 'start_time': '09:00', 'end_time': '12:00'}},
+    '2': {'lundi': {'all_day': False, 'start_time': '14:00', 'end_time': '18:00'}},
+}
+
+
+def test_saved_bits_reused_only_for_same_content(tmp_path):
+    json_path = str(tmp_path / 'user_availability.json')
+    AvailabilityIndex.load_or_build(json_path, DATA)
+    persistence.flush()
+    assert AvailabilityIndex.load_or_build(json_path, DATA).free_at(slot_of_week('lundi', '10:00')) == [1]
+    # Meme nombre d'utilisateurs, autre contenu : l'ancien index ne doit pas servir
+    edited = dict(DATA, **{'1': {'lundi': {'all_day': False, 'start_time': '15:00', 'end_time': '16:00'}}})
+    index = AvailabilityIndex.load_or_build(json_path, edited)
+    assert index.free_at(slot_of_week('lundi', '10:00')) == []
+    assert index.free_at(slot_of_week('lundi', '15:00')) == [1, 2]
+
+
+def test_free_now_uses_each_users_timezone():
+    index = AvailabilityIndex.build(DATA)
+    time_manager = TimeManagement(data_file=None)
+    time_manager.timezones = {1: 'Europe/Paris', 2: 'America/New_York'}
+    # Lundi 10:30 UTC = 11:30 a Paris / 05:30 a New York ; 19:30 UTC = 20:30 / 14:30 ; 15:00 UTC = 16:00 / 10:00
+    for hour, minute, expected in ((10, 30, [1]), (19, 30, [2]), (15, 0, [])):
+        now = datetime(2026, 1, 5, hour, minute, tzinfo=timezone.utc)
+        local_times, _, _ = time_manager.bulk_localize(now, [1, 2])
+        assert index.free_at_each([1, 2], slots_of_local_times(local_times)) == expected
+
+
+def test_edits_are_saved_once_after_the_delay(tmp_path):
+    json_path = str(tmp_path / 'user_availability.json')
+    index = AvailabilityIndex.build(DATA)
+    data = dict(DATA)
+
+    async def edit():
+        for user_id in range(3, 40):
+            data[str(user_id)] = {'mardi': {'all_day': True}}
+            index.update_user(user_id, data[str(user_id)])
+            index.save_later(json_path, data, delay=0.01)
+        await asyncio.sleep(0.05)
+    persistence.flush()  # ecritures laissees en file par les tests precedents
+    writes = persistence.writes
+    asyncio.run(edit())
+    persistence.flush()
+    # Une copie et une ecriture pour 37 modifications (appel d'encodage + ecriture)
+    assert persistence.writes - writes == 2
+    assert index.free_at(slot_of_week('mardi', '10:00')) == list(range(3, 40))
+    with np.load(AvailabilityIndex.bits_path(json_path)) as saved:
+        assert str(saved['source_hash']) == AvailabilityIndex.source_hash(data)
+        assert saved['user_ids'].tolist() == index.user_ids
+        assert (saved['bits'] == index.bits).all()
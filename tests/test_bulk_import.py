@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+from utils.bulk_import import iter_rows, parse_row
+
+#recap de ce qu'il fait ce code :
+#Verifie l'import en masse ligne par ligne : une ligne invalide donne une ValueError lisible, jamais une autre exception
+
+NOW = datetime(2026, 3, 1, 12, tzinfo=pytz.UTC)
+PARIS = pytz.timezone('Europe/Paris')
+
+
+def test_valid_row():
+    event = parse_row({'title': 'Cours', 'date': '2030-01-07', 'time': '10:00', 'remind_before': '1d,1h',
+                       'mentions': '<@42>', 'duration': '1h30m'}, PARIS, NOW)
+    assert event['event_time'] == datetime(2030, 1, 7, 9, tzinfo=pytz.UTC)
+    assert event['reminder_times'] == [event['event_time'] - timedelta(days=1), event['event_time'] - timedelta(hours=1)]
+    assert event['mentioned_users'] == [42]
+    assert event['end_time'] == event['event_time'] + timedelta(minutes=90)
+
+
+@pytest.mark.parametrize('row', [
+    {'title': 'a', 'time': '2030-01-01 10:00', 'remind_before': '99999999w'},
+    {'title': 'a', 'time': '9999999999999999999999h'},
+    {'title': 'a', 'time': 'in 99999999 weeks'},
+    {'title': 'a', 'time': '2030-01-01 10:00', 'duration': '9999999999999999999999h'},
+    {'title': 'a', 'time': '9999-12-31 23:00', 'duration': '2h'},
+    {'title': 'a', 'time': '2030-02-30 10:00'},
+    {'title': '', 'time': '1h'},
+    {'title': 'a', 'time': '1h', 'channel_id': 'general'},
+])
+def test_invalid_rows_raise_value_error(row):
+    with pytest.raises(ValueError):
+        parse_row(row, PARIS, NOW)
+
+
+def test_bad_row_does_not_stop_the_import():
+    text = "title,time,remind_before\nok,2030-01-01 10:00,1h\nhuge,2030-01-01 10:00,99999999w\nok2,2h,5m\n"
+    parsed, errors = [], []
+    for line, row, error in iter_rows('events.csv', text):
+        try:
+            parsed.append(parse_row(row, PARIS, NOW)['title'])
+        except ValueError as e:
+            errors.append((line, str(e)))
+    assert parsed == ['ok', 'ok2']
+    assert errors == [(3, 'Invalid reminder format: 99999999w')]
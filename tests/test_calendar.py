@@ -0,0 +1,182 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from google.auth.credentials import AnonymousCredentials
+
+from utils.calendar_sync import CalendarSync
+from utils.fake_calendar import FakeCalendarServer
+from utils.freebusy import FreeBusyCache, busy_counts
+from utils.google_calendar import GoogleCalendarManager
+from utils.persistence import persistence
+
+#recap de ce qu'il fait ce code :
+#Verifie le client Calendar contre le faux serveur local (utils/fake_calendar.py) :
+#batchs avec echecs partiels, reessais 429/5xx a un seul niveau, rafraichissement du jeton sur 401,
+#fusion des operations de CalendarSync et requete freebusy groupee
+
+START = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+
+@pytest.fixture
+def server():
+    with FakeCalendarServer() as server:
+        yield server
+
+
+def run(coroutine_function, server, **options):
+    """Run coroutine_function(manager) with a manager authenticated on the fake server."""
+    async def main():
+        manager = GoogleCalendarManager(api_endpoint=server.url, backoff_base=0.001, **options)
+        assert await manager.authenticate_async()
+        try:
+            return await coroutine_function(manager)
+        finally:
+            manager.close()
+    return asyncio.run(main())
+
+
+def events(count):
+    return [{'title': f"Event {i}", 'start_time': START, 'end_time': START + timedelta(hours=1)} for i in range(count)]
+
+
+def test_batch_partial_failure(server):
+    server.fail_next(400, 2, in_batch=True)  # erreurs definitives : pas de reessai
+    ids = run(lambda manager: manager.create_events(events(120)), server)
+    assert ids.count(None) == 2  # les batchs partent en parallele : n'importe lesquels
+    assert len(server.events) == 118 and set(filter(None, ids)) == set(server.events)
+    assert server.batch_count == 3  # 120 requetes, BATCH_SIZE 50, aucun reessai
+
+
+def test_transient_errors_inside_batch_are_retried(server):
+    server.fail_next(429, 30, in_batch=True)
+    server.fail_next(503, 10, in_batch=True)
+    ids = run(lambda manager: manager.create_events(events(60)), server)
+    assert all(ids) and len(server.events) == 60
+
+
+def test_failed_batch_retried_at_one_level(server):
+    """A whole batch call failing with 503 is retried max_retries times in all, not max_retries squared."""
+    server.fail_next(503, 100)
+    ids = run(lambda manager: manager.create_events(events(10)), server, max_retries=3)
+    assert ids == [None] * 10
+    assert server.failures and len(server.failures) == 97
+
+
+def test_failed_batch_recovers(server):
+    server.fail_next(503, 2)
+    ids = run(lambda manager: manager.create_events(events(10)), server, max_retries=3)
+    assert all(ids)
+
+
+def test_single_request_retries(server):
+    server.fail_next(500, 2)
+    event_id = run(lambda manager: manager.create_event("Single", START, START + timedelta(hours=1)), server)
+    assert event_id in server.events
+
+
+class RefreshableCredentials(AnonymousCredentials):
+    """Anonymous credentials that count refreshes, like an expired OAuth token would be refreshed."""
+
+    refreshes = 0
+
+    def refresh(self, request):
+        self.refreshes += 1
+
+
+@pytest.mark.parametrize('batched', [False, True])
+def test_expired_token_is_refreshed(server, batched):
+    async def scenario(manager):
+        manager.creds = RefreshableCredentials()
+        manager._generation += 1  # connexions des threads recreees avec ces identifiants
+        server.fail_next(401, 1)
+        if batched:
+            ids = await manager.create_events(events(3))
+        else:
+            ids = [await manager.create_event("Single", START, START + timedelta(hours=1))]
+        return ids, manager.creds.refreshes
+
+    ids, refreshes = run(scenario, server, max_retries=1)
+    assert all(ids)
+    assert refreshes == 1
+
+
+def test_token_still_rejected_reauthenticates_once(server, monkeypatch):
+    """401 after the transport's own refreshes: the manager authenticates again, once."""
+    authentications = []
+
+    async def scenario(manager):
+        original = manager.authenticate
+
+        def authenticate(interactive=True):
+            authentications.append(interactive)
+            return original(interactive)
+        monkeypatch.setattr(manager, 'authenticate', authenticate)
+        manager.creds = RefreshableCredentials()
+        manager.creds.refresh_token = 'refresh'
+        manager._generation += 1
+        server.fail_next(401, 3)  # 1 appel + 2 rafraichissements de AuthorizedHttp
+        return await manager.create_event("Single", START, START + timedelta(hours=1))
+
+    assert run(scenario, server, max_retries=1) in server.events
+    assert authentications == [False]
+
+
+def test_delete_missing_event_counts_as_deleted(server):
+    async def scenario(manager):
+        ids = await manager.create_events(events(2))
+        return await manager.delete_events(ids + ['missing'])
+    assert run(scenario, server) == [True, True, True]
+    assert not server.events
+
+
+def test_calendar_sync_coalesces(server, tmp_path):
+    async def scenario(manager):
+        sync = CalendarSync(manager, str(tmp_path / 'calendar_events.json'))
+        sync.create('a', 'Cancelled', START, START + timedelta(hours=1))
+        sync.delete('a')  # create puis delete : aucun appel
+        sync.create('b', 'Draft', START, START + timedelta(hours=1))
+        sync.update('b', title='Final')  # create puis update : un seul create
+        assert 'a' not in sync.pending
+        assert await sync.flush() == {'created': 1, 'updated': 0, 'deleted': 0, 'failed': 0}
+        assert server.request_count == 1
+        assert server.events[sync.event_id('b')]['summary'] == 'Final'
+
+        sync.reschedule('b', START + timedelta(days=1))  # garde la duree
+        sync.update('b', title='Again')
+        assert await sync.flush() == {'created': 0, 'updated': 1, 'deleted': 0, 'failed': 0}
+        moved = server.events[sync.event_id('b')]
+        assert moved['summary'] == 'Again'
+        assert datetime.fromisoformat(moved['end']['dateTime']) - \
+            datetime.fromisoformat(moved['start']['dateTime']) == timedelta(hours=1)
+
+        server.fail_next(400, 1, in_batch=True)
+        sync.delete('b')
+        assert (await sync.flush())['failed'] == 1 and sync.pending['b']['op'] == 'delete'
+        assert (await sync.flush())['deleted'] == 1 and not server.events
+        persistence.flush()
+        return CalendarSync(manager, sync.data_file)
+
+    reloaded = run(scenario, server)
+    assert reloaded.events == {} and reloaded.pending == {}
+
+
+def test_freebusy_single_batch_and_cache(server):
+    emails = [f"user{i}@example.com" for i in range(120)]
+    for email in emails[:100]:
+        server.busy[email] = [(START + timedelta(hours=2), START + timedelta(hours=3))]
+
+    async def scenario(manager):
+        cache = FreeBusyCache(manager, ttl=60)
+        busy = await cache.get(emails, START)
+        assert server.batch_count == 1  # 3 requetes freeBusy de 50 agendas, un seul appel HTTP
+        requests = server.request_count
+        again = await cache.get(emails[:50], START + timedelta(minutes=30), START + timedelta(days=2))
+        assert server.request_count == requests
+        return busy, again
+
+    busy, again = run(scenario, server)
+    assert sum(1 for intervals in busy.values() if intervals is None) == 20
+    assert again.keys() == set(emails[:50])
+    counts = busy_counts([START + timedelta(hours=h) for h in range(4)], timedelta(hours=1), busy.values())
+    assert counts == [0, 0, 100, 0]
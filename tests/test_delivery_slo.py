@@ -0,0 +1,83 @@
+import asyncio
+from types import SimpleNamespace
+
+from core.time_management import TimeManagementCog
+from utils.delivery_slo import DeliverySLO
+
+#recap de ce qu'il fait ce code :
+#Verifie les alertes de l'objectif de retard des rappels : seuils, une alerte par depassement, horloge injectee
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def send(slo, clock, count, lag, guild_id=1, channel_id=10):
+    for _ in range(count):
+        scheduled = clock.now - lag
+        slo.record(guild_id, channel_id, scheduled, scheduled, clock.now)
+
+
+def test_a_few_misses_do_not_alert():
+    clock = Clock()
+    slo = DeliverySLO(min_samples=20, clock=clock)
+    slo.record_missed(1, 10, clock.now - 60)
+    assert slo.breaches() == []
+    send(slo, clock, 40, lag=0.5)
+    # 1 manquee sur 41 : sous le taux tolere
+    assert slo.breaches() == []
+    for _ in range(3):
+        slo.record_missed(1, 10, clock.now - 60)
+    assert [scope for scope, _ in slo.breaches()] == [('all',), ('guild', 1), ('channel', 10)]
+
+
+def test_a_breach_is_reported_once_until_it_recovers():
+    clock = Clock()
+    slo = DeliverySLO(target=5, window=600, min_samples=10, cooldown=300, clock=clock)
+    send(slo, clock, 20, lag=30)
+    assert len(slo.breaches()) == 3
+    clock.now += 400
+    send(slo, clock, 5, lag=30)
+    assert slo.breaches() == []  # toujours en depassement : pas de nouvelle alerte
+
+    clock.now += 700
+    send(slo, clock, 20, lag=0.5)
+    assert slo.breaches() == []  # retabli
+    clock.now += 10
+    send(slo, clock, 40, lag=30)
+    assert len(slo.breaches()) == 3
+
+
+def test_misses_are_counted_on_the_injected_clock():
+    clock = Clock(now=5_000.0)
+    slo = DeliverySLO(window=600, min_samples=1, clock=clock)
+    slo.record_missed(1, 10, 4_900.0)
+    assert slo.stats(('all',))['missed'] == 1
+    clock.now += 601
+    assert slo.stats(('all',))['missed'] == 0
+
+
+def test_one_admin_message_lists_the_breached_scopes():
+    clock = Clock()
+    sent = []
+
+    async def channel_send(message):
+        sent.append(message)
+
+    cog = SimpleNamespace(
+        delivery_slo=DeliverySLO(min_samples=10, clock=clock),
+        admin_channel_id=99,
+        bot=SimpleNamespace(get_channel=lambda channel_id: SimpleNamespace(send=channel_send)),
+    )
+    send(cog.delivery_slo, clock, 20, lag=30, guild_id=1, channel_id=10)
+    send(cog.delivery_slo, clock, 20, lag=30, guild_id=2, channel_id=20)
+
+    asyncio.run(TimeManagementCog.report_slo_breaches(cog))
+    asyncio.run(TimeManagementCog.report_slo_breaches(cog))
+    assert len(sent) == 1
+    assert sent[0].count('\n• ') == 5  # all, 2 serveurs, 2 salons
+    assert 'guild 2' in sent[0] and 'channel 10' in sent[0]
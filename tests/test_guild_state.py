@@ -0,0 +1,61 @@
+import asyncio
+
+from utils.guild_state import GuildStateCache
+
+#recap de ce qu'il fait ce code :
+#Verifie l'eviction du cache des etats par serveur (LRU, budget, serveurs inactifs)
+
+
+def make_cache(saved, **kwargs):
+    return GuildStateCache(loader=lambda guild_id: {'guild': guild_id},
+                           save=lambda guild_id, state: saved.append(guild_id), **kwargs)
+
+
+def test_background_load_is_not_evicted_right_away():
+    """Presence sampling (touch=False) must not load, save and evict a guild on every cycle."""
+    saved = []
+    cache = make_cache(saved)
+    for _ in range(3):
+        cache.get(1, touch=False)
+        cache.evict_idle(max_idle_seconds=3600)
+    assert 1 in cache
+    assert saved == []
+
+
+def test_background_access_does_not_refresh_idle_time():
+    saved = []
+    cache = make_cache(saved)
+    cache.get(1)
+    cache.last_used[1] -= 7200  # inutilise depuis deux heures
+    cache.get(1, touch=False)
+    cache.evict_idle(max_idle_seconds=3600)
+    assert 1 not in cache
+    assert saved == [1]
+
+
+def test_lru_eviction_keeps_accessed_guild():
+    saved = []
+    cache = make_cache(saved, max_guilds=2)
+    cache.get(1)
+    cache.get(2)
+    cache.get(1)
+    cache.get(3)
+    assert saved == [2]
+    assert 1 in cache and 3 in cache
+
+
+def test_concurrent_async_gets_share_one_load():
+    loads = []
+
+    def loader(guild_id):
+        loads.append(guild_id)
+        return {'guild': guild_id}
+
+    async def run():
+        cache = GuildStateCache(loader=loader)
+        states = await asyncio.gather(*(cache.get_async(1) for _ in range(5)))
+        assert all(state is states[0] for state in states)
+        assert await cache.get_async(1) is states[0]
+        assert not cache.loading
+    asyncio.run(run())
+    assert loads == [1]
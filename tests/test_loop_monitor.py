@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+from utils.loop_monitor import LoopMonitor, format_stack
+
+#recap de ce qu'il fait ce code :
+#Verifie que les blocages de la boucle sont attribues a la commande ou tache qui bloque, avec sa pile
+
+
+def block(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_stalls_are_attributed_to_the_blocking_command_and_task():
+    monitor = LoopMonitor(history=10)
+
+    async def command():
+        monitor.label(asyncio.current_task(), 'command suggest_times')
+        await asyncio.sleep(0.2)
+        block(0.5)
+
+    async def check_reminders():
+        await asyncio.sleep(0.9)
+        block(0.5)
+
+    async def main():
+        monitor.start(interval=0.05, threshold=0.2)
+        await asyncio.gather(command(), asyncio.create_task(check_reminders(), name='check_reminders'))
+        await asyncio.sleep(0.2)
+        monitor.stop()
+
+    asyncio.run(main())
+    stalls = {stall['label']: stall for stall in monitor.stalls}
+    assert set(stalls) == {'command suggest_times', 'check_reminders'}
+    for stall in stalls.values():
+        assert stall['duration'] >= 0.4
+        assert 'block' in format_stack(stall['stack'])[-1]
+    assert monitor.max_lag >= 0.4
+    assert monitor.percentile(50) <= 0.05
+
+
+def test_percentile_is_the_bucket_bound():
+    monitor = LoopMonitor()
+    for lag in [0.0005] * 98 + [0.3, 2.0]:
+        monitor.observe(lag)
+    assert monitor.percentile(50) == 0.001
+    assert monitor.percentile(99) == 0.5
+    assert monitor.percentile(100) == 2.0
@@ -0,0 +1,51 @@
+import urllib.request
+
+from utils.metrics import Registry, serve
+
+#recap de ce qu'il fait ce code :
+#Verifie le format Prometheus des metriques, l'estimation des quantiles et le point d'acces /metrics
+
+
+def test_render_in_prometheus_format():
+    registry = Registry()
+    commands = registry.counter('bot_commands_total', 'Commands.', ('command', 'status'))
+    seconds = registry.histogram('bot_command_duration_seconds', 'Duration.', ('command',), buckets=(0.01, 0.1))
+    registry.gauge('event_loop_lag_seconds', 'Lag.', lambda: 0.002)
+    commands.labels('suggest_times', 'ok').inc()
+    commands.labels('say "hi"', 'error').inc(2)
+    for value in (0.005, 0.05, 0.5):
+        seconds.labels('suggest_times').observe(value)
+
+    lines = registry.render().splitlines()
+    assert 'bot_commands_total{command="suggest_times",status="ok"} 1.0' in lines
+    assert 'bot_commands_total{command="say \\"hi\\"",status="error"} 2.0' in lines
+    assert [line for line in lines if line.startswith('bot_command_duration_seconds_bucket')] == [
+        'bot_command_duration_seconds_bucket{command="suggest_times",le="0.01"} 1',
+        'bot_command_duration_seconds_bucket{command="suggest_times",le="0.1"} 2',
+        'bot_command_duration_seconds_bucket{command="suggest_times",le="+Inf"} 3',
+    ]
+    assert 'bot_command_duration_seconds_count{command="suggest_times"} 3' in lines
+    assert 'event_loop_lag_seconds 0.002' in lines
+    assert '# TYPE bot_command_duration_seconds histogram' in lines
+
+
+def test_quantile_is_interpolated_in_its_bucket():
+    child = Registry().histogram('latency_seconds', 'Latency.', buckets=(0.01, 0.05, 0.1)).labels()
+    for _ in range(100):
+        child.observe(0.042)
+    # Toutes dans ]0.01, 0.05] : la mediane est au milieu du seau
+    assert abs(child.quantile(0.5) - 0.03) < 1e-9
+    assert child.quantile(1.0) == 0.05
+    assert child.count == 100
+
+
+def test_metrics_endpoint():
+    registry = Registry()
+    registry.counter('reminders_processed_total', 'Reminders.').inc(3)
+    server = serve(registry, port=0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics") as response:
+            assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            assert 'reminders_processed_total 3.0' in response.read().decode().splitlines()
+    finally:
+        server.shutdown()
@@ -0,0 +1,23 @@
+import sqlite3
+from datetime import datetime
+
+from utils.migrations import archive_activity_log, migrate
+
+#recap de ce qu'il fait ce code :
+#Verifie que l'archivage d'activity_log ne coupe jamais un jour en deux
+
+
+def test_archive_moves_whole_days_only():
+    conn = sqlite3.connect(':memory:')
+    migrate(conn)
+    conn.executemany('INSERT INTO activity_log (participant_id, status, timestamp) VALUES (?, ?, ?)', [
+        (1, 'online', '2026-01-01 08:00:00'),
+        (1, 'online', '2026-01-02 08:00:00'),
+        (1, 'offline', '2026-01-02 20:00:00'),
+        (1, 'online', '2026-01-03 08:00:00'),
+    ])
+    # 90 jours avant le 2 avril 12:00 = le 2 janvier 12:00 : le 2 janvier reste entier
+    assert archive_activity_log(conn, 90, now=datetime(2026, 4, 2, 12)) == 1
+    assert [row[0] for row in conn.execute('SELECT timestamp FROM activity_log ORDER BY timestamp')] == [
+        '2026-01-02 08:00:00', '2026-01-02 20:00:00', '2026-01-03 08:00:00']
+    assert conn.execute('SELECT COUNT(*) FROM activity_log_202601').fetchone()[0] == 1
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from datetime import timedelta
+from types import SimpleNamespace
+
+from core.time_management import TimeManagementCog
+from utils import database
+from utils.calendar_sync import CalendarSync
+from utils.fake_discord import FakeDiscord, VirtualClock
+from utils.persistence import persistence, write_atomic
+from utils.reminders import add_reminders, load_reminders, load_reminders_async, new_reminder, save_reminders
+from utils.time_manager import TimeManagement, get_timezone
+
+#recap de ce qu'il fait ce code :
+#Verifie qu'une passe du verificateur de rappels ne perd pas les rappels ajoutes pendant qu'elle attend Discord
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def reminder(clock, minutes, title):
+    author = SimpleNamespace(id=1, name='author')
+    return new_reminder(author, 10, title, '', clock.now() + timedelta(minutes=minutes), [], [], get_timezone('UTC'))
+
+
+def with_config(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('data')
+    with open(os.path.join(ROOT, 'data', 'config.json.example')) as f:
+        config = json.load(f)
+    with open('data/config.json', 'w') as f:
+        json.dump(config, f)
+
+
+async def run_pass(clock):
+    database.init_db()
+    cog = TimeManagementCog(FakeDiscord(clock, latency=0.05))
+    cog.track_activity.cancel()
+    cog.clock = clock.now
+    cog.calendar_sync = CalendarSync(None, 'data/calendar_sync.json')
+    await asyncio.to_thread(cog.reminder_lease.try_acquire)
+
+    send_reminder = cog.send_reminder
+    added = reminder(clock, 60, 'Added during the pass')
+
+    async def send_and_schedule(*args, **kwargs):
+        # Un /schedule arrive pendant que la passe attend l'API Discord
+        add_reminders([added])
+        return await send_reminder(*args, **kwargs)
+    cog.send_reminder = send_and_schedule
+
+    await cog.process_reminders()
+    persistence.flush()
+    return added
+
+
+def test_reminder_added_during_a_pass_survives(tmp_path, monkeypatch):
+    with_config(tmp_path, monkeypatch)
+
+    clock = VirtualClock()
+    due, finished = reminder(clock, 0, 'Due now'), reminder(clock, -10, 'Finished')
+    save_reminders([due, finished])
+
+    added = asyncio.run(run_pass(clock))
+    ids = {r['id'] for r in load_reminders()}
+    assert added['id'] in ids and due['id'] in ids
+    assert finished['id'] not in ids
+
+
+def test_write_atomic_leaves_no_temporary_file(tmp_path):
+    path = str(tmp_path / 'reminders.json')
+    write_atomic(path, b'{"REMINDERS": []}')
+    write_atomic(path, b'{"REMINDERS": [1]}')
+    assert os.listdir(tmp_path) == ['reminders.json']
+    with open(path) as f:
+        assert json.load(f) == {'REMINDERS': [1]}
+
+
+def test_async_load_sees_queued_writes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('data')
+    clock = VirtualClock()
+    first = reminder(clock, 5, 'First')
+    save_reminders([first])
+    add_reminders([reminder(clock, 10, 'Second')])
+    # Lu par le thread d'ecriture, apres les sauvegardes deja en file
+    assert [r['title'] for r in asyncio.run(load_reminders_async())] == ['First', 'Second']
+    assert asyncio.run(persistence.load_json_async('data/missing.json', default=list)) == []
+    persistence.flush()
+
+
+ADDER = '''
+import sys
+sys.path.insert(0, sys.argv[1])
+from types import SimpleNamespace
+from utils.fake_discord import VirtualClock
+from utils.persistence import persistence
+from utils.reminders import add_reminders, new_reminder
+from utils.time_manager import TimeManagement, get_timezone
+
+author = SimpleNamespace(id=1, name='author')
+for i in range(25):
+    add_reminders([new_reminder(author, 10, f'{sys.argv[2]} {i}', '', VirtualClock().now(), [], [],
+                                get_timezone('UTC'))])
+    persistence.flush()
+'''
+
+
+def test_two_processes_adding_reminders_lose_nothing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('data')
+    database.init_db()
+    adders = [subprocess.Popen([sys.executable, '-c', ADDER, ROOT, name])
+              for name in ('first', 'second')]
+    assert [adder.wait(timeout=120) for adder in adders] == [0, 0]
+    # Sans le verrou, chaque processus reecrit le fichier qu'il a lu avant l'ajout de l'autre
+    assert len(load_reminders()) == 50
+
+
+def test_delete_and_reschedule_keep_other_changes(tmp_path, monkeypatch):
+    with_config(tmp_path, monkeypatch)
+    clock = VirtualClock()
+    kept, moved = reminder(clock, 30, 'Kept'), reminder(clock, 60, 'Moved')
+    save_reminders([kept, moved])
+    replies = []
+
+    async def send(message, **kwargs):
+        replies.append(message)
+
+    async def commands():
+        database.init_db()
+        cog = TimeManagementCog(FakeDiscord(clock))
+        cog.track_activity.cancel()
+        cog.time_manager = TimeManagement(data_file=None)
+        cog.calendar_sync = CalendarSync(None, 'data/calendar_sync.json')
+        ctx = SimpleNamespace(author=SimpleNamespace(id=1), send=send)
+        await cog.reschedule.callback(cog, ctx, moved['id'], '2h')
+        # Ajoute par un autre processus entre la lecture de /delete et son ecriture
+        add_reminders([reminder(clock, 90, 'Added elsewhere')])
+        await cog.delete.callback(cog, ctx, kept['id'])
+        await persistence.wait_idle()
+    asyncio.run(commands())
+
+    assert all(reply.startswith('✅') for reply in replies), replies
+    reminders = {r['title']: r for r in load_reminders()}
+    assert sorted(reminders) == ['Added elsewhere', 'Moved']
+    assert reminders['Moved']['main_time'] != moved['main_time']
@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+from utils.database import init_db
+from utils.feedback_store import FeedbackStore
+from utils.persistence import persistence
+from utils.shared_store import SharedStore
+from utils.time_manager import TimeManagement
+
+#recap de ce qu'il fait ce code :
+#Verifie que deux processus (deux instances sur la meme base) ne s'ecrasent pas leurs donnees partagees
+
+
+def test_two_processes_keep_each_others_entries(tmp_path):
+    db_path = str(tmp_path / 'dataset.db')
+    init_db(db_path)
+    first, second = SharedStore('timezones', db_path), SharedStore('timezones', db_path)
+    first.load(), second.load()
+    first.set(1, 'Europe/Paris')
+    second.set(2, 'America/New_York')
+    persistence.flush()
+    assert SharedStore('timezones', db_path).load() == {'1': 'Europe/Paris', '2': 'America/New_York'}
+
+    # Chaque processus relit les changements de l'autre (et les siens, deja en memoire)
+    assert second.changes()['1'] == 'Europe/Paris'
+    second.delete(1)
+    persistence.flush()
+    assert first.changes() == {'1': None, '2': 'America/New_York'}
+    assert first.changes() == {}
+
+
+def test_legacy_file_is_imported_once(tmp_path):
+    db_path = str(tmp_path / 'dataset.db')
+    init_db(db_path)
+    legacy = tmp_path / 'user_timezones.json'
+    with open(legacy, 'w') as f:
+        json.dump({'1': 'Asia/Tokyo'}, f)
+    assert TimeManagement(str(legacy), db_path).timezones == {1: 'Asia/Tokyo'}
+    assert not legacy.exists() and (tmp_path / 'user_timezones.json.migrated').exists()
+    time_manager = TimeManagement(str(legacy), db_path)
+    time_manager.set_timezone(2, 'Europe/Paris')
+    persistence.flush()
+    assert TimeManagement(str(legacy), db_path).timezones == {1: 'Asia/Tokyo', 2: 'Europe/Paris'}
+
+
+def test_feedback_from_two_processes_keeps_one_order(tmp_path):
+    db_path = str(tmp_path / 'dataset.db')
+    init_db(db_path)
+
+    async def run():
+        first = FeedbackStore(db_path, legacy_log=None, legacy_path=None)
+        second = FeedbackStore(db_path, legacy_log=None, legacy_path=None)
+        seen = []
+        first.listeners.append(seen.append)
+        await asyncio.gather(*(second.submit({'id': f"b{i}"}) for i in range(3)))
+        await first.submit({'id': 'a0'})
+        await second.submit({'id': 'b3'})
+        assert await first.refresh() == 1
+        # Les memes positions dans les deux processus, chaque feedback vu une fois
+        assert [r['id'] for r in seen] == ['b0', 'b1', 'b2', 'a0', 'b3']
+        assert [r['id'] for r in second.iter_records()] == [r['id'] for r in first.iter_records()]
+        assert first.read(-1) == second.read(-1) == {'id': 'b3'}
+        await first.close()
+        await second.close()
+    asyncio.run(run())
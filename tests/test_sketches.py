@@ -0,0 +1,107 @@
+import math
+import random
+from datetime import datetime, timedelta, timezone
+
+import discord
+import pytest
+
+from core.time_management import SketchActivityTracker
+from utils.sketches import CountMinSketch, HyperLogLog
+
+#recap de ce qu'il fait ce code :
+#Verifie les bornes d'erreur documentees des sketches (utils/sketches.py)
+#et la fenetre glissante de SketchActivityTracker (rotation des HyperLogLog, profils par membre)
+
+
+def test_count_min_sketch_error_bound():
+    rng = random.Random(42)
+    cms = CountMinSketch()
+    exact = {}
+    for _ in range(200_000):
+        key = (rng.randint(1, 5000), rng.randint(0, 23))
+        exact[key] = exact.get(key, 0) + 1
+        cms.add(key)
+    bound = math.e / cms.width * cms.total
+    over = [cms.estimate(key) - count for key, count in exact.items()]
+    assert min(over) >= 0, "count-min sketch underestimated a key"
+    within = sum(1 for o in over if o <= bound) / len(over)
+    assert within >= 1 - math.exp(-cms.depth)
+
+
+@pytest.mark.parametrize('precision', [8, 10])
+@pytest.mark.parametrize('n', [100, 1_000, 10_000, 50_000])
+def test_hyperloglog_error_bound(precision, n):
+    rng = random.Random(n)
+    hll = HyperLogLog(precision)
+    for _ in range(n):
+        hll.add(rng.getrandbits(64))
+    std_error = 1.04 / math.sqrt(1 << precision)
+    assert abs(hll.count() - n) / n <= 3 * std_error
+
+
+def test_sketches_round_trip():
+    cms, hll = CountMinSketch(), HyperLogLog()
+    for i in range(1000):
+        cms.add(i % 7)
+        hll.add(i)
+    assert CountMinSketch.from_dict(cms.to_dict()).estimate(3) == cms.estimate(3)
+    assert HyperLogLog.from_dict(hll.to_dict()).count() == hll.count()
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    return SketchActivityTracker(guild_id=1, days=7, data_dir=str(tmp_path))
+
+
+def test_window_users_expire(tracker):
+    """Distinct users only count while they are inside the rolling window."""
+    start = datetime(2026, 1, 5, 12, tzinfo=timezone.utc)
+    for day in range(30):
+        for user in range(100):
+            tracker.add_message(day * 1000 + user, start + timedelta(days=day))
+    # 100 nouveaux membres par jour, fenetre de 7 jours : environ 700, pas 3000
+    assert tracker.window_counts()[0] == pytest.approx(700, rel=0.1)
+    assert len(tracker.daily_users) == 7
+
+
+def test_presence_users_expire(tracker):
+    start = datetime(2026, 1, 5, 12, tzinfo=timezone.utc)
+    for day in range(30):
+        for user in range(50):
+            tracker.add_presence(day * 1000 + user, start + timedelta(days=day), discord.Status.online)
+    assert tracker.window_counts()[1] == pytest.approx(350, rel=0.1)
+
+
+def test_hour_of_week_profile_uses_sketch(tracker):
+    monday = datetime(2026, 1, 5, tzinfo=timezone.utc)
+    for _ in range(20):
+        tracker.add_message(1, monday.replace(hour=9))
+        tracker.add_message(2, monday.replace(hour=21))
+    profile = tracker.hour_of_week_profile([1, 2, 3])
+    assert profile[0, 9] == 1.0 and profile[0, 21] < 0.1
+    assert profile[1, 21] == 1.0 and profile[1, 9] < 0.1
+    assert (profile[2] == 0.5).all()  # membre sans message : neutre
+
+
+def test_estimate_active_users_scores_members(tracker):
+    monday = datetime(2026, 1, 5, 18, tzinfo=timezone.utc)
+    for user in range(10):
+        for _ in range(user + 1):
+            tracker.add_message(user, monday)
+    active, scores = tracker.estimate_active_users(monday + timedelta(weeks=1))
+    assert active == pytest.approx(10, abs=1)
+    assert max(scores, key=scores.get) == 9
+    assert scores[9] >= 10
+
+
+def test_save_and_load(tracker, tmp_path):
+    now = datetime(2026, 1, 5, 18, tzinfo=timezone.utc)
+    for user in range(50):
+        tracker.add_message(user, now)
+    tracker.save_activity_data()
+    from utils.persistence import persistence
+    persistence.flush()
+    loaded = SketchActivityTracker(guild_id=1, days=7, data_dir=str(tmp_path))
+    assert loaded.window_counts() == tracker.window_counts()
+    assert loaded.message_volume(7, now) == tracker.message_volume(7, now)
+    assert list(loaded.recent_users) == list(tracker.recent_users)
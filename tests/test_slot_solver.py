@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from benchmarks.generate import meeting_invitees, solve_meeting_slots_loop
+from utils.availability_index import SLOT_MINUTES, compile_preferences
+from utils.slot_solver import candidate_slots, solve_meeting_slots
+from utils.time_manager import TimeManagement, get_timezone, zone_offsets_minutes
+
+#recap de ce qu'il fait ce code :
+#Verifie /find_meeting autour d'un changement d'heure : le creneau local reste le meme, l'heure UTC change
+#et que le solveur vectorise donne les memes creneaux que sa version en boucles
+
+NEW_YORK = get_timezone('America/New_York')
+
+
+def test_offsets_follow_daylight_saving():
+    # Passage a l'heure d'ete a New York : dimanche 8 mars 2026, 07:00 UTC
+    start = datetime(2026, 3, 7, tzinfo=timezone.utc)
+    offsets = zone_offsets_minutes(NEW_YORK, start, 3 * 96, SLOT_MINUTES)
+    change = (datetime(2026, 3, 8, 7, tzinfo=timezone.utc) - start) // timedelta(minutes=SLOT_MINUTES)
+    assert (offsets[:change] == -300).all()
+    assert (offsets[change:] == -240).all()
+
+
+def test_utc_offset_of_an_instant():
+    time_manager = TimeManagement(data_file=None)
+    time_manager.timezones = {1: 'America/New_York'}
+    assert time_manager.utc_offset_minutes(1, datetime(2026, 1, 5, tzinfo=timezone.utc)) == -300
+    assert time_manager.utc_offset_minutes(1, datetime(2026, 7, 5, tzinfo=timezone.utc)) == -240
+
+
+def test_meeting_slot_keeps_local_time_across_dst():
+    """Free on Mondays 09:00-10:00 in New York: 14:00 UTC before the change, 13:00 UTC after."""
+    time_manager = TimeManagement(data_file=None)
+    time_manager.timezones = {1: 'America/New_York'}
+    masks = compile_preferences({'lundi': {'all_day': False, 'start_time': '09:00', 'end_time': '10:00'}})[None, :]
+    start, count = candidate_slots(datetime(2026, 3, 1, tzinfo=timezone.utc), 14)
+    offsets = time_manager.utc_offsets_minutes([1], start, count, SLOT_MINUTES)
+    results = solve_meeting_slots(start, 60, masks, np.array([True]), offsets, horizon_days=14, top_k=2)
+    assert sorted(slot for slot, _, _ in results) == [
+        datetime(2026, 3, 2, 14, tzinfo=timezone.utc),
+        datetime(2026, 3, 9, 13, tzinfo=timezone.utc),
+    ]
+
+
+@pytest.mark.parametrize('duration', [15, 60, 95])
+def test_solver_matches_the_loop_version(duration):
+    masks, known, offsets, activity = meeting_invitees(40, seed=duration)
+    start = datetime(2026, 3, 4, 10, 7, tzinfo=timezone.utc)
+    vectorized = solve_meeting_slots(start, duration, masks, known, offsets, activity, horizon_days=3)
+    looped = solve_meeting_slots_loop(start, duration, masks, known, offsets, activity, horizon_days=3)
+    assert [(slot, count) for slot, _, count in vectorized] == [(slot, count) for slot, _, count in looped]
+    assert np.allclose([e for _, e, _ in vectorized], [e for _, e, _ in looped])
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+from utils.time_parser import CORPUS, MAX_DURATION_SECONDS, compile_expression, parse_duration, parse_time_expression
+
+#recap de ce qu'il fait ce code :
+#Verifie l'analyse des expressions de temps : corpus de reference, et seule ValueError pour les entrees invalides
+#(y compris les nombres enormes, qui debordaient de timedelta / datetime avec OverflowError)
+
+NOW = datetime(2026, 3, 1, 12, tzinfo=pytz.UTC)
+
+
+@pytest.mark.parametrize('expression,expected', CORPUS)
+def test_corpus(expression, expected):
+    if expected is None:
+        with pytest.raises(ValueError):
+            compile_expression(expression)
+    else:
+        assert compile_expression(expression)[0] == expected
+        parse_time_expression(expression, pytz.timezone('Europe/Paris'), NOW)
+
+
+@pytest.mark.parametrize('text', ['99999999w', '9999999999999999999999h', '999999999999 days', '1' + '0' * 400 + 's'])
+def test_huge_durations_are_value_errors(text):
+    with pytest.raises(ValueError):
+        parse_duration(text)
+    with pytest.raises(ValueError):
+        parse_time_expression(f"in {text}", pytz.UTC, NOW)
+
+
+@pytest.mark.parametrize('text,tz', [('0001-01-01 00:00', 'Asia/Tokyo'), ('9999-12-31 23:59', 'America/New_York')])
+def test_dates_out_of_range_are_value_errors(text, tz):
+    with pytest.raises(ValueError):
+        parse_time_expression(text, pytz.timezone(tz), NOW)
+
+
+def test_longest_duration_still_resolves():
+    assert parse_duration(f"{MAX_DURATION_SECONDS}s") == timedelta(seconds=MAX_DURATION_SECONDS)
+    assert parse_time_expression(f"{MAX_DURATION_SECONDS}s", pytz.UTC, NOW)[0].year == 2126
+
+
+def test_bare_hour_is_a_time_of_day():
+    paris = pytz.timezone('Europe/Paris')
+    # 12:00 UTC = 13:00 a Paris : "18h" est 18:00 aujourd'hui, "9h" 09:00 demain
+    assert parse_time_expression('18h', paris, NOW) == (datetime(2026, 3, 1, 17, tzinfo=pytz.UTC), 'time')
+    assert parse_time_expression('9h', paris, NOW)[0] == datetime(2026, 3, 2, 8, tzinfo=pytz.UTC)
+    assert parse_time_expression('demain 18h', paris, NOW)[0].hour == parse_time_expression('18h', paris, NOW)[0].hour
+
+
+@pytest.mark.parametrize('text', ['dans 18h', '18 heures', 'in 18h'])
+def test_explicit_forms_are_durations(text):
+    assert parse_time_expression(text, pytz.UTC, NOW) == (NOW + timedelta(hours=18), 'duration')
+
+
+def test_expected_durations_keep_bare_hours():
+    # Duree attendue (remind_before, duration) : "1h" reste une heure
+    assert parse_duration('1h') == timedelta(hours=1)
+    assert parse_duration('18h') == timedelta(hours=18)
@@ -0,0 +1,82 @@
+import json
+from types import SimpleNamespace
+
+from core.time_management import TimeManagementCog
+from utils.database import init_db
+from utils.persistence import persistence
+from utils.user_data import EmailDirectory
+
+#recap de ce qu'il fait ce code :
+#Verifie que les roles de l'annuaire d'emails sont gardes par serveur et recales sur role.members
+
+
+def directory_in(tmp_path):
+    db_path = str(tmp_path / 'dataset.db')
+    init_db(db_path)
+    return EmailDirectory(tmp_path / 'user_emails.json', db_path)
+
+
+def test_roles_are_kept_per_guild(tmp_path):
+    directory = directory_in(tmp_path)
+    directory.set(1, 'a@example.com', [10], guild_id=100)
+    directory.update_roles(1, 200, [20])
+    # Un changement de roles dans le serveur 200 ne touche pas le serveur 100
+    directory.update_roles(1, 200, [21])
+    assert directory.role_user_ids(10) == {'1'}
+    assert directory.role_user_ids(20) == set()
+    assert directory.emails_for_role(21) == {'a@example.com'}
+
+    persistence.flush()
+    reloaded = EmailDirectory(tmp_path / 'user_emails.json', directory.store.db_path)
+    assert reloaded.users == directory.users
+    assert reloaded.role_user_ids(10) == {'1'}
+
+
+def test_old_role_list_is_moved_to_its_guild(tmp_path):
+    path = tmp_path / 'user_emails.json'
+    with open(path, 'w') as f:
+        json.dump({'1': {'email': 'a@example.com', 'roles': ['10', '20']}}, f)
+    directory = directory_in(tmp_path)
+    assert directory.role_user_ids(20) == {'1'}
+    # Le membre est vu dans le serveur 100, qui possede le role 10 : le role 20 reste non attribue
+    directory.update_roles(1, 100, [11], guild_role_ids=[10, 11])
+    assert directory.role_user_ids(10) == set()
+    assert directory.role_user_ids(11) == directory.role_user_ids(20) == {'1'}
+    persistence.flush()
+
+
+def fake_guild(members, roles):
+    role_objects = {}
+    guild = SimpleNamespace(id=100, chunked=True)
+    for role_id in roles:
+        role_objects[role_id] = SimpleNamespace(id=role_id, members=[], is_default=lambda: False)
+    for user_id, role_ids in members.items():
+        member = SimpleNamespace(id=user_id, name=f"user{user_id}", roles=[role_objects[r] for r in role_ids])
+        for role_id in role_ids:
+            role_objects[role_id].members.append(member)
+    by_id = {m.id: m for role in role_objects.values() for m in role.members}
+    guild.roles = list(role_objects.values())
+    guild.get_role = role_objects.get
+    guild.get_member = by_id.get
+    return guild
+
+
+def test_role_emails_follow_live_members_and_heal_the_index(tmp_path):
+    directory = directory_in(tmp_path)
+    directory.set(1, 'a@example.com', [10], guild_id=100)
+    directory.set(2, 'b@example.com', [10], guild_id=100)
+    directory.set(3, 'c@example.com', [], guild_id=100)
+    cog = SimpleNamespace(emails=directory)
+
+    # Aucun evenement recu : 2 a perdu le role, 3 et 4 (non inscrit) l'ont obtenu
+    guild = fake_guild({1: [10], 2: [11], 3: [10], 4: [10]}, [10, 11])
+    emails, missing = TimeManagementCog.role_emails(cog, guild, '10')
+    assert emails == {'a@example.com', 'c@example.com'}
+    assert missing == ['user4']
+    assert directory.role_user_ids(10) == {'1', '3'}
+    assert directory.role_user_ids(11) == {'2'}
+
+    # Serveur non charge : l'index (recale) sert de repli
+    guild.chunked = False
+    assert TimeManagementCog.role_emails(cog, guild, '10') == ({'a@example.com', 'c@example.com'}, [])
+    persistence.flush()
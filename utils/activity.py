@@ -61,26 +61,17 @@ def aggregate_participant_activity(participant_id):
             else:
                 daily_summary[date_key]['offline_times'].append(timestamp)
 
-        
-        for date_key, times in daily_summary.items():
-            
-            cursor.execute('''
-            SELECT COUNT(*) FROM daily_availability
-            WHERE participant_id = ? AND date = ?
-            ''', (participant_id, date_key))
-            existing_entry = cursor.fetchone()[0]
-
-            if existing_entry == 0:
-                cursor.execute('''
-                INSERT INTO daily_availability (participant_id, date, online_times, offline_times)
-                VALUES (?, ?, ?, ?)
-                ''', (participant_id, date_key, str(times['online_times']), str(times['offline_times'])))
-            else:
-                cursor.execute('''
-                UPDATE daily_availability
-                SET online_times = ?, offline_times = ?
-                WHERE participant_id = ? AND date = ?
-                ''', (str(times['online_times']), str(times['offline_times']), participant_id, date_key))
+        # Upsert grace a la contrainte unique (participant_id, date)
+        cursor.executemany('''
+        INSERT INTO daily_availability (participant_id, date, online_times, offline_times)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (participant_id, date) DO UPDATE SET
+            online_times = excluded.online_times,
+            offline_times = excluded.offline_times
+        ''', [
+            (participant_id, date_key.isoformat(), str(times['online_times']), str(times['offline_times']))
+            for date_key, times in daily_summary.items()
+        ])
 
         conn.commit()
 
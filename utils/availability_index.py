@@ -0,0 +1,266 @@
+import hashlib
+import io
+import json
+import os
+import numpy as np
+from .persistence import persistence
+
+#recap de ce qu'il fait ce code :
+#Compile les disponibilites (jour -> start_time/end_time) de chaque utilisateur en un bitset 7x96
+#(creneaux de 15 minutes, lundi 00:00 = bit 0), une ligne de 84 octets par utilisateur
+#Repond a "qui est libre a T" et "quels creneaux sont libres pour ce groupe" par AND/popcount vectorises
+#Les bitsets sont sauvegardes avec l'empreinte du JSON dont ils viennent : toute modification du JSON les reconstruit
+#Une modification marque l'index a sauvegarder : empreinte et npz sont calcules plus tard, sur le thread d'ecriture
+
+DAYS = ["lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi", "dimanche"]
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WEEK_SLOTS = 7 * SLOTS_PER_DAY
+BYTES_PER_USER = WEEK_SLOTS // 8
+SAVE_DELAY = 30  # secondes : les modifications rapprochees donnent une seule sauvegarde
+
+
+def parse_slot(hhmm, round_up=False):
+    """'HH:MM' -> slot of the day (0-96), or None if the string is not a valid time."""
+    try:
+        hours, minutes = (int(part) for part in hhmm.split(':'))
+    except (AttributeError, ValueError):
+        return None
+    if not (0 <= hours <= 24 and 0 <= minutes < 60) or (hours == 24 and minutes):
+        return None
+    total = hours * 60 + minutes
+    return -(-total // SLOT_MINUTES) if round_up else total // SLOT_MINUTES
+
+
+def slot_of_week(day, hhmm):
+    """('lundi', '13:00') -> slot of the week, or None."""
+    if day.lower() not in DAYS:
+        return None
+    slot = parse_slot(hhmm)
+    if slot is None or slot >= SLOTS_PER_DAY:
+        return None
+    return DAYS.index(day.lower()) * SLOTS_PER_DAY + slot
+
+
+def slots_of_local_times(local_times):
+    """Slots of the week of local wall-clock times (datetime64 array, e.g. from TimeManagement.bulk_localize)."""
+    minutes = np.asarray(local_times).astype('datetime64[m]').astype(np.int64)
+    weekdays = (minutes // (24 * 60) + 3) % 7  # 1970-01-01 etait un jeudi
+    return weekdays * SLOTS_PER_DAY + minutes % (24 * 60) // SLOT_MINUTES
+
+
+def format_slot(slot, end=False):
+    """Slot of the week -> 'lundi 13:00'. An exclusive end at midnight reads '24:00' of the day before."""
+    day, slot = divmod(int(slot), SLOTS_PER_DAY)
+    if end and slot == 0 and day > 0:
+        day, slot = day - 1, SLOTS_PER_DAY
+    minutes = slot * SLOT_MINUTES
+    return f"{DAYS[day]} {minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def compile_preferences(preferences):
+    """
+    Build the 672-slot availability mask of one user from the stored JSON entry
+    ({"lundi": {"all_day": false, "start_time": "13:00", "end_time": "15:00"}, ...}).
+    A range whose end is before its start wraps past midnight, within the same day.
+    """
+    mask = np.zeros(WEEK_SLOTS, dtype=bool)
+    for day, availability in preferences.items():
+        if day not in DAYS:
+            continue
+        offset = DAYS.index(day) * SLOTS_PER_DAY
+        if availability.get("all_day"):
+            mask[offset:offset + SLOTS_PER_DAY] = True
+            continue
+        start = parse_slot(availability.get("start_time")) if availability.get("start_time") else 0
+        end = parse_slot(availability.get("end_time"), round_up=True) \
+            if availability.get("end_time") else SLOTS_PER_DAY
+        if start is None or end is None:
+            continue
+        if end > start:
+            mask[offset + start:offset + end] = True
+        else:
+            mask[offset + start:offset + SLOTS_PER_DAY] = True
+            mask[offset:offset + end] = True
+    return mask
+
+
+class AvailabilityIndex:
+    """
+    Packed availability bitsets of all users, one row of 84 bytes per user.
+    Kept next to data/user_availability.json with a hash of its content, and rebuilt
+    from it when the hashes differ.
+    """
+
+    def __init__(self):
+        self.user_ids = []
+        self.rows = {}
+        self.bits = np.zeros((0, BYTES_PER_USER), dtype=np.uint8)
+
+    @property
+    def bits(self):
+        """(users, 84) packed bitsets: the used rows of the buffer."""
+        return self._buffer[:len(self.user_ids)]
+
+    @bits.setter
+    def bits(self, bits):
+        self._buffer = bits
+
+    @classmethod
+    def build(cls, data):
+        index = cls()
+        index.user_ids = [int(user_id) for user_id in data]
+        index.rows = {user_id: row for row, user_id in enumerate(index.user_ids)}
+        masks = [compile_preferences(preferences) for preferences in data.values()]
+        if masks:
+            index.bits = np.packbits(np.vstack(masks), axis=1)
+        return index
+
+    @staticmethod
+    def source_hash(data):
+        """Hash of the availability JSON: the saved bitsets are only reused for the same content."""
+        return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+    @classmethod
+    def load_or_build(cls, json_path, data):
+        """Load the saved bitsets if they were built from this content, else rebuild them."""
+        bits_path = cls.bits_path(json_path)
+        try:
+            with np.load(bits_path) as saved:
+                if str(saved['source_hash']) == cls.source_hash(data):
+                    index = cls()
+                    index.user_ids = saved['user_ids'].tolist()
+                    index.rows = {user_id: row for row, user_id in enumerate(index.user_ids)}
+                    index.bits = saved['bits']
+                    return index
+        except (OSError, KeyError, ValueError):
+            pass  # absent, illisible ou d'un ancien format (sans empreinte)
+        index = cls.build(data)
+        index.save(json_path, data)
+        return index
+
+    @staticmethod
+    def bits_path(json_path):
+        return os.path.splitext(json_path)[0] + '.bits.npz'
+
+    def _snapshot(self, data):
+        # Copies prises sur la boucle ; les entrees de data sont remplacees, jamais modifiees sur place
+        return list(self.user_ids), self.bits.copy(), dict(data)
+
+    @classmethod
+    def _encode(cls, snapshot):
+        user_ids, bits, data = snapshot
+        buffer = io.BytesIO()
+        np.savez(buffer, user_ids=np.array(user_ids, dtype=np.int64), bits=bits,
+                 source_hash=np.array(cls.source_hash(data)))
+        return buffer.getvalue()
+
+    def save(self, json_path, data):
+        """Save the bitsets, tagged with the hash of data (worker threads: hashes and encodes right away)."""
+        persistence.save_bytes(self.bits_path(json_path), self._encode(self._snapshot(data)))
+
+    def save_later(self, json_path, data, delay=SAVE_DELAY):
+        """
+        Mark the index as modified: within delay seconds it is copied once on the event loop,
+        then hashed, encoded and written on the persistence thread.
+        """
+        persistence.save_later(self.bits_path(json_path), lambda: self._snapshot(data), delay, encode=self._encode)
+
+    def update_user(self, user_id, preferences):
+        packed = np.packbits(compile_preferences(preferences))
+        user_id = int(user_id)
+        if user_id in self.rows:
+            self.bits[self.rows[user_id]] = packed
+            return
+        count = len(self.user_ids)
+        if count == len(self._buffer):
+            # Capacite doublee : l'ajout d'un utilisateur ne recopie pas toute la matrice
+            grown = np.zeros((max(16, 2 * count), BYTES_PER_USER), dtype=np.uint8)
+            grown[:count] = self._buffer[:count]
+            self._buffer = grown
+        self._buffer[count] = packed
+        self.rows[user_id] = count
+        self.user_ids.append(user_id)
+
+    def free_at_each(self, user_ids, slots):
+        """Users free during their own slot of the week (e.g. the current local time of each user)."""
+        pairs = [(user_id, slot) for user_id, slot in zip(user_ids, slots) if user_id in self.rows]
+        if not pairs:
+            return []
+        rows = np.array([self.rows[user_id] for user_id, _ in pairs], dtype=np.intp)
+        slots = np.array([slot for _, slot in pairs], dtype=np.intp)
+        free = (self.bits[rows, slots >> 3] >> (7 - (slots & 7))) & 1
+        return [user_id for (user_id, _), is_free in zip(pairs, free) if is_free]
+
+    def _select(self, user_ids):
+        """Row numbers of the given users (all users if None); users without availability are skipped."""
+        if user_ids is None:
+            return np.arange(len(self.user_ids))
+        return np.array([self.rows[u] for u in user_ids if u in self.rows], dtype=np.intp)
+
+    def masks(self, user_ids):
+        """(users, 672) unpacked availability of the given users, and which of them have any stored."""
+        known = np.array([u in self.rows for u in user_ids], dtype=bool)
+        masks = np.zeros((len(user_ids), WEEK_SLOTS), dtype=bool)
+        rows = [self.rows[u] for u in user_ids if u in self.rows]
+        if rows:
+            masks[known] = np.unpackbits(self.bits[rows], axis=1).astype(bool)
+        return masks, known
+
+    def free_at(self, slot, user_ids=None):
+        """Users free during one slot of the week."""
+        rows = self._select(user_ids)
+        column = self.bits[rows, slot >> 3]
+        free = (column >> (7 - (slot & 7))) & 1
+        return [self.user_ids[row] for row in rows[free.astype(bool)]]
+
+    def slot_counts(self, user_ids=None):
+        """Number of the given users free in each of the 672 slots, and how many users were counted."""
+        rows = self._select(user_ids)
+        if not len(rows):
+            return np.zeros(WEEK_SLOTS, dtype=np.int64), 0
+        return np.unpackbits(self.bits[rows], axis=1).sum(axis=0, dtype=np.int64), len(rows)
+
+    def common_slots(self, user_ids=None):
+        """Mask of the slots where every given user is free."""
+        rows = self._select(user_ids)
+        if not len(rows):
+            return np.zeros(WEEK_SLOTS, dtype=bool)
+        return np.unpackbits(np.bitwise_and.reduce(self.bits[rows], axis=0)).astype(bool)
+
+
+def slot_ranges(mask):
+    """Contiguous runs of True in a 672-slot mask, as (start, end) slot pairs."""
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    return list(zip(edges[::2], edges[1::2]))
+
+
+if __name__ == "__main__":
+    # Benchmark : role de 5000 membres
+    import random
+    import time
+
+    random.seed(1)
+    data = {}
+    for user_id in range(5000):
+        prefs = {}
+        for day in random.sample(DAYS, 4):
+            start = random.randint(8, 18)
+            prefs[day] = {"all_day": False, "start_time": f"{start:02d}:00", "end_time": f"{start + 3:02d}:30"}
+        data[str(user_id)] = prefs
+
+    t = time.perf_counter()
+    index = AvailabilityIndex.build(data)
+    print(f"Built {len(data)} bitsets in {(time.perf_counter() - t) * 1000:.1f} ms")
+
+    members = list(range(5000))
+    for name, query in [
+        ("free_at", lambda: index.free_at(slot_of_week("mardi", "14:00"), members)),
+        ("slot_counts", lambda: index.slot_counts(members)),
+        ("common_slots", lambda: index.common_slots(members)),
+    ]:
+        t = time.perf_counter()
+        for _ in range(20):
+            query()
+        print(f"{name}: {(time.perf_counter() - t) / 20 * 1000:.2f} ms")
@@ -0,0 +1,159 @@
+import csv
+import io
+import json
+from .time_parser import parse_time_expression, parse_duration
+
+#recap de ce qu'il fait ce code :
+#Lit un fichier d'evenements (CSV avec en-tete, tableau JSON ou JSON Lines) ligne par ligne
+#Chaque ligne est validee independamment : une ligne invalide donne une erreur, pas l'arret de l'import
+#Colonnes : title, time (ou date + time), description, remind_before, mentions, channel_id, add_to_calendar, duration
+
+MAX_BULK_ROWS = 10000
+FIELDS = [
+    'title', 'time', 'date', 'description', 'remind_before',
+    'mentions', 'channel_id', 'add_to_calendar', 'duration',
+]
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'oui', 'x'}
+
+
+def iter_rows(filename, text):
+    """
+    Yield (line number, row, error) for each event of the file, where row is a dict
+    with lowercase keys, or None if the line could not be read (error says why).
+    The format is picked from the extension: .json (array), .jsonl, anything else is CSV.
+    """
+    name = filename.lower()
+    if name.endswith('.jsonl') or name.endswith('.ndjson'):
+        for line_number, line in enumerate(io.StringIO(text), start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, None, f"Invalid JSON: {e.msg}"
+                continue
+            yield (line_number, _normalize(row), None) if isinstance(row, dict) \
+                else (line_number, None, "Expected a JSON object")
+    elif name.endswith('.json'):
+        try:
+            rows = json.loads(text)
+        except json.JSONDecodeError as e:
+            yield e.lineno, None, f"Invalid JSON: {e.msg}"
+            return
+        if isinstance(rows, dict):
+            rows = rows.get('events', [])
+        for index, row in enumerate(rows, start=1):
+            yield (index, _normalize(row), None) if isinstance(row, dict) \
+                else (index, None, "Expected a JSON object")
+    else:
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames or 'title' not in [f.strip().lower() for f in reader.fieldnames]:
+            yield 1, None, f"Missing CSV header (columns: {', '.join(FIELDS)})"
+            return
+        for row in reader:
+            yield reader.line_num, _normalize(row), None
+
+
+def _normalize(row):
+    return {
+        str(key).strip().lower(): value.strip() if isinstance(value, str) else value
+        for key, value in row.items() if key is not None
+    }
+
+
+def parse_row(row, tz, now):
+    """
+    Validate one row and resolve its times. Returns a dict with title, event_time,
+    reminder_times (aware UTC datetimes), description, mentions (list of ids and the raw
+    mention strings), channel_id, add_to_calendar, duration (timedelta) and end_time.
+    Raises ValueError with a readable message.
+    """
+    title = str(row.get('title') or '').strip()
+    if not title:
+        raise ValueError("Missing title")
+    time_spec = str(row.get('time') or '').strip()
+    if row.get('date'):
+        time_spec = f"{str(row['date']).strip()} {time_spec}".strip()
+    if not time_spec:
+        raise ValueError("Missing time")
+    try:
+        event_time, _ = parse_time_expression(time_spec, tz, now)
+    except ValueError:
+        raise ValueError(f"Invalid date/time: {time_spec}")
+    if event_time < now:
+        raise ValueError("Date and time must be in the future")
+
+    reminder_times = []
+    for time_str in str(row.get('remind_before') or '5m').split(','):
+        try:
+            reminder_time = event_time - parse_duration(time_str.strip())
+        except ValueError:
+            raise ValueError(f"Invalid reminder format: {time_str.strip()}")
+        if reminder_time > now:
+            reminder_times.append(reminder_time)
+
+    mention_parts = str(row.get('mentions') or '').split()
+    mentioned_users = [int(digits) for digits in (''.join(filter(str.isdigit, m)) for m in mention_parts) if digits]
+
+    channel_id = row.get('channel_id')
+    if channel_id not in (None, ''):
+        try:
+            channel_id = int(channel_id)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid channel ID: {channel_id}")
+    else:
+        channel_id = None
+
+    add_to_calendar = row.get('add_to_calendar')
+    if not isinstance(add_to_calendar, bool):
+        add_to_calendar = str(add_to_calendar or '').strip().lower() in TRUE_VALUES
+    try:
+        duration = parse_duration(str(row.get('duration') or '1h'))
+        end_time = event_time + duration
+    except (ValueError, OverflowError):
+        raise ValueError(f"Invalid duration: {row.get('duration')}")
+
+    return {
+        'title': title,
+        'event_time': event_time,
+        'reminder_times': sorted(reminder_times),
+        'description': row.get('description') or None,
+        'mentioned_users': mentioned_users,
+        'mention_parts': mention_parts,
+        'channel_id': channel_id,
+        'add_to_calendar': add_to_calendar,
+        'duration': duration,
+        'end_time': end_time,
+    }
+
+
+if __name__ == "__main__":
+    # Benchmark : import de 10 000 lignes CSV
+    import random
+    import time
+    from datetime import datetime
+    import pytz
+
+    random.seed(0)
+    lines = ["title,date,time,remind_before,mentions,duration"]
+    for i in range(MAX_BULK_ROWS):
+        lines.append(
+            f"Cours {i},2030-{random.randint(1, 12):02d}-{random.randint(1, 28):02d},"
+            f"{random.randint(8, 18)}:{random.choice(['00', '30'])},\"1d,1h\",<@{1000 + i % 50}>,1h30m"
+        )
+    lines.append("Broken,2030-02-30,10:00,,,")
+    text = "\n".join(lines)
+
+    now = datetime.now(pytz.UTC)
+    start = time.perf_counter()
+    parsed, errors = 0, []
+    for line, row, error in iter_rows("events.csv", text):
+        try:
+            if error:
+                raise ValueError(error)
+            parse_row(row, pytz.timezone('Europe/Paris'), now)
+            parsed += 1
+        except ValueError as e:
+            errors.append((line, str(e)))
+    elapsed = time.perf_counter() - start
+    print(f"{parsed} rows parsed, {len(errors)} errors {errors} in {elapsed * 1000:.0f} ms")
@@ -0,0 +1,249 @@
+import asyncio
+from datetime import datetime, timedelta
+from .user_preferences import load_data_pref, save_data_pref
+from .persistence import persistence
+
+#recap de ce qu'il fait ce code :
+#Garde la correspondance rappel -> evenement Google Calendar (data/calendar_events.json)
+#Les operations (create/update/delete) sont mises en file et fusionnees par rappel :
+#  create puis delete avant l'envoi = aucun appel, create puis update = un seul create, etc.
+#flush() envoie la file en batchs (create_events / update_events / delete_events)
+
+SYNC_FILE = 'data/calendar_events.json'
+MAX_ATTEMPTS = 5
+EVENT_FIELDS = ('title', 'start_time', 'end_time', 'description', 'attendees')
+
+
+def combine(first, second):
+    """
+    Merge two pending operations on the same reminder (first queued before second).
+    Returns the single equivalent operation, or None when they cancel out.
+    """
+    if first is None:
+        return second
+    if second is None:
+        return first
+    kind = (first['op'], second['op'])
+    if kind == ('create', 'delete'):
+        return None
+    if second['op'] == 'delete':
+        return second
+    if first['op'] == 'delete':
+        # L'evenement existe encore : le recreer revient a le modifier entierement
+        return {'op': 'update', 'fields': dict(second['fields']), 'attempts': 0}
+    return {'op': first['op'], 'fields': {**first['fields'], **second['fields']}, 'attempts': first.get('attempts', 0)}
+
+
+def _encode(fields):
+    return {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in fields.items() if key in EVENT_FIELDS
+    }
+
+
+def _decode(fields):
+    return {
+        key: datetime.fromisoformat(value) if key in ('start_time', 'end_time') else value
+        for key, value in fields.items()
+    }
+
+
+class CalendarSync:
+    """
+    Reminder -> Calendar event map, with a coalescing queue of pending changes.
+
+    Operations are queued synchronously (create / update / delete) and sent by flush(),
+    which the cog calls periodically. Both the map and the queue are saved to SYNC_FILE,
+    so pending changes survive a restart.
+    """
+
+    def __init__(self, calendar_manager, data_file=SYNC_FILE):
+        self.calendar_manager = calendar_manager
+        self.data_file = data_file
+        data = load_data_pref(data_file)
+        self.events = data.get('events', {})    # reminder_id -> {"event_id": ..., "duration": seconds}
+        self.pending = data.get('pending', {})  # reminder_id -> {"op": ..., "fields": {...}, "attempts": n}
+        self.in_flight = set()
+        self.flush_lock = asyncio.Lock()
+
+    def save(self):
+        save_data_pref(self.data_file, {'events': self.events, 'pending': self.pending})
+
+    def event_id(self, reminder_id):
+        entry = self.events.get(reminder_id)
+        return entry['event_id'] if entry else None
+
+    def has_event(self, reminder_id):
+        """Whether the reminder has, or will have, a Calendar event."""
+        pending = self.pending.get(reminder_id)
+        if pending:
+            return pending['op'] != 'delete'
+        return reminder_id in self.events or reminder_id in self.in_flight
+
+    def _enqueue(self, reminder_id, operation, save=True):
+        merged = combine(self.pending.get(reminder_id), operation)
+        if merged is None:
+            self.pending.pop(reminder_id, None)
+        else:
+            self.pending[reminder_id] = merged
+        if save:
+            self.save()
+
+    def create(self, reminder_id, title, start_time, end_time, description=None, attendees=None, save=True):
+        fields = {
+            'title': title, 'start_time': start_time, 'end_time': end_time,
+            'description': description, 'attendees': attendees or [],
+        }
+        self._enqueue(reminder_id, {'op': 'create', 'fields': _encode(fields), 'attempts': 0}, save)
+
+    def update(self, reminder_id, save=True, **fields):
+        """Queue a change of some event fields (title, start_time, end_time, description, attendees)."""
+        if not self.has_event(reminder_id):
+            return
+        self._enqueue(reminder_id, {'op': 'update', 'fields': _encode(fields), 'attempts': 0}, save)
+
+    def reschedule(self, reminder_id, start_time, save=True):
+        """Move an event to start_time, keeping its duration."""
+        pending = self.pending.get(reminder_id, {})
+        if pending.get('op') in ('create', 'update') and 'start_time' in pending['fields'] \
+                and 'end_time' in pending['fields']:
+            fields = _decode(pending['fields'])
+            duration = fields['end_time'] - fields['start_time']
+        else:
+            duration = timedelta(seconds=self.events.get(reminder_id, {}).get('duration', 3600))
+        self.update(reminder_id, save, start_time=start_time, end_time=start_time + duration)
+
+    def delete(self, reminder_id, save=True):
+        if not self.has_event(reminder_id):
+            return
+        self._enqueue(reminder_id, {'op': 'delete', 'fields': {}, 'attempts': 0}, save)
+
+    def forget(self, reminder_ids):
+        """Drop the mapping of finished reminders (their events stay in the calendars)."""
+        forgotten = [rid for rid in reminder_ids if rid in self.events and rid not in self.pending]
+        for reminder_id in forgotten:
+            del self.events[reminder_id]
+        if forgotten:
+            self.save()
+
+    async def flush(self):
+        """
+        Send all pending operations, in batches. Failed operations stay queued and are
+        retried at the next flush, up to MAX_ATTEMPTS times.
+        Returns the number of created, updated and deleted events.
+        """
+        stats = {'created': 0, 'updated': 0, 'deleted': 0, 'failed': 0}
+        if not self.pending or not self.calendar_manager or not self.calendar_manager.service:
+            return stats
+
+        async with self.flush_lock:
+            batch, self.pending = self.pending, {}
+            creates = [(rid, op) for rid, op in batch.items() if op['op'] == 'create']
+            updates = [(rid, op) for rid, op in batch.items() if op['op'] == 'update' and rid in self.events]
+            deletes = [(rid, op) for rid, op in batch.items() if op['op'] == 'delete' and rid in self.events]
+            self.in_flight = {rid for rid, _ in creates}
+
+            create_ids, update_ok, delete_ok = await asyncio.gather(
+                self.calendar_manager.create_events([_decode(op['fields']) for _, op in creates]),
+                self.calendar_manager.update_events([
+                    (self.events[rid]['event_id'], _decode(op['fields'])) for rid, op in updates
+                ]),
+                self.calendar_manager.delete_events([self.events[rid]['event_id'] for rid, _ in deletes]),
+            )
+
+            failed = []
+            for (rid, op), event_id in zip(creates, create_ids):
+                if event_id:
+                    fields = _decode(op['fields'])
+                    duration = (fields['end_time'] - fields['start_time']).total_seconds()
+                    self.events[rid] = {'event_id': event_id, 'duration': duration}
+                    stats['created'] += 1
+                else:
+                    failed.append((rid, op))
+            for (rid, op), ok in zip(updates, update_ok):
+                if ok:
+                    fields = _decode(op['fields'])
+                    if 'start_time' in fields and 'end_time' in fields:
+                        self.events[rid]['duration'] = (fields['end_time'] - fields['start_time']).total_seconds()
+                    stats['updated'] += 1
+                else:
+                    failed.append((rid, op))
+            for (rid, op), ok in zip(deletes, delete_ok):
+                if ok:
+                    self.events.pop(rid, None)
+                    stats['deleted'] += 1
+                else:
+                    failed.append((rid, op))
+            self.in_flight = set()
+
+            # Les echecs repassent devant les operations arrivees pendant l'envoi
+            for rid, op in failed:
+                op['attempts'] = op.get('attempts', 0) + 1
+                if op['attempts'] >= MAX_ATTEMPTS:
+                    print(f"Calendar sync: giving up {op['op']} of reminder {rid} after {MAX_ATTEMPTS} attempts")
+                    continue
+                merged = combine(op, self.pending.get(rid))
+                if merged is None:
+                    self.pending.pop(rid, None)
+                else:
+                    self.pending[rid] = merged
+            stats['failed'] = len(failed)
+            self.save()
+        return stats
+
+
+if __name__ == "__main__":
+    # Verification contre le faux serveur : nombre d'appels API apres fusion
+    import os
+    import tempfile
+    from datetime import timezone
+    from .google_calendar import GoogleCalendarManager
+    from .fake_calendar import FakeCalendarServer
+
+    async def main():
+        with FakeCalendarServer() as server, tempfile.TemporaryDirectory() as tmp:
+            manager = GoogleCalendarManager(api_endpoint=server.url)
+            await manager.authenticate_async()
+            sync = CalendarSync(manager, os.path.join(tmp, 'calendar_events.json'))
+            start = datetime.now(timezone.utc) + timedelta(days=1)
+
+            # create puis delete dans la meme fenetre : zero appel
+            sync.create('a', 'Cancelled', start, start + timedelta(hours=1))
+            sync.delete('a')
+            # create puis update : un seul create avec les champs a jour
+            sync.create('b', 'Draft', start, start + timedelta(hours=1))
+            sync.update('b', title='Final')
+            for i in range(120):
+                sync.create(f"bulk{i}", f"Bulk {i}", start, start + timedelta(hours=2), save=False)
+            assert 'a' not in sync.pending and sync.pending['b']['fields']['title'] == 'Final'
+
+            requests_before = server.request_count
+            stats = await sync.flush()
+            assert stats['created'] == 121, stats
+            assert server.events[sync.event_id('b')]['summary'] == 'Final'
+            print(f"Flush 1: {stats}, {server.batch_count} batch HTTP calls, "
+                  f"{server.request_count - requests_before} operations")
+
+            # reschedule garde la duree, update + delete = un seul delete
+            sync.reschedule('bulk0', start + timedelta(days=1))
+            sync.update('bulk1', title='Renamed')
+            sync.delete('bulk1')
+            stats = await sync.flush()
+            assert stats == {'created': 0, 'updated': 1, 'deleted': 1, 'failed': 0}, stats
+            moved = server.events[sync.event_id('bulk0')]
+            assert datetime.fromisoformat(moved['end']['dateTime']) - \
+                datetime.fromisoformat(moved['start']['dateTime']) == timedelta(hours=2)
+
+            # Echec non transitoire : l'operation reste en file
+            server.fail_next(400, 1, in_batch=True)
+            sync.update('bulk2', title='Retry me')
+            assert (await sync.flush())['failed'] == 1 and 'bulk2' in sync.pending
+            assert (await sync.flush())['updated'] == 1
+
+            reloaded = CalendarSync(manager, sync.data_file)
+            assert reloaded.events == sync.events and not reloaded.pending
+            manager.close()
+            persistence.flush()
+        print("Calendar sync OK")
+
+    asyncio.run(main())
@@ -1,45 +1,21 @@
 import sqlite3
-
-
-def init_db():
-    conn = sqlite3.connect('./data/dataset.db')
-    cursor = conn.cursor()
-
-    # creer participant availability table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS participant_availability (
-        participant_id INTEGER PRIMARY KEY,
-        username TEXT,
-        start_time TEXT,
-        end_time TEXT,
-        timezone TEXT
-    )
-    ''')
-
-    # creer activity log table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS activity_log (
-        log_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        participant_id INTEGER,
-        status TEXT,
-        timestamp TEXT,
-        FOREIGN KEY (participant_id) REFERENCES participant_availability(participant_id)
-    )
-    ''')
-
-    # creer daily availability aggregation table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS daily_availability (
-        participant_id INTEGER,
-        date TEXT,
-        online_times TEXT,
-        offline_times TEXT,
-        FOREIGN KEY (participant_id) REFERENCES participant_availability(participant_id)
-    )
-    ''')
-
-    conn.commit()
-    conn.close()
-
-
-init_db()
+from .migrations import migrate, archive_activity_log
+
+DB_PATH = './data/dataset.db'
+
+
+def init_db(db_path=DB_PATH, retention_days=None):
+    """
+    Bring the database schema up to date. Called once at startup from bot.py.
+    If retention_days is given, activity logs older than that are archived.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        version = migrate(conn)
+        if retention_days:
+            moved = archive_activity_log(conn, retention_days)
+            if moved:
+                print(f"Archived {moved} activity log rows older than {retention_days} days")
+        return version
+    finally:
+        conn.close()
@@ -0,0 +1,179 @@
+import time
+from collections import deque
+
+#recap de ce qu'il fait ce code :
+#Objectif de service (SLO) sur le retard d'envoi des rappels
+#Pour chaque notification : heure prevue, heure de prise en charge par la boucle, heure d'accuse de reception Discord
+#Percentiles glissants (p50, p95, p99) du retard, nombre de notifications en retard et manquees,
+#globalement, par serveur et par salon ; signale les depassements de l'objectif une fois a leur debut
+#(pas a chaque periode tant qu'ils durent), avec assez d'envois pour que le p95 et le taux de manques aient un sens
+
+DEFAULT_TARGET = 5.0  # secondes de retard au p95
+WINDOW = 3600  # fenetre glissante en secondes
+MAX_SAMPLES = 500  # par serveur / salon
+MAX_MISS_RATE = 0.05  # part des notifications manquees toleree
+MAX_ALERT_SCOPES = 10  # serveurs / salons listes dans une alerte
+
+
+def _percentile(values, q):
+    """Nearest-rank percentile of a sorted list."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(q / 100 * len(values) + 0.5)) - 1))]
+
+
+class _Scope:
+    __slots__ = ('samples', 'late', 'missed')
+
+    def __init__(self):
+        self.samples = deque(maxlen=MAX_SAMPLES)  # (accuse, retard, attente avant prise en charge)
+        self.late = deque()    # instants des envois en retard
+        self.missed = deque()  # instants des notifications manquees
+
+
+class DeliverySLO:
+    """
+    Rolling delivery-lag statistics for reminder notifications.
+
+    Scopes are ('all',), ('guild', guild_id) and ('channel', channel_id); DMs use channel 'dm'.
+    A notification is late when it is acknowledged more than target seconds after its
+    scheduled time, missed when it was never sent. A scope is in breach when it has at least
+    min_samples notifications (sent or missed) and its p95 lag is above target or more than
+    max_miss_rate of them were missed. breaches() returns the scopes that entered a breach since
+    the last call; a scope is reported again only after it recovered, and not within cooldown.
+    clock() gives the current time in epoch seconds (the cog's clock, virtual in tests).
+    """
+
+    def __init__(self, target=DEFAULT_TARGET, window=WINDOW, min_samples=20, cooldown=1800,
+                 max_miss_rate=MAX_MISS_RATE, clock=time.time):
+        self.target = target
+        self.window = window
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.max_miss_rate = max_miss_rate
+        self.clock = clock
+        self.scopes = {}
+        self.alerted = {}      # scope -> instant de la derniere alerte
+        self.breached = set()  # scopes en depassement, deja signales
+
+    @staticmethod
+    def scopes_of(guild_id, channel_id):
+        return [('all',), ('guild', guild_id or 'dm'), ('channel', channel_id or 'dm')]
+
+    def _scope(self, key):
+        scope = self.scopes.get(key)
+        if scope is None:
+            scope = self.scopes[key] = _Scope()
+        return scope
+
+    def record(self, guild_id, channel_id, scheduled, dequeued, acknowledged):
+        """Times are epoch seconds. Returns the delivery lag (acknowledged - scheduled, 0 if early)."""
+        lag = max(0.0, acknowledged - scheduled)
+        wait = max(0.0, dequeued - scheduled)
+        for key in self.scopes_of(guild_id, channel_id):
+            scope = self._scope(key)
+            scope.samples.append((acknowledged, lag, wait))
+            if lag > self.target:
+                scope.late.append(acknowledged)
+        return lag
+
+    def record_missed(self, guild_id, channel_id, scheduled, now=None):
+        """A notification due at scheduled (epoch seconds) that was never sent; counted at now."""
+        now = now or self.clock()
+        for key in self.scopes_of(guild_id, channel_id):
+            self._scope(key).missed.append(now)
+
+    def _prune(self, scope, now):
+        horizon = now - self.window
+        while scope.samples and scope.samples[0][0] < horizon:
+            scope.samples.popleft()
+        for events in (scope.late, scope.missed):
+            while events and events[0] < horizon:
+                events.popleft()
+
+    def stats(self, key, now=None):
+        """{'count', 'p50', 'p95', 'p99', 'wait_p95', 'late', 'missed'} for a scope over the window."""
+        now = now or self.clock()
+        scope = self.scopes.get(key)
+        if scope is None:
+            return {'count': 0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'wait_p95': 0.0, 'late': 0, 'missed': 0}
+        self._prune(scope, now)
+        lags = sorted(lag for _, lag, _ in scope.samples)
+        waits = sorted(wait for _, _, wait in scope.samples)
+        return {
+            'count': len(lags),
+            'p50': _percentile(lags, 50),
+            'p95': _percentile(lags, 95),
+            'p99': _percentile(lags, 99),
+            # Part du retard due a la boucle (attente avant prise en charge) plutot qu'a Discord
+            'wait_p95': _percentile(waits, 95),
+            'late': len(scope.late),
+            'missed': len(scope.missed),
+        }
+
+    def in_breach(self, stats):
+        total = stats['count'] + stats['missed']
+        if total < self.min_samples:
+            return False
+        return stats['p95'] > self.target or stats['missed'] > self.max_miss_rate * total
+
+    def breaches(self, now=None):
+        """
+        [(scope, stats)] of the scopes that entered a breach since the last call, 'all' first,
+        then servers, then channels. Scopes still in breach are not returned again.
+        """
+        now = now or self.clock()
+        found = []
+        for key in list(self.scopes):
+            stats = self.stats(key, now)
+            if not self.in_breach(stats):
+                self.breached.discard(key)
+                continue
+            if key in self.breached or now - self.alerted.get(key, float('-inf')) < self.cooldown:
+                continue
+            self.breached.add(key)
+            self.alerted[key] = now
+            found.append((key, stats))
+        order = {'all': 0, 'guild': 1, 'channel': 2}
+        return sorted(found, key=lambda item: order[item[0][0]])
+
+    def worst(self, kind, count=5, guild_channels=None):
+        """Scopes of one kind ('guild' or 'channel') with the highest p95, optionally limited to some ids."""
+        keys = [key for key in self.scopes if key[0] == kind and (guild_channels is None or key[1] in guild_channels)]
+        ranked = sorted(((key, self.stats(key)) for key in keys), key=lambda item: -item[1]['p95'])
+        return [(key, stats) for key, stats in ranked if stats['count'] or stats['missed']][:count]
+
+
+def format_stats(stats):
+    return (f"p50 {stats['p50']:.1f} s · p95 {stats['p95']:.1f} s · p99 {stats['p99']:.1f} s "
+            f"({stats['count']} sent, {stats['late']} late, {stats['missed']} missed)")
+
+
+if __name__ == "__main__":
+    # Rappels simules : la boucle qui dort 5 a 30 s (rattrapage jusqu'a 30 s de retard)
+    # comparee au reveil a l'entree de la fenetre d'envoi de la prochaine notification
+    import random
+
+    random.seed(3)
+    start = time.time() - 4000
+    due = sorted(start + random.uniform(0, 3600) for _ in range(MAX_SAMPLES))
+
+    def simulate(next_wake):
+        slo = DeliverySLO(target=5.0, window=10**9)
+        now, pending = start, list(due)
+        while pending and now < start + 4000:
+            for t in [t for t in pending if t - now <= 3]:
+                if now - t > 30:
+                    slo.record_missed(1, 1, t, now)
+                else:
+                    # Envoi : prise en charge maintenant, accuse Discord 150 ms plus tard
+                    slo.record(1, 1, t, now, now + 0.15)
+                pending.remove(t)
+            sleep = min(30, max(5, len(pending) // 10))
+            if next_wake and pending:
+                sleep = min(sleep, max(0.05, pending[0] - now - 3))
+            now += sleep
+        return slo.stats(('all',))
+
+    print("fixed 5-30 s sleep:        ", format_stats(simulate(next_wake=False)))
+    print("wake at the next due time: ", format_stats(simulate(next_wake=True)))
@@ -0,0 +1,173 @@
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, unquote
+
+#recap de ce qu'il fait ce code :
+#Faux serveur Google Calendar (http.server, en memoire) pour verifier GoogleCalendarManager sans reseau
+#Gere events insert/get/patch/update/delete, freeBusy et les batchs multipart/mixed
+#fail_next() injecte des erreurs (429, 503...) pour verifier les reessais, latency simule le reseau
+
+
+class FakeCalendarServer:
+    """
+    In-memory Calendar API on 127.0.0.1, in a background thread.
+
+        with FakeCalendarServer() as server:
+            manager = GoogleCalendarManager(api_endpoint=server.url)
+    """
+
+    def __init__(self, port=0, latency=0.0):
+        self.latency = latency
+        self.events = {}
+        self.busy = {}  # email -> [(start, end)] aware datetimes, for freeBusy; other emails are notFound
+        self.request_count = 0
+        self.batch_count = 0
+        self.lock = threading.Lock()
+        self.failures = deque()  # (status, in_batch)
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_port}/"
+
+    def fail_next(self, status, count=1, in_batch=False):
+        """The next count requests fail with status (inside batches if in_batch, else whole HTTP calls)."""
+        with self.lock:
+            self.failures.extend([(status, in_batch)] * count)
+
+    def _take_failure(self, in_batch):
+        with self.lock:
+            if self.failures and self.failures[0][1] == in_batch:
+                return self.failures.popleft()[0]
+        return None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def handle(self, method, path, body):
+        """One API call -> (status, JSON body or None)."""
+        with self.lock:
+            self.request_count += 1
+        parts = [unquote(p) for p in urlsplit(path).path.strip('/').split('/')]
+        if parts == ['calendar', 'v3', 'freeBusy'] and method == 'POST':
+            return 200, self.freebusy(json.loads(body or b'{}'))
+        if parts[:3] != ['calendar', 'v3', 'calendars'] or len(parts) < 5 or parts[4] != 'events':
+            return 404, {'error': {'code': 404, 'message': 'Not Found'}}
+        event_id = parts[5] if len(parts) > 5 else None
+
+        with self.lock:
+            if method == 'POST' and event_id is None:
+                event = dict(json.loads(body or b'{}'), id=uuid.uuid4().hex, status='confirmed')
+                self.events[event['id']] = event
+                return 200, event
+            if event_id not in self.events:
+                return 404, {'error': {'code': 404, 'message': 'Not Found'}}
+            if method == 'GET':
+                return 200, self.events[event_id]
+            if method == 'PATCH':
+                self.events[event_id].update(json.loads(body or b'{}'))
+                return 200, self.events[event_id]
+            if method == 'PUT':
+                self.events[event_id] = dict(json.loads(body or b'{}'), id=event_id, status='confirmed')
+                return 200, self.events[event_id]
+            if method == 'DELETE':
+                del self.events[event_id]
+                return 204, None
+        return 405, {'error': {'code': 405, 'message': 'Method Not Allowed'}}
+
+    def freebusy(self, query):
+        time_min = datetime.fromisoformat(query['timeMin'])
+        time_max = datetime.fromisoformat(query['timeMax'])
+        calendars = {}
+        for item in query.get('items', []):
+            intervals = self.busy.get(item['id'])
+            if intervals is None:
+                calendars[item['id']] = {'errors': [{'domain': 'global', 'reason': 'notFound'}], 'busy': []}
+                continue
+            calendars[item['id']] = {'busy': [
+                {'start': start.isoformat(), 'end': end.isoformat()}
+                for start, end in intervals if start < time_max and end > time_min
+            ]}
+        return {'kind': 'calendar#freeBusy', 'timeMin': query['timeMin'], 'timeMax': query['timeMax'],
+                'calendars': calendars}
+
+    def handle_batch(self, content_type, body):
+        """multipart/mixed batch -> multipart/mixed response, one application/http part per request."""
+        with self.lock:
+            self.batch_count += 1
+        message = BytesParser().parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+        boundary = f"batch_{uuid.uuid4().hex}"
+        out = []
+        for part in message.get_payload():
+            request = part.get_payload(decode=True) or part.get_payload().encode()
+            head, _, inner_body = request.replace(b'\r\n', b'\n').partition(b'\n\n')
+            method, path = head.split(b'\n', 1)[0].decode().split(' ')[:2]
+            failure = self._take_failure(in_batch=True)
+            if failure:
+                status, payload = failure, {'error': {'code': failure, 'message': 'Injected failure'}}
+            else:
+                status, payload = self.handle(method, path, inner_body)
+            content_id = part['Content-ID'].replace('<', '<response-', 1)
+            text = '' if payload is None else json.dumps(payload)
+            out.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: {content_id}\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status < 300 else 'Error'}\r\n"
+                f"Content-Type: application/json; charset=UTF-8\r\nContent-Length: {len(text.encode())}\r\n\r\n"
+                f"{text}\r\n"
+            )
+        out.append(f"--{boundary}--\r\n")
+        return f"multipart/mixed; boundary={boundary}", ''.join(out).encode()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, content_type, payload):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _dispatch(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                if server.latency:
+                    time.sleep(server.latency)
+                failure = server._take_failure(in_batch=False)
+                if failure:
+                    error = json.dumps({'error': {'code': failure, 'message': 'Injected failure'}}).encode()
+                    return self._reply(failure, 'application/json', error)
+                if urlsplit(self.path).path.startswith('/batch/'):
+                    content_type, payload = server.handle_batch(self.headers['Content-Type'], body)
+                    return self._reply(200, content_type, payload)
+                status, payload = server.handle(self.command, self.path, body)
+                self._reply(status, 'application/json', b'' if payload is None else json.dumps(payload).encode())
+
+            do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _dispatch
+
+        return Handler
@@ -0,0 +1,148 @@
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+
+import discord
+
+#recap de ce qu'il fait ce code :
+#Faux client Discord en memoire pour faire tourner les rappels sans reseau (benchmarks/reminder_load.py)
+#Salons et utilisateurs crees a la demande, chaque message envoye est enregistre avec son heure
+#latency simule l'aller-retour vers l'API ; rate_limit_ratio renvoie des 429, retentes comme le fait discord.py
+#VirtualClock : horloge murale qui saute les attentes, le temps de calcul reel continue de compter
+
+
+class VirtualClock:
+    """
+    Wall clock whose sleeps return at once: now() is the real time plus the time slept.
+    Code under test still pays for its real work (parsing, SQLite, loop stalls).
+    """
+
+    def __init__(self):
+        self.skipped = 0.0
+
+    def time(self):
+        return time.time() + self.skipped
+
+    def now(self):
+        return datetime.fromtimestamp(self.time(), timezone.utc)
+
+    async def sleep(self, seconds):
+        self.skipped += max(0.0, seconds)
+        await asyncio.sleep(0)
+
+
+class _Response:
+    """What discord.HTTPException reads from an aiohttp response."""
+
+    def __init__(self, status, reason):
+        self.status = status
+        self.reason = reason
+
+
+class FakeMessage:
+    __slots__ = ('id', 'content', 'created_at')
+
+    def __init__(self, id, content, created_at):
+        self.id = id
+        self.content = content
+        self.created_at = created_at
+
+
+class FakeMessageable:
+    """A channel or a user: send() goes through the fake API."""
+
+    def __init__(self, client, kind, id):
+        self.client = client
+        self.kind = kind
+        self.id = id
+        self.name = f"{kind}-{id}"
+
+    async def send(self, content=None, **kwargs):
+        return await self.client.deliver(self.kind, self.id, content)
+
+
+class FakeDiscord:
+    """
+    Enough of commands.Bot for the reminder checker: get/fetch_channel, get/fetch_user,
+    wait_until_ready, guilds, intents. Sends are recorded in sends as (time, kind, id).
+
+    Each API call waits latency (+- jitter) seconds on the clock; with probability
+    rate_limit_ratio it is answered 429 and retried after retry_after seconds, up to
+    max_tries calls like discord.py's HTTPClient, then HTTPException is raised.
+    """
+
+    def __init__(self, clock=None, latency=0.05, jitter=0.02, rate_limit_ratio=0.0, retry_after=1.0,
+                 max_tries=5, seed=0):
+        self.clock = clock or VirtualClock()
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_ratio = rate_limit_ratio
+        self.retry_after = retry_after
+        self.max_tries = max_tries
+        self.random = random.Random(seed)
+        self.channels = {}
+        self.users = {}
+        self.sends = []
+        self.api_calls = 0
+        self.rate_limited = 0
+        self.failed = 0
+        self.guilds = []
+        self.intents = discord.Intents.default()
+
+    @property
+    def loop(self):
+        return asyncio.get_running_loop()
+
+    async def wait_until_ready(self):
+        return None
+
+    def get_channel(self, channel_id):
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            channel = self.channels[channel_id] = FakeMessageable(self, 'channel', channel_id)
+        return channel
+
+    def get_user(self, user_id):
+        user = self.users.get(user_id)
+        if user is None:
+            user = self.users[user_id] = FakeMessageable(self, 'user', user_id)
+        return user
+
+    async def fetch_channel(self, channel_id):
+        return self.get_channel(channel_id)
+
+    async def fetch_user(self, user_id):
+        return self.get_user(user_id)
+
+    async def deliver(self, kind, target_id, content):
+        for _ in range(self.max_tries):
+            self.api_calls += 1
+            await self.clock.sleep(max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter)))
+            if self.random.random() < self.rate_limit_ratio:
+                self.rate_limited += 1
+                await self.clock.sleep(self.retry_after)
+                continue
+            at = self.clock.time()
+            self.sends.append((at, kind, target_id))
+            return FakeMessage(len(self.sends), content, datetime.fromtimestamp(at, timezone.utc))
+        self.failed += 1
+        raise discord.HTTPException(_Response(429, 'Too Many Requests'), 'You are being rate limited.')
+
+
+if __name__ == "__main__":
+    # 1000 envois avec 10 % de 429 : temps virtuel ecoule et nombre de reessais
+    async def main():
+        client = FakeDiscord(latency=0.05, rate_limit_ratio=0.1, seed=1)
+        started, real = client.clock.time(), time.perf_counter()
+        errors = 0
+        for i in range(1000):
+            try:
+                await client.get_channel(i % 20).send(f"reminder {i}")
+            except discord.HTTPException:
+                errors += 1
+        print(f"{len(client.sends)} sent, {client.rate_limited} 429s, {errors} given up, "
+              f"{client.clock.time() - started:.0f} s virtual in {time.perf_counter() - real:.2f} s real")
+        assert len(client.sends) + errors == 1000
+
+    asyncio.run(main())
@@ -0,0 +1,191 @@
+import io
+import json
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+from .persistence import persistence
+
+#recap de ce qu'il fait ce code :
+#Index des feedbacks par categorie, note et date, tenu a jour a chaque envoi (comme feedback_stats)
+#Pour chaque feedback (numero d'ordre dans le journal) : date, note et categorie dans des tableaux compacts
+#Une page de /view_feedback = quelques numeros trouves dans l'index, puis relus en une requete (FeedbackStore.read_many)
+#Sauvegarde a l'arret du cog (et une fois par jour) : au chargement, la fin du journal non indexee est rattrapee
+#Un fichier d'index par processus du cluster (data/feedback.index, ou feedback.cluster-N.index)
+
+INDEX_FILE = 'data/feedback.index'
+
+
+def _timestamp(value):
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class FeedbackIndex:
+    """
+    Category, rating and time index over a FeedbackStore, by record position.
+
+    Records are appended in time order, so times is kept sorted (a clock going back
+    is clamped to the previous time) and a date range is a position range found by
+    bisection. Each category keeps the sorted positions of its records.
+    Saved to path (data/feedback.index): a JSON header line, then the arrays.
+    """
+
+    def __init__(self, store, path=INDEX_FILE):
+        self.store = store
+        self.path = path
+        self._reset()
+        self.load()
+        store.listeners.append(self.add)
+
+    def _reset(self):
+        self.times = array('d')
+        self.ratings = bytearray()
+        self.categories = {}  # nom en minuscules -> array('L') des positions
+
+    def __len__(self):
+        return len(self.times)
+
+    def load(self):
+        try:
+            pending = persistence.pending(self.path)
+            with (io.BytesIO(pending) if pending is not None else open(self.path, 'rb')) as f:
+                header = json.loads(f.readline())
+                count = header['records']
+                self.times.frombytes(f.read(count * self.times.itemsize))
+                self.ratings = bytearray(f.read(count))
+                for name, size in header['categories']:
+                    positions = array('L')
+                    positions.frombytes(f.read(size * positions.itemsize))
+                    self.categories[name] = positions
+            if len(self.times) != count or len(self.ratings) != count:
+                raise ValueError("truncated index")
+        except (FileNotFoundError, ValueError, KeyError, EOFError):
+            self._reset()
+        if len(self) > len(self.store):
+            self._reset()  # journal remplace : on reconstruit l'index
+        if len(self) < len(self.store):
+            for record in self.store.iter_records(len(self)):
+                self.add(record)
+            self.save()
+
+    def save(self):
+        header = {'records': len(self), 'categories': [[name, len(p)] for name, p in self.categories.items()]}
+        persistence.save_bytes(self.path, b''.join([
+            json.dumps(header).encode() + b'\n', self.times.tobytes(), bytes(self.ratings),
+            *(positions.tobytes() for positions in self.categories.values())
+        ]))
+
+    def add(self, record):
+        position = len(self)
+        timestamp = _timestamp(record.get('timestamp'))
+        self.times.append(max(timestamp, self.times[-1]) if self.times else timestamp)
+        self.ratings.append(min(max(int(record.get('rating') or 0), 0), 255))
+        self.categories.setdefault(str(record.get('category', '')).lower(), array('L')).append(position)
+
+    def _matches(self, position, min_rating, max_rating):
+        return min_rating <= self.ratings[position] <= max_rating
+
+    def page(self, category=None, min_rating=1, max_rating=5, since=None, until=None,
+             before=None, after=None, limit=5):
+        """
+        Positions of up to limit matching records, newest first, and whether more exist.
+
+        since/until are datetimes (until exclusive). Use before=<oldest position shown>
+        for the next (older) page, after=<newest position shown> for the previous one.
+        Returns (positions, more), more meaning there are records beyond the page in
+        the direction walked.
+        """
+        # Plage de dates -> plage de positions
+        low = bisect_left(self.times, since.timestamp()) if since else 0
+        high = bisect_left(self.times, until.timestamp()) if until else len(self)
+        if category is None:
+            candidates = range(len(self))
+            start, stop = low, high
+        else:
+            candidates = self.categories.get(category.lower(), array('L'))
+            start, stop = bisect_left(candidates, low), bisect_left(candidates, high)
+
+        found = []
+        if after is not None:
+            # Page precedente : on remonte vers les plus recents, puis on remet dans l'ordre
+            for i in range(max(start, bisect_right(candidates, after)), stop):
+                if self._matches(candidates[i], min_rating, max_rating):
+                    if len(found) == limit:
+                        return found[::-1], True
+                    found.append(candidates[i])
+            return found[::-1], False
+
+        if before is not None:
+            stop = min(stop, bisect_left(candidates, before))
+        for i in range(stop - 1, start - 1, -1):
+            if self._matches(candidates[i], min_rating, max_rating):
+                if len(found) == limit:
+                    return found, True
+                found.append(candidates[i])
+        return found, False
+
+
+if __name__ == "__main__":
+    # Pagination sur 100 000 feedbacks : comparee au filtrage de tout le journal
+    import asyncio
+    import random
+    import tempfile
+    import time
+    from datetime import timedelta
+    from .database import init_db
+    from .feedback_store import FeedbackStore
+
+    random.seed(1)
+    first = datetime(2024, 1, 1)
+    records = [
+        {'id': i, 'category': random.choice(["reminder", "scheduling", "time-management", "general"]),
+         'rating': random.randint(1, 5), 'description': 'ok', 'timestamp': (first + timedelta(minutes=10 * i)).isoformat()}
+        for i in range(100_000)
+    ]
+
+    async def main():
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path, index_path = os.path.join(tmp, 'dataset.db'), os.path.join(tmp, 'feedback.index')
+            init_db(db_path)
+            store = FeedbackStore(db_path, legacy_log=None, legacy_path=None)
+            index = FeedbackIndex(store, index_path)
+            for i in range(0, len(records), 5000):
+                await asyncio.gather(*(store.submit(record) for record in records[i:i + 5000]))
+            await store.close()
+            index.save()
+
+            since, until = datetime(2024, 6, 1), datetime(2024, 7, 1)
+            expected = [r['id'] for r in records if r['category'] == 'general' and 4 <= r['rating']
+                        and since <= datetime.fromisoformat(r['timestamp']) < until][::-1]
+
+            t = time.perf_counter()
+            old = [r['id'] for r in store.iter_records() if r['category'] == 'general' and r['rating'] >= 4
+                   and since <= datetime.fromisoformat(r['timestamp']) < until][::-1][:5]
+            print(f"filter the whole log: {(time.perf_counter() - t) * 1000:.0f} ms")
+
+            t = time.perf_counter()
+            positions, more = index.page('general', 4, 5, since, until)
+            page = [r['id'] for r in store.read_many(positions)]
+            print(f"indexed page: {(time.perf_counter() - t) * 1000:.3f} ms")
+            assert page == old == expected[:5] and more
+
+            # Toutes les pages vers les plus anciens, puis retour en arriere
+            pages, shown = [page], list(page)
+            while more:
+                positions, more = index.page('general', 4, 5, since, until, before=positions[-1])
+                pages.append(positions)
+                shown += [r['id'] for r in store.read_many(positions)]
+            assert shown == expected
+            back, more = index.page('general', 4, 5, since, until, after=pages[-1][0])
+            assert back == pages[-2] and more
+
+            reloaded = FeedbackIndex(FeedbackStore(db_path, legacy_log=None, legacy_path=None), index_path)
+            assert reloaded.times == index.times and reloaded.categories == index.categories
+            persistence.flush()
+        print("Feedback index OK")
+
+    asyncio.run(main())
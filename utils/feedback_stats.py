@@ -0,0 +1,150 @@
+import json
+import os
+import re
+
+from .persistence import persistence
+
+#recap de ce qu'il fait ce code :
+#Statistiques des feedbacks tenues a jour a chaque envoi : nombre, somme et histogramme des notes,
+#mots positifs / negatifs, par categorie. Sauvegardees dans data/feedback.stats.json (un fichier par processus du cluster)
+#Chaque description est analysee une seule fois, a l'envoi : /view_feedback analyze ne relit plus le journal
+
+POSITIVE_WORDS = ["good", "great", "excellent", "awesome", "love", "happy", "amazing", "helpful"]
+NEGATIVE_WORDS = ["bad", "poor", "terrible", "hate", "unhappy", "disappointing", "slow", "not working"]
+
+_alternation = lambda words: '|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+# Les mots negatifs sont captures, les positifs non : un seul findall donne les deux comptes.
+# Negatifs essayes d'abord : "unhappy" compte comme negatif, sans compter "happy" en plus
+SENTIMENT_RE = re.compile(f"({_alternation(NEGATIVE_WORDS)})|(?:{_alternation(POSITIVE_WORDS)})")
+SAVE_EVERY = 50
+STATS_FILE = 'data/feedback.stats.json'
+
+
+def sentiment_counts(text):
+    """(positive, negative) keyword occurrences in text, in one pass."""
+    matches = SENTIMENT_RE.findall(text.lower())
+    negative = sum(1 for match in matches if match)
+    return len(matches) - negative, negative
+
+
+def _empty():
+    return {'count': 0, 'rating_sum': 0, 'histogram': [0] * 5, 'positive': 0, 'negative': 0}
+
+
+class FeedbackStats:
+    """
+    Running feedback aggregates per category, kept in sync with a FeedbackStore.
+    'records' is the number of log records folded in: on load, the records written
+    after the last save are folded in, so a crash never loses counts.
+    """
+
+    def __init__(self, store, path=STATS_FILE):
+        self.store = store
+        self.path = path
+        self.categories = {}
+        self.records = 0
+        self.unsaved = 0
+        self.load()
+        store.listeners.append(self.add)
+
+    def load(self):
+        try:
+            data = persistence.load_json(self.path)
+            self.categories = data['categories']
+            self.records = data['records']
+        except KeyError:
+            self.categories, self.records = {}, 0
+        if self.records > len(self.store):
+            self.categories, self.records = {}, 0  # journal remplace : on recalcule
+        if self.records < len(self.store):
+            for record in self.store.iter_records(self.records):
+                self.add(record, save=False)
+            self.records = len(self.store)
+            self.save()
+
+    def save(self):
+        persistence.save_json(self.path, {'records': self.records, 'categories': self.categories})
+        self.unsaved = 0
+
+    def add(self, record, save=True):
+        stats = self.categories.setdefault(str(record.get('category', '')).lower(), _empty())
+        stats['count'] += 1
+        rating = int(record.get('rating') or 0)
+        stats['rating_sum'] += rating
+        if 1 <= rating <= 5:
+            stats['histogram'][rating - 1] += 1
+        positive, negative = sentiment_counts(record.get('description') or '')
+        stats['positive'] += positive
+        stats['negative'] += negative
+        self.records += 1
+        self.unsaved += 1
+        if save and self.unsaved >= SAVE_EVERY:
+            self.save()
+
+    def summary(self, category=None):
+        """Totals over all categories, or over one; O(categories)."""
+        selected = {
+            name: stats for name, stats in self.categories.items()
+            if category is None or name == category.lower()
+        }
+        total = _empty()
+        for stats in selected.values():
+            for key in ('count', 'rating_sum', 'positive', 'negative'):
+                total[key] += stats[key]
+            total['histogram'] = [a + b for a, b in zip(total['histogram'], stats['histogram'])]
+        total['average'] = total['rating_sum'] / total['count'] if total['count'] else 0
+        total['category_counts'] = {name: stats['count'] for name, stats in selected.items()}
+        return total
+
+
+if __name__ == "__main__":
+    # Comparaison avec l'ancien calcul (count() par mot et par feedback) sur 50 000 feedbacks
+    import asyncio
+    import random
+    import tempfile
+    import time
+    from .database import init_db
+    from .feedback_store import FeedbackStore
+
+    random.seed(0)
+    words = POSITIVE_WORDS + NEGATIVE_WORDS + ["the", "bot", "reminder", "works", "sometimes", "calendar"]
+    records = [
+        {'category': random.choice(["reminder", "scheduling", "time-management", "general"]),
+         'rating': random.randint(1, 5), 'description': ' '.join(random.choices(words, k=30))}
+        for _ in range(50_000)
+    ]
+
+    t = time.perf_counter()
+    old_positive = sum(fb['description'].lower().count(w) for fb in records for w in POSITIVE_WORDS)
+    old_negative = sum(fb['description'].lower().count(w) for fb in records for w in NEGATIVE_WORDS)
+    old_time = time.perf_counter() - t
+    t = time.perf_counter()
+    counts = [sentiment_counts(fb['description']) for fb in records]
+    new_time = time.perf_counter() - t
+    # L'ancien calcul comptait aussi "happy" dans "unhappy"
+    unhappy = sum(fb['description'].count('unhappy') for fb in records)
+    assert sum(p for p, _ in counts) == old_positive - unhappy and sum(n for _, n in counts) == old_negative
+    print(f"sentiment: {old_time * 1000:.0f} ms with count() per word, {new_time * 1000:.0f} ms in one pass")
+
+    async def main():
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path, stats_path = os.path.join(tmp, 'dataset.db'), os.path.join(tmp, 'feedback.stats.json')
+            init_db(db_path)
+            store = FeedbackStore(db_path, legacy_log=None, legacy_path=None)
+            stats = FeedbackStats(store, stats_path)
+            await asyncio.gather(*(store.submit(record) for record in records))
+            await store.close()
+            t = time.perf_counter()
+            summary = stats.summary()
+            print(f"summary over {summary['count']} feedbacks: {(time.perf_counter() - t) * 1e6:.0f} µs")
+            assert summary['count'] == len(records)
+            assert summary['rating_sum'] == sum(r['rating'] for r in records)
+
+            # Redemarrage sans sauvegarde recente : le reste du journal est rattrape
+            reloaded = FeedbackStats(FeedbackStore(db_path, legacy_log=None, legacy_path=None), stats_path)
+            assert reloaded.summary() == summary
+            persistence.flush()
+        print("Feedback stats OK")
+
+    asyncio.run(main())
@@ -0,0 +1,225 @@
+import asyncio
+import json
+import os
+import sqlite3
+
+from .database import DB_PATH
+
+#recap de ce qu'il fait ce code :
+#Journal des feedbacks dans la base (table feedback), en ajout seul : un feedback = une ligne, cout O(1)
+#Partage par les processus du cluster : SQLite ordonne les ajouts, la position d'un feedback est son id - 1
+#Une seule tache asynchrone ecrit (file d'attente), les envois simultanes sont groupes en une transaction
+#Apres chaque ecriture, le processus rattrape les feedbacks ajoutes par les autres : stats et index voient tout, dans l'ordre
+#L'ancien journal JSON Lines (data/feedback.jsonl) ou l'ancienne liste (feedback.json) est importe une fois
+#Plus d'index d'offsets ni de compactage : une ecriture interrompue est annulee par SQLite, jamais une ligne tronquee
+
+FEEDBACK_LOG = 'data/feedback.jsonl'
+LEGACY_FEEDBACK_FILE = 'feedback.json'
+
+
+class FeedbackStore:
+    """
+    Append-only feedback log in the feedback table (migration 5), by position (id - 1).
+
+    submit() is safe to call from many coroutines at once: records go through a queue
+    to a single writer task, which inserts them and then reads every record added since
+    the last one this process saw, its own and those of the other processes, in order.
+    Listeners are called once per record, in position order, and readers only see
+    records up to len(store).
+    """
+
+    def __init__(self, db_path=DB_PATH, legacy_log=FEEDBACK_LOG, legacy_path=LEGACY_FEEDBACK_FILE):
+        self.db_path = db_path
+        self.queue = None
+        self.writer = None
+        self.listeners = []  # appeles avec chaque feedback enregistre
+        self._import(legacy_log, legacy_path)
+        conn = self._connect()
+        try:
+            self.count = conn.execute('SELECT COALESCE(MAX(id), 0) FROM feedback').fetchone()[0]
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def _import(self, legacy_log, legacy_path):
+        """Copy the old log (or the older feedback.json list) into an empty table, then keep it aside as .migrated."""
+        if legacy_log and os.path.exists(legacy_log):
+            source = legacy_log
+        elif legacy_path and os.path.exists(legacy_path):
+            source = legacy_path
+        else:
+            return
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            if conn.execute('SELECT 1 FROM feedback LIMIT 1').fetchone():
+                conn.execute('COMMIT')
+                return
+            try:
+                with open(source, 'r') as f:
+                    if source == legacy_log:
+                        records = []
+                        for line in f:
+                            try:
+                                records.append(json.loads(line))
+                            except ValueError:
+                                continue  # ligne tronquee par un arret brutal
+                    else:
+                        records = json.load(f)
+            except json.JSONDecodeError as e:
+                conn.execute('ROLLBACK')
+                print(f"Erreur lors de la migration de {source} : {e}")
+                return
+            conn.executemany('INSERT INTO feedback (record) VALUES (?)', [(json.dumps(r),) for r in records])
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+        for path in (source, source + '.idx'):
+            if os.path.exists(path):
+                os.replace(path, path + '.migrated')
+
+    def __len__(self):
+        return self.count
+
+    # Ecriture
+
+    def start(self):
+        """Start the writer task (needs a running event loop)."""
+        if self.writer is None:
+            self.queue = asyncio.Queue()
+            self.writer = asyncio.get_running_loop().create_task(self._write_loop())
+
+    async def close(self):
+        if self.writer:
+            await self.queue.put(None)
+            await self.writer
+            self.writer = None
+
+    async def submit(self, record):
+        """Append one feedback. Returns once it is on disk."""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(('append', record, future))
+        return await future
+
+    async def refresh(self):
+        """See the feedback added by the other processes. Returns the number of new records."""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(('refresh', None, future))
+        return await future
+
+    async def _write_loop(self):
+        while True:
+            item = await self.queue.get()
+            if item is None:
+                return
+            batch = [item]
+            # Regroupe tout ce qui attend deja : une seule transaction pour les envois simultanes
+            while not self.queue.empty() and batch[-1] is not None:
+                batch.append(self.queue.get_nowait())
+            entries = [entry for entry in batch if entry is not None]
+            try:
+                records = [record for kind, record, _ in entries if kind == 'append']
+                added = await asyncio.to_thread(self._append, records, self.count)
+                for record in added:
+                    self.count += 1
+                    for listener in self.listeners:
+                        listener(record)
+                for kind, record, future in entries:
+                    future.set_result(record if kind == 'append' else len(added))
+            except Exception as e:
+                print(f"Erreur lors de l'ecriture des feedbacks : {e}")
+                for _, _, future in entries:
+                    if not future.done():
+                        future.set_exception(e)
+            if batch[-1] is None:
+                return
+
+    def _append(self, records, seen):
+        """Insert records, then return every record after position seen (in order, records included)."""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany('INSERT INTO feedback (record) VALUES (?)', [(json.dumps(r),) for r in records])
+            rows = conn.execute('SELECT record FROM feedback WHERE id > ? ORDER BY id', (seen,)).fetchall()
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+        return [json.loads(record) for record, in rows]
+
+    # Lecture
+
+    def read(self, position):
+        """Record number position (negative counts from the end)."""
+        return self.read_many([position])[0]
+
+    def read_many(self, positions):
+        """Records at the given positions, in that order, with one query."""
+        ids = [(position + self.count if position < 0 else position) + 1 for position in positions]
+        if any(not 0 < record_id <= self.count for record_id in ids):
+            raise IndexError("feedback position out of range")
+        conn = self._connect()
+        try:
+            rows = dict(conn.execute(
+                f"SELECT id, record FROM feedback WHERE id IN ({','.join('?' * len(ids))})", ids
+            ).fetchall()) if ids else {}
+        finally:
+            conn.close()
+        return [json.loads(rows[record_id]) for record_id in ids]
+
+    def iter_records(self, start=0, stop=None):
+        """Records start..stop (in submission order)."""
+        stop = self.count if stop is None else min(stop, self.count)
+        conn = self._connect()
+        try:
+            for record, in conn.execute('SELECT record FROM feedback WHERE id > ? AND id <= ? ORDER BY id',
+                                        (start, stop)):
+                yield json.loads(record)
+        finally:
+            conn.close()
+
+    def tail(self, count):
+        return list(self.iter_records(max(0, len(self) - count)))
+
+
+if __name__ == "__main__":
+    # Envois simultanes, cout constant d'un envoi quel que soit le volume, deux processus sur la meme base
+    import tempfile
+    import time
+    from .database import init_db
+
+    async def main():
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'dataset.db')
+            init_db(db_path)
+            store = FeedbackStore(db_path, legacy_log=None, legacy_path=None)
+
+            await asyncio.gather(*(store.submit({'id': i, 'rating': i % 5 + 1}) for i in range(1000)))
+            assert len(store) == 1000 and sorted(r['id'] for r in store.iter_records()) == list(range(1000))
+
+            for total in (1_000, 100_000):
+                while len(store) < total:
+                    await asyncio.gather(*(store.submit({'id': len(store) + i, 'rating': 3}) for i in range(5000)))
+                t = time.perf_counter()
+                for i in range(200):
+                    await store.submit({'id': f"single{i}", 'rating': 4})
+                print(f"{total:>7} feedbacks: {(time.perf_counter() - t) / 200 * 1000:.3f} ms per submission")
+            t = time.perf_counter()
+            assert store.read(-1)['id'] == 'single199'
+            print(f"read(-1): {(time.perf_counter() - t) * 1000:.3f} ms")
+
+            # Un autre processus sur la meme base : ses feedbacks sont vus, dans l'ordre
+            other = FeedbackStore(db_path, legacy_log=None, legacy_path=None)
+            seen = []
+            store.listeners.append(seen.append)
+            await other.submit({'id': 'other'})
+            await store.submit({'id': 'mine'})
+            assert [r['id'] for r in seen] == ['other', 'mine'] and len(store) == len(other) + 1
+            await other.close()
+            await store.close()
+        print("Feedback store OK")
+
+    asyncio.run(main())
@@ -0,0 +1,145 @@
+import time
+from bisect import bisect_right
+from datetime import timedelta
+
+#recap de ce qu'il fait ce code :
+#Recupere les plages occupees (Google Calendar freebusy) des invites, en une requete batch
+#Chaque agenda est garde en cache (TTL court) sous forme d'intervalles tries et fusionnes,
+#interroges par recherche dichotomique : "cet invite est-il occupe entre t1 et t2 ?"
+
+
+class IntervalSet:
+    """Sorted, merged busy intervals (Unix timestamps) with O(log n) overlap queries."""
+
+    def __init__(self, intervals=()):
+        self.starts = []
+        self.ends = []
+        for start, end in sorted(intervals):
+            if end <= start:
+                continue
+            if self.ends and start <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def overlaps(self, start, end):
+        """Whether any interval intersects [start, end)."""
+        i = bisect_right(self.ends, start)
+        return i < len(self.starts) and self.starts[i] < end
+
+    def busy_seconds(self, start, end):
+        """Total busy time within [start, end)."""
+        total = 0
+        for i in range(bisect_right(self.ends, start), len(self.starts)):
+            if self.starts[i] >= end:
+                break
+            total += min(end, self.ends[i]) - max(start, self.starts[i])
+        return total
+
+
+class FreeBusyCache:
+    """
+    Busy intervals of Google calendars, fetched with GoogleCalendarManager.query_freebusy
+    over a window of horizon_days and kept ttl seconds. Calendars that cannot be read
+    (unknown or private) are cached as None: their owners count as free.
+    """
+
+    def __init__(self, calendar_manager, ttl=300, horizon_days=14):
+        self.calendar_manager = calendar_manager
+        self.ttl = ttl
+        self.horizon = timedelta(days=horizon_days)
+        self.entries = {}  # email -> (expires, window_start, window_end, IntervalSet or None)
+
+    def _cached(self, email, start, end, now):
+        entry = self.entries.get(email)
+        if entry and entry[0] > now and entry[1] <= start.timestamp() and end.timestamp() <= entry[2]:
+            return True
+        return False
+
+    async def get(self, emails, start, end=None):
+        """
+        Busy intervals of each email over [start, end) (aware datetimes), from the cache
+        or from one batched freebusy query for the missing ones. Returns {email: IntervalSet or None}.
+        """
+        end = end or start + self.horizon
+        now = time.monotonic()
+        missing = [email for email in set(emails) if not self._cached(email, start, end, now)]
+        if missing:
+            # Fenetre alignee sur l'heure : les requetes proches reutilisent le meme cache
+            window_start = start.replace(minute=0, second=0, microsecond=0)
+            window_end = max(end, window_start + self.horizon)
+            busy = await self.calendar_manager.query_freebusy(missing, window_start, window_end)
+            for email in missing:
+                intervals = busy.get(email)
+                self.entries[email] = (
+                    now + self.ttl, window_start.timestamp(), window_end.timestamp(),
+                    IntervalSet((s.timestamp(), e.timestamp()) for s, e in intervals) if intervals is not None else None
+                )
+        return {email: self.entries[email][3] for email in emails if email in self.entries}
+
+    def invalidate(self, emails=None):
+        if emails is None:
+            self.entries.clear()
+        for email in emails or []:
+            self.entries.pop(email, None)
+
+
+def busy_counts(candidates, duration, busy_sets):
+    """
+    For each candidate start (aware or naive local datetimes), how many of busy_sets
+    have an interval overlapping [start, start + duration).
+    """
+    seconds = duration.total_seconds()
+    counts = []
+    for candidate in candidates:
+        start = candidate.timestamp()
+        counts.append(sum(1 for busy in busy_sets if busy is not None and busy.overlaps(start, start + seconds)))
+    return counts
+
+
+if __name__ == "__main__":
+    # Verification contre le faux serveur Calendar
+    import asyncio
+    import random
+    from datetime import datetime, timezone
+    from .google_calendar import GoogleCalendarManager
+    from .fake_calendar import FakeCalendarServer
+
+    intervals = IntervalSet([(10, 20), (15, 30), (40, 50), (50, 55), (70, 60)])
+    assert (intervals.starts, intervals.ends) == ([10, 40], [30, 55])
+    assert intervals.overlaps(25, 35) and not intervals.overlaps(30, 40) and intervals.overlaps(0, 11)
+    assert intervals.busy_seconds(0, 100) == 35 and intervals.busy_seconds(20, 45) == 15
+
+    async def main():
+        random.seed(3)
+        with FakeCalendarServer() as server:
+            start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+            emails = [f"user{i}@example.com" for i in range(120)]
+            for email in emails[:100]:
+                server.busy[email] = [
+                    (start + timedelta(hours=h), start + timedelta(hours=h + 1))
+                    for h in random.sample(range(14 * 24), 40)
+                ]
+            manager = GoogleCalendarManager(api_endpoint=server.url)
+            await manager.authenticate_async()
+            cache = FreeBusyCache(manager, ttl=60)
+
+            busy = await cache.get(emails, start)
+            assert server.batch_count == 1, "freebusy should be one batch HTTP call"
+            assert sum(1 for b in busy.values() if b is None) == 20
+            assert all(len(busy[email]) >= 1 for email in emails[:100])
+            before = server.request_count
+            await cache.get(emails[:50], start + timedelta(minutes=30), start + timedelta(days=2))
+            assert server.request_count == before, "cached calendars were queried again"
+
+            candidates = [start + timedelta(minutes=30 * i) for i in range(48)]
+            counts = busy_counts(candidates, timedelta(hours=1), busy.values())
+            print(f"{len(emails)} calendars in {server.batch_count} batch call, busy per slot: {counts[:12]}")
+            manager.close()
+        print("Free/busy OK")
+
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+import discord
+
+#recap de ce qu'il fait ce code :
+#Choisit les intents du gateway et la politique de cache des membres selon data/config.json (GATEWAY_PROFILE)
+#  full     : tous les intents, tous les membres de tous les serveurs charges au demarrage (ancien comportement)
+#  activity : membres et presences, mais la liste des membres d'un serveur n'est chargee qu'au besoin
+#  lean     : ni membres ni presences, le suivi d'activite se limite aux messages
+#ACTIVITY_TRACKING_GUILDS liste les serveurs suivis (null = tous) ; les autres ne sont jamais charges en entier
+
+PROFILES = ('full', 'activity', 'lean')
+
+
+def gateway_options(config):
+    """Keyword arguments for commands.Bot: intents, member_cache_flags and chunk_guilds_at_startup."""
+    profile = config.get('GATEWAY_PROFILE', 'full')
+    if profile not in PROFILES:
+        raise ValueError(f"GATEWAY_PROFILE must be one of {', '.join(PROFILES)}, not {profile!r}")
+    if profile == 'full':
+        return {'intents': discord.Intents.all()}
+
+    intents = discord.Intents.default()
+    intents.message_content = True  # commandes a prefixe
+    if profile == 'activity':
+        intents.members = True
+        # Les presences sont envoyees pour tous les serveurs a la fois : on ne les active que si un serveur est suivi
+        tracked = config.get('ACTIVITY_TRACKING_GUILDS')
+        intents.presences = tracked is None or bool(tracked)
+    return {
+        'intents': intents,
+        'member_cache_flags': discord.MemberCacheFlags.from_intents(intents),
+        'chunk_guilds_at_startup': False,
+    }
+
+
+def tracked_guilds(config):
+    """Ids of the guilds whose activity is tracked, or None for all of them."""
+    tracked = config.get('ACTIVITY_TRACKING_GUILDS')
+    return None if tracked is None else {int(guild_id) for guild_id in tracked}
+
+
+async def ensure_chunked(guild, intents):
+    """Load the member list of a guild the first time it is needed (chunk_guilds_at_startup is off)."""
+    if guild is not None and intents.members and not guild.chunked:
+        await guild.chunk(cache=True)
+
+
+if __name__ == "__main__":
+    # Memoire residente par profil pour un serveur de 50 000 membres (20 % en ligne), sans connexion
+    import time
+    import tracemalloc
+
+    MEMBERS, ONLINE = 50_000, 10_000
+
+    def member(i):
+        return {'user': {'id': str(10**6 + i), 'username': f"user{i}", 'discriminator': '0', 'avatar': None,
+                         'global_name': None}, 'roles': [], 'joined_at': '2024-01-01T00:00:00+00:00',
+                'deaf': False, 'mute': False, 'flags': 0}
+
+    def presence(i, status='online'):
+        return {'user': {'id': str(10**6 + i)}, 'status': status, 'activities': [],
+                'client_status': {'desktop': status}, 'guild_id': '1'}
+
+    def guild_create(intents):
+        # Gros serveur : Discord n'envoie que les membres en ligne, et seulement avec les presences
+        online = range(ONLINE) if intents.members and intents.presences else range(0)
+        return {
+            'id': '1', 'name': 'fixture', 'member_count': MEMBERS, 'large': True, 'channels': [],
+            'roles': [{'id': '1', 'name': '@everyone', 'permissions': '0', 'position': 0, 'color': 0,
+                       'hoist': False, 'managed': False, 'mentionable': False}],
+            'members': [member(i) for i in online],
+            'presences': [presence(i) for i in online] if intents.presences else [],
+        }
+
+    def measure(name, config, chunk):
+        options = gateway_options(config)
+        client = discord.Client(**options)
+        state = client._connection
+        data = guild_create(state._intents)
+        chunk_data = [member(i) for i in range(MEMBERS)] if chunk else []
+        tracemalloc.start()
+        guild = discord.Guild(data=data, state=state)
+        state._add_guild(guild)
+        for mdata in chunk_data:
+            # Equivalent de guild.chunk(cache=True) : tous les membres gardes en cache
+            guild._add_member(discord.Member(data=mdata, guild=guild, state=state))
+        resident = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        t = time.perf_counter()
+        if state._intents.presences:
+            for i in range(0, MEMBERS, 5):
+                state.parse_presence_update(presence(i, 'idle'))
+        elapsed = time.perf_counter() - t
+        print(f"{name:<28} {len(guild.members):>6} members cached  {resident / 2**20:>7.1f} MiB"
+              f"  {MEMBERS // 5 if state._intents.presences else 0:>6} presence updates in {elapsed * 1000:.0f} ms")
+
+    measure('full', {'GATEWAY_PROFILE': 'full'}, chunk=True)
+    measure('activity, guild tracked', {'GATEWAY_PROFILE': 'activity', 'ACTIVITY_TRACKING_GUILDS': [1]}, chunk=True)
+    measure('activity, guild not tracked', {'GATEWAY_PROFILE': 'activity', 'ACTIVITY_TRACKING_GUILDS': [2]}, chunk=False)
+    measure('activity, no guild tracked', {'GATEWAY_PROFILE': 'activity', 'ACTIVITY_TRACKING_GUILDS': []}, chunk=False)
+    measure('lean', {'GATEWAY_PROFILE': 'lean'}, chunk=False)
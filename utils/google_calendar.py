@@ -1,43 +1,93 @@
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
+from google.auth.credentials import AnonymousCredentials
 from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import BatchHttpRequest
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import httplib2
 import os.path
 import pickle
+import random
+import socket
+import threading
+import time
 import logging
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
+from .metrics import CALENDAR_REQUESTS, CALENDAR_SECONDS
 
 class GoogleCalendarManager:
-    """A manager class for Google Calendar operations with better error handling and typing."""
-    
+    """
+    A manager class for Google Calendar operations with better error handling and typing.
+
+    Blocking API calls run on a bounded thread pool, each worker thread keeping its own
+    authorized HTTP connection (httplib2 is not thread-safe). Transient failures
+    (429, 5xx, rate limits, network errors) are retried with jittered exponential backoff.
+    """
+
     SCOPES = ['https://www.googleapis.com/auth/calendar', 'https://www.googleapis.com/auth/calendar.events']
-    
-    def __init__(self, credentials_path: str = 'credentials.json', token_path: str = 'token.pickle'):
+    BATCH_SIZE = 50  # limite de requetes par batch de l'API Calendar
+    FREEBUSY_MAX_CALENDARS = 50  # limite d'agendas par requete freeBusy
+    TRANSIENT_STATUSES = {429, 500, 502, 503, 504}
+    RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+
+    def __init__(self, credentials_path: str = 'credentials.json', token_path: str = 'token.pickle',
+                 api_endpoint: Optional[str] = None, max_workers: int = 4, max_retries: int = 5,
+                 backoff_base: float = 0.5, backoff_cap: float = 30.0, timeout: float = 30.0):
+        """
+        Args:
+            api_endpoint: root of another Calendar server (e.g. 'http://127.0.0.1:8080/'),
+                          used without credentials, for the local fake server
+            max_workers: size of the thread pool, i.e. concurrent API calls
+        """
         self.credentials_path = credentials_path
         self.token_path = token_path
+        self.api_endpoint = api_endpoint.rstrip('/') + '/' if api_endpoint else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.timeout = timeout
         self.creds = None
         self.service = None
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gcal')
+        self._local = threading.local()
+        self._generation = 0  # incremente a chaque authentification, invalide les connexions des threads
         self._setup_logging()
-    
+
     def _setup_logging(self) -> None:
         """Configure logging for the calendar manager."""
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger('GoogleCalendarManager')
-    
-    def authenticate(self) -> bool:
+
+    def authenticate(self, interactive: bool = True) -> bool:
         """
         Authenticate with Google Calendar API.
-        
+
+        Args:
+            interactive: allow the browser consent flow when there is no usable token.
+                         The bot passes False: it must never wait for a browser.
+
         Returns:
             bool: True if authentication was successful, False otherwise.
         """
         try:
+            if self.api_endpoint:
+                self.creds = AnonymousCredentials()
+                self.service = build(
+                    'calendar', 'v3', credentials=self.creds, static_discovery=True, cache_discovery=False,
+                    client_options={'api_endpoint': self.api_endpoint + 'calendar/v3/'}
+                )
+                self._generation += 1
+                return True
+
             if os.path.exists(self.token_path):
                 with open(self.token_path, 'rb') as token:
                     self.creds = pickle.load(token)
-            
+
             if not self.creds or not self.creds.valid:
                 if self.creds and self.creds.expired and self.creds.refresh_token:
                     self.creds.refresh(Request())
@@ -45,22 +95,81 @@ class GoogleCalendarManager:
                     if not os.path.exists(self.credentials_path):
                         self.logger.error(f"Credentials file not found at {self.credentials_path}")
                         return False
-                        
+                    if not interactive:
+                        self.logger.error(
+                            "No valid Google token: run `python -m utils.google_calendar --auth` once to authorize"
+                        )
+                        return False
+
                     flow = InstalledAppFlow.from_client_secrets_file(
                         self.credentials_path, self.SCOPES)
                     self.creds = flow.run_local_server(port=0)
-                
+
                 with open(self.token_path, 'wb') as token:
                     pickle.dump(self.creds, token)
-            
-            self.service = build('calendar', 'v3', credentials=self.creds)
+
+            self.service = build(
+                'calendar', 'v3', credentials=self.creds, static_discovery=True, cache_discovery=False
+            )
+            self._generation += 1
             return True
-            
+
         except Exception as e:
             self.logger.error(f"Authentication failed: {str(e)}")
             return False
-    
-    async def create_event(self, 
+
+    async def authenticate_async(self, interactive: bool = False) -> bool:
+        """authenticate() on the thread pool, so that token refresh never blocks the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.authenticate, interactive)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _http(self) -> AuthorizedHttp:
+        """HTTP connection of the current worker thread, kept open between calls."""
+        if getattr(self._local, 'generation', None) != self._generation:
+            self._local.http = AuthorizedHttp(self.creds, http=httplib2.Http(timeout=self.timeout))
+            self._local.generation = self._generation
+        return self._local.http
+
+    def _new_batch(self, callback) -> BatchHttpRequest:
+        if self.api_endpoint:
+            # new_batch_http_request() ignore api_endpoint et viserait www.googleapis.com
+            return BatchHttpRequest(callback=callback, batch_uri=self.api_endpoint + 'batch/calendar/v3')
+        return self.service.new_batch_http_request(callback=callback)
+
+    def _is_transient(self, error: Exception) -> bool:
+        if isinstance(error, HttpError):
+            if error.resp.status in self.TRANSIENT_STATUSES:
+                return True
+            return error.resp.status == 403 and any(
+                reason in str(error.content) for reason in self.RATE_LIMIT_REASONS
+            )
+        return isinstance(error, (httplib2.HttpLib2Error, socket.timeout, ConnectionError))
+
+    def _backoff(self, attempt: int) -> float:
+        """Full jitter: uniform in [0, min(cap, base * 2^attempt)]."""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def _event_body(self, title: str, start_time: datetime, end_time: datetime,
+                    description: Optional[str], attendees: Optional[List[str]], timezone: str) -> dict:
+        event = {
+            'summary': title,
+            'start': {'dateTime': start_time.isoformat(), 'timeZone': timezone},
+            'end': {'dateTime': end_time.isoformat(), 'timeZone': timezone},
+        }
+        if description:
+            event['description'] = description
+        # Validate email addresses (basic check)
+        valid_attendees = [
+            {'email': email.strip()} for email in attendees or [] if '@' in email and '.' in email
+        ]
+        if valid_attendees:
+            event['attendees'] = valid_attendees
+        return event
+
+    async def create_event(self,
                           title: str,
                           start_time: datetime,
                           end_time: datetime,
@@ -70,7 +179,7 @@ class GoogleCalendarManager:
                           send_updates: str = 'all') -> Optional[str]:
         """
         Create a calendar event with improved error handling and input validation.
-        
+
         Args:
             title: Event title
             start_time: Event start time
@@ -79,76 +188,284 @@ class GoogleCalendarManager:
             attendees: Optional list of attendee email addresses
             timezone: Timezone for the event (default: 'Europe/Paris')
             send_updates: Notification preference ('all', 'externalOnly', 'none')
-            
+
         Returns:
             Optional[str]: Event ID if successful, None if failed
         """
         if not self.service:
             self.logger.error("Calendar service not initialized. Call authenticate() first.")
             return None
-            
+
         # Validate inputs
         if end_time <= start_time:
             self.logger.error("End time must be after start time")
             return None
-            
-        event = {
-            'summary': title,
-            'start': {
-                'dateTime': start_time.isoformat(),
-                'timeZone': timezone,
-            },
-            'end': {
-                'dateTime': end_time.isoformat(),
-                'timeZone': timezone,
-            },
-        }
-        
-        if description:
-            event['description'] = description
-            
-        if attendees:
-            # Validate email addresses (basic check)
-            valid_attendees = [
-                {'email': email.strip()} 
-                for email in attendees 
-                if '@' in email and '.' in email
-            ]
-            if valid_attendees:
-                event['attendees'] = valid_attendees
-                
+
+        event = self._event_body(title, start_time, end_time, description, attendees, timezone)
         try:
-            result = await self._execute_with_retry(
-                lambda: self.service.events().insert(
-                    calendarId='primary',
-                    body=event,
-                    sendUpdates=send_updates
-                ).execute()
-            )
+            request = self.service.events().insert(calendarId='primary', body=event, sendUpdates=send_updates)
+            result = await self._execute_with_retry(lambda: request.execute(http=self._http()))
             return result.get('id')
-            
+
         except HttpError as e:
             self.logger.error(f"Failed to create event: {str(e)}")
-            if e.resp.status == 401:
-                # Token might be expired, try to refresh
-                if self.authenticate():
-                    return await self.create_event(
-                        title, start_time, end_time, description, 
-                        attendees, timezone, send_updates
-                    )
             return None
-            
+
         except Exception as e:
             self.logger.error(f"Unexpected error creating event: {str(e)}")
             return None
-    
-    async def _execute_with_retry(self, operation, max_retries: int = 3):
-        """Execute an operation with retries on transient failures."""
-        for attempt in range(max_retries):
+
+    async def create_events(self, events: List[dict], timezone: str = 'Europe/Paris',
+                            send_updates: str = 'all') -> List[Optional[str]]:
+        """
+        Create many events with batched HTTP requests (BATCH_SIZE inserts per round trip).
+
+        Args:
+            events: dicts with the create_event arguments (title, start_time, end_time,
+                    description, attendees)
+
+        Returns:
+            List[Optional[str]]: the event ID of each input event, None for the ones that failed
+        """
+        if not self.service:
+            self.logger.error("Calendar service not initialized. Call authenticate() first.")
+            return [None] * len(events)
+
+        events_api = self.service.events()  # construire la ressource coute ~10 ms, une seule fois
+        requests = []
+        for index, event in enumerate(events):
+            if event['end_time'] <= event['start_time']:
+                self.logger.error(f"Event {index}: end time must be after start time")
+                requests.append(None)
+                continue
+            body = self._event_body(
+                event['title'], event['start_time'], event['end_time'],
+                event.get('description'), event.get('attendees'), timezone
+            )
+            requests.append(events_api.insert(calendarId='primary', body=body, sendUpdates=send_updates))
+
+        results = await self._execute_batch(requests)
+        return [response.get('id') if response else None for response, _ in results]
+
+    async def update_events(self, updates: List[Tuple[str, dict]], timezone: str = 'Europe/Paris',
+                            send_updates: str = 'all') -> List[bool]:
+        """
+        Patch many events in batches.
+
+        Args:
+            updates: (event_id, fields) pairs; fields may hold title, start_time, end_time,
+                     description and attendees
+
+        Returns:
+            List[bool]: whether each update succeeded
+        """
+        if not self.service:
+            self.logger.error("Calendar service not initialized. Call authenticate() first.")
+            return [False] * len(updates)
+
+        events_api = self.service.events()
+        requests = []
+        for event_id, fields in updates:
+            body = {}
+            if 'title' in fields:
+                body['summary'] = fields['title']
+            if 'start_time' in fields:
+                body['start'] = {'dateTime': fields['start_time'].isoformat(), 'timeZone': timezone}
+            if 'end_time' in fields:
+                body['end'] = {'dateTime': fields['end_time'].isoformat(), 'timeZone': timezone}
+            if 'description' in fields:
+                body['description'] = fields['description'] or ''
+            if 'attendees' in fields:
+                body['attendees'] = [
+                    {'email': email.strip()} for email in fields['attendees'] or [] if '@' in email and '.' in email
+                ]
+            requests.append(events_api.patch(
+                calendarId='primary', eventId=event_id, body=body, sendUpdates=send_updates
+            ))
+
+        results = await self._execute_batch(requests)
+        return [response is not None for response, _ in results]
+
+    async def delete_events(self, event_ids: List[str], send_updates: str = 'all') -> List[bool]:
+        """
+        Delete many events in batches. An event that no longer exists (404/410) counts as deleted.
+
+        Returns:
+            List[bool]: whether each event is gone
+        """
+        if not self.service:
+            self.logger.error("Calendar service not initialized. Call authenticate() first.")
+            return [False] * len(event_ids)
+
+        events_api = self.service.events()
+        requests = [
+            events_api.delete(calendarId='primary', eventId=event_id, sendUpdates=send_updates)
+            for event_id in event_ids
+        ]
+        results = await self._execute_batch(requests)
+        return [
+            error is None or (isinstance(error, HttpError) and error.resp.status in (404, 410))
+            for _, error in results
+        ]
+
+    async def query_freebusy(self, emails: List[str], time_min: datetime,
+                             time_max: datetime) -> dict:
+        """
+        Busy intervals of many calendars, FREEBUSY_MAX_CALENDARS per query, all queries
+        in one batch HTTP request.
+
+        Returns:
+            dict: {email: [(start, end)]} with aware datetimes; calendars that could
+                  not be read (unknown, not shared) are left out
+        """
+        if not self.service or not emails:
+            return {}
+
+        freebusy_api = self.service.freebusy()
+        requests = [
+            freebusy_api.query(body={
+                'timeMin': time_min.isoformat(),
+                'timeMax': time_max.isoformat(),
+                'items': [{'id': email} for email in emails[start:start + self.FREEBUSY_MAX_CALENDARS]],
+            })
+            for start in range(0, len(emails), self.FREEBUSY_MAX_CALENDARS)
+        ]
+        busy = {}
+        for response, _ in await self._execute_batch(requests):
+            for email, calendar in (response or {}).get('calendars', {}).items():
+                if calendar.get('errors'):
+                    continue
+                busy[email] = [
+                    (datetime.fromisoformat(interval['start']), datetime.fromisoformat(interval['end']))
+                    for interval in calendar.get('busy', [])
+                ]
+        return busy
+
+    async def _execute_batch(self, requests: list) -> List[Tuple[Optional[dict], Optional[Exception]]]:
+        """
+        Send requests in batches of BATCH_SIZE, the batches running concurrently on the pool.
+        Requests that failed with a transient error, alone or with their whole batch, are sent
+        again in a new batch after a backoff: max_retries attempts per request in all.
+        None entries are skipped. Returns (response, error) for each request.
+        """
+        results = [(None, None)] * len(requests)
+        pending = [i for i, request in enumerate(requests) if request is not None]
+
+        def run(chunk):
+            outcome = {}
+            batch = self._new_batch(lambda request_id, response, error: outcome.__setitem__(
+                int(request_id), ({} if response is None and error is None else response, error)
+            ))
+            for i in chunk:
+                batch.add(requests[i], request_id=str(i))
+            batch.execute(http=self._http())
+            return outcome
+
+        for attempt in range(self.max_retries):
+            chunks = [pending[start:start + self.BATCH_SIZE] for start in range(0, len(pending), self.BATCH_SIZE)]
+            # Un seul niveau de reessai : un batch en echec transitoire repasse ici, pas dans _execute_with_retry
+            outcomes = await asyncio.gather(
+                *(self._execute_with_retry(lambda chunk=chunk: run(chunk), max_retries=1) for chunk in chunks),
+                return_exceptions=True
+            )
+            retry = []
+            for chunk, outcome in zip(chunks, outcomes):
+                if isinstance(outcome, BaseException):
+                    self.logger.error(f"Batch request failed: {outcome}")
+                    outcome = {i: (None, outcome) for i in chunk}
+                for i, (response, error) in outcome.items():
+                    results[i] = (response, error)
+                    if error is not None and self._is_transient(error):
+                        retry.append(i)
+            if not retry or attempt == self.max_retries - 1:
+                break
+            await asyncio.sleep(self._backoff(attempt))
+            pending = retry
+
+        for i, (_, error) in enumerate(results):
+            if error is not None:
+                self.logger.error(f"Calendar request {i} failed: {error}")
+        return results
+
+    async def _execute_with_retry(self, operation, max_retries: Optional[int] = None):
+        """
+        Run a blocking operation on the thread pool, with up to max_retries attempts on
+        transient failures (1: no retry, for callers that retry at their own level).
+        An expired token (401) is refreshed once, without using up an attempt.
+        """
+        loop = asyncio.get_running_loop()
+        max_retries = max_retries or self.max_retries
+        refreshed = False
+        attempt = 0
+        while True:
+            started = time.perf_counter()
             try:
-                return operation()
+                result = await loop.run_in_executor(self.executor, operation)
+                CALENDAR_SECONDS.observe(time.perf_counter() - started)
+                CALENDAR_REQUESTS.labels('ok').inc()
+                return result
             except HttpError as e:
-                if e.resp.status in {500, 503} and attempt < max_retries - 1:
-                    await asyncio.sleep(2 ** attempt)  # Exponential backoff
-                    continue
-                raise
\ No newline at end of file
+                CALENDAR_SECONDS.observe(time.perf_counter() - started)
+                CALENDAR_REQUESTS.labels(str(e.resp.status)).inc()
+                if e.resp.status == 401 and not refreshed and getattr(self.creds, 'refresh_token', None):
+                    refreshed = True
+                    if await self.authenticate_async():
+                        continue
+                error = e
+            except Exception as e:
+                CALENDAR_SECONDS.observe(time.perf_counter() - started)
+                CALENDAR_REQUESTS.labels('error').inc()
+                error = e
+            if not self._is_transient(error) or attempt >= max_retries - 1:
+                raise error
+            await asyncio.sleep(self._backoff(attempt))  # Exponential backoff with jitter
+            attempt += 1
+
+if __name__ == "__main__":
+    # --auth : autorisation interactive (une seule fois, cree token.pickle)
+    # sans argument : verification contre le faux serveur Calendar local
+    import sys
+    import time
+    from datetime import timedelta, timezone as dt_timezone
+    from utils.fake_calendar import FakeCalendarServer
+
+    if '--auth' in sys.argv:
+        print("Authorized" if GoogleCalendarManager().authenticate(interactive=True) else "Authorization failed")
+        sys.exit()
+
+    async def smoke():
+        with FakeCalendarServer(latency=0.02) as server:
+            manager = GoogleCalendarManager(api_endpoint=server.url, backoff_base=0.01)
+            assert await manager.authenticate_async()
+            start = datetime.now(dt_timezone.utc) + timedelta(days=1)
+            events = [
+                {'title': f"Event {i}", 'start_time': start, 'end_time': start + timedelta(hours=1),
+                 'attendees': ['a@example.com']}
+                for i in range(500)
+            ]
+
+            single_id = await manager.create_event("Single", start, start + timedelta(hours=1))
+            assert single_id in server.events
+
+            server.fail_next(503, 3)
+            server.fail_next(429, 20, in_batch=True)
+            t = time.perf_counter()
+            ids = await manager.create_events(events)
+            elapsed = time.perf_counter() - t
+            assert all(ids) and len(set(ids)) == len(ids), "Some events were not created"
+            print(f"create_events: {len(ids)} events, {server.batch_count} batches, {elapsed * 1000:.0f} ms")
+
+            assert all(await manager.update_events([(event_id, {'title': 'Renamed'}) for event_id in ids[:120]]))
+            assert server.events[ids[0]]['summary'] == 'Renamed'
+            assert all(await manager.delete_events(ids[:200] + ['missing']))
+            assert len(server.events) == 301, len(server.events)
+
+            # Appels sequentiels sur le meme serveur, pour comparaison
+            t = time.perf_counter()
+            for event in events[:50]:
+                await manager.create_event(event['title'], event['start_time'], event['end_time'])
+            print(f"create_event x50: {(time.perf_counter() - t) * 1000:.0f} ms")
+            manager.close()
+        print("Fake server smoke run OK")
+
+    asyncio.run(smoke())
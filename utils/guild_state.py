@@ -0,0 +1,106 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class GuildStateCache:
+    """
+    Per-guild state, loaded lazily and evicted least-recently-used first.
+
+    - loader(guild_id) builds the state of a guild the first time it is needed;
+    - save(guild_id, state) persists a state; it is called before the state is dropped;
+    - size(state) estimates the memory held by a state, in bytes.
+    Guilds are evicted when more than max_guilds are resident, or when the
+    estimated total goes over max_bytes. The guild being accessed is never evicted.
+    """
+
+    def __init__(self, loader, save=None, size=None, max_guilds=200, max_bytes=None):
+        self.loader = loader
+        self.save = save
+        self.size = size
+        self.max_guilds = max_guilds
+        self.max_bytes = max_bytes
+        self.states = OrderedDict()  # guild_id -> state, least recently used first
+        self.loading = {}  # guild_id -> chargement en cours (get_async)
+        self.last_used = {}
+
+    def get(self, guild_id, touch=True):
+        """
+        Return the state of a guild, loading it if needed. touch=False is for
+        background work (e.g. presence sampling) that should not keep a guild hot:
+        it neither refreshes the idle time nor the LRU position of a resident guild.
+        """
+        if guild_id in self.states:
+            if touch:
+                self.states.move_to_end(guild_id)
+                self.last_used[guild_id] = time.monotonic()
+            return self.states[guild_id]
+
+        return self._add(guild_id, self.loader(guild_id), touch)
+
+    async def get_async(self, guild_id, touch=True):
+        """
+        get() for coroutines: a guild that is not resident is loaded in a worker thread,
+        so reading its files does not hold the event loop. Concurrent calls share one load.
+        """
+        if guild_id in self.states:
+            return self.get(guild_id, touch)
+        loading = self.loading.get(guild_id)
+        if loading is None:
+            loading = self.loading[guild_id] = asyncio.ensure_future(asyncio.to_thread(self.loader, guild_id))
+            loading.add_done_callback(lambda _: self.loading.pop(guild_id, None))
+        state = await asyncio.shield(loading)
+        if guild_id in self.states:
+            return self.get(guild_id, touch)  # charge entre-temps par get()
+        return self._add(guild_id, state, touch)
+
+    def _add(self, guild_id, state, touch):
+        self.states[guild_id] = state
+        if not touch:
+            self.states.move_to_end(guild_id, last=False)
+        # Un serveur tout juste charge reste au moins max_idle_seconds : sinon la boucle de presence
+        # le chargerait, l'ecrirait et l'evincerait a chaque passage
+        self.last_used[guild_id] = time.monotonic()
+        self.enforce_budget(keep=guild_id)
+        return state
+
+    def __contains__(self, guild_id):
+        return guild_id in self.states
+
+    def items(self):
+        return list(self.states.items())
+
+    def discard(self, guild_id):
+        """Evict one guild now, saving its state first."""
+        state = self.states.pop(guild_id, None)
+        self.last_used.pop(guild_id, None)
+        if state is not None and self.save:
+            self.save(guild_id, state)
+
+    def total_bytes(self):
+        if not self.size:
+            return 0
+        return sum(self.size(state) for state in self.states.values())
+
+    def enforce_budget(self, keep=None):
+        """Evict least recently used guilds until the cache fits its budget."""
+        candidates = [guild_id for guild_id in self.states if guild_id != keep]
+        while candidates and len(self.states) > self.max_guilds:
+            self.discard(candidates.pop(0))
+        if self.max_bytes and self.size:
+            total = self.total_bytes()
+            while candidates and total > self.max_bytes:
+                guild_id = candidates.pop(0)
+                total -= self.size(self.states[guild_id])
+                self.discard(guild_id)
+
+    def evict_idle(self, max_idle_seconds):
+        """Evict guilds that have not been used for max_idle_seconds."""
+        limit = time.monotonic() - max_idle_seconds
+        for guild_id in [g for g, used in self.last_used.items() if used < limit]:
+            self.discard(guild_id)
+
+    def save_all(self):
+        if self.save:
+            for guild_id, state in self.items():
+                self.save(guild_id, state)
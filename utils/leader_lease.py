@@ -0,0 +1,218 @@
+import asyncio
+import os
+import socket
+import sqlite3
+import time
+import uuid
+
+from .database import DB_PATH
+
+#recap de ce qu'il fait ce code :
+#Election d'un leader entre plusieurs instances du bot, par un bail (lease) renouvelable dans SQLite (table leases)
+#Seul le leader envoie les rappels ; une instance en attente reprend le bail des qu'il expire (ou est rendu)
+#Chaque envoi est d'abord reserve dans reminder_deliveries (cle unique) par une transaction qui verifie
+#que le bail est toujours detenu avec le meme jeton (fencing) : une notification n'est jamais envoyee deux fois
+
+DEFAULT_TTL = 10.0  # secondes
+
+
+class LeaderLease:
+    """
+    A named lease in the leases table (migration 4).
+
+    try_acquire() takes the lease when it is free or expired, or renews it when held;
+    each change of holder increments the fencing token. The holder considers itself
+    leader until ttl minus a safety margin after the start of its last renewal, so a
+    replica that cannot renew stops before another one can take over.
+    """
+
+    def __init__(self, name, db_path=DB_PATH, ttl=DEFAULT_TTL, holder=None):
+        self.name = name
+        self.db_path = db_path
+        self.ttl = ttl
+        self.holder = holder or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.token = None
+        self.valid_until = 0.0
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+
+    @property
+    def is_leader(self):
+        return self.token is not None and time.monotonic() < self.valid_until
+
+    def try_acquire(self):
+        """Take or renew the lease. Returns whether this replica is the leader."""
+        started = time.monotonic()
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT holder, expires_at, fencing FROM leases WHERE name = ?', (self.name,)).fetchone()
+            if row is None:
+                token = 1
+                conn.execute('INSERT INTO leases (name, holder, expires_at, fencing) VALUES (?, ?, ?, ?)',
+                             (self.name, self.holder, now + self.ttl, token))
+            elif row[0] == self.holder and row[2] == self.token:
+                token = row[2]
+                conn.execute('UPDATE leases SET expires_at = ? WHERE name = ?', (now + self.ttl, self.name))
+            elif row[1] <= now:
+                token = row[2] + 1
+                conn.execute('UPDATE leases SET holder = ?, expires_at = ?, fencing = ? WHERE name = ?',
+                             (self.holder, now + self.ttl, token, self.name))
+            else:
+                conn.execute('COMMIT')
+                self.token = None
+                return False
+            conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            print(f"Erreur du bail {self.name} : {e}")
+            self.token = None
+            return False
+        finally:
+            conn.close()
+        self.token = token
+        self.valid_until = started + self.ttl * 0.8
+        return True
+
+    def release(self):
+        """Give the lease up (clean shutdown): a standby takes over at its next attempt."""
+        if self.token is None:
+            return
+        conn = self._connect()
+        try:
+            conn.execute('UPDATE leases SET expires_at = 0 WHERE name = ? AND holder = ? AND fencing = ?',
+                         (self.name, self.holder, self.token))
+        finally:
+            conn.close()
+        self.token = None
+
+    def claim(self, key, reminder_id):
+        """
+        Reserve one notification for sending. True only if this replica still holds the
+        lease (same fencing token) and nobody claimed the key before.
+        """
+        if not self.is_leader:
+            return False
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            held = conn.execute(
+                'SELECT 1 FROM leases WHERE name = ? AND holder = ? AND fencing = ? AND expires_at > ?',
+                (self.name, self.holder, self.token, time.time())
+            ).fetchone()
+            claimed = False
+            if held:
+                claimed = conn.execute(
+                    'INSERT OR IGNORE INTO reminder_deliveries (notification_key, reminder_id, holder, fencing, claimed_at) '
+                    'VALUES (?, ?, ?, ?, ?)', (key, reminder_id, self.holder, self.token, time.time())
+                ).rowcount == 1
+            conn.execute('COMMIT')
+            return claimed
+        finally:
+            conn.close()
+
+    def mark_sent(self, key):
+        conn = self._connect()
+        try:
+            conn.execute('UPDATE reminder_deliveries SET sent_at = ? WHERE notification_key = ?', (time.time(), key))
+        finally:
+            conn.close()
+
+    def purge(self, older_than=86400):
+        """Forget deliveries claimed more than older_than seconds ago."""
+        conn = self._connect()
+        try:
+            return conn.execute('DELETE FROM reminder_deliveries WHERE claimed_at < ?',
+                                (time.time() - older_than,)).rowcount
+        finally:
+            conn.close()
+
+    async def run(self, on_change=None):
+        """
+        Keep trying to hold the lease: renew every ttl/3 while leader, retry every ttl/5
+        while standby. on_change(is_leader) is called when the role changes.
+        """
+        leader = False
+        try:
+            while True:
+                now_leader = await asyncio.to_thread(self.try_acquire)
+                if now_leader != leader:
+                    leader = now_leader
+                    print(f"Bail {self.name} : {'leader' if leader else 'en attente'} ({self.holder})")
+                    if on_change:
+                        on_change(leader)
+                await asyncio.sleep(self.ttl / 3 if leader else self.ttl / 5)
+        finally:
+            await asyncio.to_thread(self.release)
+
+
+if __name__ == "__main__":
+    # Simulation : deux instances, le leader est tue (SIGKILL) au milieu d'une rafale de notifications
+    import json
+    import multiprocessing
+    import signal
+    import tempfile
+    from collections import Counter
+    from .migrations import migrate
+
+    COUNT, SPACING, TTL = 300, 0.02, 2.0
+
+    def dispatcher(name, db_path, out_path, first_due):
+        """Send each due notification once, while holding the lease; a 'send' is a line in out_path."""
+        lease = LeaderLease('reminder-dispatcher', db_path, ttl=TTL, holder=name)
+
+        async def loop():
+            asyncio.get_running_loop().create_task(lease.run())
+            sent = set()
+            while True:
+                if lease.is_leader:
+                    now = time.time()
+                    for i in range(COUNT):
+                        key = f"n{i}"
+                        if key in sent or first_due + i * SPACING > now:
+                            continue
+                        if await asyncio.to_thread(lease.claim, key, key):
+                            with open(out_path, 'a') as f:
+                                f.write(json.dumps({'key': key, 'by': name, 'at': time.time()}) + '\n')
+                            lease.mark_sent(key)
+                        sent.add(key)
+                await asyncio.sleep(0.01)
+
+        asyncio.run(loop())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path, out_path = os.path.join(tmp, 'dataset.db'), os.path.join(tmp, 'sent.jsonl')
+        conn = sqlite3.connect(db_path)
+        migrate(conn)
+        conn.close()
+        first_due = time.time() + 1.0
+        context = multiprocessing.get_context('fork')
+        first = context.Process(target=dispatcher, args=('replica-a', db_path, out_path, first_due))
+        first.start()
+        time.sleep(0.5)  # replica-a prend le bail
+        second = context.Process(target=dispatcher, args=('replica-b', db_path, out_path, first_due))
+        second.start()
+
+        time.sleep(1.0 + COUNT * SPACING / 3)  # un tiers de la rafale envoye
+        os.kill(first.pid, signal.SIGKILL)
+        killed_at = time.time()
+        first.join()
+        time.sleep(COUNT * SPACING + TTL * 2)
+        second.terminate()
+        second.join()
+
+        with open(out_path) as f:
+            sends = [json.loads(line) for line in f]
+        per_key = Counter(send['key'] for send in sends)
+        by_b = [send for send in sends if send['by'] == 'replica-b']
+        conn = sqlite3.connect(db_path)
+        claimed_unsent = conn.execute('SELECT COUNT(*) FROM reminder_deliveries WHERE sent_at IS NULL').fetchone()[0]
+        conn.close()
+        print(f"{len(sends)}/{COUNT} notifications sent, "
+              f"{sum(1 for s in sends if s['by'] == 'replica-a')} by the leader before it was killed, {len(by_b)} by the standby")
+        print(f"standby took over {by_b[0]['at'] - killed_at:.2f} s after the kill (lease ttl {TTL} s)")
+        print(f"claimed by the killed leader but not sent: {claimed_unsent}")
+        assert max(per_key.values()) == 1, "a notification was sent twice"
+        assert len(per_key) + claimed_unsent == COUNT
+        print("Lease handover OK")
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+import weakref
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime
+
+#recap de ce qu'il fait ce code :
+#Surveille la latence de la boucle asyncio : une tache se reveille toutes les 100 ms et mesure son retard (histogramme)
+#Un thread de surveillance voit quand la boucle ne tourne plus depuis plus que le seuil : il copie alors la pile
+#du code bloquant (fit Prophet, json.dump, appel SQLite...) et l'attribue a la commande ou tache en cours
+#Les derniers blocages sont gardes en memoire et affiches par la commande admin /loop_stalls (extended/monitoring.py)
+
+TASK_PREFIX = 'discord-ext-tasks: '  # nom donne par discord.ext.tasks aux taches @tasks.loop
+
+
+class LoopMonitor:
+    """
+    Event-loop lag histogram and stall capture.
+
+    start() from inside the loop; label(task, name) tags a task (e.g. a running command)
+    so that stalls happening in it are attributed to that name instead of the task name.
+    """
+
+    BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # secondes
+
+    def __init__(self, interval=0.1, threshold=0.25, history=50):
+        self.interval = interval
+        self.threshold = threshold
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.samples = 0
+        self.max_lag = 0.0
+        self.stalls = deque(maxlen=history)
+        self.labels = weakref.WeakKeyDictionary()  # tache -> commande en cours
+        self.loop = None
+        self.loop_thread = None
+        self.last_tick = None
+        self.open_stall = None
+        self.lock = threading.Lock()
+        self.heartbeat = None
+        self.watchdog = None
+        self.running = False
+
+    def start(self, interval=None, threshold=None):
+        if self.running:
+            return
+        self.interval = interval or self.interval
+        self.threshold = threshold or self.threshold
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        self.last_tick = time.perf_counter()
+        self.running = True
+        self.heartbeat = self.loop.create_task(self._heartbeat(), name='loop_monitor')
+        self.watchdog = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self.watchdog.start()
+
+    def stop(self):
+        self.running = False
+        if self.heartbeat:
+            self.heartbeat.cancel()
+
+    def label(self, task, name):
+        self.labels[task] = name
+
+    def unlabel(self, task):
+        self.labels.pop(task, None)
+
+    def observe(self, lag):
+        self.counts[bisect_left(self.BUCKETS, lag)] += 1
+        self.samples += 1
+        self.max_lag = max(self.max_lag, lag)
+
+    async def _heartbeat(self):
+        while self.running:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(0.0, now - expected)
+            self.observe(lag)
+            with self.lock:
+                self.last_tick = now
+                stall, self.open_stall = self.open_stall, None
+            if stall:
+                stall['duration'] = lag
+                self.stalls.append(stall)
+
+    def _watch(self):
+        while self.running:
+            time.sleep(self.threshold / 2)
+            with self.lock:
+                blocked = time.perf_counter() - self.last_tick - self.interval
+                if blocked < self.threshold or self.open_stall is not None:
+                    continue
+                frame = sys._current_frames().get(self.loop_thread)
+                self.open_stall = {
+                    'at': datetime.now(),
+                    'duration': blocked,
+                    'label': self.current_label(),
+                    'stack': traceback.extract_stack(frame) if frame else [],
+                }
+
+    def current_label(self):
+        """Command or task running on the loop right now (called from the watchdog thread)."""
+        task = asyncio.current_task(self.loop)
+        if task is None:
+            return 'callback'  # rappel hors tache : fin d'un to_thread, timer, transport...
+        name = self.labels.get(task) or task.get_name()
+        return name[len(TASK_PREFIX):] if name.startswith(TASK_PREFIX) else name
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile of the lag (seconds)."""
+        if not self.samples:
+            return 0.0
+        rank, seen = p / 100 * self.samples, 0
+        for bound, count in zip(self.BUCKETS + (self.max_lag,), self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_lag)
+        return self.max_lag
+
+    def recent_stalls(self, count=5):
+        stalls = list(self.stalls)[-count:]
+        with self.lock:
+            if self.open_stall:
+                stalls.append(dict(self.open_stall, ongoing=True))
+        return stalls[::-1]
+
+
+def format_stack(stack, limit=4):
+    """The innermost frames of a captured stack, project files first."""
+    frames = [frame for frame in stack if 'site-packages' not in frame.filename and 'asyncio' not in frame.filename]
+    frames = (frames or list(stack))[-limit:]
+    return [f"{os.path.basename(frame.filename)}:{frame.lineno} {frame.name}" for frame in frames]
+
+
+monitor = LoopMonitor()
+
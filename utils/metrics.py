@@ -0,0 +1,229 @@
+import threading
+from bisect import bisect_left
+
+#recap de ce qu'il fait ce code :
+#Compteurs et histogrammes de latence du bot (commandes, rappels, Calendar, modele, ecritures disque)
+#Une observation = une recherche dans les bornes + deux additions, sans verrou (moins d'une microseconde)
+#Exposes au format texte Prometheus sur http://METRICS_HOST:METRICS_PORT/metrics (Flask) et par /stats
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # secondes
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    return '+Inf' if value == float('inf') else repr(float(value))
+
+
+class _CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ('buckets', 'counts', 'sum')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def quantile(self, q):
+        """Estimate of the q-quantile (0..1), interpolated inside its bucket like histogram_quantile()."""
+        counts = list(self.counts)
+        total = sum(counts)
+        if not total:
+            return 0.0
+        rank, seen, lower = q * total, 0, 0.0
+        for bound, count in zip(self.buckets, counts):
+            if seen + count >= rank:
+                return lower + (bound - lower) * ((rank - seen) / count if count else 0)
+            seen += count
+            lower = bound
+        return self.buckets[-1]  # au-dela de la derniere borne
+
+
+class _Metric:
+    """A metric family: one child per combination of label values (the unlabelled child is labels())."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children = {}
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            child = self.children.setdefault(values, self._child())
+        return child
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._default.value += amount
+
+    def render(self):
+        lines = self._header()
+        for values, child in list(self.children.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, values)} {_number(child.value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def render(self):
+        lines = self._header()
+        for values, child in list(self.children.items()):
+            cumulative = 0
+            counts = list(child.counts)
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {_number(child.sum)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {cumulative}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Value read when the metrics are rendered: function() returns a number, or {label values: number}."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, function, labelnames=()):
+        self.function = function
+        super().__init__(name, documentation, labelnames)
+
+    def _child(self):
+        return None
+
+    def render(self):
+        lines = self._header()
+        value = self.function()
+        items = value.items() if isinstance(value, dict) else [((), value)]
+        for values, number in items:
+            values = values if isinstance(values, tuple) else (values,)
+            lines.append(f"{self.name}{_labels(self.labelnames, values)} {_number(number)}")
+        return lines
+
+
+class Registry:
+    """
+    The bot's metrics. Increments are not locked: a rare concurrent update from two
+    threads (persistence, Calendar pool) can be lost, which is fine for monitoring.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+
+    def _add(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._add(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, function, labelnames=()):
+        return self._add(Gauge(name, documentation, function, labelnames))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in list(self.metrics.values()):
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                print(f"Erreur de la metrique {metric.name} : {e}")
+        return '\n'.join(lines) + '\n'
+
+
+def serve(registry, host='127.0.0.1', port=9108):
+    """Serve GET /metrics with Flask on a background thread. Returns the server (call shutdown() to stop)."""
+    from flask import Flask, Response
+    from werkzeug.serving import make_server
+
+    app = Flask('metrics')
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+    server = make_server(host, port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
+
+
+registry = Registry()
+
+COMMANDS = registry.counter('bot_commands_total', 'Hybrid command invocations.', ('command', 'status'))
+COMMAND_SECONDS = registry.histogram('bot_command_duration_seconds', 'Hybrid command duration.', ('command',))
+REMINDER_NOTIFICATIONS = registry.counter(
+    'reminder_notifications_total', 'Reminder notifications by result (sent, failed, missed, claimed elsewhere).', ('result',)
+)
+REMINDER_LAG = registry.histogram(
+    'reminder_delivery_lag_seconds', 'Delay between the scheduled time of a notification and its send.',
+    buckets=(0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 15.0, 30.0, 60.0)
+)
+REMINDER_PASS_SECONDS = registry.histogram('reminder_check_duration_seconds', 'Duration of one reminder checker pass.')
+REMINDERS_PROCESSED = registry.counter('reminders_processed_total', 'Reminders examined by the reminder checker.')
+REMINDERS_REMOVED = registry.counter('reminders_removed_total', 'Past reminders removed by the reminder checker.')
+REMINDER_ERRORS = registry.counter('reminder_checker_errors_total', 'Errors while processing reminders.')
+CALENDAR_REQUESTS = registry.counter('calendar_requests_total', 'Google Calendar API calls by result.', ('result',))
+CALENDAR_SECONDS = registry.histogram('calendar_request_duration_seconds', 'Google Calendar API call duration.')
+MODEL_TRAIN_SECONDS = registry.histogram(
+    'model_train_duration_seconds', 'Prophet model fit duration.', buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+)
+MODEL_PREDICT_SECONDS = registry.histogram('model_predict_duration_seconds', 'Prophet forecast duration.')
+PERSISTENCE_WRITE_SECONDS = registry.histogram(
+    'persistence_write_duration_seconds', 'Atomic JSON write duration (write, fsync, rename).'
+)
+
@@ -0,0 +1,252 @@
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+#recap de ce qu'il fait ce code :
+#Garde la version du schema dans PRAGMA user_version
+#Applique dans l'ordre les migrations qui manquent, chacune dans sa propre transaction
+#Archive les vieux logs d'activite dans des tables mensuelles (activity_log_YYYYMM)
+
+MIGRATIONS = [
+    (1, "initial schema", [
+        '''
+        CREATE TABLE IF NOT EXISTS participant_availability (
+            participant_id INTEGER PRIMARY KEY,
+            username TEXT,
+            start_time TEXT,
+            end_time TEXT,
+            timezone TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS activity_log (
+            log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            participant_id INTEGER,
+            status TEXT,
+            timestamp TEXT,
+            FOREIGN KEY (participant_id) REFERENCES participant_availability(participant_id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS daily_availability (
+            participant_id INTEGER,
+            date TEXT,
+            online_times TEXT,
+            offline_times TEXT,
+            FOREIGN KEY (participant_id) REFERENCES participant_availability(participant_id)
+        )
+        ''',
+    ]),
+    (2, "covering indexes on activity_log", [
+        # Couvre "WHERE participant_id = ? ORDER BY timestamp" sans toucher la table
+        '''
+        CREATE INDEX IF NOT EXISTS idx_activity_log_participant_ts
+        ON activity_log (participant_id, timestamp, status)
+        ''',
+        # Utilise par l'archivage (WHERE timestamp < ?)
+        '''
+        CREATE INDEX IF NOT EXISTS idx_activity_log_ts
+        ON activity_log (timestamp)
+        ''',
+    ]),
+    (3, "unique (participant_id, date) on daily_availability", [
+        # Garder la derniere ligne ecrite pour chaque doublon avant d'ajouter la contrainte
+        '''
+        DELETE FROM daily_availability
+        WHERE rowid NOT IN (
+            SELECT MAX(rowid) FROM daily_availability GROUP BY participant_id, date
+        )
+        ''',
+        '''
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_daily_availability_participant_date
+        ON daily_availability (participant_id, date)
+        ''',
+    ]),
+    (4, "leader lease and reminder deliveries", [
+        # Un bail par role (ex. envoi des rappels) : detenteur, expiration (epoch) et jeton de fencing
+        '''
+        CREATE TABLE IF NOT EXISTS leases (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            fencing INTEGER NOT NULL
+        )
+        ''',
+        # Une ligne par notification reservee : la cle primaire empeche un second envoi
+        '''
+        CREATE TABLE IF NOT EXISTS reminder_deliveries (
+            notification_key TEXT PRIMARY KEY,
+            reminder_id TEXT NOT NULL,
+            holder TEXT NOT NULL,
+            fencing INTEGER NOT NULL,
+            claimed_at REAL NOT NULL,
+            sent_at REAL
+        )
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_reminder_deliveries_claimed
+        ON reminder_deliveries (claimed_at)
+        ''',
+    ]),
+    (5, "shared user data and feedback log", [
+        # Donnees des utilisateurs partagees par les processus du cluster (fuseaux, emails, disponibilites,
+        # reglages des serveurs) : une ligne par cle, seq croissant par magasin pour suivre les changements
+        '''
+        CREATE TABLE IF NOT EXISTS shared_data (
+            store TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT,
+            seq INTEGER NOT NULL,
+            PRIMARY KEY (store, key)
+        )
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_shared_data_seq
+        ON shared_data (store, seq)
+        ''',
+        # Journal des feedbacks, dans l'ordre d'enregistrement : position dans le journal = id - 1
+        '''
+        CREATE TABLE IF NOT EXISTS feedback (
+            id INTEGER PRIMARY KEY,
+            record TEXT NOT NULL
+        )
+        ''',
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn, target_version=LATEST_VERSION):
+    """
+    Apply every migration newer than the database's user_version, up to target_version.
+    Each migration runs in its own transaction, so a failure leaves the schema at the
+    last fully applied version. Returns the resulting version.
+    """
+    current = get_schema_version(conn)
+    previous_isolation = conn.isolation_level
+    conn.isolation_level = None  # transactions explicites, DDL compris
+    try:
+        for version, description, statements in MIGRATIONS:
+            if version <= current or version > target_version:
+                continue
+            try:
+                conn.execute('BEGIN')
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f'PRAGMA user_version = {int(version)}')
+                conn.execute('COMMIT')
+            except sqlite3.Error:
+                conn.execute('ROLLBACK')
+                raise
+            print(f"Database migrated to version {version}: {description}")
+            current = version
+    finally:
+        conn.isolation_level = previous_isolation
+    return current
+
+
+def archive_table_name(month):
+    return f"activity_log_{month.replace('-', '')}"
+
+
+def archive_activity_log(conn, retention_days=90, now=None):
+    """
+    Move activity_log rows older than retention_days into monthly archive tables
+    (activity_log_YYYYMM), so the hot table only holds the retention window.
+    Only whole days are moved: a day is either archived or left for the aggregator.
+    Returns the number of rows moved.
+    """
+    now = now or datetime.now()
+    # Minuit : un jour a moitie archive serait reagrege (ON CONFLICT) avec ses seules lignes restantes
+    cutoff = (now - timedelta(days=retention_days)).strftime('%Y-%m-%d 00:00:00')
+
+    months = [row[0] for row in conn.execute('''
+        SELECT DISTINCT substr(timestamp, 1, 7) FROM activity_log WHERE timestamp < ?
+    ''', (cutoff,))]
+
+    moved = 0
+    with conn:
+        for month in months:
+            table = archive_table_name(month)
+            conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                log_id INTEGER PRIMARY KEY,
+                participant_id INTEGER,
+                status TEXT,
+                timestamp TEXT
+            )
+            ''')
+            conn.execute(f'''
+            CREATE INDEX IF NOT EXISTS idx_{table}_participant_ts
+            ON {table} (participant_id, timestamp, status)
+            ''')
+            cursor = conn.execute(f'''
+            INSERT OR IGNORE INTO {table} (log_id, participant_id, status, timestamp)
+            SELECT log_id, participant_id, status, timestamp FROM activity_log
+            WHERE timestamp < ? AND substr(timestamp, 1, 7) = ?
+            ''', (cutoff, month))
+            moved += cursor.rowcount
+        conn.execute('DELETE FROM activity_log WHERE timestamp < ?', (cutoff,))
+    return moved
+
+
+def benchmark(rows=10_000_000, participants=5_000, db_path=':memory:'):
+    """
+    Time the aggregator's queries on a synthetic activity_log, on the version 1
+    schema and again after the remaining migrations.
+    """
+    conn = sqlite3.connect(db_path)
+    migrate(conn, target_version=1)
+
+    start = datetime(2024, 1, 1)
+    batch = 100_000
+    t0 = time.perf_counter()
+    for offset in range(0, rows, batch):
+        conn.executemany(
+            'INSERT INTO activity_log (participant_id, status, timestamp) VALUES (?, ?, ?)',
+            (
+                (
+                    i % participants,
+                    'online' if i % 3 else 'offline',
+                    (start + timedelta(seconds=i * 3)).strftime('%Y-%m-%d %H:%M:%S'),
+                )
+                for i in range(offset, min(offset + batch, rows))
+            )
+        )
+        conn.commit()
+    print(f"Inserted {rows} rows in {time.perf_counter() - t0:.1f}s")
+
+    queries = {
+        'participant history': (
+            'SELECT timestamp, status FROM activity_log WHERE participant_id = ? ORDER BY timestamp',
+            (participants // 2,),
+        ),
+        'participant day': (
+            'SELECT COUNT(*) FROM activity_log WHERE participant_id = ? AND timestamp BETWEEN ? AND ?',
+            (participants // 2, '2024-01-15 00:00:00', '2024-01-15 23:59:59'),
+        ),
+    }
+
+    def run(label):
+        for name, (sql, params) in queries.items():
+            t = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            print(f"[{label}] {name}: {(time.perf_counter() - t) * 1000:.2f} ms")
+
+    run("v1")
+    t0 = time.perf_counter()
+    migrate(conn)
+    print(f"Migrated to v{LATEST_VERSION} in {time.perf_counter() - t0:.1f}s")
+    run(f"v{LATEST_VERSION}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    # python -m utils.migrations [rows]
+    import sys
+    benchmark(rows=int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000)
@@ -0,0 +1,321 @@
+import asyncio
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+
+from .metrics import PERSISTENCE_WRITE_SECONDS
+
+#recap de ce qu'il fait ce code :
+#Service d'ecriture partage par tous les fichiers JSON du bot (rappels, preferences, activite, emails, feedbacks)
+#Un seul thread fait les ecritures disque : la boucle asyncio ne fait jamais d'open/write/fsync
+#Les coroutines lisent aussi par ce thread (load_json_async)
+#Les sauvegardes d'un meme fichier en attente sont fusionnees : seule la derniere version est ecrite
+#Chaque ecriture est atomique (fichier temporaire + fsync + rename), un arret brutal laisse l'ancienne ou la nouvelle version
+#Un fichier illisible au chargement est mis de cote (.corrupt-<date>) au lieu d'etre ecrase en silence
+
+
+def write_atomic(path, data):
+    """Replace path with data (bytes) so that a crash leaves either the old or the new content."""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    # Nom unique dans le meme repertoire : deux processus (ou threads) n'ecrivent jamais le meme temporaire
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    try:
+        # Le renommage lui-meme doit survivre a une coupure
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # Windows : pas de fsync de repertoire
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _settle(future, result, error):
+    if future.done():
+        return  # appelant annule entre-temps
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class Persistence:
+    """
+    Background writer for JSON files.
+
+    - save_json(path, data): serializes now (consistent snapshot) and queues the write;
+      a newer save of the same path replaces the queued one in place.
+    - save_later(path, snapshot, delay): for hot paths (one save per message); snapshot()
+      is called once on the event loop after delay, however many saves were asked for.
+      With encode=, encode(snapshot) gives the bytes to write and runs on the I/O thread.
+    - append(path, text): ordered appends (journals), merged with the previous append
+      to the same file only when nothing else was queued in between.
+    - call(function): any other write (SQLite), run in queue order.
+    - load_json(path, default): sees queued writes, and moves corrupt files aside;
+      load_json_async(path, default) does the same on the I/O thread, for coroutines.
+
+    then= callbacks run on the I/O thread once their write is on disk.
+    """
+
+    def __init__(self):
+        self.queue = deque()   # [kind, path, payload, callbacks]
+        self.snapshots = {}    # path -> entree 'replace' encore dans la file
+        self.in_flight = {}    # path -> contenu en cours d'ecriture
+        self.busy = False      # une entree (quel que soit son type) est en cours
+        self.deferred = {}     # path -> (snapshot, indent, TimerHandle)
+        self.condition = threading.Condition()
+        self.thread = None
+        self.writes = 0
+        self.coalesced = 0
+
+    def _start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name='persistence', daemon=True)
+            self.thread.start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.queue:
+                    self.condition.wait()
+                kind, path, payload, callbacks = self.queue.popleft()
+                self.busy = True
+                if kind == 'replace':
+                    del self.snapshots[path]
+                    self.in_flight[path] = payload
+            started = time.perf_counter()
+            try:
+                if kind == 'replace':
+                    write_atomic(path, payload)
+                elif kind == 'call':
+                    payload()
+                else:
+                    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                    with open(path, 'ab') as f:
+                        f.write(payload)
+                        f.flush()
+                        os.fsync(f.fileno())
+                PERSISTENCE_WRITE_SECONDS.observe(time.perf_counter() - started)
+                for callback in callbacks:
+                    callback()
+            except Exception as e:
+                print(f"Erreur lors de l'ecriture de {path or getattr(payload, '__qualname__', payload)} : {e}")
+            with self.condition:
+                if self.in_flight.get(path) is payload:
+                    del self.in_flight[path]
+                self.busy = False
+                self.writes += 1
+                self.condition.notify_all()
+
+    def save_bytes(self, path, data, then=None):
+        path = os.fspath(path)
+        callbacks = [then] if then else []
+        with self.condition:
+            self._start()
+            self._cancel_deferred(path)
+            entry = self.snapshots.get(path)
+            if entry is not None:
+                entry[2] = data
+                entry[3].extend(callbacks)
+                self.coalesced += 1
+            else:
+                entry = ['replace', path, data, callbacks]
+                self.snapshots[path] = entry
+                self.queue.append(entry)
+                self.condition.notify_all()
+
+    def save_json(self, path, data, indent=None, then=None):
+        self.save_bytes(path, json.dumps(data, indent=indent).encode(), then)
+
+    def save_later(self, path, snapshot, delay=1.0, indent=None, encode=None):
+        """
+        Save snapshot() to path within delay seconds. Outside an event loop
+        (scripts, worker threads) the snapshot is saved immediately.
+        """
+        path = os.fspath(path)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._save_snapshot(path, snapshot(), indent, encode)
+            return
+        if path in self.deferred:
+            self.coalesced += 1
+            return
+        handle = loop.call_later(delay, self._save_deferred, path)
+        self.deferred[path] = (snapshot, indent, encode, handle)
+
+    def _save_deferred(self, path):
+        snapshot, indent, encode, handle = self.deferred.pop(path)
+        handle.cancel()  # appele par flush() avant l'echeance : le minuteur ne doit plus sauvegarder
+        self._save_snapshot(path, snapshot(), indent, encode)
+
+    def _save_snapshot(self, path, value, indent, encode):
+        if encode is None:
+            self.save_json(path, value, indent)
+        else:
+            # Encodage sur le thread d'ecriture, l'ecriture elle-meme suit dans la file
+            self.call(lambda: self.save_bytes(path, encode(value)))
+
+    def _cancel_deferred(self, path):
+        deferred = self.deferred.pop(path, None)
+        if deferred:
+            deferred[3].cancel()
+
+    def append(self, path, text, then=None):
+        path = os.fspath(path)
+        data = text.encode() if isinstance(text, str) else text
+        with self.condition:
+            self._start()
+            last = self.queue[-1] if self.queue else None
+            if last is not None and last[0] == 'append' and last[1] == path:
+                last[2] += data
+                if then:
+                    last[3].append(then)
+            else:
+                self.queue.append(['append', path, data, [then] if then else []])
+                self.condition.notify_all()
+
+    def call(self, function, then=None):
+        """Run function() on the I/O thread, in order with the queued writes (e.g. a SQLite transaction)."""
+        with self.condition:
+            self._start()
+            self.queue.append(['call', None, function, [then] if then else []])
+            self.condition.notify_all()
+
+    def pending(self, path):
+        """Bytes of the latest save of path not yet on disk, or None."""
+        path = os.fspath(path)
+        with self.condition:
+            entry = self.snapshots.get(path)
+            if entry is not None:
+                return entry[2]
+            return self.in_flight.get(path)
+
+    def load_json(self, path, default=dict):
+        """
+        Content of a JSON file, including saves still queued. A missing file gives default();
+        an unreadable one is renamed to <path>.corrupt-<date> and gives default().
+        """
+        path = os.fspath(path)
+        data = self.pending(path)
+        try:
+            if data is not None:
+                return json.loads(data)
+            with open(path, 'rb') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return default()
+        except json.JSONDecodeError as e:
+            if data is None:
+                aside = f"{path}.corrupt-{time.strftime('%Y%m%d-%H%M%S')}"
+                os.replace(path, aside)
+                print(f"Fichier illisible {path} ({e}), mis de cote dans {aside}")
+            return default()
+
+    async def load_json_async(self, path, default=dict):
+        """
+        load_json for coroutines: the file is read and parsed on the I/O thread, after the
+        writes already queued, so the event loop never waits for the disk.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def load():
+            try:
+                result, error = self.load_json(path, default), None
+            except Exception as e:
+                result, error = None, e
+            loop.call_soon_threadsafe(_settle, future, result, error)
+        self.call(load)
+        return await future
+
+    def flush(self, timeout=30):
+        """Write the deferred saves, then block until the queue is written (shutdown, tests)."""
+        for path in list(self.deferred):
+            self._save_deferred(path)
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while self.queue or self.busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print(f"Persistence : {len(self.queue)} ecritures non terminees")
+                    return False
+                self.condition.wait(remaining)
+        return True
+
+    async def wait_idle(self):
+        # Instantanes pris sur la boucle, la ou les donnees sont modifiees ; seule l'attente part dans un thread
+        for path in list(self.deferred):
+            self._save_deferred(path)
+        await asyncio.to_thread(self.flush)
+
+
+persistence = Persistence()
+
+
+if __name__ == "__main__":
+    # Benchmark : 2000 sauvegardes d'un fichier de rappels (500 rappels) depuis la boucle asyncio
+    import tempfile
+
+    reminders = [{'id': str(i), 'title': f"reminder {i}", 'main_time': '2024-01-01T10:00:00+00:00',
+                  'reminder_times': [], 'mentioned_users': [1, 2, 3]} for i in range(500)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'reminders.json')
+
+        t = time.perf_counter()
+        for i in range(200):
+            with open(path, 'w') as f:
+                json.dump({'REMINDERS': reminders, 'version': i}, f, indent=4)
+        print(f"open/json.dump on the loop:     {(time.perf_counter() - t) / 200 * 1000:.3f} ms per save (not atomic)")
+
+        async def saves(count):
+            stalls = []
+            for i in range(count):
+                t = time.perf_counter()
+                # Sans indent : json.dumps garde son encodeur C (4x plus rapide qu'avec indent=4)
+                persistence.save_json(path, {'REMINDERS': reminders, 'version': i})
+                stalls.append(time.perf_counter() - t)
+                await asyncio.sleep(0)
+            await persistence.wait_idle()
+            return stalls
+
+        writes = persistence.writes
+        stalls = asyncio.run(saves(2000))
+        print(f"persistence.save_json:          {sum(stalls) / len(stalls) * 1000:.3f} ms per save on the loop, "
+              f"{persistence.writes - writes} disk writes for {len(stalls)} saves (atomic, fsync)")
+        assert persistence.load_json(path)['version'] == 1999
+
+        async def hot_path():
+            counter = {'messages': 0}
+            for _ in range(10_000):
+                counter['messages'] += 1
+                persistence.save_later(path, lambda: dict(counter), delay=0.05)
+            await asyncio.sleep(0.1)
+            await persistence.wait_idle()
+        asyncio.run(hot_path())
+        assert persistence.load_json(path) == {'messages': 10_000}
+
+        with open(path, 'w') as f:
+            f.write('{"REMINDERS": [')  # ecriture interrompue
+        assert persistence.load_json(path) == {}
+        assert any(name.startswith('reminders.json.corrupt-') for name in os.listdir(tmp))
+        print("Deferred saves, read-your-writes and corrupt file handling OK")
@@ -1,33 +1,197 @@
 import os
 import json
+import shutil
+import sqlite3
+import uuid
+
+from .database import DB_PATH
+from .persistence import persistence, write_atomic
 
 REMINDER_FILE = "data/reminders.json"
+# En mode cluster (cluster.py), un fichier par shard : chaque processus ne lit et n'ecrit que ses shards
+REMINDER_DIR = "data/reminders"
+MANIFEST_FILE = os.path.join(REMINDER_DIR, "manifest.json")
+# Attente maximale du verrou des rappels tenu par un autre processus (secondes)
+LOCK_TIMEOUT = 30
+
+_partition = None  # (shard_ids, shard_count) du processus, None hors cluster
+
+
+def shard_of(guild_id, shard_count):
+    """Shard of a guild, as Discord computes it; reminders without a guild (DMs, old entries) go to shard 0."""
+    return (int(guild_id) >> 22) % shard_count if guild_id else 0
+
+
+def shard_file(shard_id):
+    return os.path.join(REMINDER_DIR, f"shard-{shard_id}.json")
+
+
+def configure_partition(shard_ids, shard_count):
+    """Only load and save the reminders of these shards (call once, before the bot starts)."""
+    global _partition
+    _partition = (list(shard_ids), shard_count)
+
+
+def _read(path):
+    return persistence.load_json(path).get("REMINDERS", [])
+
+
+def load_shard(shard_id):
+    return _read(shard_file(shard_id))
+
+
+def _write(path, reminders):
+    persistence.save_json(path, {"REMINDERS": reminders})
+
 
+def repartition(shard_count):
+    """
+    Spread all reminders (the single file and any shard files) over shard_count shard files.
+    Run by the cluster supervisor before the workers start, never while they run.
+    The new files are written to a temporary directory, then swapped in.
+    """
+    old_dir, tmp_dir = REMINDER_DIR + ".old", REMINDER_DIR + ".tmp"
+    if not os.path.exists(REMINDER_DIR) and os.path.exists(old_dir):
+        os.replace(old_dir, REMINDER_DIR)  # arret entre les deux renommages
+    previous = None
+    if os.path.exists(MANIFEST_FILE):
+        with open(MANIFEST_FILE, "r") as file:
+            previous = json.load(file).get("shard_count")
+    if previous == shard_count and not os.path.exists(REMINDER_FILE):
+        return
 
-def ensure_data_file():
-    if not os.path.exists("data"):
-        os.makedirs("data")
-    if not os.path.exists(REMINDER_FILE):
-        with open(REMINDER_FILE, "w") as file:
-            json.dump({"REMINDERS": []}, file)
+    reminders = _read(REMINDER_FILE)
+    for shard_id in range(previous or 0):
+        reminders.extend(_read(shard_file(shard_id)))
+    # Par id : si un arret a laisse l'ancien fichier, la version des shards l'emporte
+    reminders = {reminder["id"]: reminder for reminder in reminders}
+    by_shard = {shard_id: [] for shard_id in range(shard_count)}
+    for reminder in reminders.values():
+        by_shard[shard_of(reminder.get("guild_id"), shard_count)].append(reminder)
+
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    # Ecritures synchrones : les fichiers doivent etre sur disque avant l'echange des repertoires
+    for shard_id, shard_reminders in by_shard.items():
+        write_atomic(os.path.join(tmp_dir, os.path.basename(shard_file(shard_id))),
+                     json.dumps({"REMINDERS": shard_reminders}).encode())
+    write_atomic(os.path.join(tmp_dir, os.path.basename(MANIFEST_FILE)),
+                 json.dumps({"shard_count": shard_count}).encode())
+    if os.path.exists(REMINDER_DIR):
+        os.replace(REMINDER_DIR, old_dir)
+    os.replace(tmp_dir, REMINDER_DIR)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(REMINDER_FILE):
+        os.replace(REMINDER_FILE, REMINDER_FILE + ".partitioned")
 
 
 def load_reminders():
-    ensure_data_file()
-    try:
-        with open(REMINDER_FILE, "r") as file:
-            data = json.load(file)
-            return data.get("REMINDERS", [])
-    except (json.JSONDecodeError, FileNotFoundError):
-        print("No reminders found")
-        return []
+    if _partition:
+        shard_ids, _ = _partition
+        return [reminder for shard_id in shard_ids for reminder in _read(shard_file(shard_id))]
+    return _read(REMINDER_FILE)
+
+
+async def load_reminders_async():
+    """load_reminders for coroutines: the files are read on the persistence thread."""
+    if _partition:
+        shard_ids, _ = _partition
+        paths = [shard_file(shard_id) for shard_id in shard_ids]
+    else:
+        paths = [REMINDER_FILE]
+    reminders = []
+    for path in paths:
+        reminders.extend((await persistence.load_json_async(path)).get("REMINDERS", []))
+    return reminders
+
+
+def _by_file(reminders):
+    """Reminders grouped by the file that holds them: one per shard of this process in a cluster."""
+    if not _partition:
+        return {REMINDER_FILE: reminders}
+    shard_ids, shard_count = _partition
+    by_shard = {shard_id: [] for shard_id in shard_ids}
+    for reminder in reminders:
+        shard_id = shard_of(reminder.get("guild_id"), shard_count)
+        if shard_id not in by_shard:
+            print(f"Rappel {reminder.get('id')} hors des shards de ce processus (shard {shard_id}), ignore")
+            continue
+        by_shard[shard_id].append(reminder)
+    return {shard_file(shard_id): shard_reminders for shard_id, shard_reminders in by_shard.items()}
 
 
 def save_reminders(reminders):
-    ensure_data_file()
+    for path, file_reminders in _by_file(reminders).items():
+        _write(path, file_reminders)
+
+
+def _update_locked(change):
+    """
+    Reload the reminders, apply change and write them back while holding the database write
+    lock (BEGIN IMMEDIATE): another process sharing the files waits instead of overwriting
+    this update with the copy it loaded before. Runs on the persistence thread.
+    """
+    conn = sqlite3.connect(DB_PATH, timeout=LOCK_TIMEOUT, isolation_level=None)
     try:
-        with open(REMINDER_FILE, "w") as file:
-            json.dump({"REMINDERS": reminders}, file, indent=4)
-    except Exception as e:
-        print(f"Erreur lors de la sauvegarde : {e}")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            reminders = change(load_reminders())
+            # Ecriture synchrone : les fichiers doivent etre sur disque avant de rendre le verrou
+            for path, file_reminders in _by_file(reminders).items():
+                write_atomic(path, json.dumps({"REMINDERS": file_reminders}).encode())
+        finally:
+            conn.execute("COMMIT")  # rien n'est ecrit dans la base, seul le verrou compte
+    finally:
+        conn.close()
+
+
+def update_reminders(change, then=None):
+    """
+    Queue change(reminders) -> reminders on the persistence thread, after the saves already
+    queued, as one locked reload/change/write of the reminders files.
+    """
+    persistence.call(lambda: _update_locked(change), then)
+
+
+def remove_reminders(reminder_ids, updated=()):
+    """
+    Drop reminders by id and replace the updated ones by id, in the reminders as they are
+    when the write happens: the reminders added in the meantime (while a pass of the checker
+    was awaiting Discord, or by another process) are kept.
+    """
+    reminder_ids = set(reminder_ids)
+    updated = {reminder["id"]: reminder for reminder in updated}
+    update_reminders(lambda reminders: [updated.get(reminder["id"], reminder) for reminder in reminders
+                                        if reminder["id"] not in reminder_ids])
+
+
+def add_reminders(new_reminders):
+    """Append many reminders with a single locked load/save of the reminders files."""
+    new_reminders = list(new_reminders)
+    update_reminders(lambda reminders: reminders + new_reminders)
+
 
+def new_reminder(author, channel_id, title, description, event_time, reminder_times, mentioned_users, tz,
+                 guild_id=None):
+    """
+    Build a reminder entry. event_time and reminder_times are aware datetimes,
+    date and time are shown in tz (the author's timezone). guild_id decides which
+    shard (and cluster process) owns the reminder; None for direct messages.
+    """
+    local_time = event_time.astimezone(tz)
+    is_dm_reminder = len(mentioned_users) == 1
+    return {
+        "id": str(uuid.uuid4()),
+        "guild_id": guild_id,
+        "user_id": author.id,
+        "username": author.name,
+        "channel_id": channel_id,
+        "title": title,
+        "description": description,
+        "date": local_time.strftime("%Y-%m-%d"),
+        "time": local_time.strftime("%H:%M"),
+        "mentions": mentioned_users if mentioned_users else "everyone",
+        "is_dm": is_dm_reminder,
+        "reminder_times": [rt.isoformat(' ') for rt in sorted(reminder_times)],
+        "main_time": event_time.isoformat(' ')
+    }
@@ -0,0 +1,94 @@
+import os
+from collections import namedtuple
+
+from .persistence import persistence
+from .reminders import load_shard, shard_of
+from .calendar_sync import SYNC_FILE
+
+#recap de ce qu'il fait ce code :
+#Decoupage des shards Discord entre les processus du cluster (cluster.py) : chaque processus recoit
+#une plage contigue de shards, transmise par variables d'environnement (BOT_CLUSTER_ID, BOT_SHARD_IDS, BOT_SHARD_COUNT)
+#Les donnees liees aux rappels (correspondance rappel -> evenement Calendar) sont rangees par processus
+#Les fichiers qu'un processus reecrit en entier (index, statistiques) existent en un exemplaire par processus
+
+Cluster = namedtuple('Cluster', 'cluster_id shard_ids shard_count')
+
+
+def plan(shard_count, cluster_count):
+    """Split shards 0..shard_count-1 into cluster_count contiguous, near-equal ranges."""
+    cluster_count = max(1, min(cluster_count, shard_count))
+    per_cluster, extra = divmod(shard_count, cluster_count)
+    clusters, start = [], 0
+    for cluster_id in range(cluster_count):
+        size = per_cluster + (1 if cluster_id < extra else 0)
+        clusters.append(Cluster(cluster_id, list(range(start, start + size)), shard_count))
+        start += size
+    return clusters
+
+
+def to_env(cluster):
+    return {
+        'BOT_CLUSTER_ID': str(cluster.cluster_id),
+        'BOT_SHARD_IDS': ','.join(map(str, cluster.shard_ids)),
+        'BOT_SHARD_COUNT': str(cluster.shard_count),
+    }
+
+
+def from_env(environ=os.environ):
+    """The Cluster of this process, or None when the bot runs alone (python bot.py)."""
+    if 'BOT_SHARD_IDS' not in environ:
+        return None
+    return Cluster(
+        int(environ['BOT_CLUSTER_ID']),
+        [int(shard_id) for shard_id in environ['BOT_SHARD_IDS'].split(',')],
+        int(environ['BOT_SHARD_COUNT'])
+    )
+
+
+def cluster_file(path, cluster):
+    """Own copy of a file for one cluster process (path itself outside a cluster)."""
+    if cluster is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.cluster-{cluster.cluster_id}{ext}"
+
+
+def calendar_sync_file(cluster):
+    """Reminder -> Calendar event mapping of a cluster process (the shared file outside a cluster)."""
+    return cluster_file(SYNC_FILE, cluster)
+
+
+def repartition_calendar_sync(clusters):
+    """
+    Regroup the Calendar mappings by owning cluster, from the shard of each reminder.
+    Run after reminders.repartition(), before the workers start.
+    """
+    directory = os.path.dirname(SYNC_FILE) or '.'
+    root = os.path.basename(os.path.splitext(SYNC_FILE)[0])
+    paths = [os.path.join(directory, name) for name in os.listdir(directory)
+             if name.startswith(root) and name.endswith('.json')]
+    events, pending = {}, {}
+    for path in paths:
+        data = persistence.load_json(path)
+        events.update(data.get('events', {}))
+        pending.update(data.get('pending', {}))
+
+    shard_count = clusters[0].shard_count
+    owner = {shard_id: cluster.cluster_id for cluster in clusters for shard_id in cluster.shard_ids}
+    reminder_shard = {
+        reminder['id']: shard_of(reminder.get('guild_id'), shard_count)
+        for shard_id in range(shard_count) for reminder in load_shard(shard_id)
+    }
+    split = {cluster.cluster_id: {'events': {}, 'pending': {}} for cluster in clusters}
+    for key, mapping in (('events', events), ('pending', pending)):
+        for reminder_id, value in mapping.items():
+            # Rappel supprime entre-temps : sa suppression en attente part avec le premier processus
+            cluster_id = owner[reminder_shard.get(reminder_id, 0)]
+            split[cluster_id][key][reminder_id] = value
+    for cluster in clusters:
+        persistence.save_json(calendar_sync_file(cluster), split[cluster.cluster_id])
+    # Sur disque avant que les processus ne demarrent (et avant de mettre les anciens fichiers de cote)
+    persistence.flush()
+    for path in paths:
+        if path not in {calendar_sync_file(cluster) for cluster in clusters}:
+            os.replace(path, path + '.partitioned')
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+
+from .database import DB_PATH
+from .persistence import persistence
+
+#recap de ce qu'il fait ce code :
+#Donnees des utilisateurs partagees par tous les processus du bot (cluster, instances actif/attente) dans SQLite
+#Une ligne par cle (table shared_data) : chaque processus n'ecrit que les cles qu'il modifie, jamais le fichier entier
+#Les ecritures passent par le thread d'ecriture (persistence.call), groupees en une transaction
+#Chaque processus garde sa copie en memoire et relit regulierement les cles modifiees par les autres (seq croissant)
+#Les anciens fichiers JSON sont importes une fois, puis mis de cote (<fichier>.migrated)
+
+FOLLOW_SECONDS = 10  # intervalle de relecture des changements faits par les autres processus
+
+
+class SharedStore:
+    """
+    The key -> JSON value entries of one store (e.g. 'timezones') in the shared_data table
+    (migration 5).
+
+    set()/delete() are queued to the persistence thread; the changes queued before a write
+    starts go in one transaction. Each transaction takes the next seq of the store, so
+    changes() returns what any process wrote since the last load() or changes().
+    """
+
+    def __init__(self, name, db_path=DB_PATH):
+        self.name = name
+        self.db_path = db_path
+        self.seq = 0            # dernier changement vu
+        self.unsaved = {}       # cle -> JSON (None = supprimee), pas encore ecrit
+        self.writing = {}       # changements en cours d'ecriture
+        self.scheduled = False  # une ecriture est deja dans la file
+        self.lock = threading.Lock()
+        self.follower = None
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def load(self, *legacy_paths, convert=None):
+        """
+        All the entries ({key: value}). The first time, while the store is still empty, the
+        files it replaces are imported: the JSON file legacy_paths[0], or convert() when the
+        old format needs it. They are then renamed to <path>.migrated.
+        """
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            self.seq = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM shared_data WHERE store = ?',
+                                    (self.name,)).fetchone()[0]
+            legacy = [str(path) for path in legacy_paths if path and os.path.exists(path)]
+            if self.seq == 0 and legacy:
+                # Dans la transaction : un seul processus importe, les autres trouvent les lignes
+                data = convert() if convert else persistence.load_json(legacy[0])
+                data = {str(key): value for key, value in data.items()}
+                self.seq = 1
+                conn.executemany('INSERT INTO shared_data (store, key, value, seq) VALUES (?, ?, ?, 1)',
+                                 [(self.name, key, json.dumps(value)) for key, value in data.items()])
+                conn.execute('COMMIT')
+                for path in legacy:
+                    os.replace(path, path + '.migrated')
+                print(f"{', '.join(legacy)} importe dans la base ({len(data)} entrees)")
+                return data
+            rows = conn.execute('SELECT key, value FROM shared_data WHERE store = ? AND value IS NOT NULL',
+                                (self.name,)).fetchall()
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+        return {key: json.loads(value) for key, value in rows}
+
+    def set(self, key, value):
+        self._queue(str(key), json.dumps(value))
+
+    def delete(self, key):
+        self._queue(str(key), None)
+
+    def _queue(self, key, value):
+        with self.lock:
+            self.unsaved[key] = value
+            if self.scheduled:
+                return
+            self.scheduled = True
+        persistence.call(self._write)
+
+    def _write(self):
+        with self.lock:
+            self.writing, self.unsaved = self.unsaved, {}
+            self.scheduled = False
+        if not self.writing:
+            return
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            seq = conn.execute('SELECT COALESCE(MAX(seq), 0) + 1 FROM shared_data WHERE store = ?',
+                               (self.name,)).fetchone()[0]
+            conn.executemany('''
+                INSERT INTO shared_data (store, key, value, seq) VALUES (?, ?, ?, ?)
+                ON CONFLICT (store, key) DO UPDATE SET value = excluded.value, seq = excluded.seq
+            ''', [(self.name, key, value, seq) for key, value in self.writing.items()])
+            conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            print(f"Erreur lors de l'ecriture de {self.name} : {e}")
+            # Gardes pour la prochaine ecriture, sans ecraser les changements plus recents
+            with self.lock:
+                self.unsaved = {**self.writing, **self.unsaved}
+        finally:
+            conn.close()
+            with self.lock:
+                self.writing = {}
+
+    def changes(self):
+        """
+        {key: value, or None if deleted} written by any process since the last call.
+        Keys with a change of this process not yet written are left out.
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute('SELECT key, value, seq FROM shared_data WHERE store = ? AND seq > ? ORDER BY seq',
+                                (self.name, self.seq)).fetchall()
+        finally:
+            conn.close()
+        if rows:
+            self.seq = rows[-1][2]
+        with self.lock:
+            local = self.unsaved.keys() | self.writing.keys()
+        return {key: json.loads(value) if value is not None else None
+                for key, value, _ in rows if key not in local}
+
+    def follow(self, apply, interval=FOLLOW_SECONDS):
+        """Call apply(key, value) on the event loop for each change made by another process."""
+        async def run():
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    changes = await asyncio.to_thread(self.changes)
+                except sqlite3.Error as e:
+                    print(f"Erreur lors de la relecture de {self.name} : {e}")
+                    continue
+                for key, value in changes.items():
+                    apply(key, value)
+        if self.follower is None:
+            self.follower = asyncio.get_running_loop().create_task(run(), name=f"follow {self.name}")
+
+    def stop(self):
+        if self.follower:
+            self.follower.cancel()
+            self.follower = None
@@ -0,0 +1,112 @@
+import base64
+import hashlib
+import math
+from array import array
+
+#recap de ce qu'il fait ce code :
+#CountMinSketch : compteurs approximatifs (ex. messages par (utilisateur, heure)) en memoire fixe
+#HyperLogLog : nombre approximatif d'elements distincts (ex. utilisateurs actifs par heure) en memoire fixe
+#Les bornes d'erreur documentees sont verifiees par tests/test_sketches.py
+
+
+def _hash64(key):
+    return int.from_bytes(hashlib.blake2b(str(key).encode(), digest_size=8).digest(), 'big')
+
+
+class CountMinSketch:
+    """
+    Approximate counter with fixed memory (width * depth counters).
+
+    Error bounds, for N = total of all increments:
+    - estimate(key) is never below the true count;
+    - estimate(key) <= true count + (e / width) * N with probability >= 1 - e^(-depth).
+    With the default width=1024, depth=4: overestimate <= 0.27% of N, with probability >= 98.1%.
+    """
+
+    def __init__(self, width=1024, depth=4):
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self.table = array('i', bytes(4 * width * depth))
+
+    def _indexes(self, key):
+        digest = hashlib.blake2b(str(key).encode(), digest_size=4 * self.depth).digest()
+        for row in range(self.depth):
+            column = int.from_bytes(digest[4 * row:4 * row + 4], 'big') % self.width
+            yield row * self.width + column
+
+    def add(self, key, count=1):
+        for index in self._indexes(key):
+            self.table[index] += count
+        self.total += count
+
+    def estimate(self, key):
+        return min(self.table[index] for index in self._indexes(key))
+
+    def memory_bytes(self):
+        return self.table.itemsize * len(self.table)
+
+    def to_dict(self):
+        return {
+            'width': self.width,
+            'depth': self.depth,
+            'total': self.total,
+            'table': base64.b64encode(self.table.tobytes()).decode(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['width'], data['depth'])
+        sketch.total = data['total']
+        sketch.table = array('i', base64.b64decode(data['table']))
+        return sketch
+
+
+class HyperLogLog:
+    """
+    Approximate distinct counter with fixed memory (2^precision one-byte registers).
+
+    The relative standard error is 1.04 / sqrt(2^precision): about 6.5% for the
+    default precision=8 (256 bytes), 3.3% for precision=10 (1 KiB).
+    Small cardinalities (< 2.5 * 2^precision) use linear counting and are close to exact.
+    """
+
+    def __init__(self, precision=8):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+
+    def add(self, item):
+        x = _hash64(item)
+        index = x >> (64 - self.precision)
+        rest = x & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        for i, value in enumerate(other.registers):
+            if value > self.registers[i]:
+                self.registers[i] = value
+
+    def count(self):
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m) if m >= 128 else {16: 0.673, 32: 0.697, 64: 0.709}[m]
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))
+        return round(raw)
+
+    def memory_bytes(self):
+        return len(self.registers)
+
+    def to_dict(self):
+        return {'precision': self.precision, 'registers': base64.b64encode(bytes(self.registers)).decode()}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['precision'])
+        sketch.registers = bytearray(base64.b64decode(data['registers']))
+        return sketch
+
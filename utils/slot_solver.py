@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from .availability_index import SLOT_MINUTES, WEEK_SLOTS
+
+#recap de ce qu'il fait ce code :
+#Pour chaque invite et chaque creneau candidat (en UTC), calcule la probabilite de presence :
+#  disponibilite (bitset local de l'invite, decale selon son fuseau a la date du creneau, sur toute la duree)
+#  x profil d'activite (heure de la semaine UTC, tire des messages de l'invite)
+#Somme sur les invites = presence attendue, puis choix glouton des k meilleurs creneaux espaces
+
+WEEK_MINUTES = WEEK_SLOTS * SLOT_MINUTES
+HOURS_PER_WEEK = 7 * 24
+
+
+def minute_of_week(unix_minutes):
+    """Minutes since Monday 00:00 UTC (the Unix epoch was a Thursday)."""
+    return (unix_minutes + 3 * 1440) % WEEK_MINUTES
+
+
+def window_availability(masks, duration_slots):
+    """
+    masks: (members, 672) bool. Returns a mask of the slots where each member is
+    free for the next duration_slots slots (the week wraps around).
+    """
+    window = masks.copy()
+    for shift in range(1, duration_slots):
+        window &= np.roll(masks, -shift, axis=1)
+    return window
+
+
+def candidate_slots(start, horizon_days):
+    """(first candidate, rounded up to a slot boundary in UTC, number of candidates) of a search."""
+    start = start.astimezone(timezone.utc).replace(second=0, microsecond=0)
+    start += timedelta(minutes=-start.minute % SLOT_MINUTES)
+    return start, horizon_days * 24 * 60 // SLOT_MINUTES
+
+
+def solve_meeting_slots(
+    start,
+    duration_minutes,
+    masks,
+    known,
+    offsets_minutes,
+    activity=None,
+    horizon_days=14,
+    top_k=3,
+    min_spacing_minutes=120,
+    activity_weight=0.5,
+    unknown_availability=0.5,
+):
+    """
+    Rank the candidate meeting slots over [start, start + horizon_days) by expected attendance.
+
+    - masks: (members, 672) bool availability in each member's local time;
+    - known: (members,) bool, False for members who never set their availability
+      (they count with probability unknown_availability);
+    - offsets_minutes: (members, candidates) UTC offset of each member's timezone at each
+      candidate (see candidate_slots and TimeManagement.utc_offsets_minutes), or (members,)
+      for offsets that do not change over the horizon;
+    - activity: optional (members, 168) activity profile in [0, 1] by UTC hour of the week.
+    A member's attendance probability is availability * (1 - w + w * activity), w = activity_weight.
+    Returns up to top_k (start datetime in UTC, expected attendance, members available),
+    at least min_spacing_minutes apart.
+    """
+    start, n_candidates = candidate_slots(start, horizon_days)
+    start_minutes = int(start.timestamp()) // 60
+    utc_minutes = start_minutes + SLOT_MINUTES * np.arange(n_candidates)
+    utc_of_week = minute_of_week(utc_minutes)
+
+    duration_slots = max(1, -(-duration_minutes // SLOT_MINUTES))
+    window = window_availability(np.asarray(masks, dtype=bool), duration_slots)
+
+    # (members, candidates) : creneau local de chaque invite pour chaque candidat
+    offsets = np.asarray(offsets_minutes, dtype=np.int64)
+    if offsets.ndim == 1:
+        offsets = offsets[:, None]
+    local_slots = ((utc_of_week[None, :] + offsets) % WEEK_MINUTES) // SLOT_MINUTES
+    available = np.take_along_axis(window, local_slots, axis=1)
+    probability = np.where(np.asarray(known, dtype=bool)[:, None], available, unknown_availability)
+
+    if activity is not None:
+        hours = utc_of_week // 60
+        probability = probability * (1 - activity_weight + activity_weight * np.asarray(activity)[:, hours])
+
+    expected = probability.sum(axis=0)
+    available_count = available.sum(axis=0)
+
+    # Choix glouton avec espacement minimum
+    spacing = max(1, min_spacing_minutes // SLOT_MINUTES)
+    scores = expected.astype(float)
+    results = []
+    while len(results) < top_k:
+        best = int(np.argmax(scores))
+        if scores[best] <= 0:
+            break
+        results.append((
+            start + timedelta(minutes=SLOT_MINUTES * best),
+            float(expected[best]),
+            int(available_count[best]),
+        ))
+        scores[max(0, best - spacing + 1):best + spacing] = -np.inf
+    return results
+
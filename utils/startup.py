@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+
+#recap de ce qu'il fait ce code :
+#Mesure la duree de chaque phase du demarrage (imports, config, cogs, connexion, chargements en arriere-plan)
+#et affiche un rapport une fois que tout est pret
+#Ne synchronise l'arbre des commandes (/) avec Discord que si leur definition a change (empreinte dans data/)
+
+COMMAND_FINGERPRINT_FILE = 'data/command_tree.sha256'
+
+
+class StartupTimer:
+    """
+    Startup phases, timed from the creation of the timer (import it first in bot.py).
+
+    - with timer.phase(name): times a synchronous block;
+    - timer.track(name, coro): runs coro as a background task and times it;
+    - timer.mark(name): records the time elapsed since startup (e.g. gateway ready).
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = []  # (name, seconds, background)
+        self.marks = []  # (name, seconds since start)
+        self.tasks = []
+
+    @contextmanager
+    def phase(self, name):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - t, False))
+
+    def track(self, name, coro):
+        async def timed():
+            t = time.perf_counter()
+            try:
+                return await coro
+            finally:
+                self.phases.append((name, time.perf_counter() - t, True))
+        task = asyncio.get_running_loop().create_task(timed(), name=name)
+        self.tasks.append(task)
+        return task
+
+    def mark(self, name):
+        self.marks.append((name, time.perf_counter() - self.start))
+
+    def report(self):
+        lines = ["Startup timing:"]
+        for name, seconds, background in self.phases:
+            lines.append(f"  {name:<32} {seconds * 1000:>8.0f} ms{'  (background)' if background else ''}")
+        for name, seconds in self.marks:
+            lines.append(f"  {name:<32} {seconds * 1000:>8.0f} ms after start")
+        return '\n'.join(lines)
+
+    async def report_when_done(self):
+        """Print the report once the background loads tracked so far have finished."""
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.mark('background loads done')
+        print(self.report())
+
+
+timer = StartupTimer()
+
+
+def command_fingerprint(tree, application_id=None):
+    """sha256 of the global command definitions, as they would be sent to Discord."""
+    payload = sorted((command.to_dict(tree) for command in tree.get_commands()), key=lambda c: c['name'])
+    data = json.dumps({'application_id': application_id, 'commands': payload}, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+async def sync_commands_if_changed(tree, application_id=None, path=COMMAND_FINGERPRINT_FILE):
+    """
+    tree.sync() only when the command definitions differ from the last synced ones.
+    Returns True if a sync was done. Delete the fingerprint file to force a sync.
+    """
+    fingerprint = command_fingerprint(tree, application_id)
+    try:
+        with open(path, 'r') as f:
+            if f.read().strip() == fingerprint:
+                return False
+    except FileNotFoundError:
+        pass
+    await tree.sync()
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(fingerprint)
+    return True
@@ -1,103 +1,169 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional
+import numpy as np
 import pytz
-import re
+from .database import DB_PATH
+from .shared_store import SharedStore
+from .time_parser import parse_duration, parse_time_expression
+
+TIMEZONE_FILE = 'data/user_timezones.json'
+
+
+@lru_cache(maxsize=None)
+def get_timezone(name: str):
+    """Memoized pytz.timezone (raises pytz.UnknownTimeZoneError like it)."""
+    return pytz.timezone(name)
+
+
+def to_utc(dt: datetime) -> datetime:
+    """Aware datetime in UTC. Naive datetimes (reminders saved before timezones were stored) are server local time."""
+    return dt.astimezone(pytz.UTC)
+
+
+def zone_offset_minutes(tz, at: datetime) -> int:
+    """UTC offset of tz at the aware instant at, in minutes (pytz resolves it from UTC, unambiguously)."""
+    return int(at.astimezone(tz).utcoffset().total_seconds() // 60)
+
+
+def zone_offsets_minutes(tz, start: datetime, count: int, step_minutes: int) -> np.ndarray:
+    """
+    UTC offsets of tz at start + i * step_minutes for i < count. Evaluated once per day;
+    a day whose two ends differ is bisected to find the step where the offset changes.
+    """
+    step = timedelta(minutes=step_minutes)
+    offset_at = lambda i: zone_offset_minutes(tz, start + i * step)
+    per_day = max(1, 24 * 60 // step_minutes)
+    bounds = list(range(0, count, per_day))
+    if bounds[-1] != count - 1:
+        bounds.append(count - 1)
+    values = [offset_at(i) for i in bounds]
+    offsets = np.full(count, values[0], dtype=np.int64)
+    for (low, before), (high, after) in zip(zip(bounds, values), zip(bounds[1:], values[1:])):
+        offsets[low:high + 1] = before
+        if before != after:
+            # Premier pas a la nouvelle heure (au plus un changement d'heure par jour)
+            first, last = low + 1, high
+            while first < last:
+                middle = (first + last) // 2
+                if offset_at(middle) == before:
+                    first = middle + 1
+                else:
+                    last = middle
+            offsets[first:high + 1] = after
+    return offsets
+
 
 class TimeManagement:
-    def __init__(self):
-        self.timezones = {}
+    def __init__(self, data_file: Optional[str] = TIMEZONE_FILE, db_path: str = DB_PATH):
+        # Fuseaux en base (shared_data), partages par les processus du cluster ; data_file est l'ancien
+        # fichier JSON, importe une fois. data_file=None : en memoire seulement (tests, benchmarks)
+        self.data_file = data_file
+        self.store = SharedStore('timezones', db_path) if data_file else None
+        self.timezones = (
+            {int(user_id): name for user_id, name in self.store.load(data_file).items()}
+            if self.store else {}
+        )
 
     def set_timezone(self, user_id: int, timezone: str) -> tuple[bool, str]:
         """Set user's timezone."""
         try:
-            pytz.timezone(timezone)
+            get_timezone(timezone)
             self.timezones[user_id] = timezone
+            if self.store:
+                self.store.set(user_id, timezone)
             return True, f"Timezone set to {timezone}"
         except pytz.exceptions.UnknownTimeZoneError:
             return False, "Invalid timezone. Use format like 'America/New_York'"
 
+    def follow(self):
+        """Pick up the timezones set through the other processes (needs a running event loop)."""
+        if self.store:
+            self.store.follow(self._changed)
+
+    def _changed(self, user_id, timezone):
+        if timezone is None:
+            self.timezones.pop(int(user_id), None)
+        else:
+            self.timezones[int(user_id)] = timezone
+
+    def get_user_timezone(self, user_id: Optional[int]):
+        """Cached tz object of a user (UTC if none is set)."""
+        return get_timezone(self.timezones.get(user_id, 'UTC'))
+
     def parse_time(self, time_input: str, user_id: Optional[int] = None) -> tuple[Optional[datetime], str]:
-        """Parse time into datetime object."""
+        """Parse a time expression (see utils.time_parser) in the user's timezone into a UTC datetime."""
         try:
-            user_tz = pytz.timezone(self.timezones.get(user_id, 'UTC'))
-            time_input = time_input.strip().lower()
-            current_time = datetime.now(user_tz)
-
-            if time_input.startswith('in '):
-                time_parts = time_input[3:].split()
-                if len(time_parts) < 2:
-                    return None, "Invalid format. Use 'in X hours/minutes'"
-
-                try:
-                    amount = int(time_parts[0])
-                    if amount <= 0:
-                        return None, "Time amount must be positive"
-                except ValueError:
-                    return None, "Invalid number format for time amount"
-
-                unit = time_parts[1].lower()
-                if 'hour' in unit:
-                    return current_time + timedelta(hours=amount), "Success"
-                elif 'minute' in unit:
-                    return current_time + timedelta(minutes=amount), "Success"
-                return None, "Invalid time unit. Use 'hours' or 'minutes'"
-            else:
-                try:
-                    specific_time = datetime.strptime(time_input, "%Y-%m-%d %H:%M")
-                    if specific_time < current_time:
-                        return None, "Time cannot be in the past"
-                    specific_time = user_tz.localize(specific_time)
-                    return specific_time.astimezone(pytz.UTC), "Success"
-                except ValueError:
-                    return None, "Invalid format. Use YYYY-MM-DD HH:MM"
-
+            when, _ = parse_time_expression(time_input, self.get_user_timezone(user_id))
+            if when < datetime.now(pytz.UTC):
+                return None, "Time cannot be in the past"
+            return when, "Success"
         except pytz.UnknownTimeZoneError:
             return None, "Error: Invalid timezone specified for user."
-        except Exception as e:
-            return None, f"Error: {str(e)}"
+        except ValueError as e:
+            return None, f"Invalid format: {e}"
+
+    def utc_offset_minutes(self, user_id: int, at: Optional[datetime] = None) -> int:
+        """UTC offset of the user's timezone at the instant at (now by default), in minutes."""
+        at = to_utc(at) if at else datetime.now(timezone.utc)
+        return zone_offset_minutes(self.get_user_timezone(user_id), at)
+
+    def utc_offsets_minutes(self, user_ids, start: datetime, count: int, step_minutes: int) -> np.ndarray:
+        """
+        (users, count) UTC offsets in minutes at start, start + step, ... for each user, so that
+        a daylight saving change inside the range shifts the following steps only.
+        Computed once per distinct timezone.
+        """
+        start = to_utc(start)
+        by_zone = {}
+        offsets = np.empty((len(user_ids), count), dtype=np.int64)
+        for row, user_id in enumerate(user_ids):
+            name = self.timezones.get(user_id, 'UTC')
+            if name not in by_zone:
+                by_zone[name] = zone_offsets_minutes(get_timezone(name), start, count, step_minutes)
+            offsets[row] = by_zone[name]
+        return offsets
 
     def convert_to_user_timezone(self, utc_time: datetime, user_id: int) -> tuple[datetime, str]:
         """Convert UTC time to user timezone."""
         try:
-            user_tz = pytz.timezone(self.timezones.get(user_id, 'UTC'))
-            return utc_time.astimezone(user_tz), "Success"
+            return utc_time.astimezone(self.get_user_timezone(user_id)), "Success"
         except pytz.UnknownTimeZoneError:
             return utc_time, "Conversion failed: Invalid timezone for user."
         except Exception as e:
             return utc_time, f"Conversion failed: {str(e)}"
-    def parse_relative_time(time_str):
-        """Parse relative time strings like '30 minutes', '2 hours', '1 day', etc."""
-        time_str = time_str.lower()
-        units = {
-            'minute': 1,
-            'minutes': 1,
-            'min': 1,
-            'mins': 1,
-            'm': 1,
-            'hour': 60,
-            'hours': 60,
-            'hr': 60,
-            'hrs': 60,
-            'h': 60,
-            'day': 1440,
-            'days': 1440,
-            'd': 1440,
-            'week': 10080,
-            'weeks': 10080,
-            'w': 10080
-        }
-    
-        pattern = r'(\d+)\s*([a-zA-Z]+)'
-        match = re.match(pattern, time_str)
-    
-        if not match:
-            raise ValueError("Format de temps invalide")
-        
-        amount = int(match.group(1))
-        unit = match.group(2)
-    
-        if unit not in units:
-            raise ValueError("Unité de temps non reconnue")
-        
-        return timedelta(minutes=amount * units[unit])
+    def bulk_localize(self, utc_time: datetime, user_ids) -> tuple[np.ndarray, list[str], np.ndarray]:
+        """
+        Local wall-clock time of one UTC instant for many users at once.
+        The UTC offset is computed once per distinct timezone, then applied to every
+        user in a single array operation. Returns (local times as datetime64[m] per user,
+        distinct timezone names, index of each user's timezone in that list).
+        """
+        codes = {}
+        inverse = np.fromiter(
+            (codes.setdefault(self.timezones.get(user_id, 'UTC'), len(codes)) for user_id in user_ids),
+            dtype=np.intp, count=len(user_ids)
+        )
+        zones = list(codes)
+        utc_time = to_utc(utc_time)
+        offsets = np.array(
+            [int(utc_time.astimezone(get_timezone(name)).utcoffset().total_seconds() // 60) for name in zones],
+            dtype='timedelta64[m]'
+        )
+        base = np.datetime64(utc_time.replace(tzinfo=None), 'm')
+        return base + offsets[inverse], zones, inverse
 
+    def local_time_groups(self, utc_time: datetime, user_ids, fmt: str = "%H:%M") -> list[tuple[str, str, int]]:
+        """(timezone, formatted local time, number of users) for each timezone among user_ids."""
+        local_times, zones, inverse = self.bulk_localize(utc_time, user_ids)
+        counts = np.bincount(inverse, minlength=len(zones))
+        first = np.zeros(len(zones), dtype=np.intp)
+        first[inverse[::-1]] = np.arange(len(inverse))[::-1]
+        return [
+            (zone, local_times[first[i]].astype(datetime).strftime(fmt), int(counts[i]))
+            for i, zone in enumerate(zones)
+        ]
+
+    def parse_relative_time(time_str):
+        """Parse relative time strings like '30 minutes', '2 hours', '1h30m', '1 day', etc."""
+        return parse_duration(time_str)
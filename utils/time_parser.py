@@ -0,0 +1,234 @@
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+import pytz
+
+#recap de ce qu'il fait ce code :
+#Analyse une expression de temps ("1h30m", "in 2 hours", "2025-03-01 14:00", "next friday 9am", "demain 14h")
+#Les regex sont compilees une seule fois, et l'analyse syntaxique de chaque texte est memorisee (LRU borne)
+#Seule la resolution (maintenant + duree, fuseau de l'utilisateur) est refaite a chaque appel, resultat en UTC
+#"18h" seul est une heure de la journee (18:00), comme dans "demain 18h" ; une duree s'ecrit "dans 18h" ou "18 heures"
+
+UNIT_SECONDS = {
+    's': 1, 'sec': 1, 'secs': 1, 'second': 1, 'seconds': 1, 'seconde': 1, 'secondes': 1,
+    'm': 60, 'min': 60, 'mins': 60, 'minute': 60, 'minutes': 60,
+    'h': 3600, 'hr': 3600, 'hrs': 3600, 'hour': 3600, 'hours': 3600, 'heure': 3600, 'heures': 3600,
+    'd': 86400, 'day': 86400, 'days': 86400, 'j': 86400, 'jour': 86400, 'jours': 86400,
+    'w': 604800, 'week': 604800, 'weeks': 604800, 'semaine': 604800, 'semaines': 604800,
+}
+
+WEEKDAYS = {
+    'monday': 0, 'mon': 0, 'lundi': 0,
+    'tuesday': 1, 'tue': 1, 'mardi': 1,
+    'wednesday': 2, 'wed': 2, 'mercredi': 2,
+    'thursday': 3, 'thu': 3, 'jeudi': 3,
+    'friday': 4, 'fri': 4, 'vendredi': 4,
+    'saturday': 5, 'sat': 5, 'samedi': 5,
+    'sunday': 6, 'sun': 6, 'dimanche': 6,
+}
+
+DAY_OFFSETS = {'today': 0, "aujourd'hui": 0, 'tomorrow': 1, 'demain': 1}
+
+# Au-dela, timedelta et datetime debordent (OverflowError) : une duree plus longue est refusee comme invalide
+MAX_DURATION_SECONDS = 100 * 365 * 86400
+
+_alternation = lambda words: '|'.join(sorted(map(re.escape, words), key=len, reverse=True))
+
+_TERM = rf'(\d+(?:[.,]\d+)?)\s*({_alternation(UNIT_SECONDS)})(?![a-zé])'
+_DURATION = rf'(?:{_TERM})(?:\s*(?:,|and|et)?\s*(?:{_TERM}))*'
+_TIME = r'(\d{1,2})(?:(:|h)(\d{2})?)?\s*(am|pm)?'
+_AT = r'(?:\s+(?:at|a|à))?\s+'
+
+TERM_RE = re.compile(_TERM)
+BARE_HOUR_RE = re.compile(r'(\d{1,2})h')
+PATTERNS = [
+    ('duration', re.compile(rf'(?:(?:in|dans)\s+)?({_DURATION})')),
+    ('absolute', re.compile(rf'(\d{{4}})-(\d{{1,2}})-(\d{{1,2}})(?:(?:[ t]|{_AT}){_TIME})?(?::\d{{2}}(?:\.\d+)?)?')),
+    ('weekday', re.compile(
+        rf'(?:(next|prochain)\s+)?({_alternation(WEEKDAYS)})(\s+prochain)?(?:{_AT}{_TIME})?'
+    )),
+    ('day_offset', re.compile(rf"({_alternation(DAY_OFFSETS)})(?:{_AT}{_TIME})?")),
+    ('time', re.compile(rf'(?:(?:at|à)\s+)?{_TIME}')),
+]
+
+
+def _normalize(text):
+    return ' '.join(text.strip().lower().split())
+
+
+def _duration_seconds(match):
+    seconds = sum(
+        float(amount.replace(',', '.')) * UNIT_SECONDS[unit]
+        for amount, unit in TERM_RE.findall(match.group(1))
+    )
+    if seconds <= 0:
+        raise ValueError("La durée doit être positive")
+    if seconds > MAX_DURATION_SECONDS:
+        raise ValueError("La durée ne peut pas dépasser 100 ans")
+    return seconds
+
+
+def _clock(hour, separator, minute, ampm):
+    """Validate a time of day. A bare number ('14') is only a time with ':', 'h' or am/pm."""
+    if hour is None:
+        return None
+    if not (separator or ampm):
+        raise ValueError("Heure invalide")
+    hour, minute = int(hour), int(minute or 0)
+    if ampm:
+        if not 1 <= hour <= 12:
+            raise ValueError("Heure invalide")
+        hour = hour % 12 + (12 if ampm == 'pm' else 0)
+    if hour > 23 or minute > 59:
+        raise ValueError("Heure invalide")
+    return hour, minute
+
+
+@lru_cache(maxsize=4096)
+def compile_expression(text):
+    """
+    Parse a time expression into a plan, independent of the current time and timezone:
+    ('duration', seconds), ('absolute', (y, m, d, hour, minute)), ('weekday', (weekday, next, clock)),
+    ('day_offset', (days, clock)) or ('time', clock). Raises ValueError if nothing matches.
+    A bare hour ('18h') is the next 18:00; '48h', 'dans 18h' and '18 heures' are durations.
+    """
+    text = _normalize(text)
+    bare_hour = BARE_HOUR_RE.fullmatch(text)
+    if bare_hour and int(bare_hour.group(1)) <= 23:
+        return 'time', _clock(bare_hour.group(1), 'h', None, None)
+    for kind, pattern in PATTERNS:
+        match = pattern.fullmatch(text)
+        if not match:
+            continue
+        groups = match.groups()
+        if kind == 'duration':
+            return kind, _duration_seconds(match)
+        if kind == 'absolute':
+            year, month, day = (int(g) for g in groups[:3])
+            clock = (_clock(*groups[3:7]) if groups[3] else None) or (0, 0)
+            datetime(year, month, day)  # ValueError si la date n'existe pas
+            return kind, (year, month, day) + clock
+        if kind == 'weekday':
+            return kind, (WEEKDAYS[groups[1]], bool(groups[0] or groups[2]), _clock(*groups[3:7]))
+        if kind == 'day_offset':
+            return kind, (DAY_OFFSETS[groups[0]], _clock(*groups[1:5]))
+        return kind, _clock(*groups)
+    raise ValueError("Format de temps invalide")
+
+
+@lru_cache(maxsize=4096)
+def parse_duration(text):
+    """
+    '1h30m', '2 hours, 15 min', '90s' -> timedelta. Raises ValueError otherwise.
+    Only a duration is expected here, so a bare '18h' is 18 hours.
+    """
+    match = PATTERNS[0][1].fullmatch(_normalize(text))
+    if not match:
+        raise ValueError("Format de durée invalide")
+    return timedelta(seconds=_duration_seconds(match))
+
+
+def parse_time_expression(text, tz=pytz.UTC, now=None):
+    """
+    Resolve a time expression to (aware datetime in UTC, kind).
+    Durations ('15m', 'in 2 hours') are counted from now; clock times, dates and
+    weekday names are read in tz. A bare clock time already past today means tomorrow.
+    Raises ValueError for invalid expressions, including dates out of datetime's range.
+    """
+    kind, plan = compile_expression(text)
+    try:
+        return _resolve(kind, plan, tz, now)
+    except OverflowError:
+        # ex. '0001-01-01' dans un fuseau en avance sur UTC : avant l'an 1 une fois en UTC
+        raise ValueError("Date hors limites") from None
+
+
+def _resolve(kind, plan, tz, now):
+    now = (now or datetime.now(pytz.UTC)).astimezone(pytz.UTC)
+    if kind == 'duration':
+        return now + timedelta(seconds=plan), kind
+
+    local_now = now.astimezone(tz)
+    today = local_now.date()
+    if kind == 'absolute':
+        naive = datetime(*plan)
+    elif kind == 'weekday':
+        weekday, next_week, clock = plan
+        days = (weekday - today.weekday()) % 7
+        hour, minute = clock or (0, 0)
+        if next_week and days == 0:
+            days = 7
+        naive = datetime.combine(today + timedelta(days=days), datetime.min.time()).replace(hour=hour, minute=minute)
+        if not next_week and days == 0 and clock and naive <= local_now.replace(tzinfo=None):
+            naive += timedelta(days=7)
+    elif kind == 'day_offset':
+        days, clock = plan
+        hour, minute = clock or (0, 0)
+        naive = datetime.combine(today + timedelta(days=days), datetime.min.time()).replace(hour=hour, minute=minute)
+    else:
+        hour, minute = plan
+        naive = local_now.replace(tzinfo=None, hour=hour, minute=minute, second=0, microsecond=0)
+        if naive <= local_now.replace(tzinfo=None):
+            naive += timedelta(days=1)
+    return tz.localize(naive).astimezone(pytz.UTC), kind
+
+
+# Corpus de depart pour le fuzzing : (expression, type attendu ou None si invalide)
+CORPUS = [
+    ('15m', 'duration'), ('1h30m', 'duration'), ('1h 30m', 'duration'), ('2 hours, 15 min', 'duration'),
+    ('in 2 hours', 'duration'), ('in 1 day and 3h', 'duration'), ('dans 3 jours', 'duration'),
+    ('90s', 'duration'), ('1.5h', 'duration'), ('2w', 'duration'),
+    ('2025-03-01 14:00', 'absolute'), ('2025-03-01', 'absolute'), ('2025-03-01T14:00:00', 'absolute'),
+    ('2025-03-01 at 2pm', 'absolute'),
+    ('monday 14:00', 'weekday'), ('next friday 9am', 'weekday'), ('lundi 14h', 'weekday'),
+    ('mardi prochain à 18h30', 'weekday'), ('sunday', 'weekday'),
+    ('tomorrow 10:00', 'day_offset'), ('demain 14h', 'day_offset'), ('today at 6pm', 'day_offset'),
+    ('14:30', 'time'), ('at 9am', 'time'), ('18h30', 'time'), ('18h', 'time'),
+    ('at 9h', 'time'), ('dans 18h', 'duration'), ('18 heures', 'duration'), ('in 2h', 'duration'), ('48h', 'duration'),
+    ('', None), ('hello', None), ('13', None), ('25:00', None), ('2025-02-30', None), ('0m', None),
+    ('in', None), ('mon 99:00', None), ('1x', None), ('13pm', None), ('m', None), ('2025-13-01', None),
+]
+
+
+if __name__ == "__main__":
+    import random
+    import string
+    import time
+
+    # Corpus : type attendu
+    for expression, expected in CORPUS:
+        try:
+            kind = compile_expression(expression)[0]
+        except ValueError:
+            kind = None
+        assert kind == expected, f"{expression!r}: {kind} != {expected}"
+        if kind:
+            parse_time_expression(expression, pytz.timezone('Europe/Paris'))
+    print(f"Corpus: {len(CORPUS)} expressions OK")
+
+    # Fuzzing : mutations aleatoires du corpus, seule ValueError est acceptee
+    random.seed(0)
+    alphabet = string.ascii_lowercase + string.digits + " :-,.hàé"
+    for _ in range(50_000):
+        text = list(random.choice(CORPUS)[0])
+        for _ in range(random.randint(1, 4)):
+            position = random.randint(0, len(text))
+            if random.random() < 0.5 and text:
+                del text[min(position, len(text) - 1)]
+            else:
+                text.insert(position, random.choice(alphabet))
+        try:
+            parse_time_expression(''.join(text), pytz.timezone('America/New_York'))
+        except ValueError:
+            pass
+    print("Fuzz: 50000 mutations OK")
+
+    # Microbenchmark
+    expressions = [f"{random.randint(1, 9)}h{random.randint(0, 59)}m" for _ in range(100_000)]
+    for label, batch in (("distinct", expressions), ("repeated", [e for e, k in CORPUS if k] * 4000)):
+        compile_expression.cache_clear()
+        start = time.perf_counter()
+        for expression in batch[:100_000]:
+            parse_time_expression(expression)
+        elapsed = time.perf_counter() - start
+        print(f"{label}: {min(len(batch), 100_000) / elapsed:,.0f} expressions/s")
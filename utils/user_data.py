@@ -1,19 +1,240 @@
 import json
+from collections import defaultdict
 from pathlib import Path
 
+from .database import DB_PATH
+from .persistence import persistence
+from .shared_store import SharedStore
+
+#recap de ce qu'il fait ce code :
+#Annuaire des emails Google des membres, charge une seule fois en memoire
+#En base (magasin 'emails' de utils/shared_store.py) : une ligne par membre, partagee par les processus du cluster
+#Index inverse role -> utilisateurs : les emails d'un role sont une union d'ensembles, sans relire la base
+#Les roles sont gardes par serveur : un changement de roles dans un serveur ne touche pas les autres
+#L'ancien fichier (data/user_emails.json et son journal) est importe une fois
+
 USER_DATA_PATH = Path('./data/user_emails.json')
-        
-def save_user_email(user_id: int, email: str, roles: list):
-    data = get_user_emails()
-    data[str(user_id)] = {
-        "email": email,
-        "roles": [str(role_id) for role_id in roles]
-    }
-    with open(USER_DATA_PATH, 'w') as f:
-        json.dump(data, f)
+UNATTRIBUTED = ''  # roles enregistres avant le decoupage par serveur
+
+
+def _role_lists(roles):
+    """Stored roles as {guild_id: [role_id]}; a bare list (old format) has no known guild."""
+    if isinstance(roles, dict):
+        return {str(guild_id): [str(r) for r in role_ids] for guild_id, role_ids in roles.items()}
+    return {UNATTRIBUTED: [str(r) for r in roles]} if roles else {}
+
+
+class EmailDirectory:
+    """
+    In-memory copy of the registered emails
+    ({user_id: {"email": ..., "roles": {guild_id: [role_id, ...]}}}), one row per user
+    in the shared 'emails' store.
+
+    Roles are kept per guild, so that a role change in one guild leaves the others alone.
+    Role lists of the old format (one list for all guilds) are kept under UNATTRIBUTED
+    until the member is seen in the guild they belong to.
+    """
+
+    def __init__(self, legacy_path=USER_DATA_PATH, db_path=DB_PATH):
+        self.path = Path(legacy_path)
+        self.journal_path = self.path.with_suffix('.journal.jsonl')
+        self.store = SharedStore('emails', db_path)
+        self.users = {}
+        self.role_members = defaultdict(set)  # role_id -> user_ids
+        self.load()
+
+    def load(self):
+        self.users = self.store.load(self.path, self.journal_path, convert=self._read_legacy)
+        for data in self.users.values():
+            data['roles'] = _role_lists(data.get('roles'))
+        self.role_members = defaultdict(set)
+        for user_id in self.users:
+            for role_id in self._all_roles(user_id):
+                self.role_members[role_id].add(user_id)
+
+    def _read_legacy(self):
+        """The old JSON file, with the changes of its journal replayed."""
+        self.users = persistence.load_json(self.path)
+        for data in self.users.values():
+            data['roles'] = _role_lists(data.get('roles'))
+        if self.journal_path.exists():
+            with open(self.journal_path, 'r') as f:
+                for line in f:
+                    try:
+                        change = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # derniere ligne tronquee par un arret brutal
+                    self._apply(change)
+        return self.users
+
+    def follow(self):
+        """Pick up the registrations and role changes made through the other processes."""
+        self.store.follow(self._changed)
+
+    def _changed(self, user_id, data):
+        old_roles = self._all_roles(user_id)
+        if data is None:
+            self.users.pop(user_id, None)
+        else:
+            data['roles'] = _role_lists(data.get('roles'))
+            self.users[user_id] = data
+        self._reindex(user_id, old_roles)
+
+    def _reindex(self, user_id, old_roles):
+        new_roles = self._all_roles(user_id)
+        for role_id in old_roles - new_roles:
+            self.role_members[role_id].discard(user_id)
+        for role_id in new_roles - old_roles:
+            self.role_members[role_id].add(user_id)
+
+    def _all_roles(self, user_id):
+        data = self.users.get(user_id)
+        return {role_id for role_ids in data['roles'].values() for role_id in role_ids} if data else set()
+
+    def _apply(self, change):
+        """Apply one change (or old journal line) to self.users; the role index is updated by the caller."""
+        user_id = str(change['user_id'])
+        guild_id = str(change.get('guild_id', UNATTRIBUTED))
+        roles = [str(r) for r in change.get('roles', [])]
+        if 'email' in change:
+            previous = self.users.get(user_id, {}).get('roles', {})
+            self.users[user_id] = {'email': change['email'], 'roles': dict(previous)}
+        elif user_id not in self.users:
+            return
+        role_lists = self.users[user_id]['roles']
+        # Les roles de ce serveur ne sont plus "non attribues"
+        dropped = set(change.get('guild_role_ids', ()))
+        if dropped and UNATTRIBUTED in role_lists:
+            role_lists[UNATTRIBUTED] = [r for r in role_lists[UNATTRIBUTED] if r not in dropped]
+            if not role_lists[UNATTRIBUTED]:
+                del role_lists[UNATTRIBUTED]
+        if roles:
+            role_lists[guild_id] = roles
+        else:
+            role_lists.pop(guild_id, None)
+
+    def _change(self, change):
+        """Apply a change, keep the role index in sync and save the user's row."""
+        user_id = str(change['user_id'])
+        old_roles = self._all_roles(user_id)
+        self._apply(change)
+        self._reindex(user_id, old_roles)
+        if user_id in self.users:
+            self.store.set(user_id, self.users[user_id])
+
+    def set(self, user_id, email, roles, guild_id=None, guild_role_ids=()):
+        """Register the email of a user, with their roles in guild_id (other guilds are kept)."""
+        self._change({
+            'user_id': str(user_id), 'email': email,
+            'guild_id': str(guild_id) if guild_id is not None else UNATTRIBUTED,
+            'roles': [str(role_id) for role_id in roles],
+            'guild_role_ids': [str(role_id) for role_id in guild_role_ids],
+        })
+
+    def update_roles(self, user_id, guild_id, roles, guild_role_ids=()):
+        """
+        Replace the roles of a registered member in one guild (e.g. from on_member_update).
+        guild_role_ids, the ids of all the roles of that guild, lets old-format entries
+        forget the roles now tracked under the guild. Returns whether anything changed.
+        """
+        user_id = str(user_id)
+        data = self.users.get(user_id)
+        if data is None:
+            return False
+        roles = [str(role_id) for role_id in roles]
+        guild_role_ids = {str(role_id) for role_id in guild_role_ids}
+        unattributed = set(data['roles'].get(UNATTRIBUTED, ()))
+        if set(data['roles'].get(str(guild_id), ())) == set(roles) and not unattributed & guild_role_ids:
+            return False
+        self._change({'user_id': user_id, 'guild_id': str(guild_id), 'roles': roles,
+                      'guild_role_ids': sorted(unattributed & guild_role_ids)})
+        return True
+
+    def get(self, user_id):
+        return self.users.get(str(user_id))
+
+    def email(self, user_id):
+        data = self.users.get(str(user_id))
+        return data['email'] if data else None
+
+    def __contains__(self, user_id):
+        return str(user_id) in self.users
+
+    def all_emails(self):
+        return {data['email'] for data in self.users.values()}
+
+    def role_user_ids(self, role_id):
+        return self.role_members.get(str(role_id), set())
+
+    def emails_for_role(self, role_id):
+        return {self.users[user_id]['email'] for user_id in self.role_user_ids(role_id)}
+
+    def emails_for_users(self, user_ids):
+        """(emails, ids of the users without a registered email)"""
+        emails, missing = set(), []
+        for user_id in user_ids:
+            email = self.email(user_id)
+            if email:
+                emails.add(email)
+            else:
+                missing.append(user_id)
+        return emails, missing
+
+
+_directory = None
+
+
+def get_directory():
+    """The shared EmailDirectory, loaded on first use."""
+    global _directory
+    if _directory is None:
+        _directory = EmailDirectory()
+    return _directory
+
+
+def save_user_email(user_id: int, email: str, roles: list, guild_id=None):
+    get_directory().set(user_id, email, roles, guild_id)
 
 def get_user_emails():
-    if not USER_DATA_PATH.exists():
-        return {}
-    with open(USER_DATA_PATH, 'r') as f:
-        return json.load(f)
\ No newline at end of file
+    """All registered users ({user_id: {"email", "roles": {guild_id: [...]}}}), from memory. Do not modify."""
+    return get_directory().users
+
+
+if __name__ == "__main__":
+    # Benchmark : emails d'un role de 2000 membres parmi 20 000 inscrits
+    import tempfile
+    import time
+    from .database import init_db
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path, db_path = Path(tmp) / 'user_emails.json', str(Path(tmp) / 'dataset.db')
+        init_db(db_path)
+        with open(path, 'w') as f:
+            json.dump({
+                str(i): {'email': f"user{i}@example.com", 'roles': [str(i % 10), '100' if i < 2000 else '101']}
+                for i in range(20_000)
+            }, f)
+
+        t = time.perf_counter()
+        for _ in range(20):
+            with open(path) as f:
+                data = json.load(f)
+            emails = [d['email'] for d in data.values() if '100' in d['roles']]
+        print(f"re-read file + scan: {(time.perf_counter() - t) / 20 * 1000:.2f} ms per role")
+
+        directory = EmailDirectory(path, db_path)
+        t = time.perf_counter()
+        for _ in range(20):
+            emails = directory.emails_for_role(100)
+        print(f"reverse index: {(time.perf_counter() - t) / 20 * 1000:.3f} ms per role ({len(emails)} emails)")
+
+        directory.set(5, 'new@example.com', ['100'], guild_id=1)
+        directory.update_roles(6, 1, ['101'], guild_role_ids=['100', '101'])
+        directory.update_roles(1999, 1, ['7'], guild_role_ids=['7', '100', '101'])
+        persistence.flush()
+        assert 'new@example.com' in directory.emails_for_role(100)
+        assert 'user1999@example.com' not in directory.emails_for_role(100)
+        reloaded = EmailDirectory(path, db_path)
+        assert reloaded.users == directory.users and not path.exists()
+        assert reloaded.emails_for_role(100) == directory.emails_for_role(100)
+        print("Import of the old file, per-user rows and reload OK")
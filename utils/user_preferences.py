@@ -1,22 +1,14 @@
-import json
-import os
+from .persistence import persistence
 
 def load_data_pref(data_file):
-    if not os.path.exists(data_file) or os.path.getsize(data_file) == 0:
-        with open(data_file, 'w') as f:
-            json.dump({}, f)
-    try:
-        with open(data_file, 'r') as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        # Reset the file to an empty dictionary if corrupted
-        with open(data_file, 'w') as f:
-            json.dump({}, f)
-        return {}
+    """
+    Load a JSON preferences file ({} if it does not exist yet).
+    A corrupt file is kept aside as <data_file>.corrupt-<date> rather than silently reset.
+    """
+    return persistence.load_json(data_file)
 
 def save_data_pref(data_file, data):
     """
-    Save user availability to the JSON file.
+    Save user availability to the JSON file (written atomically by the persistence thread).
     """
-    with open(data_file, 'w') as f:
-        json.dump(data, f, indent=4)
\ No newline at end of file
+    persistence.save_json(data_file, data)